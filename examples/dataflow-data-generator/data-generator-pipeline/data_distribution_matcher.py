@@ -26,11 +26,16 @@ import logging
 import apache_beam as beam
 from apache_beam.options.pipeline_options import PipelineOptions
 from data_generator.PerformantDataGenerator import DataGenerator, FakeRowGen, \
-    parse_data_generator_args, validate_data_args, fetch_schema
+    FakeRecordBatchGen, parse_data_generator_args, validate_data_args, \
+    fetch_schema
 import fastavro
 
 from data_generator.CsvUtil import dict_to_csv
-from data_generator.AvroUtil import fix_record_for_avro
+from data_generator.AvroUtil import WriteArrowToAvro
+from data_generator.enforce_primary_keys import EnforcePrimaryKeys, \
+    EnforcePrimaryKeysOnBatches
+from data_generator.ParquetUtil import get_pyarrow_translated_schema, \
+    WriteArrowToParquet
 
 
 def run(argv=None):
@@ -58,56 +63,97 @@ def run(argv=None):
                              max_float=data_args.max_float,
                              float_precision=data_args.float_precision,
                              write_disp=data_args.write_disp,
-                             key_skew=data_args.key_skew)
+                             key_skew=data_args.key_skew,
+                             seed=data_args.seed)
 
     # Initiate the pipeline using the pipeline arguments passed in from the
     # command line.  This includes information including where Dataflow should
     # store temp files, and what the project id is and what runner to use.
     p = beam.Pipeline(options=pipeline_options)
-    rows = (
-        p
-        | 'Read Histogram Table.' >> beam.io.Read(
-            beam.io.BigQuerySource(data_gen.hist_bq_table))
-        | 'Generate Data' >> beam.ParDo(FakeRowGen(data_gen))
-        | 'Parse Json Strings' >> beam.FlatMap(lambda row: [json.loads(row)]))
-
-    if data_args.primary_key_cols:
-        rows |= EnforcePrimaryKeys(data_args.primary_key_col)
-
-    if data_args.csv_schema_order:
-        (rows
-         | 'Order fields for CSV writing.' >> beam.FlatMap(
-             lambda d: [dict_to_csv(d, data_args.csv_schema_order.split(','))])
-         | 'Write to GCS' >> beam.io.textio.WriteToText(
-             file_path_prefix=data_args.output_prefix, file_name_suffix='.csv')
-         )
-
-    if data_args.avro_schema_file:
-        fastavro_avsc = fastavro.schema.load_schema(data_args.avro_schema_file)
-
-        (rows
-         # Need to convert time stamps from strings to timestamp-micros
-         | 'Fix date and time Types for Avro.' >>
-         beam.FlatMap(lambda row: fix_record_for_avro(row, fastavro_avsc))
-         | 'Write to Avro.' >> beam.io.avroio.WriteToAvro(
-             file_path_prefix=data_args.output_prefix,
-             codec='null',
-             file_name_suffix='.avro',
-             use_fastavro=True,
-             schema=fastavro_avsc))
-
-    if data_args.output_bq_table:
-        (rows
-         | 'Write to BigQuery.' >> beam.io.gcp.bigquery.WriteToBigQuery(
-             # The table name is a required argument for the BigQuery sink.
-             # In this case we use the value passed in from the command line.
-             data_args.output_bq_table,
-             schema=None if schema_inferred else data_gen.get_bq_schema(),
-             # Creates the table in BigQuery if it does not yet exist.
-             create_disposition=beam.io.BigQueryDisposition.CREATE_IF_NEEDED,
-             write_disposition=data_gen.write_disp,
-             # Use the max recommended batch size.
-             batch_size=500))
+    # Identifies the generated table in the seed of each batch. The csv,
+    # BigQuery, avro and parquet outputs share it so with a --seed they all
+    # get the same rows.
+    seed_key = data_args.output_bq_table or data_args.output_prefix
+    histogram = (p
+                 | 'Read Histogram Table.' >> beam.io.Read(
+                     beam.io.BigQuerySource(data_gen.hist_bq_table)))
+
+    write_rows = data_args.csv_schema_order or data_args.output_bq_table
+    write_batches = data_args.avro_schema_file or data_args.write_to_parquet
+
+    if write_batches:
+        # Avro and parquet files are written straight from Arrow batches
+        # without round tripping each record through json.
+        pa_schema = get_pyarrow_translated_schema(data_gen.schema)
+        batches = (histogram
+                   | 'Generate Record Batches' >> beam.ParDo(
+                       FakeRecordBatchGen(data_gen,
+                                          pa_schema,
+                                          batch_size=data_args.batch_size,
+                                          seed_key=seed_key)))
+
+        if data_args.primary_key_cols:
+            batches |= EnforcePrimaryKeysOnBatches(
+                data_args.primary_key_cols,
+                pa_schema,
+                batch_size=data_args.batch_size)
+
+        if data_args.avro_schema_file:
+            fastavro_avsc = fastavro.schema.load_schema(
+                data_args.avro_schema_file)
+            (batches
+             | 'Write to Avro.' >> WriteArrowToAvro(
+                 file_path_prefix=data_args.output_prefix,
+                 schema=fastavro_avsc))
+
+        if data_args.write_to_parquet:
+            (batches
+             | 'Write to Parquet.' >> WriteArrowToParquet(
+                 file_path_prefix=data_args.output_prefix,
+                 schema=pa_schema,
+                 row_group_size=data_args.parquet_row_group_size))
+
+    if write_rows:
+        if write_batches:
+            # The rows are taken from the same batches so that every output
+            # holds the same data, generated and deduplicated once.
+            rows = (batches
+                    | 'Convert Record Batches to Rows' >> beam.FlatMap(
+                        FakeRecordBatchGen.record_batch_to_rows))
+        else:
+            rows = (histogram
+                    | 'Generate Data' >> beam.ParDo(
+                        FakeRowGen(data_gen,
+                                   batch_size=data_args.batch_size,
+                                   seed_key=seed_key))
+                    | 'Parse Json Strings' >> beam.FlatMap(
+                        lambda row: [json.loads(row)]))
+
+            if data_args.primary_key_cols:
+                rows |= EnforcePrimaryKeys(data_args.primary_key_cols)
+
+        if data_args.csv_schema_order:
+            (rows
+             | 'Order fields for CSV writing.' >> beam.FlatMap(lambda d: [
+                 dict_to_csv(d, data_args.csv_schema_order.split(','))])
+             | 'Write to GCS' >> beam.io.textio.WriteToText(
+                 file_path_prefix=data_args.output_prefix,
+                 file_name_suffix='.csv'))
+
+        if data_args.output_bq_table:
+            (rows
+             | 'Write to BigQuery.' >> beam.io.gcp.bigquery.WriteToBigQuery(
+                 # The table name is a required argument for the BigQuery
+                 # sink. In this case we use the value passed in from the
+                 # command line.
+                 data_args.output_bq_table,
+                 schema=None if schema_inferred else data_gen.get_bq_schema(),
+                 # Creates the table in BigQuery if it does not yet exist.
+                 create_disposition=beam.io.BigQueryDisposition.
+                 CREATE_IF_NEEDED,
+                 write_disposition=data_gen.write_disp,
+                 # Use the max recommended batch size.
+                 batch_size=500))
 
     p.run().wait_until_finish()
 
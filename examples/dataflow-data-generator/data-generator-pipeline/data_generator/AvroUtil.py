@@ -15,6 +15,11 @@
 import avro.schema
 import fastavro
 import json
+import pyarrow as pa
+import pyarrow.compute as pc
+import apache_beam as beam
+from apache_beam.io import filebasedsink
+from apache_beam.io.filesystem import CompressionTypes
 from .TimeUtil import datetime_to_epoch_timestamp, date_to_epoch_date, \
 time_to_epoch_time
 
@@ -47,3 +52,95 @@ def fix_record_for_avro(record, avro_schema):
                     record[field_name] = time_to_epoch_time(record[field_name],
                                                             micros=is_micros)
     return [record]
+
+
+# fastavro starts a new block once its buffer reaches sync_interval bytes.
+# The Arrow avro sink flushes a block per RecordBatch instead, so this is set
+# high enough for a whole batch to fit in one block.
+_BATCH_SYNC_INTERVAL = 2**62
+
+
+def _is_string_type(datatype):
+    if isinstance(datatype, list):
+        return 'string' in datatype
+    return datatype == 'string'
+
+
+def arrow_batch_to_avro_records(batch, avro_schema):
+    """
+    Converts a pyarrow RecordBatch to the records of avro_schema. Each
+    column is converted to python values at once and the records zipped
+    from the columns. Date and timestamp columns are kept as python dates
+    and datetimes which fastavro writes to logical types, unless the avro
+    field is a string in which case the whole column is formatted at once.
+    :param batch: pyarrow.RecordBatch
+    :param avro_schema: parsed avro schema.
+    :return: iterator of record dicts.
+    """
+    columns = []
+    names = []
+    for field in avro_schema['fields']:
+        column = batch.column(batch.schema.get_field_index(field['name']))
+        if _is_string_type(field['type']):
+            if pa.types.is_timestamp(column.type):
+                column = pc.strftime(column, format='%Y-%m-%dT%H:%M:%S')
+            elif pa.types.is_date(column.type):
+                column = pc.strftime(column, format='%Y-%m-%d')
+        columns.append(column.to_pylist())
+        names.append(field['name'])
+    return (dict(zip(names, values)) for values in zip(*columns))
+
+
+class _FastAvroBatchSink(filebasedsink.FileBasedSink):
+    """
+    A sink writing pyarrow RecordBatches to avro files with fastavro, each
+    RecordBatch is written as one avro block.
+    """
+    def __init__(self, file_path_prefix, schema, codec, file_name_suffix):
+        super(_FastAvroBatchSink, self).__init__(
+            file_path_prefix,
+            coder=None,
+            file_name_suffix=file_name_suffix,
+            mime_type='application/x-avro',
+            # Compression happens at the block level using the codec.
+            compression_type=CompressionTypes.UNCOMPRESSED)
+        self._schema = fastavro.parse_schema(schema)
+        self._codec = codec
+        self._file_handle = None
+
+    def open(self, temp_path):
+        self._file_handle = super(_FastAvroBatchSink, self).open(temp_path)
+        return fastavro.write.Writer(self._file_handle,
+                                     self._schema,
+                                     codec=self._codec,
+                                     sync_interval=_BATCH_SYNC_INTERVAL)
+
+    def write_record(self, writer, batch):
+        for record in arrow_batch_to_avro_records(batch, self._schema):
+            writer.write(record)
+        writer.flush()
+
+    def close(self, writer):
+        writer.flush()
+        self._file_handle.close()
+
+
+class WriteArrowToAvro(beam.PTransform):
+    """
+    Writes a PCollection of pyarrow RecordBatches to avro files, each batch
+    is converted column by column and written as one avro block.
+    :param file_path_prefix: prefix of the output files.
+    :param schema: avro schema of the records.
+    :param codec: avro block compression codec.
+    """
+    def __init__(self,
+                 file_path_prefix,
+                 schema,
+                 codec='null',
+                 file_name_suffix='.avro'):
+        super(WriteArrowToAvro, self).__init__()
+        self._sink = _FastAvroBatchSink(file_path_prefix, schema, codec,
+                                        file_name_suffix)
+
+    def expand(self, pcoll):
+        return pcoll | beam.io.iobase.Write(self._sink)
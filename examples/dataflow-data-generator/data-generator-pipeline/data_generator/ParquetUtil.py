@@ -14,11 +14,18 @@
 
 import json
 import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 import datetime
+import apache_beam as beam
+from apache_beam.io import filebasedsink
+from apache_beam.io.filesystem import CompressionTypes
 from .TimeUtil import datetime_to_epoch_timestamp, date_to_epoch_date, \
 time_to_epoch_time
 
+# Number of rows buffered into each row group of the Arrow parquet sink.
+DEFAULT_ROW_GROUP_SIZE = 10**6
+
 
 def get_pyarrow_translated_schema(string_schema):
     """
@@ -143,3 +150,93 @@ def fix_record_for_parquet(record, schema):
             else:
                 record[field_name] = _fix_primitive(record, field)
     return [record]
+
+
+class _RowGroupWriter(object):
+    """
+    Buffers pyarrow RecordBatches and writes them to a parquet file as row
+    groups of row_group_size rows.
+    """
+    def __init__(self, file_handle, schema, row_group_size, codec,
+                 use_dictionary):
+        self.file_handle = file_handle
+        self.writer = pq.ParquetWriter(file_handle,
+                                       schema,
+                                       compression=codec,
+                                       use_dictionary=use_dictionary)
+        self.row_group_size = row_group_size
+        self.batches = []
+        self.buffered_rows = 0
+
+    def write_batch(self, batch):
+        self.batches.append(batch)
+        self.buffered_rows += batch.num_rows
+        if self.buffered_rows >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.batches:
+            self.writer.write_table(pa.Table.from_batches(self.batches),
+                                    row_group_size=self.row_group_size)
+            self.batches = []
+            self.buffered_rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        self.file_handle.close()
+
+
+class _ArrowParquetSink(filebasedsink.FileBasedSink):
+    """A sink writing pyarrow RecordBatches to parquet files."""
+    def __init__(self, file_path_prefix, schema, row_group_size, codec,
+                 use_dictionary, file_name_suffix):
+        super(_ArrowParquetSink, self).__init__(
+            file_path_prefix,
+            coder=None,
+            file_name_suffix=file_name_suffix,
+            mime_type='application/x-parquet',
+            # Compression happens at the page level using the codec.
+            compression_type=CompressionTypes.UNCOMPRESSED)
+        self._schema = schema
+        self._row_group_size = int(row_group_size)
+        self._codec = codec
+        self._use_dictionary = use_dictionary
+
+    def open(self, temp_path):
+        return _RowGroupWriter(
+            super(_ArrowParquetSink, self).open(temp_path), self._schema,
+            self._row_group_size, self._codec, self._use_dictionary)
+
+    def write_record(self, writer, batch):
+        writer.write_batch(batch)
+
+    def close(self, writer):
+        writer.close()
+
+
+class WriteArrowToParquet(beam.PTransform):
+    """
+    Writes a PCollection of pyarrow RecordBatches to parquet files without
+    converting them to individual records.
+    :param file_path_prefix: prefix of the output files.
+    :param schema: pyarrow schema of the batches.
+    :param row_group_size: number of rows in each row group.
+    :param codec: parquet compression codec.
+    :param use_dictionary: dictionary encode all columns (True) or only the
+        listed column names.
+    """
+    def __init__(self,
+                 file_path_prefix,
+                 schema,
+                 row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 codec='snappy',
+                 use_dictionary=True,
+                 file_name_suffix='.parquet'):
+        super(WriteArrowToParquet, self).__init__()
+        self._sink = _ArrowParquetSink(file_path_prefix, schema,
+                                       row_group_size, codec, use_dictionary,
+                                       file_name_suffix)
+
+    def expand(self, pcoll):
+        return pcoll | beam.io.iobase.Write(self._sink)
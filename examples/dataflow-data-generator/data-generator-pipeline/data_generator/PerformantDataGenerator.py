@@ -14,6 +14,7 @@
 
 import argparse
 import datetime
+import hashlib
 import json
 import logging
 import math
@@ -25,14 +26,66 @@ from uuid import uuid4
 
 import apache_beam as beam
 import apache_beam.io.gcp.bigquery as beam_bigquery
+import pyarrow as pa
 from faker import Faker
 from faker_schema.faker_schema import FakerSchema
 from google.cloud import bigquery as bq
 from google.cloud import storage as gcs
 from scipy.stats import truncnorm
 from google.cloud.exceptions import NotFound
+from .ParquetUtil import DEFAULT_ROW_GROUP_SIZE
 import sys
 
+# Number of rows generated together by the columnar batch mode of FakeRowGen.
+DEFAULT_BATCH_SIZE = 10000
+
+# The letters random strings are drawn from as an array of single bytes.
+ASCII_LETTERS = np.frombuffer(string.ascii_letters.encode(), dtype='S1')
+
+# The exponent of the zipf key distribution.
+ZIPF_EXPONENT = 1.25
+
+# Largest key set a cdf table is precomputed for. Zipf keys of larger key sets
+# are drawn by rejection, which rarely rejects for key sets this large.
+MAX_SAMPLER_TABLE_SIZE = 10**6
+
+
+class KeySampler(object):
+    """
+    Draws keys in bulk from a discrete distribution by inverting a
+    precomputed cumulative distribution table, so the cost of a draw does not
+    depend on the shape of the distribution.
+
+    Attributes:
+        cdf (numpy.ndarray): The normalized cumulative weights of the keys.
+        keys (numpy.ndarray): The keys, None for the keys 1 to len(cdf).
+    """
+    def __init__(self, weights, keys=None):
+        """
+        Args:
+            weights: The relative probability of each key, e.g. the
+                frequencies of an empirical histogram.
+            keys: The keys the weights refer to, defaults to 1 to
+                len(weights).
+        """
+        cdf = np.cumsum(weights, dtype=np.float64)
+        self.cdf = cdf / cdf[-1]
+        self.keys = None if keys is None else np.asarray(keys)
+
+    @classmethod
+    def zipf(cls, n_keys, exponent=ZIPF_EXPONENT):
+        """Zipf distribution over the keys 1 to n_keys."""
+        return cls(np.arange(1, n_keys + 1, dtype=np.float64)**-exponent)
+
+    def sample(self, size=None, rng=None):
+        """Returns an array of size keys (or a single key if size is None)
+        drawn with the numpy Generator rng."""
+        rng = rng if rng is not None else np.random.default_rng()
+        idxs = np.searchsorted(self.cdf, rng.random(size), side='right')
+        if self.keys is None:
+            return idxs + 1
+        return self.keys[idxs]
+
 
 class DataGenerator(object):
     """
@@ -58,6 +111,8 @@ class DataGenerator(object):
         primary_key_cols (str): The primary key for the generated data.
         dest_joining_key_col (str): The name of the key column in the table
             we are generating that joins to source_joining_key_col.
+        seed (int): When set, batches of rows are generated reproducibly
+            from this seed (see FakeRowGen.get_rng).
 
     """
     def __init__(self,
@@ -76,6 +131,7 @@ class DataGenerator(object):
                  key_skew='None',
                  primary_key_cols=None,
                  dest_joining_key_col=None,
+                 seed=None,
                  bq_cli=None):
         """
         Args:
@@ -98,6 +154,7 @@ class DataGenerator(object):
         primary_key_cols (str): The primary key for the generated data.
         dest_joining_key_col (str): The name of the key column in the table
             we are generating that joins to source_joining_key_col.
+        seed (int): The seed of reproducible generation.
         """
         if not bq_cli:
             bq_cli = bq.Client()
@@ -160,6 +217,9 @@ class DataGenerator(object):
         self.float_precision = int(float_precision)
         self.key_skew = key_skew
         self.dest_joining_key_col = dest_joining_key_col
+        self.primary_key_cols = primary_key_cols.split(',') \
+            if primary_key_cols else []
+        self.seed = None if seed is None else int(seed)
         # Map the passed string representation of the desired disposition.
         # This will force early error if invalid write disposition.
         write_disp_map = {
@@ -283,12 +343,25 @@ class DataGenerator(object):
         return [record]
 
 
+def _json_default(value):
+    """Serializes the values of generate_column with native=True like
+    native=False would."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
 class FakeRowGen(beam.DoFn):
     """
     This class wraps the logic defined in DataGenerator object and generates a
     fake record for each element it is passed.
+
+    Histogram elements with a frequency are generated in columnar batches of
+    up to batch_size rows (see generate_fake_batch). When data_gen has a seed
+    each batch is generated reproducibly, from a random number generator
+    keyed by seed_key, the histogram row and the batch number.
     """
-    def __init__(self, data_gen):
+    def __init__(self, data_gen, batch_size=DEFAULT_BATCH_SIZE, seed_key=''):
         """
         This initiates some properties of the FakeRowGen DoFn including an
         instance of the DataGenerator class and the number of records should be
@@ -297,8 +370,55 @@ class FakeRowGen(beam.DoFn):
         Attributes:
             data_gen(DataGenerator): defines the shape of the data should be
             generated by this DoFn.
+            batch_size(int): the maximum number of rows generated at once for
+            a histogram element.
+            seed_key(str): identifies the generated table in the seed of
+            each batch, so different tables get different data.
         """
         self.data_gen = data_gen
+        self.batch_size = int(batch_size)
+        self.seed_key = seed_key
+        self.faker_schema = None
+        self.faker = None
+        self.zipf_sampler = None
+        self.rng = None
+
+    def setup(self):
+        # The faker schema and key sampler only depend on data_gen so are
+        # computed once per DoFn instance rather than for every element.
+        self.faker_schema = self.data_gen.get_faker_schema()
+        if str(self.data_gen.key_skew).lower() == 'zipf':
+            self.get_zipf_sampler()
+
+    def get_rng(self, *keys):
+        """
+        Returns the numpy random Generator for the batch of rows identified
+        by keys. When data_gen has a seed this is a counter based Philox
+        generator keyed by the seed, seed_key and keys, so a batch is always
+        generated the same way regardless of which worker generates it and in
+        which order. Without keys, or without a seed, it is a generator shared
+        by all of the calls, so each call draws new values. It is keyed by the
+        seed and seed_key when data_gen has a seed.
+        """
+        if keys and self.data_gen.seed is not None:
+            return self._seeded_rng(keys)
+        if self.rng is None:
+            if self.data_gen.seed is None:
+                self.rng = np.random.default_rng()
+            else:
+                self.rng = self._seeded_rng(())
+        return self.rng
+
+    def _seeded_rng(self, keys):
+        # Each key contributes the 8 uint32 words of its sha256 digest, as a
+        # 32 bit hash would give many histogram rows the same generator.
+        entropy = [self.data_gen.seed]
+        for key in (self.seed_key, ) + tuple(keys):
+            digest = hashlib.sha256(str(key).encode()).digest()
+            entropy.extend(
+                np.frombuffer(digest, dtype='<u4').astype(int).tolist())
+        return np.random.Generator(
+            np.random.Philox(np.random.SeedSequence(entropy)))
 
     # Helper function to get a single field dictionary from the schema for
     # checking type and mode.
@@ -369,14 +489,7 @@ class FakeRowGen(beam.DoFn):
             record[fieldname] = array_of_struct
         elif field['type'] == 'STRING':
             # Efficiently generate random string.
-            STRING_LENGTH = 36
-
-            # If the description of the field is a RDMS schema like VARCHAR(255)
-            # then we extract this number and generate a string of this length.
-            if field.get('description'):
-                extracted_numbers = re.findall('\d+', field['description'])
-                if extracted_numbers:
-                    STRING_LENGTH = int(extracted_numbers[0])
+            STRING_LENGTH = self.get_string_length(field)
 
             char_idxs = np.random.randint(0,
                                           len(string.ascii_letters),
@@ -467,7 +580,19 @@ class FakeRowGen(beam.DoFn):
         # Return a tuple of the current timestamp and this fake record.
         return record
 
-    def trunc_norm_trendify(self, loc, var_scale=0.1):
+    def get_string_length(self, field):
+        """
+        Returns the length of the random strings generated for a STRING field.
+        If the description of the field is a RDMS schema like VARCHAR(255)
+        then we extract this number, otherwise it defaults to 36.
+        """
+        if field.get('description'):
+            extracted_numbers = re.findall(r'\d+', field['description'])
+            if extracted_numbers:
+                return int(extracted_numbers[0])
+        return 36
+
+    def trunc_norm_trendify(self, loc, var_scale=0.1, size=None):
         """
         This function is used to draw a sample from a bounded linear trend with
         some noise.
@@ -482,8 +607,10 @@ class FakeRowGen(beam.DoFn):
                 [min, max] range to center values.
             var_scale (float): This controls the variance of teh produced
                 variate. This should b
+            size (int): When set, draw this many variates at once. loc may
+                then also be an array with one value per variate.
         """
-        loc = min(max(loc, 0.0), 1.0)
+        loc = np.clip(loc, 0.0, 1.0)
         var_scale = min(max(var_scale, 0.0), 1.0)
 
         lower_bound = self.data_gen.min_float
@@ -491,20 +618,44 @@ class FakeRowGen(beam.DoFn):
         mu = loc * (upper_bound - lower_bound) + lower_bound
         sigma = var_scale * (upper_bound - lower_bound)
         a, b = (lower_bound - mu) / sigma, (upper_bound - mu) / sigma
-        return truncnorm.rvs(a, b, mu, sigma)
+        return truncnorm.rvs(a, b, mu, sigma, size=size)
+
+    def get_zipf_sampler(self):
+        """
+        Returns the KeySampler of zipf keys in [1, n_keys], or None when the
+        key set is too large to precompute.
+        """
+        if (self.zipf_sampler is None and
+                self.data_gen.n_keys <= MAX_SAMPLER_TABLE_SIZE):
+            self.zipf_sampler = KeySampler.zipf(self.data_gen.n_keys)
+        return self.zipf_sampler
 
     def get_skewed_key(self, distribution=None):
+        return int(self.get_skewed_keys(1, distribution)[0])
+
+    def get_skewed_keys(self, size, distribution=None, rng=None):
+        """
+        Vectorized get_skewed_key, returns an array of size keys drawn with
+        the numpy Generator rng.
+        """
+        rng = rng if rng is not None else self.get_rng()
         if distribution is None or distribution == 'None':
             distribution = 'uniform'
         if distribution.lower() == 'binomial':
-            return np.random.binomial(int(self.data_gen.n_keys), p=.5)
+            return rng.binomial(int(self.data_gen.n_keys), .5, size=size)
         elif distribution.lower() == 'zipf':
-            key = np.random.zipf(1.25)
-            while key > self.data_gen.n_keys:
-                key = np.random.zipf(1.25, 1)
-            return int(key)
+            zipf_sampler = self.get_zipf_sampler()
+            if zipf_sampler:
+                return zipf_sampler.sample(size, rng=rng)
+            keys = rng.zipf(ZIPF_EXPONENT, size=size)
+            # Only redraw the keys that fell outside of the key set.
+            rejected = keys > self.data_gen.n_keys
+            while rejected.any():
+                keys[rejected] = rng.zipf(ZIPF_EXPONENT, size=rejected.sum())
+                rejected = keys > self.data_gen.n_keys
+            return keys
         elif distribution.lower() == 'uniform':
-            return int(np.random.randint(1, self.data_gen.n_keys))
+            return rng.integers(1, self.data_gen.n_keys, size=size)
 
     def convert_key_types(self, keys):
         """
@@ -561,6 +712,274 @@ class FakeRowGen(beam.DoFn):
             data.pop('frequency')
         return json.dumps(data)
 
+    def generate_column(self, field, n_rows, native=False, rng=None):
+        """
+        This method generates n_rows values of a single field at once with
+        numpy, following the same rules as sanity_check. Types sanity_check
+        doesn't handle fall back to the field's Faker provider.
+
+        Arguments:
+            field (dict): The BigQuery schema of the field.
+            n_rows (int): The number of values to generate.
+            native (bool): Return dates and timestamps as datetime.date and
+                datetime.datetime rather than json serializable strings.
+            rng (numpy.random.Generator): The source of randomness, see
+                get_rng.
+        Returns:
+            A list of n_rows values of the field.
+        """
+        rng = rng if rng is not None else self.get_rng()
+        fieldname = field['name']
+        random_numbers = rng.integers(0, sys.maxsize, size=n_rows)
+        pct = random_numbers / float(sys.maxsize)
+
+        if field['type'] == 'RECORD':
+            # We will fill each array of struct with 0-3 elements, all the
+            # nested records of the batch are generated together.
+            lengths = rng.integers(0, 4, size=n_rows)
+            nested_rows = self.columns_to_rows(
+                self.generate_columns(int(lengths.sum()),
+                                      fields=field['fields'],
+                                      native=native,
+                                      rng=rng))
+            ends = np.cumsum(lengths).tolist()
+            values = [
+                nested_rows[end - length:end]
+                for end, length in zip(ends, lengths.tolist())
+            ]
+        elif field['type'] == 'STRING':
+            length = self.get_string_length(field)
+            if length:
+                char_idxs = rng.integers(0,
+                                         len(ASCII_LETTERS),
+                                         size=(n_rows, length))
+                # View each row of characters as a single byte string.
+                values = ASCII_LETTERS[char_idxs].view('S%d' % length)
+                values = values.ravel().astype('U%d' % length).tolist()
+            else:
+                values = [''] * n_rows
+        elif field['type'] in ('TIMESTAMP', 'DATETIME'):
+            max_delta = self.data_gen.max_date - self.data_gen.min_date
+            deltas = (pct * max_delta.total_seconds()).astype('timedelta64[s]')
+            values = np.datetime64(self.data_gen.min_date, 's') + deltas
+            if not native:
+                values = np.datetime_as_string(values)
+            values = values.tolist()
+        elif field['type'] == 'DATE':
+            max_delta = self.data_gen.max_date - self.data_gen.min_date
+            deltas = (pct * max_delta.days).astype('timedelta64[D]')
+            values = np.datetime64(self.data_gen.min_date, 'D') + deltas
+            if not native:
+                values = np.datetime_as_string(values)
+            values = values.tolist()
+        elif field['type'] == 'INTEGER':
+            max_size = self.data_gen.max_int
+            values = (max_size * pct).astype(np.int64)
+            if '_max_' in fieldname.lower():
+                max_size = int(fieldname[fieldname.find("_max_") +
+                                         5:len(fieldname)])
+            values = np.minimum(values, max_size)
+            if self.data_gen.only_pos:
+                values = np.abs(values)
+            values = values.tolist()
+        elif field['type'] == 'FLOAT' or field['type'] == 'NUMERIC':
+            max_size = float(self.data_gen.max_float)
+            if '_max_' in fieldname.lower():
+                max_size = float(fieldname[fieldname.find("_max_") +
+                                           5:len(fieldname)])
+            values = np.round(max_size * pct, self.data_gen.float_precision)
+            if self.data_gen.only_pos:
+                values = np.abs(values)
+            values = values.tolist()
+        else:
+            values = self.generate_faker_column(field,
+                                               n_rows,
+                                               native=native,
+                                               rng=rng)
+
+        # Make some values null based on null_prob.
+        if field.get('mode') == 'NULLABLE' and self.data_gen.null_prob > 0:
+            nulls = rng.random(n_rows) < self.data_gen.null_prob
+            values = [
+                None if is_null else value
+                for is_null, value in zip(nulls.tolist(), values)
+            ]
+
+        # Key columns are drawn from the key set and never null.
+        if '_key' in fieldname.lower() or '_id' in fieldname.lower():
+            values = self.get_skewed_keys(n_rows,
+                                          self.data_gen.key_skew,
+                                          rng=rng)
+            if field['type'] == 'STRING':
+                values = values.astype(str)
+            values = values.tolist()
+        return values
+
+    def generate_faker_column(self, field, n_rows, native=False, rng=None):
+        """
+        Generates n_rows values of a field with its Faker provider, for the
+        types that are not vectorized by generate_column.
+        """
+        if self.faker is None:
+            self.faker = Faker()
+        if rng is not None and self.data_gen.seed is not None:
+            self.faker.seed_instance(int(rng.integers(2**32)))
+        provider = getattr(
+            self.faker,
+            self.data_gen.get_faker_schema(fields=[field])[field['name']])
+        values = [provider() for _ in range(n_rows)]
+        if native:
+            return values
+        return [
+            value if isinstance(value, (bool, int, float, str)) else str(value)
+            for value in values
+        ]
+
+    def generate_columns(self,
+                         n_rows,
+                         fields=None,
+                         exclude=(),
+                         native=False,
+                         rng=None):
+        """
+        Generates n_rows values for each field of the schema.
+
+        Arguments:
+            n_rows (int): The number of rows to generate.
+            fields (list): The schema fields, defaults to the data_gen schema.
+            exclude: Names of fields which should not be generated.
+            native (bool): See generate_column.
+            rng (numpy.random.Generator): See generate_column.
+        Returns:
+            A dict mapping each field name to a list of n_rows values.
+        """
+        rng = rng if rng is not None else self.get_rng()
+        this_call_schema = fields if fields else self.data_gen.schema['fields']
+        return {
+            field['name']: self.generate_column(field,
+                                                n_rows,
+                                                native=native,
+                                                rng=rng)
+            for field in this_call_schema if field['name'] not in exclude
+        }
+
+    @staticmethod
+    def columns_to_rows(columns):
+        """Transposes a dict of columns into a list of row dicts."""
+        names = list(columns.keys())
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    def generate_fake_batch(self, n_rows, key_dict=None, rng=None):
+        """
+        This method is the columnar equivalent of generate_fake, it creates
+        n_rows fake records at once by generating each column as an array.
+
+        Arguments:
+            n_rows (int): The number of records to generate.
+            key_dict (dict): A row of the histogram table, the key columns
+                are copied to every record rather than randomly generated.
+            rng (numpy.random.Generator): See generate_column.
+        Returns:
+            A list of n_rows json serialized records.
+        """
+        keys = self.get_histogram_keys(key_dict)
+        columns = self.generate_columns(n_rows, exclude=keys, rng=rng)
+        rows = self.columns_to_rows(columns)
+        if keys:
+            for row in rows:
+                row.update(keys)
+        return [json.dumps(row) for row in rows]
+
+    def get_histogram_keys(self, key_dict):
+        """Returns the key columns of a histogram row converted to the
+        schema's types."""
+        if not key_dict:
+            return {}
+        return self.convert_key_types(
+            {k: v for k, v in key_dict.items() if k != 'frequency'})
+
+    def generate_record_batch(self,
+                              n_rows,
+                              pa_schema,
+                              key_dict=None,
+                              rng=None):
+        """
+        This method creates n_rows fake records as a pyarrow RecordBatch,
+        skipping the json serialization of generate_fake_batch so they can be
+        written straight to columnar files.
+
+        Arguments:
+            n_rows (int): The number of records to generate.
+            pa_schema (pyarrow.Schema): The schema of the batch, see
+                ParquetUtil.get_pyarrow_translated_schema.
+            key_dict (dict): A row of the histogram table, the key columns
+                are copied to every record rather than randomly generated.
+            rng (numpy.random.Generator): See generate_column.
+        Returns:
+            A pyarrow.RecordBatch of n_rows records.
+        """
+        keys = self.get_histogram_keys(key_dict)
+        columns = self.generate_columns(n_rows,
+                                        exclude=keys,
+                                        native=True,
+                                        rng=rng)
+        for key, value in keys.items():
+            columns[key] = [value] * n_rows
+        return pa.RecordBatch.from_pydict(columns, schema=pa_schema)
+
+    @staticmethod
+    def get_histogram_row_id(element):
+        """Identifies a histogram row by its keys in the seed of its
+        batches."""
+        return json.dumps(element, sort_keys=True, default=str)
+
+    def get_histogram_blocks(self, frequency):
+        """Splits frequency rows into (block number, number of rows) batches
+        of up to batch_size rows."""
+        return [(block, min(self.batch_size, frequency - start))
+                for block, start in enumerate(
+                    range(0, frequency, self.batch_size))]
+
+    def generate_row_range(self, start_row, n_rows, native=False):
+        """
+        This method generates the rows [start_row, start_row + n_rows) of the
+        table. Rows are generated in blocks of batch_size rows, each from the
+        generator of its block number, so when data_gen has a seed any range
+        of rows can be regenerated independently of the others.
+
+        The primary key columns of data_gen are set to the row number
+        (starting at 1) rather than drawn at random, so they are unique
+        without deduplication and join to the keys [1, n_keys] of another
+        table generated with n_keys set to this table's number of rows.
+
+        Arguments:
+            start_row (int): The number of the first row to generate.
+            n_rows (int): The number of rows to generate.
+            native (bool): See generate_column.
+        Returns:
+            A dict mapping each field name to a list of n_rows values.
+        """
+        end_row = start_row + n_rows
+        columns = {}
+        for block in range(start_row // self.batch_size,
+                           (end_row - 1) // self.batch_size + 1):
+            block_start = block * self.batch_size
+            block_columns = self.generate_columns(self.batch_size,
+                                                  native=native,
+                                                  rng=self.get_rng(block))
+            first = max(start_row, block_start) - block_start
+            last = min(end_row, block_start + self.batch_size) - block_start
+            for name, values in block_columns.items():
+                columns.setdefault(name, []).extend(values[first:last])
+
+        row_numbers = np.arange(start_row + 1, end_row + 1)
+        for key in self.data_gen.primary_key_cols:
+            if self.get_field_dict(key)['type'] == 'STRING':
+                columns[key] = row_numbers.astype(str).tolist()
+            else:
+                columns[key] = row_numbers.tolist()
+        return columns
+
     def process(self, element, *args, **kwargs):
         """This function creates a random record based on the properties
         of the passed DataGenerator object for each element in prior the
@@ -569,21 +988,80 @@ class FakeRowGen(beam.DoFn):
         Args:
             element: A single element of the PCollection
         """
-
-        faker_schema = self.data_gen.get_faker_schema()
-        try:
-            # Here the element is treated as the dictionary representing a single row
-            # of the histogram table.
+        if isinstance(element, dict):
+            # Here the element is treated as the dictionary representing a
+            # single row of the histogram table, its frequency rows are
+            # generated in batches.
             frequency = int(element.get('frequency'))
-
-            for i in range(frequency):
-                row = self.generate_fake(fschema=faker_schema,
-                                         key_dict=element)
-                yield row
-        except AttributeError:
+            for block, n_rows in self.get_histogram_blocks(frequency):
+                rng = self.get_rng(self.get_histogram_row_id(element), block)
+                for row in self.generate_fake_batch(n_rows,
+                                                    key_dict=element,
+                                                    rng=rng):
+                    yield row
+        else:
             # The contents of this element are ignored if they are a string.
-            row = self.generate_fake(fschema=faker_schema, key_dict=element)
-            yield row
+            yield self.generate_fake(fschema=dict(self.faker_schema))
+
+
+class FakeRecordBatchGen(FakeRowGen):
+    """
+    This DoFn generates the frequency rows of each histogram element like
+    FakeRowGen but outputs them as pyarrow RecordBatches of up to batch_size
+    rows, for the Arrow based Parquet and Avro sinks.
+    """
+    def __init__(self,
+                 data_gen,
+                 pa_schema,
+                 batch_size=DEFAULT_BATCH_SIZE,
+                 seed_key=''):
+        super(FakeRecordBatchGen, self).__init__(data_gen,
+                                                 batch_size=batch_size,
+                                                 seed_key=seed_key)
+        self.pa_schema = pa_schema
+
+    def process(self, element, *args, **kwargs):
+        frequency = int(element.get('frequency'))
+        for block, n_rows in self.get_histogram_blocks(frequency):
+            rng = self.get_rng(self.get_histogram_row_id(element), block)
+            yield self.generate_record_batch(n_rows,
+                                             self.pa_schema,
+                                             key_dict=element,
+                                             rng=rng)
+
+    @staticmethod
+    def record_batch_to_rows(batch):
+        """
+        Converts a RecordBatch to the row dicts FakeRowGen would output for
+        it, with dates, times and timestamps as ISO formatted strings.
+        """
+        return [
+            json.loads(json.dumps(row, default=_json_default))
+            for row in batch.to_pylist()
+        ]
+
+
+class FakeRowRangeGen(FakeRowGen):
+    """
+    This DoFn generates the rows of (start_row, n_rows) elements as json
+    strings with FakeRowGen.generate_row_range, see get_row_ranges.
+    """
+    def process(self, element, *args, **kwargs):
+        start_row, n_rows = element
+        columns = self.generate_row_range(start_row, n_rows)
+        for row in self.columns_to_rows(columns):
+            yield json.dumps(row)
+
+
+def get_row_ranges(num_records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Splits num_records rows into (start_row, n_rows) ranges of batch_size
+    rows, the elements generating a table with FakeRowRangeGen.
+    """
+    num_records = int(num_records)
+    batch_size = int(batch_size)
+    return [(start_row, min(batch_size, num_records - start_row))
+            for start_row in range(0, num_records, batch_size)]
 
 
 def parse_data_generator_args(argv):
@@ -727,6 +1205,16 @@ def parse_data_generator_args(argv):
                         'data to avro on gcs.',
                         default=None)
 
+    parser.add_argument('--write_to_parquet',
+                        dest='write_to_parquet',
+                        help='This is a flag for writing to parquet on gcs.',
+                        action="store_true")
+
+    parser.add_argument('--parquet_row_group_size',
+                        dest='parquet_row_group_size',
+                        help='Number of rows in each parquet row group.',
+                        default=DEFAULT_ROW_GROUP_SIZE)
+
     parser.add_argument('--gcs_output_prefix',
                         dest='output_prefix',
                         help='GCS path for output',
@@ -738,6 +1226,20 @@ def parse_data_generator_args(argv):
                         help='BigQuery Write Disposition.',
                         default='WRITE_APPEND')
 
+    parser.add_argument('--batch_size',
+                        dest='batch_size',
+                        required=False,
+                        help='Maximum number of rows generated at once for '
+                        'each row of the histogram table.',
+                        default=DEFAULT_BATCH_SIZE)
+
+    parser.add_argument('--seed',
+                        dest='seed',
+                        required=False,
+                        help='Seed for reproducible data. Rerunning with the '
+                        'same seed and batch_size generates the same rows.',
+                        default=None)
+
     return parser.parse_known_args(argv)
 
 
@@ -740,6 +740,15 @@ def parse_data_generator_args(argv):
                         help='BigQuery Write Disposition.',
                         default='WRITE_APPEND')
 
+    parser.add_argument('--seed',
+                        dest='seed',
+                        required=False,
+                        help='Seed for reproducible data. When set, '
+                        'data_generator_joinable_table.py generates row '
+                        'ranges with the performant generator and uses the '
+                        'row number as primary key.',
+                        default=None)
+
     return parser.parse_known_args(argv)
 
 
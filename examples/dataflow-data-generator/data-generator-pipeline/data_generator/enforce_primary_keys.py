@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import apache_beam as beam
+import pyarrow as pa
 from apache_beam.transforms import CombinePerKey
 from apache_beam.transforms.combiners import SampleCombineFn
 
@@ -37,3 +38,33 @@ class EnforcePrimaryKeys(beam.PTransform):
             beam.FlatMap(lambda row: [(row[self.primary_key], row)])
             | 'Sample n=1 by Primary Key' >> CombinePerKey(SampleCombineFn(1))
             | 'Drop keys' >> beam.FlatMap(lambda kv: kv[1]))
+
+
+class EnforcePrimaryKeysOnBatches(beam.PTransform):
+    """
+    This is a PTransform to ensure rows of a PCollection of
+    pyarrow RecordBatches are unique by key. Duplicates are dropped by
+    EnforcePrimaryKeys and the remaining rows regrouped into RecordBatches.
+    """
+    def __init__(self, primary_key, schema, batch_size):
+        """
+        Args:
+            primary_key: (str) The column by which to ensure
+                uniqueness in the posterior PCollection.
+            schema: (pyarrow.Schema) The schema of the RecordBatches.
+            batch_size: (int) The maximum rows of the rebuilt RecordBatches.
+        """
+        self.primary_key = primary_key
+        self.schema = schema
+        self.batch_size = batch_size
+
+    def expand(self, pcoll):
+        return (
+            pcoll
+            | 'Split Record Batches' >> beam.FlatMap(lambda b: b.to_pylist())
+            | 'Enforce Primary Keys' >> EnforcePrimaryKeys(self.primary_key)
+            | 'Batch Rows' >> beam.BatchElements(
+                max_batch_size=self.batch_size)
+            | 'Rebuild Record Batches' >> beam.Map(
+                lambda rows: pa.RecordBatch.from_pylist(rows,
+                                                        schema=self.schema)))
@@ -29,6 +29,7 @@ from apache_beam.pvalue import AsList
 from data_generator.PrettyDataGenerator import DataGenerator, FakeRowGen, \
     parse_data_generator_args, validate_data_args, fetch_schema,\
     write_n_line_file_to_gcs
+from data_generator import PerformantDataGenerator
 import fastavro
 import os
 
@@ -53,11 +54,6 @@ def run(argv=None):
 
     pipeline_options = PipelineOptions(pipeline_args)
 
-    temp_location = pipeline_options.display_data()['temp_location']
-    temp_blob = write_n_line_file_to_gcs(
-        pipeline_options.display_data()['project'], temp_location,
-        data_args.num_records)
-
     data_gen = DataGenerator(
         bq_schema_filename=data_args.schema_file,
         input_bq_table=data_args.input_bq_table,
@@ -78,42 +74,87 @@ def run(argv=None):
     # store temp files, and what the project id is and what runner to use.
     p = beam.Pipeline(options=pipeline_options)
 
-    # When generating a dimension table we get the distinct keys as a side
-    # input from the main table so we generate dimension records that join to
-    # the main data table.
-    key_set = \
-        (p
-         | 'Query Keys from main table' >> beam.io.Read(
-            beam.io.BigQuerySource(
-                query="SELECT DISTINCT({}) FROM `{}`".format(
-                    data_args.source_joining_key_col,
-                    data_args.fact_table),
-                use_standard_sql=True)
+    temp_blob = None
+    if data_args.seed is not None:
+        # Each range of rows is generated independently and reproducibly from
+        # the seed. The joining and primary keys are the row numbers
+        # [1, num_records] so they are unique and join to a fact table
+        # generated with --n_keys=num_records without querying its keys or
+        # deduplicating.
+        primary_key_cols = [data_args.dest_joining_key_col] \
+            if data_args.dest_joining_key_col else []
+        if data_args.primary_key_cols:
+            primary_key_cols += data_args.primary_key_cols.split(',')
+        row_range_gen = PerformantDataGenerator.DataGenerator(
+            bq_schema_filename=data_args.schema_file,
+            input_bq_table=data_args.input_bq_table,
+            p_null=data_args.p_null,
+            n_keys=data_args.n_keys,
+            min_date=data_args.min_date,
+            max_date=data_args.max_date,
+            only_pos=data_args.only_pos,
+            max_int=data_args.max_int,
+            max_float=data_args.max_float,
+            float_precision=data_args.float_precision,
+            write_disp=data_args.write_disp,
+            key_skew=data_args.key_skew,
+            primary_key_cols=','.join(primary_key_cols),
+            seed=data_args.seed)
+
+        rows = (
+            p
+            | 'Create row ranges' >> beam.Create(
+                PerformantDataGenerator.get_row_ranges(data_args.num_records))
+            | 'Generate Data' >> beam.ParDo(
+                PerformantDataGenerator.FakeRowRangeGen(
+                    row_range_gen,
+                    seed_key=data_args.output_bq_table or
+                    data_args.output_prefix))
+            | 'Parse Json Strings' >> beam.FlatMap(
+                lambda row: [json.loads(row)]))
+    else:
+        temp_location = pipeline_options.display_data()['temp_location']
+        temp_blob = write_n_line_file_to_gcs(
+            pipeline_options.display_data()['project'], temp_location,
+            data_args.num_records)
+
+        # When generating a dimension table we get the distinct keys as a side
+        # input from the main table so we generate dimension records that join
+        # to the main data table.
+        key_set = \
+            (p
+             | 'Query Keys from main table' >> beam.io.Read(
+                beam.io.BigQuerySource(
+                    query="SELECT DISTINCT({}) FROM `{}`".format(
+                        data_args.source_joining_key_col,
+                        data_args.fact_table),
+                    use_standard_sql=True)
+                )
+             | 'Extract key values' >> beam.Map(
+                    lambda x: (x[data_args.source_joining_key_col]))
             )
-         | 'Extract key values' >> beam.Map(
-                lambda x: (x[data_args.source_joining_key_col]))
-        )
-
-    rows = (
-        p
-
-        # Read the file we created with num_records newlines.
-        #
-        | 'Read file with num_records lines' >> beam.io.ReadFromText(
-            os.path.join('gs://', temp_blob.bucket.name, temp_blob.name))
-
-        # Use our instance of our custom DataGenerator Class to generate 1 fake
-        # datum with the appropriate schema for each element in the PColleciton
-        # created above.
-        | 'Generate Data' >> beam.ParDo(FakeRowGen(data_gen))
-        | 'Parse Json Strings' >> beam.FlatMap(lambda row: [json.loads(row)])
-        | 'Enforce joining keys' >> beam.FlatMap(
-            data_gen.enforce_joinable_keys, key_set=AsList(key_set)))
-
-    if data_args.primary_key_cols:
-        for key in data_args.primary_key_cols.split(','):
-            rows |= 'Enforcing primary key: {}'.format(
-                key) >> EnforcePrimaryKeys(key)
+
+        rows = (
+            p
+
+            # Read the file we created with num_records newlines.
+            #
+            | 'Read file with num_records lines' >> beam.io.ReadFromText(
+                os.path.join('gs://', temp_blob.bucket.name, temp_blob.name))
+
+            # Use our instance of our custom DataGenerator Class to generate 1
+            # fake datum with the appropriate schema for each element in the
+            # PColleciton created above.
+            | 'Generate Data' >> beam.ParDo(FakeRowGen(data_gen))
+            | 'Parse Json Strings' >> beam.FlatMap(
+                lambda row: [json.loads(row)])
+            | 'Enforce joining keys' >> beam.FlatMap(
+                data_gen.enforce_joinable_keys, key_set=AsList(key_set)))
+
+        if data_args.primary_key_cols:
+            for key in data_args.primary_key_cols.split(','):
+                rows |= 'Enforcing primary key: {}'.format(
+                    key) >> EnforcePrimaryKeys(key)
 
     if data_args.csv_schema_order:
         (rows
@@ -155,7 +196,8 @@ def run(argv=None):
 
     # Manually clean up of temp_num_records.txt because it will be outside this
     # job's directory and Dataflow will not remove it for us.
-    temp_blob.delete()
+    if temp_blob:
+        temp_blob.delete()
 
 
 if __name__ == '__main__':
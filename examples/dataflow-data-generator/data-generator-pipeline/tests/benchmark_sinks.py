@@ -0,0 +1,153 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#            http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Micro-benchmark of the parquet and avro output paths of the distribution
+matcher for the lineorder schema.
+
+The json path generates json strings with FakeRowGen.generate_fake_batch,
+parses them and fixes each record with fix_record_for_parquet or
+fix_record_for_avro as the pipeline did before. The arrow path writes the
+RecordBatches of FakeRowGen.generate_record_batch directly. Each path runs in
+its own process so its peak resident memory can be reported, and the time a
+single worker would take for --projected_rows rows is extrapolated. Not
+collected by pytest, run it directly from the data-generator-pipeline
+directory:
+
+    python tests/benchmark_sinks.py --num_rows 1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import fastavro
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_generator.AvroUtil import arrow_batch_to_avro_records, \
+    fix_record_for_avro
+from data_generator.ParquetUtil import get_pyarrow_translated_schema, \
+    fix_record_for_parquet
+from data_generator.PerformantDataGenerator import DataGenerator, FakeRowGen
+
+RESOURCES = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..',
+                         'resources')
+MODES = ('json-parquet', 'arrow-parquet', 'json-avro', 'arrow-avro')
+
+
+def write_parquet(fakerowgen, pa_schema, num_rows, batch_size, path, arrow):
+    writer = pq.ParquetWriter(path, pa_schema)
+    for start in range(0, num_rows, batch_size):
+        n_rows = min(batch_size, num_rows - start)
+        if arrow:
+            batch = fakerowgen.generate_record_batch(n_rows, pa_schema)
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            rows = [
+                fix_record_for_parquet(json.loads(row),
+                                       fakerowgen.data_gen.schema)[0]
+                for row in fakerowgen.generate_fake_batch(n_rows)
+            ]
+            writer.write_table(pa.Table.from_pylist(rows, schema=pa_schema))
+    writer.close()
+
+
+def write_avro(fakerowgen, pa_schema, num_rows, batch_size, path, arrow):
+    avro_schema = fastavro.parse_schema(
+        fastavro.schema.load_schema(
+            os.path.join(RESOURCES, 'lineorders-schema.avsc')))
+    with open(path, 'wb') as f:
+        writer = fastavro.write.Writer(f, avro_schema)
+        for start in range(0, num_rows, batch_size):
+            n_rows = min(batch_size, num_rows - start)
+            if arrow:
+                records = arrow_batch_to_avro_records(
+                    fakerowgen.generate_record_batch(n_rows, pa_schema),
+                    avro_schema)
+            else:
+                records = [
+                    fix_record_for_avro(json.loads(row), avro_schema)[0]
+                    for row in fakerowgen.generate_fake_batch(n_rows)
+                ]
+            for record in records:
+                writer.write(record)
+            writer.flush()
+
+
+def run_mode(mode, num_rows, batch_size):
+    """Runs one output path and prints its measurements as json."""
+    data_gen = DataGenerator(
+        bq_schema_filename=os.path.join(RESOURCES, 'lineorder-schema.json'),
+        # fix_record_for_parquet doesn't support null dates.
+        p_null=0.0,
+        n_keys=1000,
+        key_skew='zipf',
+        bq_cli=object())
+    fakerowgen = FakeRowGen(data_gen)
+    fakerowgen.setup()
+    pa_schema = get_pyarrow_translated_schema(data_gen.schema)
+    source, output_format = mode.split('-')
+    write = write_parquet if output_format == 'parquet' else write_avro
+
+    path = tempfile.mktemp(suffix='.' + output_format)
+    start = time.time()
+    write(fakerowgen, pa_schema, num_rows, batch_size, path,
+          arrow=(source == 'arrow'))
+    seconds = time.time() - start
+    print(
+        json.dumps({
+            'seconds': seconds,
+            'bytes': os.path.getsize(path),
+            # ru_maxrss is in kilobytes on linux.
+            'max_rss_mb': resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        }))
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num_rows', type=int, default=10**6)
+    parser.add_argument('--batch_size', type=int, default=10000)
+    parser.add_argument('--projected_rows', type=int, default=10**9)
+    parser.add_argument('--mode', choices=MODES, default=None)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.num_rows, args.batch_size)
+        return
+
+    print('{:<14} {:>10} {:>10} {:>12} {:>18}'.format(
+        'path', 'rows/s', 'MB/s', 'peak RSS MB', 'hours/1B rows/vCPU'))
+    for mode in MODES:
+        output = subprocess.check_output([
+            sys.executable, __file__, '--mode', mode, '--num_rows',
+            str(args.num_rows), '--batch_size',
+            str(args.batch_size)
+        ])
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        rows_per_second = args.num_rows / result['seconds']
+        print('{:<14} {:>10.0f} {:>10.2f} {:>12.0f} {:>18.1f}'.format(
+            mode, rows_per_second,
+            result['bytes'] / result['seconds'] / 2**20, result['max_rss_mb'],
+            args.projected_rows / rows_per_second / 3600))
+
+
+if __name__ == '__main__':
+    main()
@@ -23,7 +23,9 @@ import sys
 from faker_schema.faker_schema import FakerSchema
 from google.cloud import bigquery as bq
 
-from data_generator.PerformantDataGenerator import DataGenerator, FakeRowGen
+from data_generator.ParquetUtil import get_pyarrow_translated_schema
+from data_generator.PerformantDataGenerator import DataGenerator, FakeRowGen, \
+    KeySampler, get_row_ranges
 
 
 class TestPerformantDataGenerator(unittest.TestCase):
@@ -142,6 +144,76 @@ class TestPerformantDataGenerator(unittest.TestCase):
         # Check if record type nesting worked.
         self.assertIsInstance(actual_row['lo_record_field'], list)
 
+    def test_generate_fake_batch(self):
+        """
+        This tests the columnar generate_fake_batch method obeys the same rules as generate_fake
+        and copies the histogram key columns to every record.
+        """
+        key_dict = {'lo_cust_key': 42, 'frequency': 100}
+        rows = [json.loads(row) for row in
+                self.fakerowgen.generate_fake_batch(100, key_dict=key_dict)]
+        self.assertEqual(len(rows), 100)
+
+        expected_fields = set(f['name'] for f in self.data_gen.schema['fields'])
+        for row in rows:
+            self.assertSetEqual(set(row.keys()), expected_fields)
+            self.assertEqual(row['lo_cust_key'], '42')
+            orderdate = datetime.datetime.strptime(row['lo_orderdate'],
+                                                   '%Y-%m-%d').date()
+            self.assertGreaterEqual(orderdate, self.data_gen.min_date)
+            self.assertLessEqual(orderdate, self.data_gen.max_date)
+            self.assertGreaterEqual(row['lo_linenumber'], 0)
+            self.assertLessEqual(row['lo_linenumber'], self.data_gen.max_int)
+            self.assertGreaterEqual(row['lo_tax'], 0.0)
+            self.assertLessEqual(row['lo_tax'], self.data_gen.max_float)
+            self.assertEqual(len(row['lo_recieptfile']), 10)
+            self.assertLessEqual(int(row['lo_part_key']), self.data_gen.n_keys)
+            self.assertIsInstance(row['lo_record_field'], list)
+            for nested in row['lo_record_field']:
+                datetime.datetime.strptime(nested['date'], '%Y-%m-%dT%H:%M:%S')
+
+    def test_generate_record_batch(self):
+        """
+        This tests generate_record_batch returns native typed columns in a pyarrow RecordBatch.
+        """
+        pa_schema = get_pyarrow_translated_schema(self.data_gen.schema)
+        batch = self.fakerowgen.generate_record_batch(
+            50, pa_schema, key_dict={'lo_cust_key': 42, 'frequency': 50})
+        self.assertEqual(batch.num_rows, 50)
+        self.assertTrue(batch.schema.equals(pa_schema))
+        row = batch.slice(0, 1).to_pylist()[0]
+        self.assertEqual(row['lo_cust_key'], '42')
+        self.assertIsInstance(row['lo_orderdate'], datetime.date)
+        for nested in row['lo_record_field']:
+            self.assertIsInstance(nested['date'], datetime.datetime)
+
+    def test_seeded_row_range(self):
+        """
+        This tests seeded generation is reproducible and any range of rows can be regenerated
+        independently of the others.
+        """
+        self.data_gen.seed = 1234
+        self.data_gen.primary_key_cols = ['lo_order_key']
+        fakerowgen = FakeRowGen(self.data_gen, batch_size=8, seed_key='lineorder')
+        rows = fakerowgen.columns_to_rows(fakerowgen.generate_row_range(0, 20))
+        self.assertEqual([row['lo_order_key'] for row in rows],
+                         [str(i) for i in range(1, 21)])
+
+        other = FakeRowGen(self.data_gen, batch_size=8, seed_key='lineorder')
+        self.assertEqual(
+            other.columns_to_rows(other.generate_row_range(5, 10)), rows[5:15])
+
+        other_table = FakeRowGen(self.data_gen, batch_size=8, seed_key='other')
+        self.assertNotEqual(
+            other_table.columns_to_rows(other_table.generate_row_range(0, 20)),
+            rows)
+
+        histogram_row = {'lo_cust_key': 42, 'frequency': 20}
+        self.assertEqual(list(fakerowgen.process(dict(histogram_row))),
+                         list(other.process(dict(histogram_row))))
+
+        self.assertEqual(get_row_ranges(20, 8), [(0, 8), (8, 8), (16, 4)])
+
     def test_get_field_dict(self):
         """
         This tests the ability of the FakeRowGen.get_field_dict method to extract a single field
@@ -239,6 +311,44 @@ class TestPerformantDataGenerator(unittest.TestCase):
         self.assertTrue(uniform_key)
         self.assertLessEqual(uniform_key, self.data_gen.n_keys)
 
+    def test_seeded_get_skewed_key(self):
+        """
+        This tests seeded get_skewed_key draws different keys for every row,
+        the same way on every run.
+        """
+        self.data_gen.seed = 1234
+        for distribution in ['uniform', 'binomial', 'zipf']:
+            fakerowgen = FakeRowGen(self.data_gen, seed_key='lineorder')
+            fakerowgen.setup()
+            keys = [fakerowgen.get_skewed_key(distribution) for _ in range(20)]
+            self.assertGreater(len(set(keys)), 1)
+
+            other = FakeRowGen(self.data_gen, seed_key='lineorder')
+            other.setup()
+            self.assertEqual(
+                keys, [other.get_skewed_key(distribution) for _ in range(20)])
+
+    def test_key_sampler(self):
+        """
+        This tests the KeySampler draws keys with the precomputed distribution.
+        """
+        zipf_keys = KeySampler.zipf(1000).sample(10000)
+        self.assertGreaterEqual(zipf_keys.min(), 1)
+        self.assertLessEqual(zipf_keys.max(), 1000)
+        # The first key is the most frequent.
+        self.assertEqual(np.bincount(zipf_keys).argmax(), 1)
+
+        histogram_keys = KeySampler([3, 0, 1], keys=['a', 'b', 'c']).sample(1000)
+        self.assertNotIn('b', histogram_keys)
+        self.assertGreater(np.sum(histogram_keys == 'a'),
+                           np.sum(histogram_keys == 'c'))
+
+        self.data_gen.key_skew = 'zipf'
+        self.fakerowgen.setup()
+        self.assertIsNotNone(self.fakerowgen.zipf_sampler)
+        keys = self.fakerowgen.get_skewed_keys(100, distribution='zipf')
+        self.assertLessEqual(keys.max(), self.data_gen.n_keys)
+
 
 if __name__ == '__main__':
     unittest.main()
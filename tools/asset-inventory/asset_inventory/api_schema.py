@@ -15,11 +15,14 @@
 # limitations under the License.
 """Generates BigQuery schema from API discovery documents."""
 
+import logging
 import re
 
 from asset_inventory import bigquery_schema
 import requests
 
+DISCOVERY_DIRECTORY_URL = 'https://content.googleapis.com/discovery/v1/apis'
+
 
 class APISchema(object):
     """Convert a CAI asset type to a BigQuery table schema.
@@ -32,24 +35,99 @@ class APISchema(object):
 
     _discovery_document_cache = {}
     _schema_cache = {}
+    # optional `discovery_cache.DiscoveryCache` persisting documents and
+    # schemas across processes.
+    _persistent_cache = None
+
+    @classmethod
+    def set_persistent_cache(cls, persistent_cache):
+        """Use a `discovery_cache.DiscoveryCache` behind the in-memory caches.
+
+        Args:
+            persistent_cache: DiscoveryCache or None to disable.
+        """
+        cls._persistent_cache = persistent_cache
 
     @classmethod
-    def _get_discovery_document(cls, dd_url):
-        """Retrieve and cache a discovery document."""
-        if dd_url in cls._discovery_document_cache:
+    def _fetch_discovery_document(cls, dd_url, entry=None):
+        """Fetch a discovery document, revalidating the cached entry if any.
+
+        Args:
+            dd_url: Discovery document url.
+            entry: persistent cache entry for the url or None.
+        Returns:
+            The discovery document or None.
+        """
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        try:
+            response = requests.get(dd_url, headers=headers, timeout=3.05)
+        except requests.exceptions.RequestException:
+            # use a stale document over nothing.
+            if entry:
+                logging.warning('using stale discovery document %s', dd_url)
+                return entry['document']
+            raise
+        if response.status_code == 304 and entry:
+            cls._persistent_cache.touch_document(entry)
+            return entry['document']
+        if response.status_code == 200:
+            try:
+                discovery_document = response.json()
+            except ValueError:
+                return None
+            if cls._persistent_cache:
+                cls._persistent_cache.put_document(
+                    dd_url, discovery_document, response.headers.get('ETag'))
+            return discovery_document
+        return entry['document'] if entry else None
+
+    @classmethod
+    def _get_discovery_document(cls, dd_url, revalidate=False):
+        """Retrieve and cache a discovery document.
+
+        Args:
+            dd_url: Discovery document url.
+            revalidate: If a fresh persistent cache entry should be
+              revalidated anyway.
+        Returns:
+            The discovery document or None.
+        """
+        if dd_url in cls._discovery_document_cache and not revalidate:
             return cls._discovery_document_cache[dd_url]
         discovery_document = None
         # Ignore discovery document urls that aren't urls.
         if dd_url and dd_url.startswith('http'):
-            response = requests.get(dd_url, timeout=3.05)
-            if response.status_code == 200:
-                try:
-                    discovery_document = response.json()
-                except ValueError:
-                    pass
+            persistent_cache = cls._persistent_cache
+            entry = None
+            if persistent_cache:
+                entry = persistent_cache.get_document_entry(dd_url)
+            if entry and (persistent_cache.offline or
+                          (persistent_cache.is_fresh(entry) and
+                           not revalidate)):
+                discovery_document = entry['document']
+            elif not (persistent_cache and persistent_cache.offline):
+                discovery_document = cls._fetch_discovery_document(dd_url,
+                                                                   entry)
         cls._discovery_document_cache[dd_url] = discovery_document
         return discovery_document
 
+    @classmethod
+    def prewarm_persistent_cache(cls):
+        """Fetch or revalidate discovery documents in the persistent cache.
+
+        Called before submitting a pipeline so workers find fresh documents in
+        the cache and don't need to fetch them. The discovery directory is
+        always fetched, other documents are ones a previous run cached.
+        """
+        if not cls._persistent_cache or cls._persistent_cache.offline:
+            return
+        urls = set(cls._persistent_cache.document_urls())
+        urls.add(DISCOVERY_DIRECTORY_URL)
+        for dd_url in sorted(urls):
+            cls._get_discovery_document(dd_url, revalidate=True)
+
     @classmethod
     def _get_api_name_for_discovery_document_url(cls, dd_url):
         """Get API name from discovery document url.
@@ -86,8 +164,8 @@ class APISchema(object):
         discovery_documents += [doc] if doc else []
         # and discovery documents from other versions of the same API.
         all_discovery_docs = cls._get_discovery_document(
-            'https://content.googleapis.com/discovery/v1/apis')
-        for discovery_doc in all_discovery_docs['items']:
+            DISCOVERY_DIRECTORY_URL) or {}
+        for discovery_doc in all_discovery_docs.get('items', []):
             dru = discovery_doc['discoveryRestUrl']
             if api_name == discovery_doc['name'] and dru != doc_url:
                 doc = cls._get_discovery_document(dru)
@@ -345,13 +423,20 @@ class APISchema(object):
         cache_key = cls._get_cache_key(resource_name, document)
         if cache_key in cls._schema_cache:
             return cls._schema_cache[cache_key]
-        resources = cls._get_document_resources(document)
-        field_list = []
-        if resource_name in resources:
-            resource = resources[resource_name]
-            properties_map = resource['properties']
-            field_list = cls._properties_map_to_field_list(
-                properties_map, resources, {resource_name: True})
+        persistent_cache = cls._persistent_cache
+        field_list = None
+        if persistent_cache:
+            field_list = persistent_cache.get_schema(cache_key, document)
+        if field_list is None:
+            resources = cls._get_document_resources(document)
+            field_list = []
+            if resource_name in resources:
+                resource = resources[resource_name]
+                properties_map = resource['properties']
+                field_list = cls._properties_map_to_field_list(
+                    properties_map, resources, {resource_name: True})
+            if persistent_cache:
+                persistent_cache.put_schema(cache_key, document, field_list)
         cls._schema_cache[cache_key] = field_list
         return field_list
 
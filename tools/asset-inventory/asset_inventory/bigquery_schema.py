@@ -28,6 +28,9 @@ The entry points are:
     `merge_schemas` - Combines multiple BigQuery schemas and returns a new schema
     that is a union of both.
 
+    `merge_indexed_schemas` - Same as `merge_schemas` but for schemas indexed
+    by field name with `index_schema`, convert back with `unindex_schema`.
+
     `get_field_by_name` - Returns a field with the supplied name from a list of
     BigQuery field.
 
@@ -36,7 +39,6 @@ This module helps import json documents into BigQuery.
 """
 
 from collections import defaultdict
-import copy
 from numbers import Number
 import re
 
@@ -157,18 +159,69 @@ def is_additional_property_fields(fields):
         or (f.get('name', None) == 'value') for f in fields)
 
 
+def _is_additional_property_index(indexed_fields):
+    """True if the indexed fields are part of an 'additionalProperties' field."""
+    return (len(indexed_fields) == 2 and
+            is_additional_property_fields(list(indexed_fields.values())))
+
+
+def index_schema(schema):
+    """Convert a list schema into a name indexed schema.
+
+    The indexed schema is a dict of lower cased field name to field, each
+    RECORD field's 'fields' are also indexed. Python dicts preserve insertion
+    order so converting back with `unindex_schema` keeps the field order. Fields
+    are copied so the input schema is never modified. Fields that differ only
+    by case are merged as BigQuery column names are case-insensitive.
+
+    Args:
+        schema: List of `google.cloud.bigquery.SchemaField` like dicts.
+    Returns:
+        Dict of lower cased field name to `google.cloud.bigquery.SchemaField`
+        like dicts.
+    """
+    indexed = {}
+    for field in schema:
+        field = dict(field)
+        if 'fields' in field:
+            field['fields'] = index_schema(field['fields'])
+        key = field['name'].lower()
+        if key in indexed:
+            indexed[key] = _merge_fields(indexed[key], field)
+        else:
+            indexed[key] = field
+    return indexed
+
+
+def unindex_schema(indexed_schema):
+    """Convert a name indexed schema back into a list schema.
+
+    Args:
+        indexed_schema: Schema returned by `index_schema`.
+    Returns:
+        List of `google.cloud.bigquery.SchemaField` like dicts.
+    """
+    schema = []
+    for field in indexed_schema.values():
+        field = dict(field)
+        if 'fields' in field:
+            field['fields'] = unindex_schema(field['fields'])
+        schema.append(field)
+    return schema
+
+
 def merge_additional_properties_fields(apf, fields):
     """Adds "fields" into the "value" property of apf.
     This is to match the specific type of additional property in the new schema.
     Args:
-        apf: the additional property field
-        fields: list of schema json documents to merge into the value field.
+        apf: the indexed additional property field
+        fields: indexed schema to merge into the value field.
     """
-    i, value_field = get_field_by_name(apf, 'value')
-    for f in fields:
+    value_field = apf['value']
+    for f in fields.values():
         if f.get('name', None) not in ('name', 'value'):
             value_field = _merge_fields(value_field, f)
-    apf[i] = value_field
+    apf['value'] = value_field
 
 
 def _merge_fields(destination_field, source_field, num_properties=0):
@@ -178,6 +231,9 @@ def _merge_fields(destination_field, source_field, num_properties=0):
     trying to combine schemas. To handle this we try to choose a more specific
     type if there is a conflict and merge any enclosed fields.
 
+    Any nested 'fields' must be indexed (see `index_schema`). The source_field
+    sub-tree is adopted rather than copied and must not be used afterwards.
+
     Args:
         destination_field:  `google.cloud.bigquery.SchemaField` dict.
         source_field: `google.cloud.bigquery.SchemaField` dict.
@@ -209,22 +265,16 @@ def _merge_fields(destination_field, source_field, num_properties=0):
     # documents of type RECORD are converted to the REPEATED
     # additionalProperties name value pairs.
 
-    src_fields = source_field.get('fields', [])
-    dst_fields = destination_field.get('fields', [])
+    src_fields = source_field.get('fields', {})
+    dst_fields = destination_field.get('fields', {})
+    src_is_apf = _is_additional_property_index(src_fields)
+    dst_is_apf = _is_additional_property_index(dst_fields)
 
-    if (is_additional_property_fields(src_fields) and not
-        is_additional_property_fields(dst_fields)):
+    if src_is_apf and not dst_is_apf:
         destination_field['mode'] = 'REPEATED'
         merge_additional_properties_fields(src_fields, dst_fields)
-        destination_field['fields'] = copy.deepcopy(src_fields)
-
-    elif (is_additional_property_fields(dst_fields) and not
-          is_additional_property_fields(src_fields)):
-        destination_field['mode'] = 'REPEATED'
-        merge_additional_properties_fields(dst_fields, src_fields)
-        destination_field['fields'] = dst_fields
-    elif (is_additional_property_fields(dst_fields) and
-          is_additional_property_fields(src_fields)):
+        destination_field['fields'] = src_fields
+    elif dst_is_apf:
         destination_field['mode'] = 'REPEATED'
         merge_additional_properties_fields(dst_fields, src_fields)
         destination_field['fields'] = dst_fields
@@ -237,20 +287,23 @@ def _merge_fields(destination_field, source_field, num_properties=0):
 
 def contains_additional_properties(schema):
     """True if the schema contains an 'additionalProperties' field."""
+    if isinstance(schema, dict):
+        return 'additionalproperties' in schema
     return get_field_by_name(schema, 'additionalProperties')[0] is not None
 
 
 def _merge_schema(destination_schema, source_schema, num_properties=0):
     """Add source_schema fields to the destination_schema.
 
-    Modifies the destination_schema list argument with fields from
-    source_schema. Calls _merge_fields when a field exists in both with the same
-    name.
+    Modifies the destination_schema with fields from source_schema. Calls
+    _merge_fields when a field exists in both with the same name. Both schemas
+    are indexed (see `index_schema`) so each lookup is constant time and the
+    source sub-trees are adopted rather than copied.
     Args:
-        destination_schema: List of `google.cloud.bigquery.SchemaField`.
-        source_schema: List of `google.cloud.bigquery.SchemaField`.
+        destination_schema: Indexed `google.cloud.bigquery.SchemaField` dicts.
+        source_schema: Indexed `google.cloud.bigquery.SchemaField` dicts.
     Returns:
-        The modified destination_schema list.
+        The modified destination_schema dict.
 
     """
     # short circuit.
@@ -266,24 +319,45 @@ def _merge_schema(destination_schema, source_schema, num_properties=0):
     if contains_additional_properties(destination_schema):
         return destination_schema
     if contains_additional_properties(source_schema):
-        return copy.deepcopy(source_schema)
+        return source_schema
 
-    # modify the destination_schema_list for efficiency
-    for source_field in source_schema:
+    # modify the destination_schema for efficiency
+    for key, source_field in source_schema.items():
         # short circuit.
         if num_properties > BQ_MAX_COLUMNS:
             return destination_schema
-        i, destination_field = get_field_by_name(destination_schema,
-                                                 source_field['name'])
+        destination_field = destination_schema.get(key, None)
         # field with same name exists, merge them.
         if destination_field:
-            destination_schema[i] = _merge_fields(destination_field,
-                                                  source_field,
-                                                  num_properties)
-            num_properties = num_properties + len(destination_schema[i].get('fields', [])) + 1
+            destination_field = _merge_fields(destination_field,
+                                              source_field,
+                                              num_properties)
+            destination_schema[key] = destination_field
+            num_properties = (num_properties +
+                              len(destination_field.get('fields', {})) + 1)
         else:
-            destination_schema.append(copy.deepcopy(source_field))
-            num_properties = num_properties + len(source_field.get('fields', [])) + 1
+            destination_schema[key] = source_field
+            num_properties = num_properties + len(source_field.get('fields', {})) + 1
+    return destination_schema
+
+
+def merge_indexed_schemas(indexed_schemas):
+    """Combines indexed BigQuery schemas.
+
+    Like `merge_schemas` but the inputs and result are indexed schemas (see
+    `index_schema`). The first schema is modified and returned, fields of the
+    others are moved into it rather than copied, so callers holding many schemas, like
+    a combiner accumulator, can merge without converting to and from lists.
+
+    Args:
+        indexed_schemas: List of indexed schemas.
+    Returns:
+        Indexed schema.
+    """
+    schemas = iter(indexed_schemas)
+    destination_schema = next(schemas, {})
+    for source_schema in schemas:
+        destination_schema = _merge_schema(destination_schema, source_schema)
     return destination_schema
 
 
@@ -299,10 +373,8 @@ def merge_schemas(schemas):
         List of `google.cloud.bigquery.SchemaField` objects.
 
     """
-    destination_schema = []
-    for source_schema in schemas:
-        destination_schema = _merge_schema(destination_schema, source_schema)
-    return destination_schema
+    return unindex_schema(
+        merge_indexed_schemas([index_schema(schema) for schema in schemas]))
 
 
 def _convert_labels_dict_to_list(parent):
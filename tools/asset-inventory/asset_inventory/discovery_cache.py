@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+#
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Persistent cache of API discovery documents and their BigQuery schemas.
+
+Used by `api_schema.APISchema` so that discovery documents are fetched and
+translated once rather than by every worker process and command line run. The
+cache directory can be local or any location supported by Beam's
+`FileSystems` like a GCS url, making it shareable by all Dataflow workers.
+
+Entries are json objects stored under a versioned directory and named by the
+sha256 hash of their key:
+
+    <cache_dir>/v1/documents/<hash>.json - a discovery document, with the url,
+    ETag and fetch time used for TTL and ETag revalidation.
+
+    <cache_dir>/v1/schemas/<hash>.json - a translated BigQuery schema, the key
+    includes a hash of the discovery document content so the schema is
+    invalidated when the document changes.
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from apache_beam.io.filesystems import FileSystems
+
+CACHE_VERSION = 'v1'
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def content_hash(value):
+    """Return the sha256 hex digest of the json serialized value."""
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class DiscoveryCache(object):
+    """Read and write discovery documents and schemas to a cache directory.
+
+    Documents older than ttl_seconds are stale and should be revalidated with
+    their ETag. When offline is True, stale documents are still used and
+    nothing is ever fetched.
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 offline=False):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+
+    def _path(self, kind, key):
+        file_name = hashlib.sha256(key.encode()).hexdigest() + '.json'
+        return FileSystems.join(self.cache_dir, CACHE_VERSION, kind,
+                                file_name)
+
+    @classmethod
+    def _read(cls, path):
+        """Return the json object at path or None if it doesn't exist."""
+        if not FileSystems.exists(path):
+            return None
+        try:
+            with FileSystems.open(path) as f:
+                return json.loads(f.read())
+        except (IOError, ValueError) as e:
+            logging.warning('ignoring invalid cache entry %s: %s', path, e)
+            return None
+
+    @classmethod
+    def _write(cls, path, value):
+        with FileSystems.create(path, mime_type='application/json') as f:
+            f.write(json.dumps(value).encode())
+
+    def is_fresh(self, entry):
+        """True if the document entry can be used without revalidation."""
+        return (self.offline or
+                time.time() - entry['fetch_time'] < self.ttl_seconds)
+
+    def get_document_entry(self, url):
+        """Return the cached entry for the discovery document url.
+
+        Args:
+            url: discovery document url.
+        Returns:
+            dict with 'url', 'etag', 'fetch_time' and 'document' keys or None.
+        """
+        entry = self._read(self._path('documents', url))
+        if entry and entry.get('url') == url:
+            return entry
+        return None
+
+    def put_document(self, url, document, etag=None):
+        """Store the discovery document fetched from url now."""
+        entry = {'url': url,
+                 'etag': etag,
+                 'fetch_time': time.time(),
+                 'document': document}
+        self._write(self._path('documents', url), entry)
+        return entry
+
+    def touch_document(self, entry):
+        """Mark a revalidated (not modified) document entry as fresh."""
+        return self.put_document(entry['url'], entry['document'],
+                                 entry['etag'])
+
+    def document_urls(self):
+        """Return the urls of all cached discovery documents."""
+        pattern = FileSystems.join(self.cache_dir, CACHE_VERSION, 'documents',
+                                   '*.json')
+        urls = []
+        for match_result in FileSystems.match([pattern]):
+            for metadata in match_result.metadata_list:
+                entry = self._read(metadata.path)
+                if entry and entry.get('url'):
+                    urls.append(entry['url'])
+        return urls
+
+    def _schema_key(self, cache_key, document):
+        return cache_key + '.' + content_hash(document)
+
+    def get_schema(self, cache_key, document):
+        """Return the cached schema translated from document or None."""
+        key = self._schema_key(cache_key, document)
+        entry = self._read(self._path('schemas', key))
+        if entry and entry.get('key') == key:
+            return entry['schema']
+        return None
+
+    def put_schema(self, cache_key, document, schema):
+        """Store the schema translated from document."""
+        key = self._schema_key(cache_key, document)
+        self._write(self._path('schemas', key),
+                    {'key': key, 'schema': schema})
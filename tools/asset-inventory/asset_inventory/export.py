@@ -24,14 +24,21 @@ https://cloud.google.com/resource-manager/docs/cloud-asset-inventory/overview
 from __future__ import print_function
 
 import argparse
+import collections
 import logging
 import pprint
+import time
 
 from concurrent import futures
 
 from google.cloud.exceptions import GoogleCloudError
 from google.cloud import asset_v1
 
+# Exports of multiple parents running at once.
+MAX_CONCURRENT_EXPORTS = 10
+MIN_POLL_INTERVAL_SECONDS = 1
+MAX_POLL_INTERVAL_SECONDS = 60
+
 
 class Clients(object):
     """Holds API client objects."""
@@ -62,14 +69,31 @@ def export_to_gcs(parent, gcs_destination, content_type, asset_types):
     Returns:
         The result of the successfully completed export operation.
     """
+    return start_export_to_gcs(parent, gcs_destination, content_type,
+                               asset_types).result()
+
+
+def start_export_to_gcs(parent, gcs_destination, content_type, asset_types):
+    """Starts exporting assets to GCS destination.
+
+    Same as `export_to_gcs` but doesn't wait for the export to complete.
+    Args:
+        parent: Either `project/<project-id>` or `organization/<organization#>`.
+        gcs_destination: GCS uri to export to.
+        content_type: Either `RESOURCE` or `IAM_POLICY` or
+        None/`CONTENT_TYPE_UNSPECIFIED` for just asset names.
+        asset_types: None for all asset types or a list of asset names to
+        export.
+    Returns:
+        The long-running export operation.
+    """
     output_config = asset_v1.types.OutputConfig()
     output_config.gcs_destination.uri = gcs_destination
-    operation = Clients.cloudasset().export_assets(
+    return Clients.cloudasset().export_assets(
         {'parent': parent,
          'output_config': output_config,
          'content_type': content_type,
          'asset_types': asset_types})
-    return operation.result()
 
 
 def export_to_gcs_content_types(parent, gcs_destination, content_types,
@@ -117,6 +141,88 @@ def export_to_gcs_content_types(parent, gcs_destination, content_types,
     return operation_results
 
 
+def get_parent_gcs_destination(gcs_destination, parent, content_type):
+    """GCS object for the export of a parent's content type.
+
+    Objects of all parents are written to the same GCS prefix so they can all
+    be imported with a single `<gcs_destination>/*.json` pattern.
+    """
+    return '{}/{}.{}.json'.format(gcs_destination, parent.replace('/', '-'),
+                                  content_type)
+
+
+def export_to_gcs_parents(parents, gcs_destination, content_types,
+                          asset_types,
+                          max_concurrent_exports=MAX_CONCURRENT_EXPORTS):
+    """Export the content types of multiple parents concurrently.
+
+    Starts up to max_concurrent_exports exports at a time and polls all the
+    running export operations from a single thread, backing off exponentially
+    while none complete. Starts queued exports as running ones complete, so
+    the export takes about as long as the slowest exports rather than the sum
+    of them. The latency of each export is logged.
+
+    Args:
+        parents: List of organizations, folders or projects to export.
+        gcs_destination: GCS object prefix to export to (gs://bucket/prefix),
+          see `get_parent_gcs_destination`.
+        content_types: List of [RESOURCE, NAME, IAM_POLICY, NAME] to export.
+        Defaults to [RESOURCE, NAME, IAM_POLICY]
+        asset_types: List of asset_types to export. Supply `None` to get
+        everything.
+        max_concurrent_exports: Maximum number of running exports.
+    Returns:
+        A dict of (parent, content_type) and export result objects.
+    """
+    logging.info('performing export from %s to %s of content_types %s',
+                 parents, gcs_destination, str(content_types))
+    if asset_types == ['*']:
+        asset_types = None
+    if content_types is None:
+        content_types = ['RESOURCE', 'IAM_POLICY']
+    queued_exports = collections.deque(
+        (parent, content_type)
+        for parent in parents for content_type in content_types)
+    running_exports = {}
+    operation_results = {}
+    latencies = {}
+    poll_interval = MIN_POLL_INTERVAL_SECONDS
+    while queued_exports or running_exports:
+        while (queued_exports and
+               len(running_exports) < max_concurrent_exports):
+            parent, content_type = queued_exports.popleft()
+            operation = start_export_to_gcs(
+                parent,
+                get_parent_gcs_destination(gcs_destination, parent,
+                                           content_type),
+                content_type, asset_types)
+            running_exports[(parent, content_type)] = (operation, time.time())
+
+        completed_exports = [
+            export_key
+            for export_key, (operation, _) in running_exports.items()
+            if operation.done()]
+        for export_key in completed_exports:
+            operation, start_time = running_exports.pop(export_key)
+            latencies[export_key] = time.time() - start_time
+            try:
+                operation_results[export_key] = operation.result()
+            except GoogleCloudError:
+                logging.exception('Error exporting %s', export_key)
+                raise
+            logging.info('exported %s %s in %.1f seconds', export_key[0],
+                         export_key[1], latencies[export_key])
+
+        if completed_exports:
+            poll_interval = MIN_POLL_INTERVAL_SECONDS
+        elif running_exports:
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL_SECONDS)
+
+    logging.info('export latencies (seconds): %s', pprint.pformat(latencies))
+    return operation_results
+
+
 def add_argparse_args(ap, required=False):
     """Configure the `argparse.ArgumentParser`."""
     ap.formatter_class = argparse.RawTextHelpFormatter
@@ -146,7 +252,16 @@ def add_argparse_args(ap, required=False):
         '--parent',
         required=required,
         help=('Organization number (organizations/123)'
-              'or project id (projects/id) or number (projects/123).'))
+              'or project id (projects/id) or number (projects/123). '
+              'A comma separated list of organizations, folders (folders/123) '
+              'and projects exports each of them concurrently.'))
+
+    ap.add_argument(
+        '--max-concurrent-exports',
+        type=int,
+        default=MAX_CONCURRENT_EXPORTS,
+        help=('When exporting multiple parents, the maximum number of exports '
+              'running at once.'))
 
     ap.add_argument(
         '--gcs-destination', help='URL of the gcs file to write to.',
@@ -181,6 +296,12 @@ def add_argparse_args(ap, required=False):
         nargs='?')
 
 
+def get_parents(parent_argument):
+    """Split the comma separated --parent argument into a list of parents."""
+    return [parent.strip() for parent in parent_argument.split(',')
+            if parent.strip()]
+
+
 def main():
     logging.basicConfig()
     logging.getLogger().setLevel(logging.INFO)
@@ -188,11 +309,21 @@ def main():
     add_argparse_args(ap, required=True)
     args = ap.parse_args()
     logging.info('Exporting assets.')
-    export_result = export_to_gcs_content_types(
-        args.parent,
-        args.gcs_destination,
-        args.content_types,
-        asset_types=args.asset_types.split(',') if args.asset_types else None)
+    asset_types = args.asset_types.split(',') if args.asset_types else None
+    parents = get_parents(args.parent)
+    if len(parents) > 1:
+        export_result = export_to_gcs_parents(
+            parents,
+            args.gcs_destination,
+            args.content_types,
+            asset_types,
+            args.max_concurrent_exports)
+    else:
+        export_result = export_to_gcs_content_types(
+            args.parent,
+            args.gcs_destination,
+            args.content_types,
+            asset_types=asset_types)
     logging.info('Export results %s.', pprint.pformat(export_result))
 
 
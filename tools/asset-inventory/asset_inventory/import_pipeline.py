@@ -28,8 +28,10 @@ environments that are not easily suited to large memory single machines like
 Cloud Functions or App Engine.
 """
 
+import collections
 import copy
 from datetime import datetime
+import hashlib
 import json
 import logging
 import pprint
@@ -38,12 +40,15 @@ import random
 import apache_beam as beam
 from apache_beam.coders import Coder
 from apache_beam.io import ReadFromText
+from apache_beam.io.filesystem import CompressionTypes
 from apache_beam.io.filesystems import FileSystems
 from apache_beam.options.pipeline_options import PipelineOptions
 from apache_beam.options.value_provider import StaticValueProvider
 from apache_beam.transforms import core
 from asset_inventory import bigquery_schema
 from asset_inventory.api_schema import APISchema
+from asset_inventory.discovery_cache import DEFAULT_TTL_SECONDS
+from asset_inventory.discovery_cache import DiscoveryCache
 from six import string_types
 from typing import Any
 
@@ -51,6 +56,26 @@ from google.api_core.exceptions import BadRequest
 from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Write staged files in chunks of this size.
+STAGE_WRITE_BUFFER_BYTES = 1024 * 1024
+# Roll over to a new staged file after this many uncompressed bytes.
+STAGE_MAX_FILE_BYTES = 1024 * 1024 * 1024
+# Maximum staged files open at once by a bundle.
+STAGE_MAX_OPEN_FILES = 16
+# Table in the dataset recording fingerprints of loaded tables.
+MANIFEST_TABLE_NAME = '_asset_inventory_manifest'
+FINGERPRINT_MODULUS = 2 ** 64
+
+
+def is_true(value):
+    """True if the string option value is a true value."""
+    return bool(value) and value.lower() in ('yes', 'true', 't', '1')
+
 
 class JsonCoder(Coder):
     """A coder interpreting each line as a JSON string."""
@@ -132,17 +157,68 @@ class AssignGroupByKey(beam.DoFn):
         yield key, element
 
 
+def get_discovery_cache(discovery_cache, discovery_cache_ttl,
+                        discovery_cache_offline):
+    """Construct the `DiscoveryCache` from the pipeline option values.
+
+    Args:
+        discovery_cache: ValueProvider of the cache location, or None.
+        discovery_cache_ttl: ValueProvider of the document TTL in seconds.
+        discovery_cache_offline: ValueProvider of 'true' to never fetch.
+    Returns:
+        DiscoveryCache or None if no cache location is supplied.
+    """
+    cache_dir = discovery_cache.get() if discovery_cache else None
+    if not cache_dir:
+        return None
+    ttl = discovery_cache_ttl.get() if discovery_cache_ttl else None
+    offline = (discovery_cache_offline.get()
+               if discovery_cache_offline else None)
+    return DiscoveryCache(
+        cache_dir,
+        ttl_seconds=int(ttl) if ttl else DEFAULT_TTL_SECONDS,
+        offline=is_true(offline))
+
+
 class BigQuerySchemaCombineFn(core.CombineFn):
-    """Reduce a list of schemas into a single schema."""
+    """Reduce a list of schemas into a single schema.
+
+    The accumulator is a name indexed schema (see
+    `bigquery_schema.index_schema`) so merging each input is linear in the
+    size of the input rather than the accumulated schema. It's converted to the
+    list form only in `extract_output`.
+
+    If a discovery_cache location is supplied, discovery documents and API
+    schemas are read from (and written to) it instead of fetched by each
+    worker.
+    """
+
+    def __init__(self, discovery_cache=None, discovery_cache_ttl=None,
+                 discovery_cache_offline=None):
+        if isinstance(discovery_cache, string_types):
+            discovery_cache = StaticValueProvider(str, discovery_cache)
+        if isinstance(discovery_cache_ttl, string_types):
+            discovery_cache_ttl = StaticValueProvider(str, discovery_cache_ttl)
+        if isinstance(discovery_cache_offline, string_types):
+            discovery_cache_offline = StaticValueProvider(
+                str, discovery_cache_offline)
+        self.discovery_cache = discovery_cache
+        self.discovery_cache_ttl = discovery_cache_ttl
+        self.discovery_cache_offline = discovery_cache_offline
+
+    def setup(self, *args, **kwargs):
+        APISchema.set_persistent_cache(get_discovery_cache(
+            self.discovery_cache, self.discovery_cache_ttl,
+            self.discovery_cache_offline))
 
     def create_accumulator(self):
-        return []
+        return {}
 
     def merge_accumulators(self, accumulators, **kwargs):
-        return bigquery_schema.merge_schemas(accumulators)
+        return bigquery_schema.merge_indexed_schemas(accumulators)
 
     def extract_output(self, accumulator, **kwargs):
-        return accumulator
+        return bigquery_schema.unindex_schema(accumulator)
 
     @staticmethod
     def get_api_schema_for_resource(element):
@@ -159,12 +235,65 @@ class BigQuerySchemaCombineFn(core.CombineFn):
         resource_schema = self.get_api_schema_for_resource(element)
         # use the API resource's schema if we have one.
         if bigquery_schema.contains_resource_data_schema(resource_schema):
-            return resource_schema
+            return bigquery_schema.index_schema(resource_schema)
         # we don't have a valid API schema, use the element schema.
-        return bigquery_schema.merge_schemas([
+        return bigquery_schema.merge_indexed_schemas([
             mutable_accumulator,
-            resource_schema,
-            bigquery_schema.translate_json_to_schema(element)])
+            bigquery_schema.index_schema(resource_schema),
+            bigquery_schema.index_schema(
+                bigquery_schema.translate_json_to_schema(element))])
+
+
+class FingerprintAsset(beam.DoFn):
+    """Key the hash of each asset's content by its table key.
+
+    Only when incremental, otherwise fingerprints aren't needed.
+    """
+
+    def __init__(self, incremental, *unused_args, **unused_kwargs):
+        if isinstance(incremental, string_types):
+            incremental = StaticValueProvider(str, incremental)
+        self.incremental = incremental
+
+    def process(self, element, **kwargs):
+        if is_true(self.incremental.get()):
+            yield (AssignGroupByKey.remove_shard(element[0]),
+                   asset_fingerprint(element[1]))
+
+
+def asset_fingerprint(asset):
+    """Return a 64 bit hash of the asset's json content."""
+    digest = hashlib.sha256(
+        json.dumps(asset, sort_keys=True).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class FingerprintCombineFn(core.CombineFn):
+    """Combine asset hashes into a table fingerprint.
+
+    Hashes are summed so the fingerprint is independent of the order assets
+    are read in, the output is a tuple of the fingerprint hex string and the
+    number of assets.
+    """
+
+    def create_accumulator(self):
+        return 0, 0
+
+    def add_input(self, mutable_accumulator, element, **kwargs):
+        fingerprint, num_assets = mutable_accumulator
+        return (fingerprint + element) % FINGERPRINT_MODULUS, num_assets + 1
+
+    def merge_accumulators(self, accumulators, **kwargs):
+        fingerprint, num_assets = 0, 0
+        for accumulator_fingerprint, accumulator_num_assets in accumulators:
+            fingerprint = ((fingerprint + accumulator_fingerprint) %
+                           FINGERPRINT_MODULUS)
+            num_assets += accumulator_num_assets
+        return fingerprint, num_assets
+
+    def extract_output(self, accumulator, **kwargs):
+        fingerprint, num_assets = accumulator
+        return '{:016x}'.format(fingerprint), num_assets
 
 
 class BigQuerySanitize(beam.DoFn):
@@ -272,61 +401,147 @@ class CombinePolicyResource(beam.DoFn):
             yield combined
 
 
+def json_dumps_bytes(value):
+    """Serialize value to json bytes, with orjson when it's installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # orjson rejects integers over 64 bits, json does not.
+            pass
+    return json.dumps(value).encode()
+
+
+class StagedFile(object):
+    """Buffered writer of a single staged newline delimited json file."""
+
+    def __init__(self, file_path, compression_type):
+        self.file_path = file_path
+        self.file_handle = FileSystems.create(
+            file_path, mime_type='text/json',
+            compression_type=compression_type)
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.bytes_written = 0
+
+    def write_line(self, line):
+        self.buffer.append(line)
+        self.buffer.append(b'\n')
+        self.buffered_bytes += len(line) + 1
+        self.bytes_written += len(line) + 1
+        if self.buffered_bytes >= STAGE_WRITE_BUFFER_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file_handle.write(b''.join(self.buffer))
+        self.buffer = []
+        self.buffered_bytes = 0
+
+    def close(self):
+        self.flush()
+        self.file_handle.close()
+
+
 class WriteToGCS(beam.DoFn):
     """Stage in GCE the files to load into BigQuery.
 
     All written objects are prefixed by the input stage_dir and loadtime. There
     is an object for each group-key, either an object per asset type, or for
-    each asset type version.
+    each asset type version. Once an object holds max_file_bytes (uncompressed)
+    writing rolls over to a new object. Lines are buffered and written in
+    chunks, optionally gzip compressed, and at most max_open_files objects are
+    open at once, the least recently used is closed first.
 
     There is nothing cleaning up these objects, so it might be prudent to have a
     lifecycle policy on the GCS destination bucket to purge old files.
 
     """
 
-    def __init__(self, stage_dir, load_time, *unused_args, **unused_kwargs):
+    def __init__(self, stage_dir, load_time, compression='NONE',
+                 max_file_bytes=str(STAGE_MAX_FILE_BYTES),
+                 max_open_files=str(STAGE_MAX_OPEN_FILES),
+                 *unused_args, **unused_kwargs):
         if isinstance(stage_dir, string_types):
             stage_dir = StaticValueProvider(str, stage_dir)
         if isinstance(load_time, string_types):
             load_time = StaticValueProvider(str, load_time)
+        if isinstance(compression, string_types):
+            compression = StaticValueProvider(str, compression)
+        if isinstance(max_file_bytes, string_types):
+            max_file_bytes = StaticValueProvider(str, max_file_bytes)
+        if isinstance(max_open_files, string_types):
+            max_open_files = StaticValueProvider(str, max_open_files)
 
         self.stage_dir = stage_dir
         self.load_time = load_time
-        self.open_files = {}
+        self.compression = compression
+        self.max_file_bytes = max_file_bytes
+        self.max_open_files = max_open_files
+        self.open_files = collections.OrderedDict()
+        self.file_parts = {}
+
+    def is_gzip(self):
+        return self.compression.get() == 'GZIP'
 
-    def get_path_for_key_name(self, key_name):
+    def get_path_for_key_name(self, key_name, part=0):
         stage_dir = self.stage_dir.get()
         load_time = self.load_time.get()
-        return FileSystems.join(stage_dir, load_time, key_name + '.json')
+        file_name = key_name
+        if part:
+            file_name += '-' + str(part)
+        file_name += '.json'
+        if self.is_gzip():
+            file_name += '.gz'
+        return FileSystems.join(stage_dir, load_time, file_name)
 
     def start_bundle(self):
-        self.open_files = {}
-
-    def _get_file_for_element(self, element):
-        key_name = element[0]
-        if key_name in self.open_files:
-            return self.open_files[key_name], None
-        file_path = self.get_path_for_key_name(key_name)
-        file_handle = FileSystems.create(file_path, mime_type='text/json')
-        self.open_files[key_name] = file_handle
-        return file_handle, file_path
+        self.open_files = collections.OrderedDict()
+        self.file_parts = {}
+
+    def _close_file(self, key_name):
+        self.open_files.pop(key_name).close()
+
+    def _open_file(self, key_name):
+        # cap the number of concurrently open files.
+        max_open_files = max(int(self.max_open_files.get()), 1)
+        while len(self.open_files) >= max_open_files:
+            self._close_file(next(iter(self.open_files)))
+        part = self.file_parts.get(key_name, 0)
+        self.file_parts[key_name] = part + 1
+        compression_type = (CompressionTypes.GZIP if self.is_gzip()
+                            else CompressionTypes.UNCOMPRESSED)
+        staged_file = StagedFile(self.get_path_for_key_name(key_name, part),
+                                 compression_type)
+        self.open_files[key_name] = staged_file
+        return staged_file
 
     def process(self, element, **kwargs):
-        file_handle, created_file_path = self._get_file_for_element(element)
+        key_name = element[0]
+        max_file_bytes = int(self.max_file_bytes.get())
+        staged_file = self.open_files.get(key_name, None)
+        if staged_file:
+            self.open_files.move_to_end(key_name)
+        created_file_paths = []
         for asset_line in element[1]:
-            file_handle.write(json.dumps(asset_line).encode())
-            file_handle.write(b'\n')
-        if created_file_path:
+            if staged_file and staged_file.bytes_written >= max_file_bytes:
+                self._close_file(key_name)
+                staged_file = None
+            if not staged_file:
+                staged_file = self._open_file(key_name)
+                created_file_paths.append(staged_file.file_path)
+            staged_file.write_line(json_dumps_bytes(asset_line))
+        for created_file_path in created_file_paths:
             # key is bigquery table name so each table deleted and created
             # independently
             # value is sharded key and gcs filepath.
-            yield (AssignGroupByKey.remove_shard(element[0]),
-                   (element[0], created_file_path))
+            yield (AssignGroupByKey.remove_shard(key_name),
+                   (key_name, created_file_path))
 
     def finish_bundle(self):
-        for _, file_handle in self.open_files.items():
-            logging.info('finish bundle')
-            file_handle.close()
+        logging.info('finish bundle')
+        for key_name in list(self.open_files):
+            self._close_file(key_name)
 
 
 class AssignShardedKeyForLoad(beam.DoFn):
@@ -373,9 +588,7 @@ class BigQueryDoFn(beam.DoFn):
 
     def asset_type_to_table_name(self, asset_type):
         suffix = ''
-        add_load_date_suffix = self.add_load_date_suffix.get()
-        if (add_load_date_suffix and
-                add_load_date_suffix.lower() in ('yes', 'true', 't', '1')):
+        if is_true(self.add_load_date_suffix.get()):
             suffix = '_' + self.load_time.get()[0:10].replace('-', '')
         return asset_type.replace('.', '_').replace('/', '_') + suffix
 
@@ -386,15 +599,64 @@ class BigQueryDoFn(beam.DoFn):
         self.load_jobs = {}
 
 
+class ReadManifest(BigQueryDoFn):
+    """Read the fingerprints of tables that are unchanged since their load.
+
+    The manifest table records the fingerprint and number of assets of each
+    table when it's loaded. A table is unchanged if its latest manifest
+    fingerprint matches and it still holds the recorded number of rows, a
+    table with a failed or partial load won't match. Yields nothing unless
+    incremental is true. Creates the manifest table if it doesn't exist.
+    """
+
+    def __init__(self, dataset, add_load_date_suffix, load_time,
+                 incremental):
+        BigQueryDoFn.__init__(self, dataset, add_load_date_suffix, load_time)
+        if isinstance(incremental, string_types):
+            incremental = StaticValueProvider(str, incremental)
+        self.incremental = incremental
+
+    def process(self, element, **kwargs):
+        if not is_true(self.incremental.get()):
+            return
+        dataset_ref = self.get_dataset_ref()
+        manifest_table = bigquery.Table(
+            dataset_ref.table(MANIFEST_TABLE_NAME),
+            schema=[bigquery.SchemaField('table_name', 'STRING'),
+                    bigquery.SchemaField('fingerprint', 'STRING'),
+                    bigquery.SchemaField('num_assets', 'INTEGER'),
+                    bigquery.SchemaField('load_time', 'STRING')])
+        self.bigquery_client.create_table(manifest_table, exists_ok=True)
+        dataset_id = '{}.{}'.format(dataset_ref.project, dataset_ref.dataset_id)
+        query = (
+            'SELECT manifest.table_name, manifest.fingerprint, '
+            'manifest.num_assets '
+            'FROM `{dataset}.{manifest}` AS manifest '
+            'JOIN `{dataset}.__TABLES__` AS tables '
+            'ON tables.table_id = manifest.table_name '
+            'AND tables.row_count = manifest.num_assets '
+            'WHERE TRUE QUALIFY ROW_NUMBER() OVER ('
+            'PARTITION BY manifest.table_name '
+            'ORDER BY manifest.load_time DESC) = 1').format(
+            dataset=dataset_id, manifest=MANIFEST_TABLE_NAME)
+        for row in self.bigquery_client.query(
+                query, location=self.dataset_location).result():
+            yield row['table_name'], (row['fingerprint'], row['num_assets'])
+
+
 class DeleteDataSetTables(BigQueryDoFn):
     """Delete tables when truncating and not appending.
 
     If we are not keeping old data around, it safer to delete tables in the
     dataset before loading so that no old records remain.
+
+    When incremental and truncating, tables whose fingerprint matches their
+    unchanged manifest entry are neither deleted nor loaded again, the
+    fingerprint of every other table is recorded in the manifest.
     """
 
     def __init__(self, dataset, add_load_date_suffix, load_time,
-                 write_disposition):
+                 write_disposition, incremental='False'):
         # Can't use super().
         # https://issues.apache.org/jira/browse/BEAM-6158?focusedCommentId=16919945
         # super(DeleteDataSetTables, self).__init__(dataset)
@@ -402,16 +664,40 @@ class DeleteDataSetTables(BigQueryDoFn):
         if isinstance(write_disposition, string_types):
             write_disposition = StaticValueProvider(str, write_disposition)
         self.write_disposition = write_disposition
-
-    def process(self, element, **kwargs):
+        if isinstance(incremental, string_types):
+            incremental = StaticValueProvider(str, incremental)
+        self.incremental = incremental
+
+    def record_manifest(self, table_name, fingerprint):
+        """Record the fingerprint of the table about to be loaded."""
+        errors = self.bigquery_client.insert_rows_json(
+            self.get_dataset_ref().table(MANIFEST_TABLE_NAME),
+            [{'table_name': table_name,
+              'fingerprint': fingerprint[0],
+              'num_assets': fingerprint[1],
+              'load_time': self.load_time.get()}])
+        # without a manifest entry the table is just loaded next time.
+        if errors:
+            logging.warning('error recording manifest of %s: %s', table_name,
+                            errors)
+
+    def process(self, element, fingerprints=None, manifest=None, **kwargs):
         # If we are appending to the table, no need to Delete first.
         if self.write_disposition.get() == 'WRITE_APPEND':
             yield element
             return
 
-        # Delete the BigQuery table prior to loading to it.
         key_name = element[0]
         table_name = self.asset_type_to_table_name(key_name)
+        if is_true(self.incremental.get()):
+            fingerprint = (fingerprints or {}).get(key_name, None)
+            if fingerprint and (manifest or {}).get(table_name) == fingerprint:
+                logging.info('skipping unchanged table %s', table_name)
+                return
+            if fingerprint:
+                self.record_manifest(table_name, fingerprint)
+
+        # Delete the BigQuery table prior to loading to it.
         table_ref = self.get_dataset_ref().table(
             table_name)
         try:
@@ -524,6 +810,23 @@ class ImportAssetOptions(PipelineOptions):
             '--stage',
             help='GCS location to write intermediary BigQuery load files.')
 
+        parser.add_value_provider_argument(
+            '--stage_compression',
+            default='NONE',
+            choices=['NONE', 'GZIP'],
+            help='Compression of the intermediary BigQuery load files.')
+
+        parser.add_value_provider_argument(
+            '--stage_max_file_bytes',
+            default=str(STAGE_MAX_FILE_BYTES),
+            help=('Uncompressed bytes written to an intermediary BigQuery load '
+                  'file before rolling over to a new file.'))
+
+        parser.add_value_provider_argument(
+            '--stage_max_open_files',
+            default=str(STAGE_MAX_OPEN_FILES),
+            help='Maximum intermediary load files a worker bundle keeps open.')
+
         parser.add_value_provider_argument(
             '--load_time',
             default=datetime.now().isoformat(),
@@ -537,12 +840,42 @@ class ImportAssetOptions(PipelineOptions):
         parser.add_value_provider_argument(
             '--dataset', help='BigQuery dataset to load to.')
 
+        parser.add_value_provider_argument(
+            '--incremental',
+            default='False',
+            help=('With write_disposition=WRITE_EMPTY, only delete and load '
+                  'tables whose content changed since they were loaded.'))
+
+        parser.add_value_provider_argument(
+            '--discovery_cache',
+            help=('Local or GCS location to cache API discovery documents and '
+                  'schemas in. Shared by all workers and pipeline runs.'))
+
+        parser.add_value_provider_argument(
+            '--discovery_cache_ttl',
+            default=str(DEFAULT_TTL_SECONDS),
+            help='Seconds before a cached discovery document is revalidated.')
+
+        parser.add_value_provider_argument(
+            '--discovery_cache_offline',
+            default='False',
+            help=('If only cached discovery documents are used, '
+                  'nothing is fetched.'))
+
 
 def run(argv=None):
     """Construct the pipeline."""
 
     options = ImportAssetOptions(argv)
 
+    # Prewarm the discovery cache before submission when the location is
+    # known, workers then read fresh documents rather than fetching them.
+    if options.discovery_cache.is_accessible():
+        APISchema.set_persistent_cache(get_discovery_cache(
+            options.discovery_cache, options.discovery_cache_ttl,
+            options.discovery_cache_offline))
+        APISchema.prewarm_persistent_cache()
+
     p = beam.Pipeline(options=options)
 
     # Cleanup json documents.
@@ -566,10 +899,25 @@ def run(argv=None):
     # Generate BigQuery schema for each table.
     schemas = (keyed_assets
                | 'to_schema' >> core.CombinePerKey(
-                BigQuerySchemaCombineFn())
+                BigQuerySchemaCombineFn(options.discovery_cache,
+                                        options.discovery_cache_ttl,
+                                        options.discovery_cache_offline))
                | 'sanitize_schema' >> beam.ParDo(SanitizeBigQuerySchema()))
 
     pvalue_schemas = beam.pvalue.AsDict(schemas)
+
+    # Fingerprint each table's content and read those unchanged since loaded,
+    # used to skip deleting and loading unchanged tables when incremental.
+    fingerprints = (keyed_assets
+                    | 'fingerprint_asset' >> beam.ParDo(
+                FingerprintAsset(options.incremental))
+                    | 'fingerprint_table' >> core.CombinePerKey(
+                FingerprintCombineFn()))
+    manifest = (p | 'manifest_seed' >> beam.Create([None])
+                | 'read_manifest' >> beam.ParDo(
+                ReadManifest(options.dataset, options.add_load_date_suffix,
+                             options.load_time, options.incremental)))
+
     # Write to GCS and load to BigQuery.
     # pylint: disable=expression-not-assigned
     (keyed_assets
@@ -578,12 +926,18 @@ def run(argv=None):
      | 'enforce_schema' >> beam.ParDo(EnforceSchemaDataTypes(), pvalue_schemas)
      | 'group_by_sharded_key_for_write' >> beam.GroupByKey()
      | 'write_to_gcs' >> beam.ParDo(
-                WriteToGCS(options.stage, options.load_time))
+                WriteToGCS(options.stage, options.load_time,
+                           options.stage_compression,
+                           options.stage_max_file_bytes,
+                           options.stage_max_open_files))
      | 'group_written_objects_by_key' >> beam.GroupByKey()
      | 'delete_tables' >> beam.ParDo(
                 DeleteDataSetTables(options.dataset, options.add_load_date_suffix,
                                     options.load_time,
-                                    options.write_disposition))
+                                    options.write_disposition,
+                                    options.incremental),
+                beam.pvalue.AsDict(fingerprints),
+                beam.pvalue.AsDict(manifest))
      | 'assign_sharded_key_for_load' >> beam.ParDo(AssignShardedKeyForLoad())
      | 'group_by_sharded_key_for_load' >> beam.GroupByKey()
      | 'load_to_bigquery' >> beam.ParDo(
@@ -154,9 +154,17 @@ def main():
 
     # Perform the export (unless we are skipping it).
     if not args.skip_export:
-        export.export_to_gcs_content_types(args.parent, args.gcs_destination,
-                                           args.content_types,
-                                           args.asset_types)
+        parents = export.get_parents(args.parent)
+        if len(parents) > 1:
+            export.export_to_gcs_parents(parents, args.gcs_destination,
+                                         args.content_types,
+                                         args.asset_types,
+                                         args.max_concurrent_exports)
+        else:
+            export.export_to_gcs_content_types(args.parent,
+                                               args.gcs_destination,
+                                               args.content_types,
+                                               args.asset_types)
 
     # Perform the import, via template or beam runner.
     launch_location = args.template_job_launch_location
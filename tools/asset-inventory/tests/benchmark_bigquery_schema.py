@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#            http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark of schema merging for a synthetic asset export.
+
+Compares accumulating the schema of each resource with list schemas and
+`merge_schemas` against name indexed schemas and `merge_indexed_schemas` as
+done by `import_pipeline.BigQuerySchemaCombineFn`, and checks both produce
+the same schema. Not collected by pytest, run it directly (the list schema
+pass takes several minutes for the default 100k resources):
+
+    python tests/benchmark_bigquery_schema.py --num_resources 100000
+"""
+
+import argparse
+import random
+import time
+
+from asset_inventory import bigquery_schema
+
+
+def generate_resources(num_resources, num_asset_types, num_properties):
+    """Yields (asset_type, resource) with heterogeneous resource.data."""
+    rnd = random.Random(0)
+    property_names = ['property{}'.format(i) for i in range(num_properties)]
+    for i in range(num_resources):
+        data = {}
+        for name in rnd.sample(property_names, 20):
+            kind = rnd.randint(0, 3)
+            if kind == 0:
+                data[name] = 'value'
+            elif kind == 1:
+                data[name] = rnd.random()
+            elif kind == 2:
+                data[name] = [{rnd.choice(property_names): True}]
+            else:
+                data[name] = {rnd.choice(property_names): 'value'}
+        asset_type = 'google.synthetic.Type{}'.format(i % num_asset_types)
+        yield asset_type, {'name': 'resource{}'.format(i),
+                           'asset_type': asset_type,
+                           'resource': {'data': data}}
+
+
+def merge_list_schemas(keyed_schemas):
+    accumulators = {}
+    for key, schema in keyed_schemas:
+        accumulators[key] = bigquery_schema.merge_schemas(
+            [accumulators.get(key, []), schema])
+    return accumulators
+
+
+def merge_indexed_schemas(keyed_schemas):
+    accumulators = {}
+    for key, schema in keyed_schemas:
+        accumulators[key] = bigquery_schema.merge_indexed_schemas(
+            [accumulators.get(key, {}), bigquery_schema.index_schema(schema)])
+    return {key: bigquery_schema.unindex_schema(accumulator)
+            for key, accumulator in accumulators.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num_resources', type=int, default=100000)
+    parser.add_argument('--num_asset_types', type=int, default=100)
+    parser.add_argument('--num_properties', type=int, default=500)
+    args = parser.parse_args()
+
+    keyed_schemas = [
+        (asset_type, bigquery_schema.translate_json_to_schema(resource))
+        for asset_type, resource in generate_resources(
+            args.num_resources, args.num_asset_types, args.num_properties)]
+
+    start = time.time()
+    list_result = merge_list_schemas(keyed_schemas)
+    list_seconds = time.time() - start
+
+    start = time.time()
+    indexed_result = merge_indexed_schemas(keyed_schemas)
+    indexed_seconds = time.time() - start
+
+    assert list_result == indexed_result, 'merged schemas differ'
+    print('resources: {}, asset types: {}'.format(args.num_resources,
+                                                  args.num_asset_types))
+    print('list schemas:    {:.2f}s'.format(list_seconds))
+    print('indexed schemas: {:.2f}s'.format(indexed_seconds))
+    print('speedup:         {:.1f}x'.format(list_seconds / indexed_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -151,6 +151,34 @@ class TestBigQuerySchema(unittest.TestCase):
                                 'field_type': 'NUMERIC',
                                 'mode': 'REPEATED'}]}])
 
+    def test_merge_indexed_schemas(self):
+        schemas = [
+            bigquery_schema.index_schema(
+                bigquery_schema.translate_json_to_schema(
+                    {'recordField': {'field1': 'string'}})),
+            bigquery_schema.index_schema(
+                bigquery_schema.translate_json_to_schema(
+                    {'recordfield': {'field2': [2]}, 'field3': True}))
+        ]
+        merged_schema = bigquery_schema.merge_indexed_schemas(schemas)
+        self.assertEqual(list(merged_schema), ['recordfield', 'field3'])
+        self.assertEqual(list(merged_schema['recordfield']['fields']),
+                         ['field1', 'field2'])
+        self.assertEqual(bigquery_schema.unindex_schema(merged_schema),
+                         [{'name': 'recordField',
+                           'field_type': 'RECORD',
+                           'mode': 'NULLABLE',
+                           'fields': [
+                               {'name': 'field1',
+                                'field_type': 'STRING',
+                                'mode': 'NULLABLE'},
+                               {'name': 'field2',
+                                'field_type': 'NUMERIC',
+                                'mode': 'REPEATED'}]},
+                          {'name': 'field3',
+                           'field_type': 'BOOL',
+                           'mode': 'NULLABLE'}])
+
     def test_sanitize_property_value(self):
         doc = {
             'empty_dict': {},
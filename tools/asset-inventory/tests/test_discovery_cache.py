@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+#
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#            http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the persistent discovery document and schema cache."""
+
+import shutil
+import tempfile
+import unittest
+
+from asset_inventory.api_schema import APISchema
+from asset_inventory.discovery_cache import DiscoveryCache
+import mock
+
+DD_URL = 'https://compute.googleapis.com/$discovery/rest?version=v1'
+DOCUMENT = {'id': 'compute:v1',
+            'schemas': {'Instance': {'properties': {
+                'name': {'type': 'string', 'description': 'Name.'}}}}}
+
+
+def mock_response(status_code, document=None, etag=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.json.return_value = document
+    response.headers = {'ETag': etag} if etag else {}
+    return response
+
+
+# pylint:disable=protected-access
+class TestDiscoveryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        APISchema._discovery_document_cache = {}
+        APISchema._schema_cache = {}
+        APISchema.set_persistent_cache(None)
+
+    def test_document_entry(self):
+        cache = DiscoveryCache(self.cache_dir, ttl_seconds=60)
+        self.assertIsNone(cache.get_document_entry(DD_URL))
+        cache.put_document(DD_URL, DOCUMENT, 'etag-1')
+        entry = cache.get_document_entry(DD_URL)
+        self.assertEqual(entry['document'], DOCUMENT)
+        self.assertEqual(entry['etag'], 'etag-1')
+        self.assertTrue(cache.is_fresh(entry))
+        self.assertEqual(cache.document_urls(), [DD_URL])
+
+        entry['fetch_time'] -= 120
+        self.assertFalse(cache.is_fresh(entry))
+        self.assertTrue(DiscoveryCache(self.cache_dir, ttl_seconds=60,
+                                       offline=True).is_fresh(entry))
+
+    def test_schema_invalidated_by_document_change(self):
+        cache = DiscoveryCache(self.cache_dir)
+        schema = [{'name': 'name', 'field_type': 'STRING', 'mode': 'NULLABLE'}]
+        cache.put_schema('compute:v1.Instance', DOCUMENT, schema)
+        self.assertEqual(cache.get_schema('compute:v1.Instance', DOCUMENT),
+                         schema)
+        changed_document = dict(DOCUMENT, revision='2')
+        self.assertIsNone(cache.get_schema('compute:v1.Instance',
+                                           changed_document))
+
+    @mock.patch('requests.get')
+    def test_api_schema_uses_persistent_cache(self, mock_get):
+        mock_get.return_value = mock_response(200, DOCUMENT, 'etag-1')
+        APISchema.set_persistent_cache(DiscoveryCache(self.cache_dir))
+        self.assertEqual(APISchema._get_discovery_document(DD_URL), DOCUMENT)
+        self.assertEqual(mock_get.call_count, 1)
+
+        # a new process only has the persistent cache.
+        APISchema._discovery_document_cache = {}
+        self.assertEqual(APISchema._get_discovery_document(DD_URL), DOCUMENT)
+        self.assertEqual(mock_get.call_count, 1)
+
+        schema = APISchema._translate_resource_to_schema('Instance', DOCUMENT)
+        APISchema._schema_cache = {}
+        with mock.patch.object(APISchema,
+                               '_properties_map_to_field_list') as translate:
+            self.assertEqual(
+                APISchema._translate_resource_to_schema('Instance', DOCUMENT),
+                schema)
+            translate.assert_not_called()
+
+    @mock.patch('requests.get')
+    def test_api_schema_revalidates_stale_document(self, mock_get):
+        cache = DiscoveryCache(self.cache_dir, ttl_seconds=0)
+        cache.put_document(DD_URL, DOCUMENT, 'etag-1')
+        APISchema.set_persistent_cache(cache)
+        mock_get.return_value = mock_response(304)
+        self.assertEqual(APISchema._get_discovery_document(DD_URL), DOCUMENT)
+        mock_get.assert_called_once_with(
+            DD_URL, headers={'If-None-Match': 'etag-1'}, timeout=3.05)
+
+    @mock.patch('requests.get')
+    def test_api_schema_offline(self, mock_get):
+        cache = DiscoveryCache(self.cache_dir, ttl_seconds=0, offline=True)
+        cache.put_document(DD_URL, DOCUMENT, 'etag-1')
+        APISchema.set_persistent_cache(cache)
+        self.assertEqual(APISchema._get_discovery_document(DD_URL), DOCUMENT)
+        self.assertIsNone(APISchema._get_discovery_document(
+            'https://storage.googleapis.com/$discovery/rest?version=v1'))
+        mock_get.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
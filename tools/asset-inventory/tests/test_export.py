@@ -44,6 +44,43 @@ class TestExport(unittest.TestCase):
         export.export_to_gcs_content_types('parent', 'gcs_prefix', None, None)
         self.assertEqual(mock_export_to_gcs.call_count, 2)
 
+    @mock.patch('time.sleep')
+    @mock.patch('asset_inventory.export.start_export_to_gcs')
+    def test_export_to_gcs_parents(self, mock_start_export_to_gcs,
+                                   mock_sleep):
+        operations = []
+
+        def start_export(parent, gcs_destination, content_type, asset_types):
+            operation = mock.Mock()
+            # each export completes after two polls.
+            operation.done.side_effect = [False, True]
+            operation.result.return_value = gcs_destination
+            operations.append(operation)
+            return operation
+
+        mock_start_export_to_gcs.side_effect = start_export
+        results = export.export_to_gcs_parents(
+            ['folders/1', 'projects/p'], 'gs://b/o', ['RESOURCE', 'IAM_POLICY'],
+            ['*'], max_concurrent_exports=3)
+
+        self.assertEqual(results, {
+            ('folders/1', 'RESOURCE'): 'gs://b/o/folders-1.RESOURCE.json',
+            ('folders/1', 'IAM_POLICY'): 'gs://b/o/folders-1.IAM_POLICY.json',
+            ('projects/p', 'RESOURCE'): 'gs://b/o/projects-p.RESOURCE.json',
+            ('projects/p', 'IAM_POLICY'):
+                'gs://b/o/projects-p.IAM_POLICY.json'})
+        mock_start_export_to_gcs.assert_any_call(
+            'folders/1', 'gs://b/o/folders-1.RESOURCE.json', 'RESOURCE', None)
+        # first three started together, the fourth when they completed.
+        self.assertEqual(len(operations), 4)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_get_parents(self):
+        self.assertEqual(export.get_parents('folders/1, projects/p'),
+                         ['folders/1', 'projects/p'])
+        self.assertEqual(export.get_parents('organizations/1'),
+                         ['organizations/1'])
+
     def test_parse_args_1(self):
         ap = argparse.ArgumentParser()
         export.add_argparse_args(ap)
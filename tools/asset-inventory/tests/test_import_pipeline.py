@@ -16,8 +16,11 @@
 """Test import beam pipeline."""
 
 import glob
+import gzip
 import json
 import os
+import shutil
+import tempfile
 import unittest
 import warnings
 
@@ -60,6 +63,89 @@ class TestImportPipeline(unittest.TestCase):
                                  'google.cloud.billing.BillingAccount')
             self.assertEqual(len(found_names), 2)
 
+    @mock.patch('google.cloud.bigquery.Client')
+    def test_assets_gzip_stage(self, _):
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore',
+                                    'The compiler package is deprecated')
+            import_pipeline.run([
+                '--load_time=',
+                '--input=tests/data/iam_policy.json', '--group_by=ASSET_TYPE',
+                '--stage={}'.format(STAGE_PATH), '--dataset=test_iam_policy',
+                '--stage_compression=GZIP'
+            ])
+
+            rows = []
+            for fn in glob.glob(os.path.join(STAGE_PATH, 'google.*.json.gz')):
+                with gzip.open(fn, 'rt') as f:
+                    for line in f:
+                        rows.append(json.loads(line))
+            self.assertEqual(len(rows), 2)
+
+    def test_write_to_gcs_rolls_files(self):
+        stage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, stage_path)
+        write_to_gcs = import_pipeline.WriteToGCS(stage_path, '', 'NONE',
+                                                  '100', '1')
+        assets = [{'name': 'asset-{}'.format(i), 'value': 'x' * 40}
+                  for i in range(5)]
+        write_to_gcs.start_bundle()
+        written = list(write_to_gcs.process(('google.compute.Disk.0', assets)))
+        written += list(write_to_gcs.process(('google.compute.Network.0',
+                                              assets[:1])))
+        write_to_gcs.finish_bundle()
+
+        self.assertEqual([key for key, _ in written],
+                         ['google.compute.Disk'] * 3 +
+                         ['google.compute.Network'])
+        rows = []
+        for _, (_, file_path) in written:
+            with open(file_path) as f:
+                rows += [json.loads(line) for line in f]
+        self.assertEqual(rows, assets + assets[:1])
+
+    def test_fingerprint_is_order_independent(self):
+        assets = [{'name': 'asset-{}'.format(i), 'labels': {'a': i}}
+                  for i in range(10)]
+        combine_fn = import_pipeline.FingerprintCombineFn()
+
+        def fingerprint(asset_list):
+            accumulators = []
+            for asset in asset_list:
+                accumulators.append(combine_fn.add_input(
+                    combine_fn.create_accumulator(),
+                    import_pipeline.asset_fingerprint(asset)))
+            return combine_fn.extract_output(
+                combine_fn.merge_accumulators(accumulators))
+
+        self.assertEqual(fingerprint(assets), fingerprint(assets[::-1]))
+        self.assertEqual(fingerprint(assets)[1], 10)
+        self.assertNotEqual(fingerprint(assets), fingerprint(assets[1:]))
+
+    @mock.patch('google.cloud.bigquery.Client')
+    def test_incremental_skips_unchanged_tables(self, _):
+        delete_tables = import_pipeline.DeleteDataSetTables(
+            'test_dataset', 'False', '2019-01-01', 'WRITE_EMPTY', 'True')
+        delete_tables.start_bundle()
+        fingerprints = {'google.compute.Disk': ('0123', 2),
+                        'google.compute.Network': ('4567', 1)}
+        manifest = {'google_compute_Disk': ('0123', 2),
+                    'google_compute_Network': ('0000', 1)}
+        elements = [('google.compute.Disk', ['disk']),
+                    ('google.compute.Network', ['network'])]
+        processed = []
+        for element in elements:
+            processed += list(delete_tables.process(element, fingerprints,
+                                                    manifest))
+        self.assertEqual(processed, [('google.compute.Network', ['network'])])
+        client = delete_tables.bigquery_client
+        self.assertEqual(client.delete_table.call_count, 1)
+        rows = client.insert_rows_json.call_args[0][1]
+        self.assertEqual(rows, [{'table_name': 'google_compute_Network',
+                                 'fingerprint': '4567',
+                                 'num_assets': 1,
+                                 'load_time': '2019-01-01'}])
+
     @mock.patch('google.cloud.bigquery.Client')
     def test_resources(self, _):
         with warnings.catch_warnings():
@@ -59,13 +59,11 @@ def format_commitment_table(templates_dict: Dict[str, Union[str, bool]], **kwarg
     Returns:
         None
     """
-    gcs_bucket = '{project}-cud-correction-commitment-data'
-    gcs_bucket = gcs_bucket.format(project=templates_dict['project_id'])
     schema = commitments_schema.schema
     commitment_intervals.main(templates_dict['commitment_table_name'],
                               templates_dict['corrected_dataset_id'],
                               templates_dict['temp_commitments_table_name'],
-                              gcs_bucket, schema)
+                              schema)
 
 
 with models.DAG('cud_correction_dag',
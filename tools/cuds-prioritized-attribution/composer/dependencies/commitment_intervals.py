@@ -12,17 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from dateutil import parser
 from datetime import timedelta
-import csv
-import os
-import tempfile
+from decimal import Decimal
+from fractions import Fraction
+from operator import itemgetter
+import itertools
 import uuid
-from composer.dependencies.helper_function import (table_to_csv_in_gcs,
-                                                   csv_in_gcs_to_table,
-                                                   gcs_to_local,
-                                                   local_to_gcs,
-                                                   convert_to_schema)
+import pyarrow
+from composer.dependencies.helper_function import (table_to_arrow,
+                                                   arrow_to_table,
+                                                   convert_to_schema,
+                                                   convert_to_arrow_schema)
+
+# Scale of the BigQuery NUMERIC type.
+NUMERIC_SCALE = Decimal('1e-9')
 
 
 class CommitmentValue:
@@ -161,83 +164,107 @@ def combine_schedule(schedule_a, schedule_b):
 def compute_diff(commitment_obj):
     """Redistribute the overlapping schedules from all the commitments
 
+    Sweeps through the start and end boundaries of the schedules of each group
+    of commitments in order, so that every segment between two boundaries is
+    given the sum of the amounts of the commitments active over it.
+
     Args:
         commitment_obj: List of commitments
 
     Returns:
-        List of non-overlapping commitments
+        List of non-overlapping commitments sorted by start
     """
-    commitment_obj.sort()
-    iteration = 0
-    while iteration < len(commitment_obj):
-        comparison_first = commitment_obj[iteration]
-        for comparison_second in commitment_obj[iteration+1:]:
-            if is_schedule_combineable(comparison_first, comparison_second):
-               new_records = combine_schedule(comparison_first, comparison_second)
-               commitment_obj.remove(comparison_first)
-               commitment_obj.remove(comparison_second)
-               commitment_obj.extend(new_records)
-               commitment_obj.sort()
-               iteration = iteration - 1
-               break
-        iteration = iteration + 1
-    return commitment_obj
+    groups = {}
+    for schedule in commitment_obj:
+        value = schedule.value
+        group = (value.folder_ids, value.project_ids,
+                 value.commitments_unit_type, value.commitments_cud_type,
+                 value.commitments_region)
+        if group not in groups:
+            groups[group] = (value, [])
+        amount = Fraction(float(value.commitments_amount))
+        boundaries = groups[group][1]
+        boundaries.append((schedule.start, 1, amount))
+        boundaries.append((schedule.end + timedelta(days=1), -1, -amount))
+
+    ret_val = []
+    for value, boundaries in groups.values():
+        boundaries.sort(key=itemgetter(0))
+        active_count = 0
+        active_amount = Fraction(0)
+        segment_start = None
+        for boundary, count, amount in boundaries:
+            if active_count and segment_start < boundary:
+                ret_val.append(
+                    ScheduleAndValue(
+                        segment_start, boundary - timedelta(days=1),
+                        CommitmentValue(str(uuid.uuid1()), value.folder_ids,
+                                        value.project_ids,
+                                        value.commitments_unit_type,
+                                        value.commitments_cud_type,
+                                        float(active_amount),
+                                        value.commitments_region)))
+            active_count += count
+            active_amount += amount
+            segment_start = boundary
+    ret_val.sort()
+    return ret_val
 
 
 def main(commitment_table, modified_commitment_dataset,
-         modified_commitment_table, gcs_bucket, commitment_schema):
+         modified_commitment_table, commitment_schema):
     """Breaks out the commitment table rows to remove overlapping commitments.
 
     Args:
         commitment_table: Name of the commitment table
+        modified_commitment_dataset: Dataset for the redistributed commitment
+            table
         modified_commitment_table: Name for the redistributed commitment table
-        gcs_bucket: Bucket name for transferring data between BQ
         commitment_schema: Schema for the commitment table
 
     Returns:
         None; Creates a new table in BigQuery
     """
     data = {}
-    source_filename = 'original_commitments'
-    table_to_csv_in_gcs(gcs_bucket, source_filename, commitment_table)
-    source_file_path = os.path.join('/tmp', source_filename)
-    gcs_to_local(gcs_bucket, source_filename, source_file_path)
-    with open(source_file_path, 'r') as csvfile:
-        datareader = csv.reader(csvfile, delimiter=',')
-        next(datareader)
-        for row in datareader:
-            folder_ids = sorted(row[1].strip().split(","))
-            project_ids = sorted(row[2].strip().split(","))
-            key = ",".join(folder_ids) + "#" + ",".join(project_ids)
-            if (key not in data):
-                data[key] = []
-            data[key].append(
-                ScheduleAndValue(
-                    parser.parse(row[7]), parser.parse(row[8]),
-                    CommitmentValue(row[0].strip(), row[1].strip(),
-                                    row[2].strip(),
-                                    row[3].strip(), row[4].strip(),
-                                    float(row[5].strip()), row[6].strip())))
-    for key in data:
-        ret_val = compute_diff(data[key])
-        data[key] = ret_val
-    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as corrected_commitments:
-        writer = csv.writer(corrected_commitments)
-        for i, commitment_val in enumerate(sum(data.values(),[])):
-            writer.writerow([
-                i+1,
-                commitment_val.value.folder_ids,
-                commitment_val.value.project_ids,
-                commitment_val.value.commitments_unit_type,
-                commitment_val.value.commitments_cud_type,
-                commitment_val.value.commitments_amount,
-                commitment_val.value.commitments_region,
-                commitment_val.start.strftime("%Y-%m-%d"),
-                commitment_val.end.strftime("%Y-%m-%d")
-            ])
-    local_to_gcs(gcs_bucket, os.path.basename(corrected_commitments.name),
-                 corrected_commitments.name)
-    csv_in_gcs_to_table(gcs_bucket, os.path.basename(corrected_commitments.name),
-                        modified_commitment_dataset,
-                        modified_commitment_table,
-                        convert_to_schema(commitment_schema))
+    commitments = table_to_arrow(commitment_table)
+    columns = [commitments.column(field['name']).to_pylist()
+               for field in commitment_schema]
+    for row in zip(*columns):
+        # Nullable ids are read as None, like the empty strings of a CSV.
+        folder_ids = (row[1] or '').strip()
+        project_ids = (row[2] or '').strip()
+        key = ",".join(sorted(folder_ids.split(","))) + "#" + ",".join(
+            sorted(project_ids.split(",")))
+        if (key not in data):
+            data[key] = []
+        data[key].append(
+            ScheduleAndValue(
+                row[7], row[8],
+                CommitmentValue(row[0].strip(), folder_ids, project_ids,
+                                row[3].strip(), row[4].strip(),
+                                float(row[5]), row[6].strip())))
+    rows = []
+    for i, commitment_val in enumerate(
+            itertools.chain.from_iterable(
+                compute_diff(data[key]) for key in data)):
+        rows.append([
+            str(i+1),
+            commitment_val.value.folder_ids or None,
+            commitment_val.value.project_ids or None,
+            commitment_val.value.commitments_unit_type,
+            commitment_val.value.commitments_cud_type,
+            Decimal(str(commitment_val.value.commitments_amount)).quantize(
+                NUMERIC_SCALE),
+            commitment_val.value.commitments_region,
+            commitment_val.start,
+            commitment_val.end
+        ])
+    arrow_schema = convert_to_arrow_schema(commitment_schema)
+    columns = list(zip(*rows)) or [[] for _ in arrow_schema]
+    corrected_commitments = pyarrow.Table.from_arrays(
+        [pyarrow.array(column, type=field.type)
+         for column, field in zip(columns, arrow_schema)],
+        schema=arrow_schema)
+    arrow_to_table(corrected_commitments, modified_commitment_dataset,
+                   modified_commitment_table,
+                   convert_to_schema(commitment_schema))
@@ -12,52 +12,63 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+import io
 from typing import Dict
 from typing import List
 from google.cloud import bigquery
-from google.cloud import storage
+from google.cloud import bigquery_storage_v1
+import pyarrow
+from pyarrow import parquet
 
+# Arrow types of the BigQuery types, NUMERIC has a precision of 38 and a scale
+# of 9 digits.
+ARROW_TYPES = {
+    'STRING': pyarrow.string(),
+    'NUMERIC': pyarrow.decimal128(38, 9),
+    'DATE': pyarrow.date32(),
+    'FLOAT': pyarrow.float64(),
+    'INTEGER': pyarrow.int64()
+}
 
-def table_to_csv_in_gcs(bucket_name: str, object_name: str,
-                        table_id: str) -> None:
-    """Save the table in GCS.
+
+def table_to_arrow(table_id: str) -> pyarrow.Table:
+    """Read the table through the BigQuery Storage Read API.
 
     Args:
-        bucket_name: String of bucket name for string the object
-        object_name: String of name of object to be uploaded
         table_id: String holding id of table
+
+    Returns:
+        pyarrow.Table holding the rows of the table.
     """
-    destination_uri = "gs://{}/{}".format(bucket_name, object_name)
     client = bigquery.Client()
-    table_ref = bigquery.TableReference.from_string(table_id)
-    extract_job = client.extract_table(table_ref, destination_uri)
-    extract_job.result()
+    table = client.get_table(table_id)
+    return client.list_rows(table).to_arrow(
+        bqstorage_client=bigquery_storage_v1.BigQueryReadClient())
 
 
-def csv_in_gcs_to_table(bucket_name: str, object_name: str, dataset_id: str,
-                        table_id: str,
-                        schema: List[bigquery.SchemaField]) -> None:
-    """Upload CSV to BigQuery table.
+def arrow_to_table(arrow_table: pyarrow.Table, dataset_id: str, table_id: str,
+                   schema: List[bigquery.SchemaField]) -> None:
+    """Load the Arrow table to a BigQuery table as an in-memory Parquet file.
         If the table already exists, it overwrites the table data.
 
     Args:
-        bucket_name: Bucket name for holding the object
-        object_name: Name of object to be uploaded
+        arrow_table: pyarrow.Table holding the rows to load
         dataset_id: Dataset id where the table is located.
         table_id: String holding id of hte table.
         schema: Schema of the table_id
     """
+    parquet_file = io.BytesIO()
+    parquet.write_table(arrow_table, parquet_file)
+    parquet_file.seek(0)
     client = bigquery.Client()
     dataset_ref = client.dataset(dataset_id)
     job_config = bigquery.LoadJobConfig()
     job_config.schema = schema
-    job_config.source_format = bigquery.SourceFormat.CSV
+    job_config.source_format = bigquery.SourceFormat.PARQUET
     job_config.write_disposition = bigquery.WriteDisposition().WRITE_TRUNCATE
-    uri = "gs://{}/{}".format(bucket_name, object_name)
-    load_job = client.load_table_from_uri(uri,
-                                          dataset_ref.table(table_id),
-                                          job_config=job_config)
+    load_job = client.load_table_from_file(parquet_file,
+                                           dataset_ref.table(table_id),
+                                           job_config=job_config)
     load_job.result()
 
 
@@ -78,39 +89,6 @@ def delete_table(bq_client: bigquery.Client, dataset_id: str,
     bq_client.delete_table(table=table_ref)
 
 
-def gcs_to_local(bucket_name: str, object_name: str, output_file: str) -> None:
-    """Download the GCS object as output file
-
-    Args:
-        bucket_name: String of bucket name
-        object_name: Name of object to be uploaded
-        output_file: Local file name to save the object from the bucket
-    """
-    client = storage.Client()
-    bucket = client.get_bucket(bucket_name)
-    blob = bucket.get_blob(object_name)
-    with open(output_file, "wb") as file_obj:
-        blob.download_to_file(file_obj)
-
-
-def local_to_gcs(bucket_name: str, object_name: str, input_file: str) -> None:
-    """Uploads a local file to the GCS object as output file.
-
-    Args:
-        bucket_name: String of bucket name for holding the object.
-        object_name: String of name of object to be uploaded.
-        input_file: Local file name to upload.
-
-    Returns:
-        None.
-    """
-    client = storage.Client()
-    bucket = client.get_bucket(bucket_name)
-    blob = bucket.blob(object_name)
-    with open(input_file, "rb") as file_obj:
-        blob.upload_from_file(file_obj)
-
-
 def convert_to_schema(schema: List[Dict[str, str]]) -> List[bigquery.SchemaField]:
     """Read the schema as a JSON and reformats as an array.
 
@@ -128,3 +106,20 @@ def convert_to_schema(schema: List[Dict[str, str]]) -> List[bigquery.SchemaField
                                  input_field['type'],
                                  mode=input_field['mode']))
     return schema
+
+
+def convert_to_arrow_schema(schema: List[Dict[str, str]]) -> pyarrow.Schema:
+    """Read the schema as a JSON and reformats as an Arrow schema.
+
+    Args:
+        schema: list of dicts to convert to an Arrow schema
+
+    Returns:
+        pyarrow.Schema with the Arrow type of each field.
+    """
+    return pyarrow.schema([
+        pyarrow.field(input_field['name'],
+                      ARROW_TYPES[input_field['type']],
+                      nullable=input_field['mode'] != 'REQUIRED')
+        for input_field in schema
+    ])
@@ -37,6 +37,10 @@ resource "google_project_service" "bqapi" {
   service = "bigquery.googleapis.com"
 }
 
+resource "google_project_service" "bqstorageapi" {
+  service = "bigquerystorage.googleapis.com"
+}
+
 resource "google_project_service" "composerapi" {
   service = "composer.googleapis.com"
 }
@@ -56,7 +60,9 @@ resource "google_project_iam_custom_role" "cud_iam_role" {
     "bigquery.tables.create",
     "bigquery.tables.updateData",
     "bigquery.tables.get",
-    "bigquery.tables.getData"
+    "bigquery.tables.getData",
+    "bigquery.readsessions.create",
+    "bigquery.readsessions.getData"
   ]
 }
 
@@ -92,12 +98,6 @@ resource "google_bigquery_dataset" "corrected_dataset" {
   }
 }
 
-# Create bucket for Composer temporary file store
-resource "google_storage_bucket" "commitment_file_store" {
-  name     = "${var.project_id}-cud-correction-commitment-data"
-  location = var.billing_export_location
-}
-
 # Create Composer Environment
 resource "google_composer_environment" "env" {
   provider = google-beta
@@ -105,8 +105,7 @@ resource "google_composer_environment" "env" {
   region   = var.region
   depends_on = [google_project_service.composerapi,
     google_project_iam_binding.custom_role_binding,
-    google_project_iam_binding.composer_binding,
-    google_storage_bucket.commitment_file_store
+    google_project_iam_binding.composer_binding
   ]
 
   config {
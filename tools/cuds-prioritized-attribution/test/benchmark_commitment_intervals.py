@@ -0,0 +1,126 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import copy
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.append('..')
+sys.path.append('../composer/')
+from dependencies.commitment_intervals import (compute_diff,
+                                               combine_schedule,
+                                               is_schedule_combineable,
+                                               ScheduleAndValue,
+                                               CommitmentValue)
+
+
+def pairwise_compute_diff(commitment_obj):
+    """The previous compute_diff, combining overlapping pairs until none is left.
+
+    Args:
+        commitment_obj: List of commitments
+    Returns:
+        List of non-overlapping commitments
+    """
+    commitment_obj.sort()
+    iteration = 0
+    while iteration < len(commitment_obj):
+        comparison_first = commitment_obj[iteration]
+        for comparison_second in commitment_obj[iteration+1:]:
+            if is_schedule_combineable(comparison_first, comparison_second):
+                new_records = combine_schedule(comparison_first,
+                                               comparison_second)
+                commitment_obj.remove(comparison_first)
+                commitment_obj.remove(comparison_second)
+                commitment_obj.extend(new_records)
+                commitment_obj.sort()
+                iteration = iteration - 1
+                break
+        iteration = iteration + 1
+    return commitment_obj
+
+
+def generate_commitments(count, seed):
+    """Generates overlapping commitments of a single folder/project key.
+
+    Args:
+        count: Number of commitments
+        seed: Seed of the random generator
+    Returns:
+        List of commitments
+    """
+    generator = random.Random(seed)
+    first_day = datetime(2019, 1, 1)
+    commitments = []
+    for i in range(count):
+        start = first_day + timedelta(days=generator.randrange(3 * 365))
+        end = start + timedelta(days=generator.choice([0, 30, 365, 3 * 365]))
+        commitments.append(
+            ScheduleAndValue(
+                start, end,
+                CommitmentValue(str(i), 'folder_1', 'project_1',
+                                generator.choice(['vcpu', 'memory']),
+                                'regular', generator.randrange(1, 100),
+                                generator.choice(['us-east1',
+                                                  'europe-west1']))))
+    return commitments
+
+
+def to_rows(commitments):
+    """Converts commitments to comparable rows, sorted."""
+    return sorted((c.value.commitments_unit_type, c.value.commitments_region,
+                   c.start, c.end, float(c.value.commitments_amount))
+                  for c in commitments)
+
+
+def is_equivalent(commitments_a, commitments_b):
+    """Checks two lists of commitments have the same segments and amounts."""
+    rows_a = to_rows(commitments_a)
+    rows_b = to_rows(commitments_b)
+    return len(rows_a) == len(rows_b) and all(
+        row_a[:4] == row_b[:4] and math.isclose(row_a[4], row_b[4])
+        for row_a, row_b in zip(rows_a, rows_b))
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description='Compares compute_diff with the previous pairwise '
+        'implementation on overlapping commitments.')
+    ap.add_argument('--commitments', type=int, default=2000)
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+    commitments = generate_commitments(args.commitments, args.seed)
+
+    start = time.time()
+    pairwise = pairwise_compute_diff(copy.deepcopy(commitments))
+    pairwise_seconds = time.time() - start
+
+    start = time.time()
+    sweep = compute_diff(copy.deepcopy(commitments))
+    sweep_seconds = time.time() - start
+
+    print('{} commitments, {} segments'.format(len(commitments), len(sweep)))
+    print('pairwise: {:.2f}s, sweep-line: {:.2f}s'.format(pairwise_seconds,
+                                                         sweep_seconds))
+    if not is_equivalent(pairwise, sweep):
+        print('outputs differ')
+        sys.exit(1)
+    print('outputs are equivalent')
+
+
+if __name__ == '__main__':
+    main()
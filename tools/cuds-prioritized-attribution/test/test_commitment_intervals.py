@@ -412,3 +412,12 @@ def test_overlap_but_in_different_commitments_cud_type_so_not_combining_dates():
         assert retVal[i].value.commitments_amount == approx(float(
             res['amount']))
         i = i + 1
+
+
+def test_same_as_pairwise_on_many_overlaping():
+    from benchmark_commitment_intervals import (generate_commitments,
+                                                pairwise_compute_diff,
+                                                is_equivalent)
+    commitments = generate_commitments(200, 0)
+    retVal = compute_diff(list(commitments))
+    assert is_equivalent(pairwise_compute_diff(list(commitments)), retVal)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 
+import itertools
 import logging
 import threading
 
@@ -64,6 +65,54 @@ def resource_iterator(next_page_function):
             more_results = False
 
 
+def map_concurrently(function, items, max_workers):
+    """Call a function on every item using a bounded number of threads.
+
+    Google API clients must be obtained from the Clients thread local
+    descriptors within the function as each thread requires it's own client.
+
+    Args:
+        function: Function to call with each item.
+        items: Items to call the function with.
+        max_workers: Maximum number of threads to use.
+
+    Returns:
+        List of the function results in the same order as the items.
+
+    Raises:
+        Exception: The first exception raised by the function, the remaining
+        items are not processed.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    raised_exceptions = []
+    next_index = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        """Process items until there are none left or one failed."""
+        while not raised_exceptions:
+            with lock:
+                index = next(next_index)
+            if index >= len(items):
+                return
+            try:
+                results[index] = function(items[index])
+            except Exception as e:
+                logging.exception('failed processing %s', items[index])
+                raised_exceptions.append(e)
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(min(max_workers, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if raised_exceptions:
+        raise raised_exceptions[0]
+    return results
+
+
 class ThreadsafeClientLocal(object):
     """A thread local Google API client descriptor.
 
@@ -0,0 +1,316 @@
+# Copyright 2017 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#            http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import json
+import logging
+import time
+
+from google.cloud import datastore
+from googleapiclient import errors
+import webapp2
+
+from dns_sync import api
+from dns_sync import audit_log
+from dns_sync import auth
+from dns_sync import zones
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Longest wait between two status checks of a change.
+MAX_CHECK_INTERVAL_SECONDS = 10
+
+# How long a single poll request may keep polling, under the cron interval.
+POLL_DEADLINE_SECONDS = 50
+
+# Completed changes are kept this long so their status can be looked up.
+COMPLETED_CHANGE_RETENTION = datetime.timedelta(days=1)
+
+# Before the completion_time of every completed change, pending changes have
+# none.
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=audit_log.UTC_INSTANCE)
+
+
+class PendingDnsChange(datastore.Entity):
+    """A submitted Cloud DNS change and its completion status.
+
+    Changes are submitted without waiting for them to be applied. The status
+    of all pending changes is then tracked by the PollDnsChanges handler.
+    Keyed by the string 'zone_name:change_id'. A failed change records why in
+    its error property.
+    """
+    KIND = 'PendingDnsChange'
+
+    def __init__(self, zone_name, change, status=PENDING, submit_time=None,
+                 check_count=0, next_check_time=None, completion_time=None,
+                 error=None):
+        """Record a submitted change.
+
+        Args:
+            zone_name: Cloud DNS zone name the change is for.
+            change: The change returned by the dns.changes.create API.
+            status: One of PENDING, DONE or FAILED.
+            submit_time: When the change was submitted, defaults to now.
+            check_count: Times the change status was checked.
+            next_check_time: When to next check the change status, defaults
+                to now.
+            completion_time: When the change was found done or failed.
+            error: Why the change failed.
+        """
+        now = audit_log.utcnow()
+        super(PendingDnsChange, self).__init__(
+            key=api.CLIENTS.datastore.key(
+                PendingDnsChange.KIND, '{}:{}'.format(zone_name,
+                                                      change['id'])),
+            exclude_from_indexes=['change'])
+        self.update({
+            'zone_name': zone_name,
+            'change_id': change['id'],
+            'change': json.dumps(change),
+            'status': status,
+            'submit_time': submit_time or now,
+            'check_count': check_count,
+            'next_check_time': next_check_time or now,
+            'completion_time': completion_time,
+            'error': error
+        })
+
+    @classmethod
+    def from_entity(cls, entity):
+        """Create a PendingDnsChange from a datastore entity."""
+        return PendingDnsChange(
+            entity['zone_name'], json.loads(entity['change']),
+            status=entity['status'],
+            submit_time=entity['submit_time'],
+            check_count=entity['check_count'],
+            next_check_time=entity['next_check_time'],
+            completion_time=entity['completion_time'],
+            error=entity.get('error'))
+
+    @classmethod
+    def get_by_id(cls, zone_name, change_id):
+        """Lookup a PendingDnsChange.
+
+        Args:
+            zone_name: Cloud DNS zone name the change is for.
+            change_id: Id of the change.
+
+        Returns:
+            The found PendingDnsChange or None.
+        """
+        entity = api.CLIENTS.datastore.get(
+            api.CLIENTS.datastore.key(PendingDnsChange.KIND,
+                                      '{}:{}'.format(zone_name, change_id)))
+        if entity:
+            return PendingDnsChange.from_entity(entity)
+        else:
+            return None
+
+    @classmethod
+    def query(cls, status=None):
+        """List the tracked changes.
+
+        Args:
+            status: Only list changes with this status when supplied.
+
+        Returns:
+            List of PendingDnsChange.
+        """
+        query = api.CLIENTS.datastore.query(kind=PendingDnsChange.KIND)
+        if status:
+            query.add_filter('status', '=', status)
+        return [PendingDnsChange.from_entity(entity)
+                for entity in query.fetch()]
+
+    def check(self):
+        """Get the change status from Cloud DNS and update the entity.
+
+        A change still pending is checked again with backoff and a maximum of
+        MAX_CHECK_INTERVAL_SECONDS.
+        """
+        now = audit_log.utcnow()
+        error = None
+        try:
+            change = api.CLIENTS.dns.changes().get(
+                changeId=self['change_id'],
+                managedZone=self['zone_name'],
+                project=zones.CONFIG.managed_zone_project).execute()
+            status = change['status']
+        except errors.HttpError as e:
+            if e.resp.status != 404:
+                logging.warning('unable to get dns change %s, will retry',
+                                self.key.name, exc_info=True)
+                status = PENDING
+            else:
+                change = json.loads(self['change'])
+                status = FAILED
+                error = 'dns change not found'
+
+        self['check_count'] += 1
+        if status == PENDING:
+            self['next_check_time'] = now + datetime.timedelta(seconds=min(
+                1.5**self['check_count'], MAX_CHECK_INTERVAL_SECONDS))
+            return
+
+        self['change'] = json.dumps(change)
+        self['completion_time'] = now
+        if status == DONE:
+            self['status'] = DONE
+            logging.info('dns change %s completed successfully.',
+                         self['change'])
+        else:
+            self['status'] = FAILED
+            self['error'] = error or 'dns change status is {}'.format(status)
+            logging.error('dns change %s failed.', self['change'])
+
+    def put(self):
+        """Saves entity in datastore."""
+        return api.CLIENTS.datastore.put(self)
+
+
+def submit_change(change, zone_name):
+    """Submit a DNS change without waiting for it to complete.
+
+    Args:
+        change: The change object to apply.
+        zone_name: Name of the DNS zone.
+
+    Returns:
+        The PendingDnsChange tracking the change status.
+    """
+    operation = api.CLIENTS.dns.changes().create(
+        managedZone=zone_name,
+        project=zones.CONFIG.managed_zone_project,
+        body=change).execute()
+    pending_change = PendingDnsChange(zone_name, operation)
+    if operation.get('status') == DONE:
+        pending_change['status'] = DONE
+        pending_change['completion_time'] = pending_change['submit_time']
+    pending_change.put()
+    return pending_change
+
+
+def poll_pending_changes(deadline_seconds=POLL_DEADLINE_SECONDS):
+    """Track all pending changes until they complete or the deadline passes.
+
+    A single loop checks the changes that are due, then sleeps until the next
+    change is due, so any number of pending changes share one poller.
+
+    Args:
+        deadline_seconds: Seconds after which to stop polling.
+
+    Returns:
+        List of the PendingDnsChange checked.
+    """
+    stop_time = time.time() + deadline_seconds
+    pending_changes = PendingDnsChange.query(status=PENDING)
+    checked_changes = {}
+    while pending_changes:
+        now = audit_log.utcnow()
+        due_changes = [pending_change for pending_change in pending_changes
+                       if pending_change['next_check_time'] <= now]
+        for pending_change in due_changes:
+            pending_change.check()
+            checked_changes[pending_change.key.name] = pending_change
+        if due_changes:
+            api.CLIENTS.datastore.put_multi(due_changes)
+
+        pending_changes = [pending_change
+                           for pending_change in pending_changes
+                           if pending_change['status'] == PENDING]
+        if not pending_changes:
+            break
+        next_check_time = min(pending_change['next_check_time']
+                              for pending_change in pending_changes)
+        wait_seconds = max(
+            0, (next_check_time - audit_log.utcnow()).total_seconds())
+        if time.time() + wait_seconds > stop_time:
+            break
+        time.sleep(wait_seconds)
+
+    delete_completed_changes()
+    return checked_changes.values()
+
+
+def delete_completed_changes():
+    """Delete changes completed more than COMPLETED_CHANGE_RETENTION ago.
+
+    Only the keys of the changes to delete are fetched. Both filters are on
+    completion_time so the query needs no composite index, the lower bound
+    excludes the pending changes which have no completion_time.
+    """
+    completed_before = audit_log.utcnow() - COMPLETED_CHANGE_RETENTION
+    query = api.CLIENTS.datastore.query(kind=PendingDnsChange.KIND)
+    query.add_filter('completion_time', '>', EPOCH)
+    query.add_filter('completion_time', '<', completed_before)
+    query.keys_only()
+    keys = [entity.key for entity in query.fetch()]
+    if keys:
+        api.CLIENTS.datastore.delete_multi(keys)
+
+
+def datetime_handler(x):
+    """JSON serialize datetimes in ISO format."""
+    if isinstance(x, datetime.datetime):
+        return x.isoformat()
+    raise TypeError('Unknown type')
+
+
+class PollDnsChanges(webapp2.RequestHandler):
+    """Web handler polling the status of pending DNS changes.
+
+    Expected to be called by App Engine cron. Returns an error listing the
+    changes found failed, so they show as a failed cron job.
+    """
+
+    def get(self):
+        """Poll pending changes until they complete or the deadline passes."""
+        if self.request.headers.get('X-Appengine-Cron') != 'true':
+            self.response.status = 403
+            return
+        checked_changes = poll_pending_changes()
+        logging.info('checked %s dns changes', len(checked_changes))
+        failed_changes = [checked_change.key.name
+                          for checked_change in checked_changes
+                          if checked_change['status'] == FAILED]
+        if failed_changes:
+            self.response.status = 500
+            self.response.content_type = 'application/json'
+            self.response.write(json.dumps({'failed': failed_changes}))
+
+
+class GetDnsChanges(auth.AdminRequestHandler):
+    """Web handler to return the status of DNS changes."""
+
+    def get(self):
+        """Returns json for the tracked changes.
+
+        Accepts the 'zone_name' and 'change_id' request parameters to return
+        a single change, otherwise all tracked changes are returned, or only
+        those of the 'status' request parameter, such as 'failed'.
+        """
+        zone_name = self.request.get('zone_name')
+        change_id = self.request.get('change_id')
+        if zone_name and change_id:
+            result = PendingDnsChange.get_by_id(zone_name, change_id)
+            if result is None:
+                self.response.status = 404
+                return
+        else:
+            result = PendingDnsChange.query(
+                status=self.request.get('status') or None)
+        self.response.content_type = 'application/json'
+        self.response.write(json.dumps(result, default=datetime_handler))
@@ -20,7 +20,6 @@ import logging
 import mimetypes
 import os
 import re
-import time
 import urllib
 
 from google.cloud import datastore
@@ -30,8 +29,13 @@ import webapp2
 from dns_sync import api
 from dns_sync import audit_log
 from dns_sync import auth
+from dns_sync import dns_changes
 from dns_sync import zones
 
+# Cloud Datastore limits on a single lookup and commit.
+MAX_DATASTORE_KEYS_PER_LOOKUP = 1000
+MAX_DATASTORE_ENTITIES_PER_COMMIT = 500
+
 
 class CreatedDnsResource(datastore.Entity):
     """Store resource data upon creation.
@@ -83,6 +87,36 @@ class CreatedDnsResource(datastore.Entity):
         else:
             return None
 
+    @classmethod
+    def get_existing_ids(cls, entity_ids):
+        """Lookup which of the ids have a CreatedDnsResource.
+
+        Args:
+            entity_ids: List of string ids of entities.
+
+        Returns:
+            Set of the ids of the found entities.
+        """
+        keys = [api.CLIENTS.datastore.key(CreatedDnsResource.KIND, entity_id)
+                for entity_id in entity_ids]
+        existing_ids = set()
+        for i in xrange(0, len(keys), MAX_DATASTORE_KEYS_PER_LOOKUP):
+            entities = api.CLIENTS.datastore.get_multi(
+                keys[i:i + MAX_DATASTORE_KEYS_PER_LOOKUP])
+            existing_ids.update(entity.key.name for entity in entities)
+        return existing_ids
+
+    @classmethod
+    def put_multi(cls, entities):
+        """Saves entities in datastore.
+
+        Args:
+            entities: List of CreatedDnsResource to save.
+        """
+        for i in xrange(0, len(entities), MAX_DATASTORE_ENTITIES_PER_COMMIT):
+            api.CLIENTS.datastore.put_multi(
+                entities[i:i + MAX_DATASTORE_ENTITIES_PER_COMMIT])
+
     def put(self):
         """Saves entity in datastore."""
         return api.CLIENTS.datastore.put(self)
@@ -92,50 +126,20 @@ class CreatedDnsResource(datastore.Entity):
         return api.CLIENTS.datastore.delete(self.key)
 
 
-def wait_for_dns_operation_completion(operation, zone_name, retry_count=0):
-    """Wait for the dns operation to complete.
-
-    Args:
-        operation: the operation object to wait on.
-        zone_name: dns zone operation is for.
-        retry_count: times this operation was waited on.
-
-    Raises:
-        Exception: If the operation failed due to an error.
-    """
-    change = api.CLIENTS.dns.changes().get(
-        changeId=operation['id'],
-        managedZone=zone_name,
-        project=zones.CONFIG.managed_zone_project).execute()
-    if change['status'] == 'pending':
-        # Retry with backoff and max of 10 seconds.
-        time.sleep(min(1.5**retry_count, 10))
-        wait_for_dns_operation_completion(
-            change, zone_name, retry_count=retry_count + 1)
-    elif change['status'] == 'done':
-        logging.info('dns change %s completed successfully.',
-                     json.dumps(change))
-    else:
-        raise Exception('dns change {} failed.'.format(json.dumps(change)))
-
-
-def change_dns_record(change, zone_name, wait_for_operation=True):
+def change_dns_record(change, zone_name):
     """Apply the input DNS change.
 
-    Calls the dns.change.create API.
+    Calls the dns.change.create API without waiting for the change to
+    complete, the PollDnsChanges handler tracks its completion.
 
     Args:
         change: The change object to apply.
         zone_name: Name of the DNS zone
-        wait_for_operation: True if the operation needs to complete before
-            returning. If the operation fails, an exception is raised.
+
+    Returns:
+        The dns_changes.PendingDnsChange tracking the change status.
     """
-    operation = api.CLIENTS.dns.changes().create(
-        managedZone=zone_name,
-        project=zones.CONFIG.managed_zone_project,
-        body=change).execute()
-    if wait_for_operation:
-        wait_for_dns_operation_completion(operation, zone_name)
+    return dns_changes.submit_change(change, zone_name)
 
 
 def get_a_record(dns_name, zone_name):
@@ -387,33 +391,112 @@ def create_dns_a_records_for_resource(resource, project):
         change_dns_record(body, zone_name)
 
 
-def get_project_from_dns_name(dns_name, zone_name):
+# Matches the project ID in an A record name stripped of the zone DNS name.
+PROJECT_IN_DNS_NAME_RE = re.compile(r'[^.]+(?:\.internal)?\.([^.]+)')
+
+# Cloud DNS limits on a single change, see
+# https://cloud.google.com/dns/quotas
+MAX_RRSET_ADDITIONS_PER_CHANGE = 1000
+MAX_RRSET_DELETIONS_PER_CHANGE = 1000
+MAX_RRDATA_SIZE_PER_CHANGE = 100000
+
+
+def get_project_from_dns_name(dns_name, zone_name, zone_dns_name=None):
     """Find the project a DNS name is for.
 
     Args:
         dns_name: The name of the A record.
         zone_name: Cloud DNS zone name.
+        zone_dns_name: DNS name of the zone, looked up from zone_name when not
+            supplied.
 
     Returns:
         The project ID parsed out of the DNS name. None if no project ID could
         be found.
     """
+    if zone_dns_name is None:
+        zone_dns_name = zones.CONFIG.get_zone_dns_name(zone_name)
     # Strip the zone dns name suffix.
-    instance_project = dns_name[:-len(
-        zones.CONFIG.get_zone_dns_name(zone_name)) + 1]
-    match = re.match(r'[^.]+(?:\.internal)?\.([^.]+)', instance_project)
+    instance_project = dns_name[:-len(zone_dns_name) + 1]
+    match = PROJECT_IN_DNS_NAME_RE.match(instance_project)
     if match:
         return match.groups(0)[0]
     return None
 
 
+def get_record_key(record):
+    """Key identifying a record set by its name and data.
+
+    Args:
+        record: A record set dictionary.
+
+    Returns:
+        A tuple of the record name and its sorted rrdatas.
+    """
+    return record['name'], tuple(sorted(record.get('rrdatas', [])))
+
+
+def get_rrdata_size(record):
+    """Returns the size of the rrdatas of a record set, in characters."""
+    return sum(len(rrdata) for rrdata in record.get('rrdatas', []))
+
+
+def batch_dns_changes(records_to_add, records_to_delete):
+    """Split additions and deletions into as few changes as possible.
+
+    Every change stays within the Cloud DNS per change limits. The deletion
+    and addition of records with the same name are kept in the same change so
+    that a record is never added while the record it replaces still exists.
+
+    Args:
+        records_to_add: List of record sets to add.
+        records_to_delete: List of record sets to delete.
+
+    Returns:
+        List of change bodies to submit with dns.changes.create.
+    """
+    records_by_name = collections.OrderedDict()
+    for record in records_to_delete:
+        records_by_name.setdefault(record['name'], ([], []))[0].append(record)
+    for record in records_to_add:
+        records_by_name.setdefault(record['name'], ([], []))[1].append(record)
+
+    changes = []
+    change = {'additions': [], 'deletions': []}
+    rrdata_size = 0
+    for deletions, additions in records_by_name.itervalues():
+        size = sum(get_rrdata_size(record)
+                   for record in itertools.chain(deletions, additions))
+        if ((change['additions'] or change['deletions']) and
+                (len(change['additions']) + len(additions) >
+                 MAX_RRSET_ADDITIONS_PER_CHANGE or
+                 len(change['deletions']) + len(deletions) >
+                 MAX_RRSET_DELETIONS_PER_CHANGE or
+                 rrdata_size + size > MAX_RRDATA_SIZE_PER_CHANGE)):
+            changes.append(change)
+            change = {'additions': [], 'deletions': []}
+            rrdata_size = 0
+        change['deletions'].extend(deletions)
+        change['additions'].extend(additions)
+        rrdata_size += size
+    if change['additions'] or change['deletions']:
+        changes.append(change)
+    return changes
+
+
 class SyncProjectsWithDns(auth.AdminRequestHandler):
     """Sync a cloud DNS zone with the GCE resources.
 
     Accepts one or more project IDs in the request and syncs the Cloud DNS zone
     with those resources creating and deleting DNS 'A' records in the zone.
+
+    Attributes:
+        MAX_CONCURRENT_PROJECTS: Number of projects to list resources of at
+            the same time.
     """
 
+    MAX_CONCURRENT_PROJECTS = 16
+
     def get_project_instances(self, project):
         """List all GCE instances in the project.
 
@@ -456,58 +539,87 @@ class SyncProjectsWithDns(auth.AdminRequestHandler):
                 forwarding_rules.append(rule)
         return forwarding_rules
 
-    def translate_to_a_records(self, project, instances, forwarding_rules):
-        """Convert project resources into A records.
+    def get_project_resources(self, project):
+        """List all instances and forwarding rules in the project.
 
         Args:
             project: Project id.
-            instances: List of GCE instances.
-            forwarding_rules: List of forwarding rules.
+
+        Returns:
+            A tuple of the list of GCE instances and the list of forwarding
+            rules.
+        """
+        return (self.get_project_instances(project),
+                self.get_project_forwarding_rules(project))
+
+    def translate_to_a_records(self, project_resources):
+        """Convert project resources into A records.
+
+        Args:
+            project_resources: List of tuples of project id, list of GCE
+                instances and list of forwarding rules.
 
         Returns:
             A dictionary mapping a Cloud DNS zone name to list of A records
             that should exist in that zone.
         """
         a_records_to_add = collections.defaultdict(list)
+        resources_by_id = collections.OrderedDict()
         # Translate all project resources into a list of A records to
         # create.
-        for resource in itertools.chain(instances, forwarding_rules):
-            zone_name, a_records = get_zone_name_and_ips_for_resource(
-                resource, project)
-            # Add CreatedDnsResource.
-            create_dns_rsource_id = '{}:{}:{}'.format(
-                project, resource['kind'][8:], resource['id'])
-            if not CreatedDnsResource.get_by_id(create_dns_rsource_id):
-                CreatedDnsResource(
-                    entity_id=create_dns_rsource_id,
-                    project_id=project,
-                    resource_string=json.dumps(resource),
-                    resource_name=resource['name'],
-                    event='synced').put()
-
-            for dns_name, ip_addresses in a_records:
-                a_records_to_add[zone_name].append({
-                    'name': dns_name,
-                    'type': 'A',
-                    'ttl': 300,
-                    'rrdatas': ip_addresses
-                })
+        for project, instances, forwarding_rules in project_resources:
+            for resource in itertools.chain(instances, forwarding_rules):
+                zone_name, a_records = get_zone_name_and_ips_for_resource(
+                    resource, project)
+                create_dns_rsource_id = '{}:{}:{}'.format(
+                    project, resource['kind'][8:], resource['id'])
+                resources_by_id[create_dns_rsource_id] = (project, resource)
+
+                for dns_name, ip_addresses in a_records:
+                    a_records_to_add[zone_name].append({
+                        'name': dns_name,
+                        'type': 'A',
+                        'ttl': 300,
+                        'rrdatas': ip_addresses
+                    })
+
+        # Add CreatedDnsResource for resources without one.
+        existing_ids = CreatedDnsResource.get_existing_ids(
+            resources_by_id.keys())
+        CreatedDnsResource.put_multi([
+            CreatedDnsResource(
+                entity_id=create_dns_rsource_id,
+                project_id=project,
+                resource_string=json.dumps(resource),
+                resource_name=resource['name'],
+                event='synced')
+            for create_dns_rsource_id, (project, resource)
+            in resources_by_id.iteritems()
+            if create_dns_rsource_id not in existing_ids
+        ])
         return a_records_to_add
 
-    def get_a_records_to_add(self, project):
-        """Returns all A records that should be added for a project.
+    def get_a_records_to_add(self, projects):
+        """Returns all A records that should be added for the projects.
+
+        Projects are listed concurrently by up to MAX_CONCURRENT_PROJECTS
+        threads.
 
         Args:
-            project: Project id.
+            projects: List of project ids.
 
         Returns:
             A dictionary mapping a Cloud DNS zone name to list of A records
             that should exist in that zone.
         """
-        return self.translate_to_a_records(
-            project,
-            self.get_project_instances(project),
-            self.get_project_forwarding_rules(project))
+        project_resources = api.map_concurrently(
+            self.get_project_resources, projects,
+            SyncProjectsWithDns.MAX_CONCURRENT_PROJECTS)
+        return self.translate_to_a_records([
+            (project, instances, forwarding_rules)
+            for project, (instances, forwarding_rules)
+            in zip(projects, project_resources)
+        ])
 
     def merge_with_existing_records(self, records_to_add, records_to_delete,
                                     projects, zone_name):
@@ -517,7 +629,8 @@ class SyncProjectsWithDns(auth.AdminRequestHandler):
         records_to_add and records_to_delete lists to contain the changes that
         need to be made. For example, not creating a record that already
         exists, deleting records that need to be changed or aren't in the list
-        to add.
+        to add. Records are matched by name and data in a single pass over the
+        zone.
 
         Args:
             records_to_add: List of A records to add.
@@ -532,39 +645,39 @@ class SyncProjectsWithDns(auth.AdminRequestHandler):
                 type='A',
                 pageToken=page_token)
 
-        # Loop through all existing dns a records, if it's for a
-        # project we are syncing determine if we should delete the
-        # record or keep it by removing it from list to add.
-        for existing_a_record in api.resource_iterator(rr_set_pager):
-            logging.debug('existing a record %s', existing_a_record)
-            record_project = get_project_from_dns_name(
-                existing_a_record['name'], zone_name)
-            logging.debug('record project %s', record_project)
-            # If the record isn't for a project we are syncing
-            # ignore it.
-            if record_project not in projects:
-                continue
+        # Index the records to add by name and data, dropping duplicates.
+        records_to_add_by_key = collections.OrderedDict()
+        for a_record_to_add in records_to_add:
+            records_to_add_by_key.setdefault(
+                get_record_key(a_record_to_add), a_record_to_add)
 
-            matching_record = None
-            logging.debug('zone records to add %s', records_to_add)
-            for a_record_to_add in records_to_add:
-                if (a_record_to_add['name'] == existing_a_record['name'] and
-                        a_record_to_add['rrdatas'] ==
-                        existing_a_record['rrdatas']):
-                    matching_record = a_record_to_add
-                    break
+        projects = set(projects)
+        zone_dns_name = zones.CONFIG.get_zone_dns_name(zone_name)
 
+        # Loop through all existing dns a records, if it has a matching record
+        # to add keep it, otherwise delete it when it's for a project we are
+        # syncing.
+        for existing_a_record in api.resource_iterator(rr_set_pager):
+            matching_record = records_to_add_by_key.pop(
+                get_record_key(existing_a_record), None)
             if matching_record:
                 logging.debug('record exists for resource %s',
                               matching_record['name'])
-                records_to_add.remove(matching_record)
-                break
+                continue
+
+            # If the record isn't for a project we are syncing
+            # ignore it.
+            record_project = get_project_from_dns_name(
+                existing_a_record['name'], zone_name, zone_dns_name)
+            if record_project not in projects:
+                continue
 
             # existing record has no matching resource
-            if not matching_record:
-                logging.debug('no resource forrecord %s. deleting it',
-                              existing_a_record['name'])
-                records_to_delete.append(existing_a_record)
+            logging.debug('no resource for record %s. deleting it',
+                          existing_a_record['name'])
+            records_to_delete.append(existing_a_record)
+
+        records_to_add[:] = records_to_add_by_key.values()
 
     def post(self):
         """Sync projects webhook.
@@ -583,11 +696,7 @@ class SyncProjectsWithDns(auth.AdminRequestHandler):
 
         logging.info('syncing projects: ' + str(projects))
         # From zone_name->a_records for all projects we are syncing.
-        a_records_to_add = collections.defaultdict(list)
-        for project in projects:
-            a_records = self.get_a_records_to_add(project)
-            for zone, records in a_records.iteritems():
-                a_records_to_add[zone].extend(records)
+        a_records_to_add = self.get_a_records_to_add(projects)
 
         # Determine what records need to be deleted,
         a_records_to_delete = collections.defaultdict(list)
@@ -606,15 +715,10 @@ class SyncProjectsWithDns(auth.AdminRequestHandler):
             self.merge_with_existing_records(records_to_add, records_to_delete,
                                              projects, zone_name)
 
-            # Are there records to add or delete in the zone?
-            if records_to_add or records_to_delete:
-                changes = {
-                    'additions': records_to_add,
-                    'deletions': records_to_delete
-                }
-                # But don't wait for operation to complete.
-                # as there are many of them to send.
-                change_dns_record(changes, zone_name, False)
+            # Apply the records to add or delete in the zone.
+            for change in batch_dns_changes(records_to_add,
+                                            records_to_delete):
+                change_dns_record(change, zone_name)
 
 
 class ComputeEngineActivityPush(webapp2.RequestHandler):
@@ -912,6 +1016,8 @@ class DnsSyncApplication(webapp2.WSGIApplication):
             ('/get_audit_log_state', audit_log.GetAuditLogState),
             ('/static/(.+)', AdminStaticFileHandler),
             ('/sync_projects', SyncProjectsWithDns),
+            ('/poll_dns_changes', dns_changes.PollDnsChanges),
+            ('/get_dns_changes', dns_changes.GetDnsChanges),
             webapp2.Route(
                 '/',
                 webapp2.RedirectHandler,
@@ -0,0 +1,155 @@
+# Copyright 2017 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#            http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import unittest
+
+from dns_sync import api
+from dns_sync import audit_log
+from dns_sync import main
+from google.cloud import datastore
+from google.cloud.datastore import client
+import mock
+import webapp2
+
+import common
+
+
+class TestHandlers(unittest.TestCase):
+    """Test polling the status of pending dns changes."""
+
+    def setUp(self):
+        logging.basicConfig(level=logging.DEBUG)
+
+    def test_poll_dns_changes(self):
+        """A pending change is marked done once Cloud DNS applied it."""
+        request = webapp2.Request.blank('/poll_dns_changes')
+        request.headers['X-Appengine-Cron'] = 'true'
+
+        data_files = common.read_data_files([
+            'tests/data/dns.v1.json',
+            'tests/data/instance-creation-dns-pending-operation.json',
+            'tests/data/instance-creation-dns-done-operation.json'
+        ])
+
+        success = {'status': '200'}
+        dns_mock_http = common.LoggingHttpMockSequence([
+            (success, '{"access_token":"token","expires_in":3600}'),
+            (success, data_files['dns.v1.json']),
+            (success, data_files['instance-creation-dns-done-operation.json'])
+        ])
+        api.Clients.dns.http = dns_mock_http
+        api.Clients.dns.cache_discovery = False
+
+        now = audit_log.utcnow()
+        pending_entity = datastore.Entity()
+        pending_entity.update({
+            'zone_name': 'dns-zone',
+            'change_id': '39',
+            'change':
+            data_files['instance-creation-dns-pending-operation.json'],
+            'status': 'pending',
+            'submit_time': now,
+            'check_count': 0,
+            'next_check_time': now,
+            'completion_time': None
+        })
+
+        mock_datastore = mock.Mock(spec=client.Client)
+        mock_datastore.project = 'project-1'
+        mock_datastore.get.side_effect = [common.config_entity()]
+        # Pending changes, then the keys of completed changes to prune.
+        mock_datastore.query.return_value.fetch.side_effect = [
+            [pending_entity], []
+        ]
+        api.CLIENTS.datastore = mock_datastore
+
+        dns_sync_app = main.DnsSyncApplication()
+
+        response = request.get_response(dns_sync_app)
+        self.assertEquals(response.status_int, 200)
+
+        (checked_changes,), _ = mock_datastore.put_multi.call_args
+        self.assertEquals(len(checked_changes), 1)
+        self.assertEquals(checked_changes[0]['status'], 'done')
+        self.assertEquals(checked_changes[0]['check_count'], 1)
+        self.assertEquals(
+            json.loads(checked_changes[0]['change'])['status'], 'done')
+        mock_datastore.delete_multi.assert_not_called()
+
+    def test_poll_dns_changes_failed(self):
+        """A change Cloud DNS no longer has is recorded as failed."""
+        request = webapp2.Request.blank('/poll_dns_changes')
+        request.headers['X-Appengine-Cron'] = 'true'
+
+        data_files = common.read_data_files([
+            'tests/data/dns.v1.json',
+            'tests/data/instance-creation-dns-pending-operation.json'
+        ])
+
+        success = {'status': '200'}
+        dns_mock_http = common.LoggingHttpMockSequence([
+            (success, '{"access_token":"token","expires_in":3600}'),
+            (success, data_files['dns.v1.json']),
+            ({'status': '404'}, '{}')
+        ])
+        api.Clients.dns.http = dns_mock_http
+        api.Clients.dns.cache_discovery = False
+
+        now = audit_log.utcnow()
+        pending_entity = datastore.Entity()
+        pending_entity.update({
+            'zone_name': 'dns-zone',
+            'change_id': '39',
+            'change':
+            data_files['instance-creation-dns-pending-operation.json'],
+            'status': 'pending',
+            'submit_time': now,
+            'check_count': 0,
+            'next_check_time': now,
+            'completion_time': None
+        })
+        expired_entity = datastore.Entity(
+            key=datastore.Key('PendingDnsChange', 'dns-zone:1',
+                              project='project-1'))
+
+        mock_datastore = mock.Mock(spec=client.Client)
+        mock_datastore.project = 'project-1'
+        mock_datastore.get.side_effect = [common.config_entity()]
+        mock_datastore.query.return_value.fetch.side_effect = [
+            [pending_entity], [expired_entity]
+        ]
+        api.CLIENTS.datastore = mock_datastore
+
+        response = request.get_response(main.DnsSyncApplication())
+        self.assertEquals(response.status_int, 500)
+        self.assertEquals(json.loads(response.body),
+                          {'failed': ['dns-zone:39']})
+
+        (checked_changes,), _ = mock_datastore.put_multi.call_args
+        self.assertEquals(checked_changes[0]['status'], 'failed')
+        self.assertEquals(checked_changes[0]['error'],
+                          'dns change not found')
+
+        # Completed changes are pruned by a keys only query.
+        mock_datastore.query.return_value.keys_only.assert_called_once_with()
+        mock_datastore.delete_multi.assert_called_once_with(
+            [expired_entity.key])
+
+    def test_poll_dns_changes_requires_cron(self):
+        """Only App Engine cron can trigger polling."""
+        request = webapp2.Request.blank('/poll_dns_changes')
+        response = request.get_response(main.DnsSyncApplication())
+        self.assertEquals(response.status_int, 403)
@@ -46,7 +46,6 @@ class TestHandlers(unittest.TestCase):
             'tests/data/instance-creation-instance-get.json',
             'tests/data/dns.v1.json', 'tests/data/dns-zone-response.json',
             'tests/data/instance-creation-dns-pending-operation.json',
-            'tests/data/instance-creation-dns-done-operation.json',
             'tests/data/instance-creation-dns-record-set-response.json'
         ])
 
@@ -99,7 +98,6 @@ class TestHandlers(unittest.TestCase):
             # make change
             (success,
              data_files['instance-creation-dns-pending-operation.json']),
-            (success, data_files['instance-creation-dns-done-operation.json']),
         ])
 
         mock_datastore = mock.Mock(spec=client.Client)
@@ -115,3 +113,6 @@ class TestHandlers(unittest.TestCase):
 
         response = request.get_response(dns_sync_app)
         self.assertEquals(response.status_int, 200)
+        # The change is tracked without waiting for it to complete.
+        pending_change = mock_datastore.put.call_args_list[-1][0][0]
+        self.assertEquals(pending_change['status'], 'pending')
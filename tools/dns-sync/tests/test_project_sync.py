@@ -81,6 +81,7 @@ class TestHandlers(unittest.TestCase):
         mock_datastore.project = 'project-1'
         entity = mock.MagicMock(spec=datastore.Entity)
         mock_datastore.get.return_value = entity
+        mock_datastore.get_multi.return_value = [entity]
 
         api.Clients.dns.http = dns_mock_http
         api.Clients.dns.cache_discovery = False
@@ -89,6 +90,35 @@ class TestHandlers(unittest.TestCase):
         dns_sync_app = main.DnsSyncApplication()
 
         auth.AdminRequestHandler.SKIP_AUTHENTICATION = True
+        # The mock compute responses are in project order.
+        main.SyncProjectsWithDns.MAX_CONCURRENT_PROJECTS = 1
         # Get a response for that request.
         response = request.get_response(dns_sync_app)
         self.assertEquals(response.status_int, 200)
+        self.assertEquals(mock_datastore.get_multi.call_count, 1)
+        self.assertEquals(mock_datastore.put_multi.call_count, 1)
+
+    def test_batch_dns_changes(self):
+        """Changes are split on the per change limits keeping names together."""
+        records_to_add = [{
+            'name': 'instance-{}.project-1.mydomain.com.'.format(i),
+            'type': 'A',
+            'ttl': 300,
+            'rrdatas': ['10.240.0.{}'.format(i % 250)]
+        } for i in xrange(2500)]
+        records_to_delete = [{
+            'name': 'instance-{}.project-1.mydomain.com.'.format(i),
+            'type': 'A',
+            'ttl': 300,
+            'rrdatas': ['10.0.0.1']
+        } for i in xrange(0, 2500, 2)]
+
+        changes = main.batch_dns_changes(records_to_add, records_to_delete)
+
+        self.assertEquals([(len(change['additions']), len(change['deletions']))
+                           for change in changes],
+                          [(1000, 1000), (1000, 250), (500, 0)])
+        for change in changes:
+            self.assertTrue(
+                set(record['name'] for record in change['deletions']) <=
+                set(record['name'] for record in change['additions']))
@@ -0,0 +1,315 @@
+# Copyright 2018 Google LLC. All rights reserved. Licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+# Any software provided by Google hereunder is distributed "AS IS", WITHOUT WARRANTIES OR
+# CONDITIONS OF ANY KIND, and is not intended for production use.
+"""Moves all of the buckets listed in a manifest, several of them at the same time.
+
+Most of a move is spent waiting on the STS jobs, so the moves are run concurrently by a pool of
+threads. The credentials, storage clients and project/STS account lookups are shared by all of the
+moves, and every thread reuses its STS client for all of the moves it runs. Console spinners of
+concurrent moves would overwrite each other, so a progress table of all of the moves is printed
+periodically instead, followed by a timing report once they are all done.
+"""
+
+import datetime
+import functools
+import threading
+import time
+from concurrent import futures
+
+from attr import attrs, attrib, Factory
+
+from gcs_bucket_mover import bucket_mover_service
+
+DEFAULT_MAX_CONCURRENT_MOVES = 4
+DEFAULT_PROGRESS_INTERVAL = 60
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+# Steps of a move that are spent in STS jobs, reported separately in the timing report
+_STS_STEPS = ("Creating STS job", "Creating STS jobs", "Checking STS job status")
+
+_thread_state = threading.local()
+
+
+@attrs  # This is a data class. pylint: disable=too-few-public-methods
+class BucketMove(object):
+  """The state and timings of the move of one bucket of the manifest."""
+
+  bucket_name = attrib()
+  rename_bucket_to = attrib(default=None)
+  temp_bucket_name = attrib(default=None)
+  status = attrib(default=PENDING)
+  step = attrib(default="")
+  started = attrib(default=None)
+  finished = attrib(default=None)
+  step_durations = attrib(default=Factory(dict))
+
+  @property
+  def target_bucket_name(self):
+    return self.rename_bucket_to or self.bucket_name
+
+  def duration(self, now=None):
+    """The number of seconds the move took, or has taken so far if it is still running."""
+    if self.started is None:
+      return 0
+    return (self.finished or now or time.time()) - self.started
+
+  def sts_duration(self):
+    """The number of seconds spent creating and waiting for STS jobs."""
+    return sum(seconds for step, seconds in self.step_durations.items()
+               if step in _STS_STEPS)
+
+
+class _ProgressSpinner(object):
+  """Stands in for the yaspin spinner of a step, showing the step in the progress table instead.
+
+  Messages written to the spinners are already logged to Stackdriver by the mover, so they are
+  dropped here.
+  """
+
+  def __init__(self, move, text):
+    self._move = move
+    self._step = text
+    self._started = None
+    self.text = text
+
+  @property
+  def text(self):
+    return self._move.step
+
+  @text.setter
+  def text(self, value):
+    self._move.step = value
+
+  def __enter__(self):
+    self._started = time.time()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    durations = self._move.step_durations
+    durations[self._step] = (durations.get(self._step, 0) + time.time() -
+                             self._started)
+
+  def write(self, text):
+    pass
+
+  def ok(self, text=None):
+    pass
+
+  def fail(self, text=None):
+    pass
+
+
+class _BucketLogger(object):
+  """Prefixes the messages of a move with its bucket name, as the moves' logs are interleaved."""
+
+  def __init__(self, cloud_logger, bucket_name):
+    self._cloud_logger = cloud_logger
+    self._prefix = "[{}] ".format(bucket_name)
+
+  def log_text(self, text, **kwargs):
+    self._cloud_logger.log_text(self._prefix + text, **kwargs)
+
+
+def read_manifest(path):
+  """Read the buckets to move from a manifest file.
+
+  Every line holds a bucket name, optionally followed by the name to rename it to and the temp
+  bucket name to use, separated by commas. Empty lines and lines starting with # are ignored.
+
+  Args:
+      path: a local file system path
+
+  Returns:
+      A list of BucketMove objects, in the order of the manifest
+  """
+
+  moves = []
+  seen = set()
+  with open(path, "r") as stream:
+    for line_number, line in enumerate(stream, 1):
+      line = line.strip()
+      if not line or line.startswith("#"):
+        continue
+      fields = [field.strip() for field in line.split(",")]
+      if len(fields) > 3 or not fields[0]:
+        raise SystemExit("Invalid line {} in the bucket manifest: {}".format(
+          line_number, line))
+      move = BucketMove(*[field or None for field in fields])
+      if move.bucket_name in seen:
+        raise SystemExit("Bucket {} is listed more than once in the manifest".format(
+          move.bucket_name))
+      seen.add(move.bucket_name)
+      moves.append(move)
+
+  if not moves:
+    raise SystemExit("The bucket manifest does not list any bucket")
+  return moves
+
+
+def main(config, parsed_args, cloud_logger):
+  """Move all of the buckets of the manifest given on the command line
+
+  Args:
+      config: A Configuration object with the config values shared by all of the moves
+      parsed_args: the configargparser parsing of command line options
+      cloud_logger: A GCP logging client instance
+  """
+
+  moves = read_manifest(parsed_args.bucket_manifest)
+  max_concurrent_moves = (parsed_args.max_concurrent_moves or
+                          DEFAULT_MAX_CONCURRENT_MOVES)
+  cloud_logger.log_text(
+    "Starting GCS Bucket Mover for {} buckets, {} at a time".format(
+      len(moves), max_concurrent_moves))
+
+  all_done = threading.Event()
+  reporter = threading.Thread(target=_report_progress,
+                              args=(moves, all_done, DEFAULT_PROGRESS_INTERVAL))
+  reporter.daemon = True
+  reporter.start()
+
+  started = time.time()
+  run_move = functools.partial(_run_move, config, parsed_args, cloud_logger)
+  with futures.ThreadPoolExecutor(max_workers=max_concurrent_moves) as executor:
+    list(executor.map(run_move, moves))
+  all_done.set()
+  reporter.join()
+
+  print(format_progress_table(moves))
+  print(format_timing_report(moves, time.time() - started))
+
+  failed_moves = [move for move in moves if move.status == FAILED]
+  cloud_logger.log_text(
+    "Completed GCS Bucket Mover, {} of {} bucket moves failed".format(
+      len(failed_moves), len(moves)))
+  if failed_moves:
+    raise SystemExit("{} of {} bucket moves failed: {}".format(
+      len(failed_moves), len(moves),
+      ", ".join(move.bucket_name for move in failed_moves)))
+
+
+def _run_move(config, parsed_args, cloud_logger, move):
+  """Run the move of one bucket of the manifest, recording its progress in the move.
+
+  Args:
+      config: A Configuration object with the config values shared by all of the moves
+      parsed_args: the configargparser parsing of command line options
+      cloud_logger: A GCP logging client instance
+      move: The BucketMove object of the bucket to move
+  """
+
+  bucket_logger = _BucketLogger(cloud_logger, move.bucket_name)
+  move.started = time.time()
+  move.status = RUNNING
+  bucket_mover_service.set_spinner_factory(
+    functools.partial(_ProgressSpinner, move))
+  try:
+    bucket_config = config.for_bucket(move.bucket_name, move.rename_bucket_to,
+                                      move.temp_bucket_name)
+    sts_client = getattr(_thread_state, "sts_client", None)
+    if sts_client is None:
+      sts_client = bucket_mover_service.build_sts_client(config)
+      _thread_state.sts_client = sts_client
+    bucket_mover_service.move_bucket(bucket_config, parsed_args, bucket_logger,
+                                     sts_client)
+  except (Exception, SystemExit) as ex:  # pylint: disable=broad-except
+    # A failed move must not stop the others, the failures are reported at the end
+    move.status = FAILED
+    move.step = "Failed during '{}': {}".format(move.step, ex)
+    bucket_logger.log_text(move.step)
+  else:
+    move.status = SUCCEEDED
+    move.step = ""
+    bucket_logger.log_text("Completed bucket move")
+  finally:
+    move.finished = time.time()
+    bucket_mover_service.set_spinner_factory(None)
+
+
+def _report_progress(moves, all_done, interval):
+  """Print the progress table of the moves until they are all done.
+
+  Args:
+      moves: The list of BucketMove objects
+      all_done: A threading.Event set once all of the moves are done
+      interval: The number of seconds between two progress tables
+  """
+
+  while not all_done.wait(interval):
+    print(format_progress_table(moves))
+
+
+def format_progress_table(moves, now=None):
+  """Format the status and current step of every move.
+
+  Args:
+      moves: The list of BucketMove objects
+      now: The current time, defaults to time.time()
+
+  Returns:
+      The table as a string
+  """
+
+  now = now or time.time()
+  counts = ", ".join("{} {}".format(
+    len([move for move in moves if move.status == status]), status.lower())
+                     for status in (PENDING, RUNNING, SUCCEEDED, FAILED))
+  rows = [(move.bucket_name, move.target_bucket_name, move.status,
+           _format_duration(move.duration(now)), move.step) for move in moves]
+  return "Bucket moves: {}\n{}".format(
+    counts,
+    _format_table(("BUCKET", "TARGET", "STATUS", "ELAPSED", "STEP"), rows))
+
+
+def format_timing_report(moves, total_seconds):
+  """Format how long every move took, split between the STS jobs and the other steps.
+
+  Args:
+      moves: The list of BucketMove objects
+      total_seconds: The number of seconds the whole batch took
+
+  Returns:
+      The report as a string
+  """
+
+  rows = []
+  for move in sorted(moves, key=lambda move: move.duration(), reverse=True):
+    duration = move.duration()
+    sts_duration = move.sts_duration()
+    rows.append((move.bucket_name, move.status, _format_duration(duration),
+                 _format_duration(sts_duration),
+                 _format_duration(duration - sts_duration)))
+  summed_seconds = sum(move.duration() for move in moves)
+  return "{}\n{} bucket moves took {} ({} if run one at a time)".format(
+    _format_table(("BUCKET", "STATUS", "TOTAL", "STS JOBS", "OTHER STEPS"),
+                  rows), len(moves), _format_duration(total_seconds),
+    _format_duration(summed_seconds))
+
+
+def _format_duration(seconds):
+  return str(datetime.timedelta(seconds=int(round(max(seconds, 0)))))
+
+
+def _format_table(headers, rows):
+  widths = [
+    max(len(str(value)) for value in column) for column in zip(headers, *rows)
+  ]
+  lines = [
+    "  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip()
+    for row in [headers] + list(rows)
+  ]
+  return "\n".join(lines)
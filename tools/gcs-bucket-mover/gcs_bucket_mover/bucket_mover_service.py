@@ -15,6 +15,7 @@
 
 import datetime
 import json
+import threading
 from time import sleep
 from retrying import retry
 from yaspin import yaspin
@@ -28,9 +29,17 @@ from googleapiclient import discovery
 
 from gcs_bucket_mover import bucket_details
 from gcs_bucket_mover import sts_job_status
+from gcs_bucket_mover import sts_shards
 
 _CHECKMARK = "\u2713".encode("utf8")
 
+# Results of the project and STS account lookups, shared by all of the moves of a run
+_lookup_cache = {}
+_lookup_cache_lock = threading.Lock()
+
+# Per thread settings of the moves run concurrently by batch_mover_service
+_thread_state = threading.local()
+
 
 def main(config, parsed_args, cloud_logger):
   """Main entry point for the bucket mover tool
@@ -42,6 +51,19 @@ def main(config, parsed_args, cloud_logger):
   """
   cloud_logger.log_text("Starting GCS Bucket Mover")
   _print_config_details(cloud_logger, config)
+  move_bucket(config, parsed_args, cloud_logger)
+  cloud_logger.log_text("Completed GCS Bucket Mover")
+
+
+def move_bucket(config, parsed_args, cloud_logger, sts_client=None):
+  """Move or rename the bucket of the config
+
+  Args:
+      config: A Configuration object with all of the config values needed for the script to run
+      parsed_args: the configargparser parsing of command line options
+      cloud_logger: A GCP logging client instance
+      sts_client: The STS client object to be used, a new one is built if not given
+  """
 
   source_bucket = (
     config.source_storage_client.lookup_bucket(  # pylint: disable=no-member
@@ -61,9 +83,9 @@ def main(config, parsed_args, cloud_logger):
   _check_bucket_lock(cloud_logger, config, source_bucket,
                      source_bucket_details)
 
-  sts_client = discovery.build("storagetransfer",
-                               "v1",
-                               credentials=config.target_project_credentials)
+  if sts_client is None:
+    sts_client = build_sts_client(config)
+  shard_plan = _get_sts_shard_plan(cloud_logger, config, source_bucket)
 
   if config.is_rename:
     _rename_bucket(
@@ -73,6 +95,7 @@ def main(config, parsed_args, cloud_logger):
       source_bucket_details,
       sts_client,
       transfer_log_value,
+      shard_plan,
     )
   else:
     _move_bucket(
@@ -82,9 +105,71 @@ def main(config, parsed_args, cloud_logger):
       source_bucket_details,
       sts_client,
       transfer_log_value,
+      shard_plan,
     )
 
-  cloud_logger.log_text("Completed GCS Bucket Mover")
+
+def build_sts_client(config):
+  """Build an STS client for the target project
+
+  The client is not thread safe, so concurrent moves each need their own.
+
+  Args:
+      config: A Configuration object with all of the config values needed for the script to run
+
+  Returns:
+      The STS client object
+  """
+
+  return discovery.build("storagetransfer",
+                         "v1",
+                         credentials=config.target_project_credentials)
+
+
+def set_spinner_factory(factory):
+  """Replace the console spinners of the moves run by the current thread
+
+  Args:
+      factory: A callable taking the spinner text and returning a context manager with the
+          text, write, ok and fail members of a yaspin spinner, or None to restore yaspin
+  """
+
+  _thread_state.spinner_factory = factory
+
+
+def _spinner(text):
+  """Create the spinner shown during a step of the move
+
+  Args:
+      text: The text of the spinner
+
+  Returns:
+      A yaspin spinner, or the replacement set for the current thread by set_spinner_factory
+  """
+
+  factory = getattr(_thread_state, "spinner_factory", None)
+  if factory is None:
+    return yaspin(text=text)
+  return factory(text)
+
+
+def _cached_lookup(key, lookup):
+  """Return the result of the lookup, calling it only once per key
+
+  Args:
+      key: A hashable identifying the lookup
+      lookup: A function doing the lookup
+
+  Returns:
+      The result of the lookup
+  """
+
+  with _lookup_cache_lock:
+    if key in _lookup_cache:
+      return _lookup_cache[key]
+  value = lookup()
+  with _lookup_cache_lock:
+    return _lookup_cache.setdefault(key, value)
 
 
 def _check_log_values(cloud_logger, config):
@@ -101,7 +186,7 @@ def _check_log_values(cloud_logger, config):
       else:
         msg = "Entered log action is incorrect"
         cloud_logger.log_text(msg)
-        with yaspin(text=msg) as spinner:
+        with _spinner(msg) as spinner:
           spinner.ok(_CHECKMARK)
         raise Exception(msg)
     transfer_log_value = {"logActions": log_action_final}
@@ -114,7 +199,7 @@ def _check_log_values(cloud_logger, config):
       else:
         msg = "Entered log states is incorrect"
         cloud_logger.log_text(msg)
-        with yaspin(text=msg) as spinner:
+        with _spinner(msg) as spinner:
           spinner.ok(_CHECKMARK)
         raise Exception(msg)
     transfer_log_value = {"logActionStates": log_states_final}
@@ -127,7 +212,7 @@ def _check_log_values(cloud_logger, config):
       else:
         msg = "Entered log action or log state is incorrect"
         cloud_logger.log_text(msg)
-        with yaspin(text=msg) as spinner:
+        with _spinner(msg) as spinner:
           spinner.ok(_CHECKMARK)
         raise Exception(msg)
     log_states = config.log_action_state.split(",")
@@ -137,7 +222,7 @@ def _check_log_values(cloud_logger, config):
       else:
         msg = "Entered log states is incorrect"
         cloud_logger.log_text(msg)
-        with yaspin(text=msg) as spinner:
+        with _spinner(msg) as spinner:
           spinner.ok(_CHECKMARK)
         raise Exception(msg)
     transfer_log_value = {
@@ -157,6 +242,7 @@ def _rename_bucket(
     source_bucket_details,
     sts_client,
     transfer_log_value,
+    shard_plan=None,
 ):
   """Main method for doing a bucket rename
 
@@ -168,20 +254,21 @@ def _rename_bucket(
       source_bucket: The bucket object for the original source bucket in the source project
       source_bucket_details: The details copied from the source bucket that is being moved
       sts_client: The STS client object to be used
+      shard_plan: The objectConditions of the STS jobs of every hop, or None for a single job
   """
   target_bucket = _create_target_bucket(cloud_logger, config,
                                         source_bucket_details,
                                         config.target_bucket_name)
   sts_account_email = _assign_sts_permissions(cloud_logger, sts_client,
                                               config, target_bucket)
-  _run_and_wait_for_sts_job(
+  _run_sts_transfer(
     sts_client,
-    config.target_project,
     config.bucket_name,
     config.target_bucket_name,
     cloud_logger,
     config,
     transfer_log_value,
+    shard_plan,
   )
 
   _delete_empty_source_bucket(cloud_logger, source_bucket)
@@ -196,6 +283,7 @@ def _move_bucket(
     source_bucket_details,
     sts_client,
     transfer_log_value,
+    shard_plan=None,
 ):
   """Main method for doing a bucket move.
 
@@ -208,34 +296,35 @@ def _move_bucket(
       source_bucket: The bucket object for the original source bucket in the source project
       source_bucket_details: The details copied from the source bucket that is being moved
       sts_client: The STS client object to be used
+      shard_plan: The objectConditions of the STS jobs of every hop, or None for a single job
   """
   target_temp_bucket = _create_target_bucket(cloud_logger, config,
                                              source_bucket_details,
                                              config.temp_bucket_name)
   sts_account_email = _assign_sts_permissions(cloud_logger, sts_client,
                                               config, target_temp_bucket)
-  _run_and_wait_for_sts_job(
+  _run_sts_transfer(
     sts_client,
-    config.target_project,
     config.bucket_name,
     config.temp_bucket_name,
     cloud_logger,
     config,
     transfer_log_value,
+    shard_plan,
   )
 
   _delete_empty_source_bucket(cloud_logger, source_bucket)
   _recreate_source_bucket(cloud_logger, config, source_bucket_details)
   _assign_sts_permissions_to_new_bucket(cloud_logger, sts_account_email,
                                         config)
-  _run_and_wait_for_sts_job(
+  _run_sts_transfer(
     sts_client,
-    config.target_project,
     config.temp_bucket_name,
     config.bucket_name,
     cloud_logger,
     config,
     transfer_log_value,
+    shard_plan,
   )
 
   _delete_empty_temp_bucket(cloud_logger, target_temp_bucket)
@@ -284,7 +373,7 @@ def _check_bucket_lock(cloud_logger, config, bucket, source_bucket_details):
       config.lock_file_name)
     cloud_logger.log_text(spinner_text)
 
-    with yaspin(text=spinner_text) as spinner:
+    with _spinner(spinner_text) as spinner:
       _write_spinner_and_log(
         spinner,
         cloud_logger,
@@ -364,7 +453,7 @@ def _create_target_bucket(cloud_logger, config, source_bucket_details,
       bucket_name, config.target_project)
 
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     target_bucket = _create_bucket(spinner, cloud_logger, config,
                                    bucket_name, source_bucket_details)
     _write_spinner_and_log(
@@ -392,7 +481,7 @@ def _assign_sts_permissions(cloud_logger, sts_client, config,
 
   spinner_text = "Assigning STS permissions to source/temp buckets"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     sts_account_email = _get_sts_iam_account_email(sts_client,
                                                    config.target_project)
     _write_spinner_and_log(
@@ -430,7 +519,7 @@ def _assign_sts_permissions_to_new_bucket(cloud_logger, sts_account_email,
 
   spinner_text = "Assigning STS permissions to new source bucket"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     _assign_sts_iam_roles(
       sts_account_email,
       config.target_storage_client,
@@ -451,7 +540,7 @@ def _delete_empty_source_bucket(cloud_logger, source_bucket):
 
   spinner_text = "Deleting empty source bucket"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     source_bucket.delete()
     spinner.ok(_CHECKMARK)
 
@@ -467,7 +556,7 @@ def _recreate_source_bucket(cloud_logger, config, source_bucket_details):
 
   spinner_text = "Re-creating source bucket in target project"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     _create_bucket(spinner, cloud_logger, config, config.bucket_name,
                    source_bucket_details)
     spinner.ok(_CHECKMARK)
@@ -483,7 +572,7 @@ def _delete_empty_temp_bucket(cloud_logger, target_temp_bucket):
 
   spinner_text = "Deleting empty temp bucket"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     target_temp_bucket.delete()
     spinner.ok(_CHECKMARK)
 
@@ -501,7 +590,7 @@ def _remove_sts_permissions(cloud_logger, sts_account_email, config,
 
   spinner_text = "Removing STS permissions from bucket {}".format(bucket_name)
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     _remove_sts_iam_roles(sts_account_email, config.target_storage_client,
                           bucket_name)
     spinner.ok(_CHECKMARK)
@@ -518,9 +607,12 @@ def _get_project_number(project_id, credentials):
       The project number as a string
   """
 
-  crm = discovery.build("cloudresourcemanager", "v1", credentials=credentials)
-  project = (crm.projects().get(projectId=project_id).execute(num_retries=5))  # pylint: disable=no-member
-  return project["projectNumber"]
+  def _lookup():
+    crm = discovery.build("cloudresourcemanager", "v1", credentials=credentials)
+    project = (crm.projects().get(projectId=project_id).execute(num_retries=5))  # pylint: disable=no-member
+    return project["projectNumber"]
+
+  return _cached_lookup(("projectNumber", project_id), _lookup)
 
 
 def _create_bucket(spinner, cloud_logger, config, bucket_name,
@@ -766,9 +858,12 @@ def _get_sts_iam_account_email(sts_client, project_id):
       The STS service account email as a string
   """
 
-  result = (sts_client.googleServiceAccounts().get(
-    projectId=project_id).execute(num_retries=5))
-  return result["accountEmail"]
+  def _lookup():
+    result = (sts_client.googleServiceAccounts().get(
+      projectId=project_id).execute(num_retries=5))
+    return result["accountEmail"]
+
+  return _cached_lookup(("stsAccountEmail", project_id), _lookup)
 
 
 def _assign_sts_iam_roles(sts_email, storage_client, project_name, bucket_name,
@@ -887,6 +982,87 @@ def _assign_target_project_to_topic(spinner, cloud_logger, config, topic_name,
   )
 
 
+def _get_sts_shard_plan(cloud_logger, config, source_bucket):
+  """Plan how the objects are split between the STS jobs of every hop, if there are several
+
+  Args:
+      cloud_logger: A GCP logging client instance
+      config: A Configuration object with all of the config values needed for the script to run
+      source_bucket: The bucket object for the original source bucket in the source project
+
+  Returns:
+      A list of objectConditions dicts, or None to transfer with a single STS job
+  """
+
+  if config.sts_shards <= 1:
+    return None
+
+  spinner_text = "Planning STS shards"
+  cloud_logger.log_text(spinner_text)
+  with _spinner(spinner_text) as spinner:
+    shard_plan = sts_shards.get_shard_plan(source_bucket, config.sts_shards,
+                                           config.sts_shard_plan,
+                                           config.sts_shard_manifest)
+    _write_spinner_and_log(
+      spinner,
+      cloud_logger,
+      "Objects will be transferred by {} STS jobs per hop".format(
+        len(shard_plan)),
+    )
+    spinner.ok(_CHECKMARK)
+
+  if len(shard_plan) == 1:
+    return None
+  return shard_plan
+
+
+def _run_sts_transfer(
+    sts_client,
+    source_bucket_name,
+    sink_bucket_name,
+    cloud_logger,
+    config,
+    transfer_log_value,
+    shard_plan,
+):
+  """Transfer all objects from a bucket to another with one or several STS jobs
+
+  Args:
+      sts_client: The STS client object to be used
+      source_bucket_name: The name of the bucket where the STS jobs will transfer from
+      sink_bucket_name: The name of the bucket where the STS jobs will transfer to
+      cloud_logger: A GCP logging client instance
+      config: A Configuration object with all of the config values needed for the script to run
+      transfer_log_value: The loggingConfig of the STS jobs
+      shard_plan: The objectConditions of the STS jobs, or None for a single job
+  """
+
+  if not shard_plan:
+    _run_and_wait_for_sts_job(
+      sts_client,
+      config.target_project,
+      source_bucket_name,
+      sink_bucket_name,
+      cloud_logger,
+      config,
+      transfer_log_value,
+    )
+    return
+
+  # The shards keep their status between the retries, so that only the failed ones are rerun
+  shards = [sts_shards.StsShard(conditions) for conditions in shard_plan]
+  _run_and_wait_for_sharded_sts_jobs(
+    sts_client,
+    config.target_project,
+    source_bucket_name,
+    sink_bucket_name,
+    cloud_logger,
+    config,
+    transfer_log_value,
+    shards,
+  )
+
+
 @retry(
   retry_on_result=_retry_if_false,
   wait_exponential_multiplier=10000,
@@ -924,7 +1100,7 @@ def _run_and_wait_for_sts_job(
 
   spinner_text = "Creating STS job"
   cloud_logger.log_text(spinner_text)
-  with yaspin(text=spinner_text) as spinner:
+  with _spinner(spinner_text) as spinner:
     sts_job_name = _execute_sts_job(
       sts_client,
       target_project,
@@ -936,7 +1112,7 @@ def _run_and_wait_for_sts_job(
     spinner.ok(_CHECKMARK)
 
   # Check every 10 seconds until STS job is complete
-  with yaspin(text="Checking STS job status") as spinner:
+  with _spinner("Checking STS job status") as spinner:
     while True:
       job_status = _check_sts_job(spinner, cloud_logger, sts_client,
                                   target_project, sts_job_name)
@@ -962,6 +1138,128 @@ def _run_and_wait_for_sts_job(
   return False
 
 
+@retry(
+  retry_on_result=_retry_if_false,
+  wait_exponential_multiplier=10000,
+  wait_exponential_max=120000,
+  stop_max_attempt_number=10,
+)
+def _run_and_wait_for_sharded_sts_jobs(
+    sts_client,
+    target_project,
+    source_bucket_name,
+    sink_bucket_name,
+    cloud_logger,
+    config,
+    transfer_log_value,
+    shards,
+):
+  """Kick off an STS job per shard and wait for them all to complete. Retry the failed ones.
+
+  Args:
+      sts_client: The STS client object to be used
+      target_project: The name of the target project where the STS jobs will be created
+      source_bucket_name: The name of the bucket where the STS jobs will transfer from
+      sink_bucket_name: The name of the bucket where the STS jobs will transfer to
+      cloud_logger: A GCP logging client instance
+      shards: The StsShard objects of the hop, updated with the status of their jobs
+
+  Returns:
+      True if the STS jobs of all shards completed successfully, False if any of them failed
+  """
+
+  # Note that this routine is in a @retry decorator, so non-True exits
+  # and unhandled exceptions will trigger a retry of the shards that have not succeeded.
+  # Only the shards without a job or whose job failed get a new one, the jobs still in
+  # progress from a previous attempt are polled again rather than run twice.
+
+  pending_shards = [shard for shard in shards if not shard.succeeded]
+  new_job_shards = [
+    shard for shard in pending_shards
+    if shard.job_name is None or shard.status == sts_job_status.StsJobStatus.FAILED
+  ]
+  msg = "Moving from bucket {} to {} with {} of {} STS jobs ({} new)".format(
+    source_bucket_name, sink_bucket_name, len(pending_shards), len(shards),
+    len(new_job_shards))
+  _print_and_log(cloud_logger, msg)
+
+  spinner_text = "Creating STS jobs"
+  cloud_logger.log_text(spinner_text)
+  with _spinner(spinner_text) as spinner:
+    for shard in new_job_shards:
+      shard.job_name = _execute_sts_job(
+        sts_client,
+        target_project,
+        source_bucket_name,
+        sink_bucket_name,
+        config,
+        transfer_log_value,
+        shard.object_conditions,
+      )
+      shard.status = sts_job_status.StsJobStatus.IN_PROGRESS
+      shard.counters = None
+    spinner.ok(_CHECKMARK)
+
+  # Check every 10 seconds until all of the STS jobs are complete
+  with _spinner("Checking STS job status") as spinner:
+    while True:
+      for shard in pending_shards:
+        if shard.status == sts_job_status.StsJobStatus.IN_PROGRESS:
+          _update_sts_shard(sts_client, target_project, shard)
+      counters = _sum_sts_counters(shard.counters for shard in shards)
+      if not any(shard.status == sts_job_status.StsJobStatus.IN_PROGRESS
+                 for shard in pending_shards):
+        break
+      _print_sts_counters(spinner, cloud_logger, counters, False)
+      sleep(10)
+
+    failed_shards = [shard for shard in shards if not shard.succeeded]
+    if failed_shards:
+      spinner.fail("X")
+    else:
+      _print_sts_counters(spinner, cloud_logger, counters, True)
+      spinner.ok(_CHECKMARK)
+
+  if not failed_shards:
+    return True
+
+  # Execution will only reach this code if something went wrong with an STS job
+  _print_and_log(
+    cloud_logger,
+    "{} of {} STS jobs failed: {}. You can view the details in the cloud"
+    " console.".format(len(failed_shards), len(shards),
+                       ", ".join(shard.job_name for shard in failed_shards)),
+  )
+  _print_and_log(
+    cloud_logger,
+    "Waiting for a period of time and then trying again the failed ones. If you choose to"
+    " cancel this script, the buckets will need to be manually cleaned up.",
+  )
+  return False
+
+
+def _update_sts_shard(sts_client, target_project, shard):
+  """Update the status and counters of the STS job of a shard.
+
+  Args:
+      sts_client: The STS client object to be used
+      target_project: The name of the target project where the STS job was created
+      shard: The StsShard object of the job
+  """
+
+  operation = _get_sts_operation(sts_client, target_project, shard.job_name)
+  if not operation:
+    return
+
+  metadata = operation["metadata"]
+  shard.counters = metadata.get("counters", shard.counters)
+  if operation.get("done"):
+    if metadata["status"] == "SUCCESS":
+      shard.status = sts_job_status.StsJobStatus.SUCCESS
+    else:
+      shard.status = sts_job_status.StsJobStatus.FAILED
+
+
 def _execute_sts_job(
     sts_client,
     target_project,
@@ -969,6 +1267,7 @@ def _execute_sts_job(
     sink_bucket_name,
     config,
     transfer_log_value,
+    object_conditions=None,
 ):
   """Start the STS job.
 
@@ -977,6 +1276,7 @@ def _execute_sts_job(
       target_project: The name of the target project where the STS job will be created
       source_bucket_name: The name of the bucket where the STS job will transfer from
       sink_bucket_name: The name of the bucket where the STS job will transfer to
+      object_conditions: The objectConditions selecting the objects to transfer, if not all
 
   Returns:
       The name of the STS job as a string
@@ -1038,6 +1338,8 @@ def _execute_sts_job(
       },
     },
   }
+  if object_conditions:
+    transfer_job["transferSpec"]["objectConditions"] = object_conditions
   transfer_job["loggingConfig"] = transfer_log_value
   result = sts_client.transferJobs().create(body=transfer_job).execute(
     num_retries=5)
@@ -1058,15 +1360,9 @@ def _check_sts_job(spinner, cloud_logger, sts_client, target_project, job_name):
       The status of the job as an StsJobStatus enum
   """
 
-  filter_string = (
-    '{{"project_id": "{project_id}", "job_names": ["{job_name}"]}}').format(
-    project_id=target_project, job_name=job_name)
-
-  result = (sts_client.transferOperations().list(
-    name="transferOperations", filter=filter_string).execute(num_retries=5))
+  operation = _get_sts_operation(sts_client, target_project, job_name)
 
-  if result:
-    operation = result["operations"][0]
+  if operation:
     metadata = operation["metadata"]
     if operation.get("done"):
       if metadata["status"] != "SUCCESS":
@@ -1086,6 +1382,47 @@ def _check_sts_job(spinner, cloud_logger, sts_client, target_project, job_name):
   return sts_job_status.StsJobStatus.IN_PROGRESS
 
 
+def _get_sts_operation(sts_client, target_project, job_name):
+  """Get the transfer operation of the STS job.
+
+  Args:
+      sts_client: The STS client object to be used
+      target_project: The name of the target project where the STS job was created
+      job_name: The name of the STS job that was created
+
+  Returns:
+      The operation as a dict, or None if the job has not started one yet
+  """
+
+  filter_string = (
+    '{{"project_id": "{project_id}", "job_names": ["{job_name}"]}}').format(
+    project_id=target_project, job_name=job_name)
+
+  result = (sts_client.transferOperations().list(
+    name="transferOperations", filter=filter_string).execute(num_retries=5))
+
+  if result:
+    return result["operations"][0]
+  return None
+
+
+def _sum_sts_counters(counters_list):
+  """Add up the counters of several STS jobs.
+
+  Args:
+      counters_list: The counters objects of the jobs, None for jobs without counters yet
+
+  Returns:
+      A counters object with the totals, as expected by _print_sts_counters
+  """
+
+  totals = {}
+  for counters in counters_list:
+    for name, value in (counters or {}).items():
+      totals[name] = str(int(totals.get(name, "0")) + int(value))
+  return totals
+
+
 def _print_sts_counters(spinner, cloud_logger, counters, is_job_done):
   """Print out the current STS job counters.
 
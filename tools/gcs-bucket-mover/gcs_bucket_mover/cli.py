@@ -19,9 +19,11 @@ import textwrap
 import configargparse
 import yaml
 
+from gcs_bucket_mover import batch_mover_service
 from gcs_bucket_mover import bucket_mover_service
 from gcs_bucket_mover import bucket_mover_tester
 from gcs_bucket_mover import configuration
+from gcs_bucket_mover import sts_shards
 
 
 def _get_parsed_args():
@@ -44,8 +46,11 @@ def _get_parsed_args():
                       is_config_file=True,
                       help="The path to the local config file")
 
-  parser.add_argument("bucket_name",
-                      help="The name of the bucket to be moved.")
+  parser.add_argument(
+    "bucket_name",
+    nargs="?",
+    help="The name of the bucket to be moved. Omitted when --bucket_manifest is given.",
+  )
   parser.add_argument("source_project",
                       help="The project id that the bucket is currently in.")
   parser.add_argument("target_project",
@@ -76,6 +81,42 @@ def _get_parsed_args():
         before starting the move, and it will not lock down permissions on the source bucket
         before starting the move."""),
   )
+  parser.add_argument(
+    "--bucket_manifest",
+    help=textwrap.dedent("""\
+        The path to a file listing the buckets to move, one per line, instead of a single
+        bucket_name. A line can also give the name to rename the bucket to and the temp bucket
+        name to use, separated by commas: bucket_name[,rename_bucket_to[,temp_bucket_name]]"""),
+  )
+  parser.add_argument(
+    "--max_concurrent_moves",
+    type=int,
+    default=batch_mover_service.DEFAULT_MAX_CONCURRENT_MOVES,
+    help="The maximum number of buckets of the --bucket_manifest moved at the same time.",
+  )
+  parser.add_argument(
+    "--sts_shards",
+    type=int,
+    default=1,
+    help=textwrap.dedent("""\
+        The number of STS jobs run at the same time to transfer the objects of a bucket, each
+        transferring a share of its top-level prefixes. Useful for very large buckets."""),
+  )
+  parser.add_argument(
+    "--sts_shard_plan",
+    choices=sts_shards.SHARD_PLANS,
+    default=sts_shards.PREFIXES_PLAN,
+    help=textwrap.dedent("""\
+        How the top-level prefixes are spread between the --sts_shards STS jobs: 'prefixes'
+        gives every job the same number of prefixes, 'size' lists every object of the bucket
+        to give every job about the same number of bytes."""),
+  )
+  parser.add_argument(
+    "--sts_shard_manifest",
+    help=textwrap.dedent("""\
+        A local JSON file to read the plan of the STS shards from if it exists, or to save the
+        computed plan to so that it is not computed again if the move is rerun."""),
+  )
   parser.add_argument("--lock_file_name",
                       help="The name of the lock file in the bucket")
   parser.add_argument(
@@ -206,7 +247,24 @@ def _get_parsed_args():
     "A log action state for successfull and failed to see log on google log  console",
   )
 
-  return parser.parse_args()
+  parsed_args = parser.parse_args()
+  if parsed_args.bucket_manifest:
+    if parsed_args.bucket_name:
+      parser.error("bucket_name cannot be given with --bucket_manifest")
+    if (parsed_args.test or parsed_args.rename_bucket_to or
+        parsed_args.temp_bucket_name):
+      parser.error(
+        "--test, --rename_bucket_to and --temp_bucket_name cannot be used with"
+        " --bucket_manifest")
+    if parsed_args.max_concurrent_moves < 1:
+      parser.error("--max_concurrent_moves must be at least 1")
+    if parsed_args.sts_shard_manifest:
+      parser.error("--sts_shard_manifest cannot be used with --bucket_manifest")
+  elif not parsed_args.bucket_name:
+    parser.error("bucket_name is required unless --bucket_manifest is given")
+  if parsed_args.sts_shards < 1:
+    parser.error("--sts_shards must be at least 1")
+  return parsed_args
 
 
 def _parse_yaml_file(path):
@@ -242,4 +300,7 @@ def main():
     config.bucket_name = test_bucket_name
     config.target_bucket_name = test_bucket_name
 
-  bucket_mover_service.main(config, parsed_args, cloud_logger)
+  if parsed_args.bucket_manifest:
+    batch_mover_service.main(config, parsed_args, cloud_logger)
+  else:
+    bucket_mover_service.main(config, parsed_args, cloud_logger)
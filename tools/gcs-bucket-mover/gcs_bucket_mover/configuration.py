@@ -15,7 +15,7 @@
 
 import os
 
-from attr import attrs, attrib
+from attr import attrs, attrib, evolve
 
 from google.auth import environment_vars
 from google.cloud import logging
@@ -43,6 +43,9 @@ class Configuration(object):
   preserve_custom_time = attrib()
   log_action = attrib()
   log_action_state = attrib()
+  sts_shards = attrib()
+  sts_shard_plan = attrib()
+  sts_shard_manifest = attrib()
 
   @classmethod
   def from_conf(cls, conf):
@@ -54,17 +57,6 @@ class Configuration(object):
         conf: the configargparser parsing of command line options
     """
 
-    temp_bucket_name = conf.bucket_name + "-temp"
-    if conf.temp_bucket_name:
-      temp_bucket_name = conf.temp_bucket_name
-
-    target_bucket_name = conf.bucket_name
-    is_rename = False
-    if conf.rename_bucket_to:
-      target_bucket_name = conf.rename_bucket_to
-      if target_bucket_name != conf.bucket_name:
-        is_rename = True
-
     # Decide whether to use user supplied service account key
     # files or the default GOOGLE_APPLICATION_CREDENTIALS value.
     if (not conf.gcp_source_project_service_account_key or
@@ -83,7 +75,7 @@ class Configuration(object):
     target_credentials = service_account.Credentials.from_service_account_file(
       json_path)
 
-    return cls(
+    config = cls(
       source_project_credentials=source_credentials,
       target_project_credentials=target_credentials,
       source_storage_client=storage.Client(credentials=source_credentials,
@@ -94,13 +86,44 @@ class Configuration(object):
                                            project=conf.target_project),
       source_project=conf.source_project,
       target_project=conf.target_project,
-      bucket_name=conf.bucket_name,
-      target_bucket_name=target_bucket_name,
-      temp_bucket_name=temp_bucket_name,
-      is_rename=is_rename,
+      bucket_name=None,
+      target_bucket_name=None,
+      temp_bucket_name=None,
+      is_rename=False,
       disable_bucket_lock=conf.disable_bucket_lock,
       lock_file_name=conf.lock_file_name,
       preserve_custom_time=conf.preserve_custom_time,
       log_action=conf.log_action,
       log_action_state=conf.log_action_state,
+      sts_shards=conf.sts_shards,
+      sts_shard_plan=conf.sts_shard_plan,
+      sts_shard_manifest=conf.sts_shard_manifest,
+    )
+    if not conf.bucket_name:
+      # Batch mode, where every move of the manifest gets its own copy from for_bucket
+      return config
+    return config.for_bucket(conf.bucket_name, conf.rename_bucket_to,
+                             conf.temp_bucket_name)
+
+  def for_bucket(self, bucket_name, rename_bucket_to=None,
+                 temp_bucket_name=None):
+    """Copy the config to move the given bucket, sharing the credentials and clients.
+
+    Args:
+        bucket_name: The name of the bucket to be moved
+        rename_bucket_to: The name to rename the bucket to, if any
+        temp_bucket_name: The temporary bucket name to use instead of <bucket_name>-temp
+
+    Returns:
+        A new Configuration object
+    """
+
+    temp_bucket_name = temp_bucket_name or bucket_name + "-temp"
+    target_bucket_name = rename_bucket_to or bucket_name
+    return evolve(
+      self,
+      bucket_name=bucket_name,
+      target_bucket_name=target_bucket_name,
+      temp_bucket_name=temp_bucket_name,
+      is_rename=target_bucket_name != bucket_name,
     )
@@ -0,0 +1,168 @@
+# Copyright 2018 Google LLC. All rights reserved. Licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+# Any software provided by Google hereunder is distributed "AS IS", WITHOUT WARRANTIES OR
+# CONDITIONS OF ANY KIND, and is not intended for production use.
+"""Splits the transfer of a bucket between several STS jobs run at the same time.
+
+The shards are disjoint sets of objects, so that concurrent jobs deleting their objects from the
+source never race each other. The top-level prefixes of the bucket are spread over all but one of
+the shards, each an STS job with includePrefixes. The last shard excludes all of those prefixes
+and so transfers everything else, such as the objects at the root of the bucket.
+"""
+
+import json
+import os
+
+from attr import attrs, attrib
+
+from gcs_bucket_mover import sts_job_status
+
+PREFIXES_PLAN = "prefixes"
+SIZE_PLAN = "size"
+SHARD_PLANS = (PREFIXES_PLAN, SIZE_PLAN)
+
+# STS accepts at most 1000 includePrefixes or excludePrefixes per job
+MAX_PREFIXES_PER_JOB = 1000
+
+
+@attrs  # This is a data class. pylint: disable=too-few-public-methods
+class StsShard(object):
+  """The STS job transferring one shard of a bucket during a hop of the move."""
+
+  object_conditions = attrib()
+  job_name = attrib(default=None)
+  status = attrib(default=None)
+  counters = attrib(default=None)
+
+  @property
+  def succeeded(self):
+    return self.status == sts_job_status.StsJobStatus.SUCCESS
+
+
+def get_shard_plan(bucket, shard_count, plan, manifest_path=None):
+  """Get the object conditions of the STS jobs transferring the bucket.
+
+  Args:
+      bucket: The bucket object to plan the transfer of
+      shard_count: The maximum number of STS jobs
+      plan: PREFIXES_PLAN to spread the top-level prefixes evenly between the jobs, or SIZE_PLAN
+          to list every object and balance the bytes transferred by the jobs
+      manifest_path: A local file to read the plan from if it exists, or to write it to so that
+          the (possibly expensive) listing is not redone if the move is run again
+
+  Returns:
+      A list of objectConditions dicts for the STS jobs
+  """
+
+  if manifest_path and os.path.exists(manifest_path):
+    return read_manifest(manifest_path, bucket.name)
+
+  if plan == SIZE_PLAN:
+    weights, remainder_weight = _list_prefix_sizes(bucket)
+  else:
+    weights, remainder_weight = _list_top_level_prefixes(bucket)
+  shards = balance_prefixes(weights, shard_count, remainder_weight)
+
+  if manifest_path:
+    write_manifest(manifest_path, bucket.name, shards)
+  return shards
+
+
+def balance_prefixes(weights, shard_count, remainder_weight=0):
+  """Spread the prefixes between the shards so that they all have about the same weight.
+
+  Args:
+      weights: A dict of the weight of every top-level prefix
+      shard_count: The maximum number of shards
+      remainder_weight: The weight of the objects outside of the prefixes, always transferred by
+          the last shard
+
+  Returns:
+      A list of objectConditions dicts, the last of which excludes the prefixes of all the others
+  """
+
+  # Longest processing time first: every prefix goes to the lightest shard so far. Index 0 is the
+  # last shard, which needs no condition for the prefixes it gets.
+  loads = [remainder_weight] + [0] * (shard_count - 1)
+  prefixes = [[] for _ in loads]
+  by_weight = sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+  for count, (prefix, weight) in enumerate(by_weight):
+    if count < MAX_PREFIXES_PER_JOB:
+      shard = loads.index(min(loads))
+    else:
+      # The last shard's excludePrefixes cannot hold any more prefixes
+      shard = 0
+    loads[shard] += weight
+    prefixes[shard].append(prefix)
+
+  included = [sorted(shard) for shard in prefixes[1:] if shard]
+  excluded = sorted(prefix for shard in included for prefix in shard)
+  shards = [{"includePrefixes": shard} for shard in included]
+  shards.append({"excludePrefixes": excluded} if excluded else {})
+  return shards
+
+
+def read_manifest(path, bucket_name):
+  """Read the shard plan of the bucket written by write_manifest.
+
+  Args:
+      path: a local file system path
+      bucket_name: The name of the bucket the plan must be for
+
+  Returns:
+      A list of objectConditions dicts
+  """
+
+  with open(path, "r") as stream:
+    manifest = json.load(stream)
+  if manifest.get("bucket") != bucket_name:
+    raise SystemExit("The STS shard manifest {} is for bucket {}, not {}".format(
+      path, manifest.get("bucket"), bucket_name))
+  return manifest["shards"]
+
+
+def write_manifest(path, bucket_name, shards):
+  """Write the shard plan of the bucket to a local JSON file.
+
+  Args:
+      path: a local file system path
+      bucket_name: The name of the bucket the plan is for
+      shards: A list of objectConditions dicts
+  """
+
+  with open(path, "w") as stream:
+    json.dump({"bucket": bucket_name, "shards": shards}, stream, indent=2)
+
+
+def _list_top_level_prefixes(bucket):
+  """List the top-level prefixes of the bucket, all weighing the same."""
+
+  iterator = bucket.list_blobs(delimiter="/", fields="prefixes,nextPageToken")
+  prefixes = set()
+  for page in iterator.pages:
+    prefixes.update(page.prefixes)
+  return dict.fromkeys(prefixes, 1), 0
+
+
+def _list_prefix_sizes(bucket):
+  """List every object of the bucket to sum the bytes under every top-level prefix."""
+
+  sizes = {}
+  remainder_size = 0
+  for blob in bucket.list_blobs(fields="items(name,size),nextPageToken"):
+    size = int(blob.size or 0)
+    if "/" in blob.name:
+      prefix = blob.name.split("/", 1)[0] + "/"
+      sizes[prefix] = sizes.get(prefix, 0) + size
+    else:
+      remainder_size += size
+  return sizes, remainder_size
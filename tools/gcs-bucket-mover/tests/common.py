@@ -32,6 +32,9 @@ def get_mock_args():
     args.lock_file_name = 'my-lock-file'
     args.gcp_source_project_service_account_key = './data/fake_source_keyjson'
     args.gcp_target_project_service_account_key = './data/fake_target_keyjson'
+    args.sts_shards = 1
+    args.sts_shard_plan = 'prefixes'
+    args.sts_shard_manifest = None
 
     args.location = 'conf_location'
     args.storage_class = 'conf_storage_class'
@@ -0,0 +1,119 @@
+# Copyright 2018 Google LLC. All rights reserved. Licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+# Any software provided by Google hereunder is distributed "AS IS", WITHOUT WARRANTIES OR
+# CONDITIONS OF ANY KIND, and is not intended for production use.
+"""Tests for the batch_mover_service.py file"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from gcs_bucket_mover import batch_mover_service
+from tests import common
+
+
+class TestBatchMoverService(unittest.TestCase):
+    """Tests for the logic in the batch_mover_service module."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.temp_dir, 'manifest.txt')
+        self.parsed_args = common.get_mock_args()
+        self.parsed_args.bucket_name = None
+        self.parsed_args.bucket_manifest = self.manifest_path
+        self.parsed_args.max_concurrent_moves = 2
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_manifest(self, text):
+        with open(self.manifest_path, 'w') as stream:
+            stream.write(text)
+
+    def test_read_manifest(self):
+        """Tests the bucket names and options are read from the manifest"""
+        self._write_manifest('# Buckets to move\n'
+                             'bucket1\n'
+                             '\n'
+                             'bucket2, renamed2\n'
+                             'bucket3,,temp3\n')
+
+        moves = batch_mover_service.read_manifest(self.manifest_path)
+
+        self.assertEqual(['bucket1', 'bucket2', 'bucket3'],
+                         [move.bucket_name for move in moves])
+        self.assertEqual(['bucket1', 'renamed2', 'bucket3'],
+                         [move.target_bucket_name for move in moves])
+        self.assertEqual([None, None, 'temp3'],
+                         [move.temp_bucket_name for move in moves])
+
+    def test_read_manifest_duplicate_bucket(self):
+        """Tests that a bucket listed twice is rejected"""
+        self._write_manifest('bucket1\nbucket1,renamed\n')
+
+        with self.assertRaises(SystemExit):
+            batch_mover_service.read_manifest(self.manifest_path)
+
+    @mock.patch('gcs_bucket_mover.bucket_mover_service.build_sts_client')
+    @mock.patch('gcs_bucket_mover.bucket_mover_service.move_bucket')
+    def test_main_continues_after_failed_move(self, mock_move_bucket,
+                                              mock_build_sts_client):
+        """Tests that every bucket is moved and the failures reported at the end"""
+        self._write_manifest('bucket1\nbucket2\nbucket3\n')
+        mock_config = mock.MagicMock()
+        mock_config.for_bucket.side_effect = (
+            lambda bucket_name, rename_bucket_to, temp_bucket_name: bucket_name)
+
+        def move_bucket(bucket_name, parsed_args, cloud_logger, sts_client):
+            if bucket_name == 'bucket2':
+                raise SystemExit('The source bucket does not exist')
+
+        mock_move_bucket.side_effect = move_bucket
+
+        with self.assertRaises(SystemExit) as context:
+            batch_mover_service.main(mock_config, self.parsed_args,
+                                     mock.MagicMock())
+
+        self.assertIn('1 of 3 bucket moves failed: bucket2',
+                      str(context.exception))
+        self.assertEqual(
+            ['bucket1', 'bucket2', 'bucket3'],
+            sorted(call[0][0] for call in mock_move_bucket.call_args_list))
+        # Every worker thread builds a single STS client for all of its moves
+        self.assertLessEqual(mock_build_sts_client.call_count, 2)
+
+    def test_format_timing_report(self):
+        """Tests that the STS job steps are reported separately"""
+        move = batch_mover_service.BucketMove(
+            'bucket1',
+            status=batch_mover_service.SUCCEEDED,
+            started=100,
+            finished=700,
+            step_durations={
+                'Creating STS job': 20,
+                'Checking STS job status': 400,
+                'Deleting empty source bucket': 5,
+            })
+
+        report = batch_mover_service.format_timing_report([move], 600)
+
+        self.assertIn('bucket1  SUCCEEDED  0:10:00  0:07:00   0:03:00', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,8 @@ from retrying import RetryError
 
 from gcs_bucket_mover import bucket_details
 from gcs_bucket_mover import bucket_mover_service
+from gcs_bucket_mover import sts_job_status
+from gcs_bucket_mover import sts_shards
 from tests import common
 
 
@@ -391,6 +393,97 @@ class TestBucketMoverService(unittest.TestCase):
         mock_write_spinner_and_log.assert_not_called()
         self.assertTrue(result)
 
+    @mock.patch('gcs_bucket_mover.bucket_mover_service.sleep')
+    @mock.patch('gcs_bucket_mover.bucket_mover_service._get_sts_operation')
+    @mock.patch('gcs_bucket_mover.bucket_mover_service._execute_sts_job')
+    def test_sharded_sts_jobs_rerun_failed_shards(self, mock_execute_sts_job,
+                                                  mock_get_sts_operation,
+                                                  mock_sleep):
+        """Tests that only the shards whose STS job failed are run again."""
+        mock_execute_sts_job.side_effect = (
+            lambda *args: 'job-' + args[-1].get('includePrefixes', ['rest'])[0])
+        statuses = {'job-a/': ['SUCCESS'], 'job-rest': ['FAILED', 'SUCCESS']}
+        counters = {'bytesCopiedToSink': '5', 'objectsCopiedToSink': '1'}
+
+        def get_sts_operation(sts_client, target_project, job_name):
+            return {
+                'done': True,
+                'metadata': {
+                    'status': statuses[job_name].pop(0),
+                    'counters': counters
+                }
+            }
+
+        mock_get_sts_operation.side_effect = get_sts_operation
+        shards = [
+            sts_shards.StsShard({'includePrefixes': ['a/']}),
+            sts_shards.StsShard({'excludePrefixes': ['a/']})
+        ]
+        run_jobs = (bucket_mover_service._run_and_wait_for_sharded_sts_jobs.
+                    __wrapped__)
+        args = (mock.MagicMock(), 'my-target-project', 'source', 'sink',
+                mock.MagicMock(), mock.MagicMock(), None, shards)
+
+        self.assertFalse(run_jobs(*args))
+        self.assertTrue(run_jobs(*args))
+
+        self.assertEqual(3, mock_execute_sts_job.call_count)
+        self.assertEqual({'excludePrefixes': ['a/']},
+                         mock_execute_sts_job.call_args[0][-1])
+        self.assertTrue(all(shard.succeeded for shard in shards))
+        mock_sleep.assert_not_called()
+
+    @mock.patch('gcs_bucket_mover.bucket_mover_service.sleep')
+    @mock.patch('gcs_bucket_mover.bucket_mover_service._get_sts_operation')
+    @mock.patch('gcs_bucket_mover.bucket_mover_service._execute_sts_job')
+    def test_sharded_sts_jobs_resume_running_shards(self, mock_execute_sts_job,
+                                                    mock_get_sts_operation,
+                                                    mock_sleep):
+        """Tests that a retry polls the jobs still running instead of rerunning them."""
+        mock_execute_sts_job.side_effect = ['job-a/', Exception('quota'),
+                                            'job-rest']
+        mock_get_sts_operation.return_value = {
+            'done': True,
+            'metadata': {
+                'status': 'SUCCESS'
+            }
+        }
+        shards = [
+            sts_shards.StsShard({'includePrefixes': ['a/']}),
+            sts_shards.StsShard({'excludePrefixes': ['a/']})
+        ]
+        run_jobs = (bucket_mover_service._run_and_wait_for_sharded_sts_jobs.
+                    __wrapped__)
+        args = (mock.MagicMock(), 'my-target-project', 'source', 'sink',
+                mock.MagicMock(), mock.MagicMock(), None, shards)
+
+        with self.assertRaises(Exception):
+            run_jobs(*args)
+        self.assertEqual(sts_job_status.StsJobStatus.IN_PROGRESS,
+                         shards[0].status)
+        self.assertTrue(run_jobs(*args))
+
+        self.assertEqual(3, mock_execute_sts_job.call_count)
+        self.assertEqual({'excludePrefixes': ['a/']},
+                         mock_execute_sts_job.call_args[0][-1])
+        self.assertEqual('job-a/', shards[0].job_name)
+        self.assertTrue(all(shard.succeeded for shard in shards))
+        mock_sleep.assert_not_called()
+
+    def test_sum_sts_counters(self):
+        """Tests that the counters of the shards' STS jobs are added up."""
+        counters = bucket_mover_service._sum_sts_counters([{
+            'bytesCopiedToSink': '10',
+            'objectsCopiedToSink': '2'
+        }, None, {
+            'bytesCopiedToSink': '5'
+        }])
+
+        self.assertEqual({
+            'bytesCopiedToSink': '15',
+            'objectsCopiedToSink': '2'
+        }, counters)
+
     @unittest.skip('Not implemented')
     def test_update_iam_policies_logic(self):
         self.assertTrue(True)
@@ -97,6 +97,22 @@ class TestConfiguration(unittest.TestCase):
         ]
         mock_from_service_account_file.assert_has_calls(calls)
 
+    def test_for_bucket(self, mock_from_service_account_file):
+        """Test that a batch mode config is copied for every bucket."""
+        self.parsed_args.bucket_name = None
+        config = configuration.Configuration.from_conf(self.parsed_args)
+        self.assertIsNone(config.bucket_name)
+
+        bucket_config = config.for_bucket('bucket', 'renamed')
+
+        self.assertEqual('bucket', bucket_config.bucket_name)
+        self.assertEqual('renamed', bucket_config.target_bucket_name)
+        self.assertEqual('bucket-temp', bucket_config.temp_bucket_name)
+        self.assertTrue(bucket_config.is_rename)
+        self.assertIs(config.source_storage_client,
+                      bucket_config.source_storage_client)
+        self.assertIsNone(config.bucket_name)
+
     @mock.patch.dict(os.environ, {environment_vars.CREDENTIALS: 'env_key_path'})
     def test_source_key_is_none(self, mock_from_service_account_file):
         """Test that the source project credentials are set from the environment
@@ -0,0 +1,122 @@
+# Copyright 2018 Google LLC. All rights reserved. Licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+# Any software provided by Google hereunder is distributed "AS IS", WITHOUT WARRANTIES OR
+# CONDITIONS OF ANY KIND, and is not intended for production use.
+"""Tests for the sts_shards.py file"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from gcs_bucket_mover import sts_shards
+
+
+class TestStsShards(unittest.TestCase):
+    """Tests for the logic in the sts_shards module."""
+
+    def test_balance_prefixes_by_size(self):
+        """Tests the prefixes are spread to balance the shards' weights"""
+        shards = sts_shards.balance_prefixes(
+            {
+                'a/': 100,
+                'b/': 60,
+                'c/': 50,
+                'd/': 10
+            }, 3, remainder_weight=5)
+
+        self.assertEqual([{
+            'includePrefixes': ['a/']
+        }, {
+            'includePrefixes': ['b/']
+        }, {
+            'excludePrefixes': ['a/', 'b/']
+        }], shards)
+
+    def test_balance_prefixes_single_shard(self):
+        """Tests that a single shard transfers everything"""
+        shards = sts_shards.balance_prefixes({'a/': 1, 'b/': 1}, 1)
+
+        self.assertEqual([{}], shards)
+
+    @mock.patch('gcs_bucket_mover.sts_shards.MAX_PREFIXES_PER_JOB', 2)
+    def test_balance_prefixes_limits_excluded_prefixes(self):
+        """Tests that prefixes over the STS limit are left to the last shard"""
+        shards = sts_shards.balance_prefixes(
+            {
+                'a/': 4,
+                'b/': 3,
+                'c/': 2,
+                'd/': 1
+            }, 4)
+
+        # Only the 2 heaviest prefixes are balanced, the others stay in the last shard
+        self.assertEqual([{
+            'includePrefixes': ['b/']
+        }, {
+            'excludePrefixes': ['b/']
+        }], shards)
+
+    def test_get_shard_plan_by_size(self):
+        """Tests the size plan sums the object sizes under every top-level prefix"""
+        bucket = mock.MagicMock()
+        bucket.name = 'my-bucket'
+        blobs = []
+        for name, size in (('a/1', 10), ('a/2', 10), ('b/1', 15), ('root', 1)):
+            blob = mock.MagicMock(size=size)
+            blob.name = name
+            blobs.append(blob)
+        bucket.list_blobs.return_value = blobs
+
+        shards = sts_shards.get_shard_plan(bucket, 3, sts_shards.SIZE_PLAN)
+
+        self.assertEqual([{
+            'includePrefixes': ['a/']
+        }, {
+            'includePrefixes': ['b/']
+        }, {
+            'excludePrefixes': ['a/', 'b/']
+        }], shards)
+
+    def test_shard_manifest_is_reused(self):
+        """Tests that a saved plan is read back instead of listing the bucket again"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'shards.json')
+        bucket = mock.MagicMock()
+        bucket.name = 'my-bucket'
+        page = mock.MagicMock(prefixes=['a/', 'b/'])
+        bucket.list_blobs.return_value.pages = [page]
+
+        shards = sts_shards.get_shard_plan(bucket, 2, sts_shards.PREFIXES_PLAN,
+                                           path)
+        bucket.list_blobs.reset_mock()
+
+        self.assertEqual(
+            shards,
+            sts_shards.get_shard_plan(bucket, 2, sts_shards.PREFIXES_PLAN,
+                                      path))
+        bucket.list_blobs.assert_not_called()
+
+        bucket.name = 'other-bucket'
+        with self.assertRaises(SystemExit):
+            sts_shards.get_shard_plan(bucket, 2, sts_shards.PREFIXES_PLAN,
+                                      path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -263,18 +263,28 @@ def main():
             "Tracking table already exists. Continuing from the previous "
             "iteration...")
         try:
-            # Copies the pending files from the previous run to GCS, loads them
-            # to BigQuery and updates the BigQuery load job status.
-            # mysqlexec
-            gcs_component.stage_to_gcs(mysql_component, bq_component,
-                                       hive_table_model, bq_table_model,
-                                       PropertiesReader.get('gcs_bucket_name'))
-            bq_component.load_gcs_to_bq(mysql_component, hive_table_model,
-                                        bq_table_model)
+            if hive_table_model.is_partitioned:
+                # Resumes the partitions pending from the previous run from
+                # the stage they had reached.
+                hive_component.migrate_partition_table(
+                    mysql_component, bq_component, gcs_component,
+                    hive_table_model, bq_table_model,
+                    PropertiesReader.get('gcs_bucket_name'), [])
+            else:
+                # Copies the pending files from the previous run to GCS and
+                # loads them to BigQuery.
+                gcs_component.stage_to_gcs(
+                    mysql_component, bq_component, hive_table_model,
+                    bq_table_model, PropertiesReader.get('gcs_bucket_name'))
+                bq_component.load_gcs_to_bq(mysql_component, hive_table_model,
+                                            bq_table_model)
+            # Updates the BigQuery load job status.
             bq_component.update_bq_job_status(
                 mysql_component, gcs_component, hive_table_model,
                 bq_table_model, PropertiesReader.get('gcs_bucket_name'))
-        except custom_exceptions.MySQLExecutionError as error:
+        except (custom_exceptions.HiveExecutionError,
+                custom_exceptions.HDFSCommandError,
+                custom_exceptions.MySQLExecutionError) as error:
             raise RuntimeError from error
 
     try:
@@ -302,17 +302,38 @@ class BigQueryComponent(GCPService):
         if not results:
             logger.info("No gcs files to load to BigQuery")
 
-        for row in results:
-            gcs_source_uri = row[0]
-            bq_job_id = "hive2bq-job-{}".format(uuid4())
-            # Starts the load job asynchronously.
-            self.start_load_job(bq_table_model, gcs_source_uri, bq_job_id)
-            # Updates the job status as RUNNING.
-            query = "UPDATE {0} SET bq_job_id='{1}',bq_job_status='RUNNING' " \
-                    "WHERE gcs_file_path='{2}'".format(
-                        hive_table_model.tracking_table_name,
-                        bq_job_id, gcs_source_uri)
-            mysql_component.execute_transaction(query)
+        self.start_load_jobs(mysql_component, hive_table_model,
+                             bq_table_model, [row[0] for row in results])
+
+    def start_load_jobs(self, mysql_component, hive_table_model,
+                        bq_table_model, gcs_file_paths):
+        """Starts a load job for every GCS file and records it in the
+        tracking table.
+
+        Args:
+            mysql_component (:class:`MySQLComponent`): Instance of
+                MySQLComponent to connect to MySQL.
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            bq_table_model (:class:`BigQueryTableModel`): Wrapper to BigQuery
+                table details.
+            gcs_file_paths (List[str]): GCS paths of the files to load.
+        """
+
+        params = []
+        query = "UPDATE {0} SET bq_job_id=%s,bq_job_status='RUNNING' WHERE " \
+                "gcs_file_path=%s".format(hive_table_model.tracking_table_name)
+        try:
+            for gcs_source_uri in gcs_file_paths:
+                bq_job_id = "hive2bq-job-{}".format(uuid4())
+                # Starts the load job asynchronously.
+                self.start_load_job(bq_table_model, gcs_source_uri, bq_job_id)
+                params.append((bq_job_id, gcs_source_uri))
+        finally:
+            # Updates the status of the started jobs as RUNNING, even if
+            # starting one of them failed.
+            mysql_component.execute_batch([(query, params)])
+        for bq_job_id, gcs_source_uri in params:
             logger.info(
                 "Updated BigQuery load job ID {} status TODO --> RUNNING for "
                 "file path {}".format(bq_job_id, gcs_source_uri))
@@ -354,9 +375,19 @@ class BigQueryComponent(GCPService):
             logger.info(
                 "No BigQuery job is in RUNNING state. No values to update")
 
+        tracking_table_name = hive_table_model.tracking_table_name
+        done_query = "UPDATE {} SET bq_job_status='DONE' WHERE " \
+                     "bq_job_id=%s".format(tracking_table_name)
+        failed_query = "UPDATE {} SET bq_job_status='FAILED' WHERE " \
+                       "bq_job_id=%s".format(tracking_table_name)
+        retry_query = "UPDATE {} SET bq_job_status='TODO',bq_job_retries=%s " \
+                      "WHERE bq_job_id=%s".format(tracking_table_name)
         # Waits till all the load jobs finish.
         while results:
             count = 0
+            done_jobs = []
+            failed_jobs = []
+            retry_jobs = []
             for row in results:
                 gcs_file_path, bq_job_id, bq_job_retries = row
                 # Gets information about the running job.
@@ -367,41 +398,12 @@ class BigQueryComponent(GCPService):
                 if job.state == 'DONE':
                     # Job finished successfully.
                     if job.errors is None:
-                        query = "UPDATE {0} SET bq_job_status='DONE' WHERE " \
-                                "bq_job_id='{1}'".format(
-                                    hive_table_model.tracking_table_name,
-                                    bq_job_id)
-                        mysql_component.execute_transaction(query)
-                        logger.info(
-                            "Updated BigQuery load job {} status RUNNING --> "
-                            "DONE".format(bq_job_id))
-                        # Deletes the data file in GCS.
-                        gcs_component.delete_file(gcs_bucket_name,
-                                                  gcs_file_path)
+                        done_jobs.append((bq_job_id, gcs_file_path))
                     # Job finished with error.
-                    elif job.errors is not None:
-
-                        if bq_job_retries == bq_load_job_max_retries:
-                            query = "UPDATE {0} SET bq_job_status='FAILED' " \
-                                    "WHERE bq_job_id='{1}'".format(
-                                        hive_table_model.tracking_table_name,
-                                        bq_job_id)
-                            mysql_component.execute_transaction(query)
-                            logger.info(
-                                "BigQuery job {} failed.Tried for a maximum "
-                                "of 3 times.Updated status RUNNING --> "
-                                "FAILED".format(bq_job_id))
-                        else:
-                            query = "UPDATE {0} SET bq_job_status='TODO'," \
-                                    "bq_job_retries={1} WHERE " \
-                                    "bq_job_id='{2}'".format(
-                                        hive_table_model.tracking_table_name,
-                                        bq_job_retries + 1, bq_job_id)
-                            mysql_component.execute_transaction(query)
-                            logger.info(
-                                "BigQuery job {} failed.Updated status "
-                                "RUNNING --> TODO & increased retries count "
-                                "by 1".format(bq_job_id))
+                    elif bq_job_retries == bq_load_job_max_retries:
+                        failed_jobs.append((bq_job_id, ))
+                    else:
+                        retry_jobs.append((bq_job_retries + 1, bq_job_id))
 
                 elif job.state == 'RUNNING':
                     # Count of jobs which are still in running state.
@@ -409,6 +411,26 @@ class BigQueryComponent(GCPService):
                 else:
                     logger.debug("job id %s job state %s", bq_job_id,
                                  job.state)
+
+            # Commits the status changes of this poll at once.
+            mysql_component.execute_batch([
+                (done_query, [(bq_job_id, ) for bq_job_id, _ in done_jobs]),
+                (failed_query, failed_jobs), (retry_query, retry_jobs)
+            ])
+            for bq_job_id, gcs_file_path in done_jobs:
+                logger.info("Updated BigQuery load job {} status RUNNING --> "
+                            "DONE".format(bq_job_id))
+                # Deletes the data file in GCS.
+                gcs_component.delete_file(gcs_bucket_name, gcs_file_path)
+            for bq_job_id, in failed_jobs:
+                logger.info("BigQuery job {} failed.Tried for a maximum of 3 "
+                            "times.Updated status RUNNING --> "
+                            "FAILED".format(bq_job_id))
+            for _, bq_job_id in retry_jobs:
+                logger.info("BigQuery job {} failed.Updated status RUNNING "
+                            "--> TODO & increased retries count by "
+                            "1".format(bq_job_id))
+
             if count == 0:
                 logger.info(
                     "No BigQuery job is in RUNNING state. No values to update")
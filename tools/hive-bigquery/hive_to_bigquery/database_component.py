@@ -13,6 +13,7 @@
 # limitations under the License.
 """Defines Abstract class for connecting to a database."""
 
+import queue
 from abc import ABCMeta, abstractmethod
 
 
@@ -33,6 +34,39 @@ class DatabaseComponent:
         self.database = kwargs['database']
 
         self.connection = self.get_connection()
+        # Idle clones kept open for reuse by acquire.
+        self._pool = queue.LifoQueue()
+
+    def clone(self):
+        """Creates a component with its own connection to the same database.
+
+        Connections are not thread safe, so every thread doing database
+        operations uses its own clone.
+        """
+
+        return self.__class__(host=self.host,
+                              port=self.port,
+                              user=self.user,
+                              password=self.password,
+                              database=self.database)
+
+    def acquire(self):
+        """Gets an idle clone of the component from the pool, or a new clone
+        if there is none.
+
+        Returns:
+            DatabaseComponent: Clone to give back with release once done.
+        """
+
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self.clone()
+
+    def release(self, component):
+        """Gives back a clone obtained with acquire to the pool."""
+
+        self._pool.put(component)
 
     @abstractmethod
     def get_connection(self):
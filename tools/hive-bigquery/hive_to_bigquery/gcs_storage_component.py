@@ -150,6 +150,86 @@ class GCSStorageComponent(GCPService):
         logger.debug("File %s doesn't exist", gcs_uri)
         return False
 
+    def copy_files_to_gcs(self, mysql_component, hive_table_model,
+                          gcs_bucket_name, source_locations):
+        """Copies HDFS files to a new GCS staging folder with distcp.
+
+        Runs a distcp job to copy the files in one operation, checks whether
+        every file has been copied and updates its gcs_copy_status to 'DONE'
+        in the tracking table. Only the first of the files having the same
+        name is copied, the others are left for the next call.
+
+        Args:
+            mysql_component (:class:`MySQLComponent`): Instance of
+                MySQLComponent to connect to MySQL.
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            gcs_bucket_name (str): GCS bucket name.
+            source_locations (List[str]): HDFS paths of the files to copy.
+
+        Returns:
+            List[str]: GCS paths of the files copied successfully.
+        """
+
+        file_info = {}
+        for source_location in source_locations:
+            file_name = source_location.split('/')[-1]
+            if file_name not in file_info.keys():
+                file_info[file_name] = source_location
+        filename = "file_info_{}.json".format(uuid4())
+        # Dictionary of file names and their locations
+        with open(filename, "w") as file_content:
+            file_content.write(str(file_info))
+
+        target_blob = "BQ_staging/{}/{}/{}/".format(
+            hive_table_model.db_name, hive_table_model.table_name.lower(),
+            str(uuid4()).replace("-", "_"))
+        # Uploads file to create a folder like structure in GCS
+        self.upload_file(gcs_bucket_name, filename, target_blob + filename)
+        os.remove(filename)
+
+        target_folder_location = "gs://{}/{}".format(gcs_bucket_name,
+                                                     target_blob)
+
+        logger.debug(
+            "Copying data from location %s to GCS Staging location %s "
+            "....", ' '.join(file_info.values()), target_folder_location)
+        # Hadoop distcp command to copy multiple files in one operation
+        cmd_copy_gcs = ['hadoop', 'distcp']
+        for value in file_info.values():
+            cmd_copy_gcs.append(value)
+        cmd_copy_gcs.append(target_folder_location)
+        logger.info("Running {}".format(" ".join(cmd_copy_gcs)))
+
+        start = time.time()
+        execute_command(cmd_copy_gcs)
+        logger.debug("Time taken - %s", calculate_time(start, time.time()))
+
+        params = []
+        # Iterates though the dict and checks whether the distcp
+        # operation is successful or partially completed
+        for file_name, source_location in file_info.items():
+            target_file_location = target_folder_location + file_name
+            # Checks whether the copied file is present at the GCS location
+            if self.check_file_exists(gcs_bucket_name, target_file_location):
+                logger.error(
+                    "Finished copying data from location %s to GCS "
+                    "Staging location %s", source_location,
+                    target_file_location)
+                params.append((target_file_location, source_location))
+            else:
+                logger.error(
+                    "Failed copying data from location %s to GCS Staging "
+                    "location %s", source_location, target_file_location)
+
+        query = "UPDATE {0} SET gcs_copy_status='DONE',gcs_file_path=%s " \
+                "WHERE file_path=%s".format(
+                    hive_table_model.tracking_table_name)
+        mysql_component.execute_batch([(query, params)])
+        logger.debug("Updated GCS copy status TODO --> DONE for %d files",
+                     len(params))
+        return [target_file_location for target_file_location, _ in params]
+
     def stage_to_gcs(self, mysql_component, bq_component, hive_table_model,
                      bq_table_model, gcs_bucket_name):
         """Copies staged files to GCS.
@@ -184,65 +264,9 @@ class GCSStorageComponent(GCPService):
             logger.debug("No file paths to copy to GCS")
 
         while results:
-            file_info = {}
-            for row in results:
-                source_location = row[1]
-                file_name = source_location.split('/')[-1]
-                if file_name not in file_info.keys():
-                    file_info[file_name] = source_location
-            source_locations = ' '.join(file_info.values())
-            filename = "file_info_{}.json".format(uuid4())
-            # Dictionary of file names and their locations
-            with open(filename, "w") as file_content:
-                file_content.write(str(file_info))
-
-            target_blob = "BQ_staging/{}/{}/{}/".format(
-                hive_table_model.db_name, hive_table_model.table_name.lower(),
-                str(uuid4()).replace("-", "_"))
-            # Uploads file to create a folder like structure in GCS
-            self.upload_file(gcs_bucket_name, filename, target_blob + filename)
-            os.remove(filename)
-
-            target_folder_location = "gs://{}/{}".format(
-                gcs_bucket_name, target_blob)
-
-            logger.debug(
-                "Copying data from location %s to GCS Staging location %s "
-                "....", source_locations, target_folder_location)
-            # Hadoop distcp command to copy multiple files in one operation
-            cmd_copy_gcs = ['hadoop', 'distcp']
-            for value in file_info.values():
-                cmd_copy_gcs.append(value)
-            cmd_copy_gcs.append(target_folder_location)
-            logger.info("Running {}".format(" ".join(cmd_copy_gcs)))
-
-            start = time.time()
-            execute_command(cmd_copy_gcs)
-            logger.debug("Time taken - %s", calculate_time(start, time.time()))
-
-            # Iterates though the dict and checks whether the distcp
-            # operation is successful or partially completed
-            for file_name, source_location in file_info.items():
-                target_file_location = target_folder_location + file_name
-                # Checks whether the copied file is present at the GCS location
-                if self.check_file_exists(gcs_bucket_name,
-                                          target_file_location):
-                    logger.error(
-                        "Finished copying data from location %s to GCS "
-                        "Staging location %s", source_location,
-                        target_file_location)
-                    query = "UPDATE {0} SET gcs_copy_status='DONE'," \
-                            "gcs_file_path='{1}' WHERE file_path='{2}'".format(
-                                hive_table_model.tracking_table_name,
-                                target_file_location, source_location)
-                    mysql_component.execute_transaction(query)
-                    logger.debug(
-                        "Updated GCS copy status TODO --> DONE for file path "
-                        "%s", source_location)
-                else:
-                    logger.error(
-                        "Failed copying data from location %s to GCS Staging "
-                        "location %s", source_location, target_file_location)
+            self.copy_files_to_gcs(mysql_component, hive_table_model,
+                                   gcs_bucket_name,
+                                   [row[1] for row in results])
             # Starts loading the copied files
             bq_component.load_gcs_to_bq(mysql_component, hive_table_model,
                                         bq_table_model)
@@ -0,0 +1,272 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module to list the data files under HDFS locations.
+
+Three backends are available, selected by the hdfs_listing_backend property:
+
+    shell: runs 'hdfs dfs -ls -R' once for all the locations of a call.
+    webhdfs: queries the WebHDFS REST API of the NameNode, reusing its HTTP
+        connections across calls.
+    pyarrow: lists in process with pyarrow.fs.HadoopFileSystem, which needs
+        pyarrow and libhdfs on the cluster node.
+
+All of them list recursively and, like Hive, skip empty files and the hidden
+files and directories whose names start with '_' or '.', such as _SUCCESS,
+_temporary or .hive-staging directories.
+"""
+
+import logging
+import subprocess
+import threading
+from abc import ABCMeta, abstractmethod
+from urllib.parse import quote, urlparse
+
+import requests
+
+from hive_to_bigquery import custom_exceptions
+from hive_to_bigquery.properties_reader import PropertiesReader
+
+logger = logging.getLogger('Hive2BigQuery')
+
+LISTING_BACKENDS = ('shell', 'webhdfs', 'pyarrow')
+
+_lister = None
+_lister_lock = threading.Lock()
+
+
+def _is_under(path, location):
+    return path == location or path.startswith(location.rstrip('/') + '/')
+
+
+def _is_hidden(relative_path):
+    """Whether a path relative to a listed location is hidden from Hive."""
+    return any(
+        name.startswith(('_', '.')) for name in relative_path.split('/'))
+
+
+class HDFSLister(metaclass=ABCMeta):
+    """Lists the non empty, non hidden files under HDFS locations.
+
+    Implement list_files_bulk abstract method, list_files lists a single
+    location with it.
+    """
+    def list_files(self, location):
+        """Lists the files under an HDFS location.
+
+        Args:
+            location (str): HDFS directory, such as a Hive table location.
+
+        Returns:
+            List[str]: Paths of the non hidden files with non-zero size.
+        """
+
+        return self.list_files_bulk([location])[location]
+
+    @abstractmethod
+    def list_files_bulk(self, locations):
+        """Lists the files under several HDFS locations in one call.
+
+        Args:
+            locations (List[str]): HDFS directories.
+
+        Returns:
+            dict: Paths of the non hidden files with non-zero size under every
+                location.
+        """
+
+
+class ShellHDFSLister(HDFSLister):
+    """Lists files with the hdfs command line, which starts a JVM per call."""
+    def list_files_bulk(self, locations):
+        cmd = ['hdfs', 'dfs', '-ls', '-R'] + list(locations)
+        process = subprocess.Popen(cmd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        if process.returncode:
+            logger.error("hdfs command execution failed - %s",
+                         stderr.decode())
+            raise custom_exceptions.HDFSCommandError
+
+        files = {location: [] for location in locations}
+        for line in stdout.decode().splitlines():
+            columns = line.split()
+            # Lines of files start with their permissions, as in -rw-r--r--.
+            if len(columns) < 8 or not line.startswith('-'):
+                continue
+            if columns[4] == '0':
+                continue
+            path = columns[-1]
+            for location in locations:
+                if _is_under(path, location):
+                    if not _is_hidden(path[len(location.rstrip('/')):]):
+                        files[location].append(path)
+                    break
+        return files
+
+
+class WebHDFSLister(HDFSLister):
+    """Lists files with the WebHDFS REST API.
+
+    Attributes:
+        url (str): Base URL of the WebHDFS server, such as
+            http://namenode:9870.
+        user (str): User name to list as, if any.
+        session (requests.Session): HTTP session reused by all the requests.
+    """
+    def __init__(self, url, user=None):
+        self.url = url.rstrip('/')
+        self.user = user
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+
+    def _list_status(self, path):
+        params = {'op': 'LISTSTATUS'}
+        if self.user:
+            params['user.name'] = self.user
+        try:
+            response = self.session.get('{}/webhdfs/v1{}'.format(
+                self.url, quote(path)),
+                                        params=params,
+                                        timeout=60)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as error:
+            logger.error("WebHDFS listing of %s failed", path)
+            raise custom_exceptions.HDFSCommandError from error
+        return response.json()['FileStatuses']['FileStatus']
+
+    def _list_directory(self, location):
+        base_path = urlparse(location).path.rstrip('/')
+        prefix = location.rstrip('/')
+        files = []
+        directories = ['']
+        while directories:
+            relative_path = directories.pop()
+            for status in self._list_status(base_path + relative_path):
+                if _is_hidden(status['pathSuffix']):
+                    continue
+                child = relative_path + '/' + status['pathSuffix']
+                if status['type'] == 'DIRECTORY':
+                    directories.append(child)
+                elif status['length'] > 0:
+                    files.append(prefix + child)
+        return sorted(files)
+
+    def list_files_bulk(self, locations):
+        # requests.Session is not thread safe.
+        with self._lock:
+            return {
+                location: self._list_directory(location)
+                for location in locations
+            }
+
+
+class PyArrowHDFSLister(HDFSLister):
+    """Lists files with pyarrow's libhdfs based HadoopFileSystem.
+
+    Attributes:
+        user (str): User name to list as, if any.
+    """
+    def __init__(self, user=None):
+        self.user = user
+        self._filesystems = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _import_fs():
+        try:
+            from pyarrow import fs
+        except ImportError as error:
+            logger.error("pyarrow is needed by the pyarrow listing backend")
+            raise custom_exceptions.HDFSCommandError from error
+        return fs
+
+    def _get_filesystem(self, location):
+        fs = self._import_fs()
+        parsed = urlparse(location)
+        key = (parsed.hostname, parsed.port)
+        with self._lock:
+            if key not in self._filesystems:
+                try:
+                    if parsed.hostname:
+                        filesystem = fs.HadoopFileSystem(
+                            parsed.hostname,
+                            port=parsed.port or 8020,
+                            user=self.user)
+                    else:
+                        # Uses fs.defaultFS of the Hadoop configuration.
+                        filesystem = fs.HadoopFileSystem('default',
+                                                         port=0,
+                                                         user=self.user)
+                except OSError as error:
+                    logger.error("Failed to connect to HDFS with pyarrow")
+                    raise custom_exceptions.HDFSCommandError from error
+                self._filesystems[key] = filesystem
+            return self._filesystems[key]
+
+    def list_files_bulk(self, locations):
+        fs = self._import_fs()
+        files = {}
+        for location in locations:
+            filesystem = self._get_filesystem(location)
+            base_path = urlparse(location).path.rstrip('/')
+            prefix = location.rstrip('/')
+            try:
+                infos = filesystem.get_file_info(
+                    fs.FileSelector(base_path, recursive=True))
+            except OSError as error:
+                logger.error("pyarrow listing of %s failed", location)
+                raise custom_exceptions.HDFSCommandError from error
+            relative_paths = (
+                (urlparse(info.path).path[len(base_path):], info)
+                for info in infos)
+            files[location] = sorted(
+                prefix + relative_path
+                for relative_path, info in relative_paths
+                if info.type == fs.FileType.File and info.size > 0 and
+                not _is_hidden(relative_path))
+        return files
+
+
+def create_hdfs_lister(backend, webhdfs_url=None, user=None):
+    """Creates a lister of the given backend.
+
+    Args:
+        backend (str): One of LISTING_BACKENDS.
+        webhdfs_url (str): Base URL of the WebHDFS server.
+        user (str): User name to list as, if any.
+
+    Returns:
+        HDFSLister: Lister of the backend.
+    """
+
+    if backend == 'webhdfs':
+        return WebHDFSLister(webhdfs_url, user)
+    if backend == 'pyarrow':
+        return PyArrowHDFSLister(user)
+    return ShellHDFSLister()
+
+
+def get_hdfs_lister():
+    """Returns the lister configured in the properties, shared by all the
+    threads."""
+
+    global _lister
+    with _lister_lock:
+        if _lister is None:
+            _lister = create_hdfs_lister(
+                PropertiesReader.get('hdfs_listing_backend'),
+                PropertiesReader.get('webhdfs_url'),
+                PropertiesReader.get('hdfs_user'))
+        return _lister
@@ -17,7 +17,6 @@ exists etc."""
 
 import json
 import logging
-import os
 import time
 from dateutil.parser import parse
 from uuid import uuid4
@@ -28,6 +27,9 @@ from thrift.transport import TTransport
 from hive_to_bigquery import custom_exceptions
 from hive_to_bigquery.utilities import calculate_time
 from hive_to_bigquery.database_component import DatabaseComponent
+from hive_to_bigquery.hdfs_lister import get_hdfs_lister
+from hive_to_bigquery.partition_pipeline import PartitionMigrationPipeline
+from hive_to_bigquery.properties_reader import PropertiesReader
 
 logger = logging.getLogger('Hive2BigQuery')
 
@@ -173,26 +175,21 @@ class HiveComponent(DatabaseComponent):
             List: List of the underlying data files.
         """
 
-        file_name = "hdfs_files_{}.txt".format(uuid4())
-        status_code = os.system("hdfs dfs -ls {0} > {1}".format(
-            location, file_name))
-        if status_code:
-            logger.error("hdfs command execution failed")
-            raise custom_exceptions.HDFSCommandError
-        with open(file_name, "r") as file_content:
-            content = file_content.readlines()
-        os.remove(file_name)
-        hdfs_files_list = []
-        i = 0
-        for i, line in enumerate(content):
-            if line.startswith("Found "):
-                break
-        for j in range(i + 1, len(content)):
-            size = content[j].split()[4]
-            if size != '0':
-                hdfs_files_list.append(content[j].split()[-1])
-
-        return hdfs_files_list
+        return get_hdfs_lister().list_files(location)
+
+    @staticmethod
+    def list_hdfs_files_bulk(locations):
+        """Lists the underlying HDFS files with non-zero size of several
+        locations in one call.
+
+        Args:
+            locations (List[str]): Hive table locations.
+
+        Returns:
+            dict: List of the underlying data files of every location.
+        """
+
+        return get_hdfs_lister().list_files_bulk(locations)
 
     def list_partitions(self, database_name, table_name):
         """Gets information about the different partitions.
@@ -595,39 +592,165 @@ class HiveComponent(DatabaseComponent):
         # Lists underlying HDFS files.
         hdfs_files_list = self.list_hdfs_files(source_location)
         logger.info("Updating file paths in the tracking table..")
-        for file_path in hdfs_files_list:
-            if hive_table_model.is_inc_col_present:
-                query = "INSERT INTO {0} (id,table_name,inc_col_min," \
-                        "inc_col_max,clause,file_path,gcs_copy_status," \
-                        "bq_job_id,bq_job_retries,bq_job_status) VALUES({1}," \
-                        "'{2}','{3}','{4}','{5}','{6}','TODO','TODO',0," \
-                        "'TODO')".format(
-                            hive_table_model.tracking_table_name, identifier,
-                            table_name, inc_col_min, inc_col_max, clause,
-                            file_path)
-            else:
-                query = "INSERT INTO {0} (table_name,clause,file_path," \
-                        "gcs_copy_status,bq_job_id,bq_job_retries," \
-                        "bq_job_status) VALUES('{1}','{2}','{3}','TODO'," \
-                        "'TODO',0,'TODO')".format(
-                            hive_table_model.tracking_table_name, table_name,
-                            clause, file_path)
-            # Commits information about the staging files.
-            mysql_component.execute_transaction(query)
+        # Commits information about the staging files.
+        mysql_component.execute_batch([
+            self.get_staged_files_statement(hive_table_model, table_data[0],
+                                            hdfs_files_list)
+        ])
         # Copies files from HDFS to GCS.
         gcs_component.stage_to_gcs(mysql_component, bq_component,
                                    hive_table_model, bq_table_model,
                                    gcs_bucket_name)
 
+    @staticmethod
+    def get_partition_insert_clause(hive_table_model, partition):
+        """Returns the WHERE clause to load the partition into its staging
+        table.
+
+        Args:
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            partition (dict): Partition information from the tracking table.
+
+        Returns:
+            str: WHERE clause filtering the partition and the range of the
+            incremental column, if any.
+        """
+
+        clause = partition['clause']
+        if not hive_table_model.is_inc_col_present:
+            return clause
+        if int(partition['id']) == 1:
+            # Includes lower bound value in the stage table.
+            return "{0} and {1}>='{2}' and {1}<='{3}'".format(
+                clause, hive_table_model.inc_col, partition['inc_col_min'],
+                partition['inc_col_max'])
+        return "{0} and {1}>'{2}' and {1}<='{3}'".format(
+            clause, hive_table_model.inc_col, partition['inc_col_min'],
+            partition['inc_col_max'])
+
+    @staticmethod
+    def add_partitions_to_tracking_table(mysql_component, hive_table_model,
+                                         table_data):
+        """Inserts a row with file_path 'TODO' in the tracking table for
+        every partition to migrate.
+
+        Args:
+            mysql_component (:class:`MySQLComponent`): Instance of
+                MySQLComponent to connect to MySQL.
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            table_data (List): Information of data to migrate.
+        """
+
+        if hive_table_model.is_inc_col_present:
+            columns = ['id', 'table_name', 'inc_col_min', 'inc_col_max',
+                       'clause']
+        else:
+            columns = ['table_name', 'clause']
+        insert_query = "INSERT INTO {0} ({1},file_path) VALUES ({2})".format(
+            hive_table_model.tracking_table_name, ','.join(columns),
+            ','.join(['%s'] * (len(columns) + 1)))
+        mysql_component.execute_batch([
+            (insert_query,
+             [tuple(data[column] for column in columns) + ('TODO', )
+              for data in table_data])
+        ])
+
+    @staticmethod
+    def get_pending_partitions(mysql_component, hive_table_model):
+        """Gets the partitions whose files are not listed in the tracking
+        table yet.
+
+        Args:
+            mysql_component (:class:`MySQLComponent`): Instance of
+                MySQLComponent to connect to MySQL.
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+
+        Returns:
+            List: A list of dict elements containing information of every
+                pending partition.
+        """
+
+        if hive_table_model.is_inc_col_present:
+            columns = ['id', 'table_name', 'inc_col_min', 'inc_col_max',
+                       'clause']
+        else:
+            columns = ['table_name', 'clause']
+        select_query = "SELECT {} FROM {} WHERE file_path='TODO'".format(
+            ','.join(columns), hive_table_model.tracking_table_name)
+        results = mysql_component.execute_query(select_query)
+        return [dict(zip(columns, row)) for row in results]
+
+    @staticmethod
+    def get_staged_files_statement(hive_table_model, table_data,
+                                   hdfs_files_list):
+        """Forms the statement to insert a row for every staged file in the
+        tracking table.
+
+        Args:
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            table_data (dict): Information of the data which was staged.
+            hdfs_files_list (List[str]): HDFS paths of the staged files.
+
+        Returns:
+            Tuple[str, List[tuple]]: INSERT query with placeholders and the
+            values of every row, to be run with
+            :meth:`MySQLComponent.execute_batch`.
+        """
+
+        if hive_table_model.is_inc_col_present:
+            columns = ['id', 'table_name', 'inc_col_min', 'inc_col_max',
+                       'clause']
+        else:
+            columns = ['table_name', 'clause']
+        query = "INSERT INTO {0} ({1},file_path,gcs_copy_status,bq_job_id," \
+                "bq_job_retries,bq_job_status) VALUES ({2})".format(
+                    hive_table_model.tracking_table_name, ','.join(columns),
+                    ','.join(['%s'] * (len(columns) + 5)))
+        values = tuple(table_data[column] for column in columns)
+        params = [
+            values + (file_path, 'TODO', 'TODO', 0, 'TODO')
+            for file_path in hdfs_files_list
+        ]
+        return query, params
+
+    def record_staged_files(self, mysql_component, hive_table_model,
+                            partition, hdfs_files_list):
+        """Inserts a row for every staged file of the partition in the
+        tracking table and deletes the row marking the partition as pending,
+        in a single transaction.
+
+        Args:
+            mysql_component (:class:`MySQLComponent`): Instance of
+                MySQLComponent to connect to MySQL.
+            hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+                details.
+            partition (dict): Partition information from the tracking table.
+            hdfs_files_list (List[str]): HDFS paths of the staged files.
+        """
+
+        delete_query = "DELETE FROM {0} WHERE table_name=%s AND clause=%s " \
+                       "AND file_path='TODO'".format(
+                           hive_table_model.tracking_table_name)
+        mysql_component.execute_batch([
+            self.get_staged_files_statement(hive_table_model, partition,
+                                            hdfs_files_list),
+            (delete_query, [(partition['table_name'], partition['clause'])])
+        ])
+
     def migrate_partition_table(self, mysql_component, bq_component,
                                 gcs_component, hive_table_model,
                                 bq_table_model, gcs_bucket_name, table_data):
         """Migrates Hive data in case of a partition table.
 
-        Invokes the function to create and load stage table, gets the staging
-        table location, and lists down the underneath HDFS files. Updates the
-        file paths in the tracking table and calls the function stage_to_gcs
-        to copy files to GCS.
+        Records the partitions to migrate in the tracking table and runs a
+        :class:`PartitionMigrationPipeline`, which stages the partitions in
+        Hive, lists the underneath HDFS files, copies them to GCS and starts
+        the BigQuery load jobs concurrently. Partitions left pending by a
+        previous run are resumed as well, so table_data can be empty.
 
         Args:
             mysql_component (:class:`MySQLComponent`): Instance of
@@ -644,87 +767,29 @@ class HiveComponent(DatabaseComponent):
             table_data (List): Information of data to migrate.
         """
 
-        for data in table_data:
-            if hive_table_model.is_inc_col_present:
-                insert_query = "INSERT INTO {0} (id,table_name,inc_col_min," \
-                               "inc_col_max,clause,file_path) VALUES('{1}'," \
-                               "'{2}','{3}','{4}','{5}','TODO')".format(
-                                   hive_table_model.tracking_table_name,
-                                   data['id'], data['table_name'],
-                                   data['inc_col_min'], data['inc_col_max'],
-                                   data['clause'])
-                select_query = "SELECT id,table_name,inc_col_min,inc_col_max," \
-                               "clause FROM {} WHERE file_path='TODO'".format(
-                                   hive_table_model.tracking_table_name)
-            else:
-                insert_query = "INSERT INTO {0} (table_name,clause," \
-                               "file_path)VALUES('{1}','{2}','TODO')".format(
-                                   hive_table_model.tracking_table_name,
-                                   data['table_name'], data['clause'])
-                select_query = "SELECT table_name,clause FROM {} WHERE " \
-                               "file_path='TODO'".format(
-                                   hive_table_model.tracking_table_name)
-            # Inserts a row in the tracking table for every partition.
-            mysql_component.execute_transaction(insert_query)
-            results = mysql_component.execute_query(select_query)
-
-            for row in results:
-                if hive_table_model.is_inc_col_present:
-                    identifier, table_name, inc_col_min, inc_col_max, clause \
-                        = row
-                    if identifier == 1:
-                        insert_clause = "{0} and {1}>='{2}' and " \
-                                        "{1}<='{3}'".format(
-                                            clause, hive_table_model.inc_col,
-                                            inc_col_min, inc_col_max)
-                    else:
-                        insert_clause = "{0} and {1}>'{2}' and " \
-                                        "{1}<='{3}'".format(
-                                            clause, hive_table_model.inc_col,
-                                            inc_col_min, inc_col_max)
-                else:
-                    table_name, clause = row
-                    insert_clause = clause
-                # Creates staging table and inserting data.
-                self.create_and_load_stage_table(hive_table_model, table_name,
-                                                 insert_clause)
-                # Gets table location
-                source_location = self.get_table_location(
-                    "default", table_name)
-                # Lists underlying HDFS files.
-                hdfs_files_list = self.list_hdfs_files(source_location)
-
-                logger.info("Updating file paths in the tracking table..")
-                for file_path in hdfs_files_list:
-                    if hive_table_model.is_inc_col_present:
-                        query = "INSERT INTO {0} (id,table_name,inc_col_min," \
-                                "inc_col_max,clause,file_path," \
-                                "gcs_copy_status,bq_job_id,bq_job_retries," \
-                                "bq_job_status) VALUES('{1}','{2}','{3}'," \
-                                "'{4}','{5}','{6}','TODO','TODO',0," \
-                                "'TODO')".format(
-                                    hive_table_model.tracking_table_name,
-                                    identifier, table_name, inc_col_min,
-                                    inc_col_max, clause, file_path)
-                    else:
-                        query = "INSERT INTO {0} (table_name,clause," \
-                                "file_path,gcs_copy_status,bq_job_id," \
-                                "bq_job_retries,bq_job_status) VALUES('{1}'," \
-                                "'{2}','{3}','TODO','TODO',0,'TODO')".format(
-                                    hive_table_model.tracking_table_name,
-                                    table_name, clause, file_path)
-                    # Commits information about the staging files.
-                    mysql_component.execute_transaction(query)
-
-                query = "DELETE FROM {0} WHERE table_name='{1}' AND clause " \
-                        "='{2}' AND file_path='TODO'".format(
-                            hive_table_model.tracking_table_name,
-                            table_name, clause)
-                mysql_component.execute_transaction(query)
-                # Copies files from HDFS to GCS.
-                gcs_component.stage_to_gcs(mysql_component, bq_component,
-                                           hive_table_model, bq_table_model,
-                                           gcs_bucket_name)
+        # Inserts a row in the tracking table for every partition.
+        self.add_partitions_to_tracking_table(mysql_component,
+                                              hive_table_model, table_data)
+
+        pipeline = PartitionMigrationPipeline(
+            self,
+            mysql_component,
+            bq_component,
+            gcs_component,
+            hive_table_model,
+            bq_table_model,
+            gcs_bucket_name,
+            concurrency={
+                'stage': PropertiesReader.get('hive_staging_concurrency'),
+                'list': PropertiesReader.get('hdfs_listing_concurrency'),
+                'copy': PropertiesReader.get('gcs_copy_concurrency'),
+                'load': PropertiesReader.get('bq_load_concurrency')
+            },
+            queue_size=PropertiesReader.get('partition_queue_size'))
+        start = time.time()
+        pipeline.run()
+        logger.debug("Migrated partitions - Time taken - %s",
+                     calculate_time(start, time.time()))
 
     @staticmethod
     def compare_max_values(hive_table_model, old_max, new_max):
@@ -878,19 +943,19 @@ class HiveComponent(DatabaseComponent):
                 self.get_table_location(hive_table_model.db_name,
                                         hive_table_model.table_name))
 
-            new_data_exists = False
+            old_file_paths = set(old_file_paths)
+            params = []
             for file_path in new_file_paths:
                 if file_path not in old_file_paths:
-                    # Updates the tracking table with new file paths.
-                    new_data_exists = True
                     logger.debug("Found new data at file path %s", file_path)
-                    query = "INSERT INTO {0} (table_name,file_path," \
-                            "gcs_copy_status,bq_job_id,bq_job_retries," \
-                            "bq_job_status) VALUES('{1}','{2}','TODO','TODO'," \
-                            "0,'TODO')".format(
-                                hive_table_model.tracking_table_name,
-                                hive_table_model.table_name, file_path)
-                    mysql_component.execute_transaction(query)
+                    params.append((hive_table_model.table_name, file_path,
+                                   'TODO', 'TODO', 0, 'TODO'))
+            new_data_exists = bool(params)
+            # Updates the tracking table with new file paths.
+            query = "INSERT INTO {0} (table_name,file_path,gcs_copy_status," \
+                    "bq_job_id,bq_job_retries,bq_job_status) VALUES (%s,%s," \
+                    "%s,%s,%s,%s)".format(hive_table_model.tracking_table_name)
+            mysql_component.execute_batch([(query, params)])
             # Copies the new files to GCS.
             if new_data_exists:
                 logger.info("New files found in source table")
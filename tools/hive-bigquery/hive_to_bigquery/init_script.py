@@ -21,6 +21,8 @@ import re
 from google.api_core import exceptions
 
 from hive_to_bigquery import custom_exceptions
+from hive_to_bigquery import hdfs_lister
+from hive_to_bigquery import partition_pipeline
 
 TIME_FORMAT = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S_%f")
 LOG_FILE_NAME = "hive_bq_migration_{}.log".format(TIME_FORMAT)
@@ -127,6 +129,27 @@ def validate_config_parameters(data):
     except KeyError:
         raise
 
+    # Concurrency of the partition migration stages is optional.
+    pipeline_config = data.get('Partition_Pipeline', {})
+    hive_staging_concurrency = pipeline_config.get(
+        'hive_staging_concurrency',
+        partition_pipeline.DEFAULT_CONCURRENCY['stage'])
+    hdfs_listing_concurrency = pipeline_config.get(
+        'hdfs_listing_concurrency',
+        partition_pipeline.DEFAULT_CONCURRENCY['list'])
+    gcs_copy_concurrency = pipeline_config.get(
+        'gcs_copy_concurrency', partition_pipeline.DEFAULT_CONCURRENCY['copy'])
+    bq_load_concurrency = pipeline_config.get(
+        'bq_load_concurrency', partition_pipeline.DEFAULT_CONCURRENCY['load'])
+    partition_queue_size = pipeline_config.get(
+        'queue_size', partition_pipeline.DEFAULT_QUEUE_SIZE)
+
+    # HDFS listing backend is optional, the hdfs command line by default.
+    hdfs_config = data.get('HDFS', {})
+    hdfs_listing_backend = hdfs_config.get('listing_backend', 'shell')
+    webhdfs_url = hdfs_config.get('webhdfs_url')
+    hdfs_user = hdfs_config.get('user')
+
     hive_table = hive_table.lower()
     if bq_table is None:
         bq_table = hive_table
@@ -139,6 +162,20 @@ def validate_config_parameters(data):
     if not isinstance(tracking_db_port, int):
         raise TypeError("Tracking database port must be an integer")
 
+    for value in (hive_staging_concurrency, hdfs_listing_concurrency,
+                  gcs_copy_concurrency, bq_load_concurrency,
+                  partition_queue_size):
+        if not isinstance(value, int):
+            raise TypeError("Partition pipeline values must be integers")
+        if value < 1:
+            raise ValueError("Partition pipeline values must be positive")
+
+    if hdfs_listing_backend not in hdfs_lister.LISTING_BACKENDS:
+        raise ValueError("HDFS listing backend must be one of {}".format(
+            ', '.join(hdfs_lister.LISTING_BACKENDS)))
+    if hdfs_listing_backend == 'webhdfs' and not webhdfs_url:
+        raise ValueError("WebHDFS URL is required by the webhdfs backend")
+
     if gcs_bucket_name.startswith('gs://'):
         gcs_bucket_name = gcs_bucket_name.split('gs://')[1]
     if gcs_bucket_name[-1] == '/':
@@ -178,6 +215,14 @@ def validate_config_parameters(data):
         "key_ring_id": kms_key_ring_id,
         "crypto_key_id": kms_crypto_key_id,
         "create_validation_table": create_validation_table,
+        "hive_staging_concurrency": hive_staging_concurrency,
+        "hdfs_listing_concurrency": hdfs_listing_concurrency,
+        "gcs_copy_concurrency": gcs_copy_concurrency,
+        "bq_load_concurrency": bq_load_concurrency,
+        "partition_queue_size": partition_queue_size,
+        "hdfs_listing_backend": hdfs_listing_backend,
+        "webhdfs_url": webhdfs_url,
+        "hdfs_user": hdfs_user,
         "hive_bq_comparison_csv": hive_bq_comparison_csv,
         "hive_bq_comparison_table": hive_bq_comparison_table,
         "log_file_name": LOG_FILE_NAME
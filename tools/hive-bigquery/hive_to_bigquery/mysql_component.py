@@ -69,6 +69,19 @@ class MySQLComponent(DatabaseComponent):
         except pymysql.err.DatabaseError as error:
             raise custom_exceptions.ConnectionError from error
 
+    def acquire(self):
+        """Gets an idle clone of the component from the pool, or a new clone
+        if there is none.
+
+        Returns:
+            MySQLComponent: Clone to give back with release once done.
+        """
+
+        component = super(MySQLComponent, self).acquire()
+        # Reconnects if the server closed the connection while it was idle.
+        component.connection.ping(reconnect=True)
+        return component
+
     def get_cursor(self):
         """Gets the cursor object.
 
@@ -80,16 +93,17 @@ class MySQLComponent(DatabaseComponent):
         cursor = self.connection.cursor()
         return cursor
 
-    def execute_transaction(self, query):
+    def execute_transaction(self, query, params=None):
         """Executes a transaction and commits to the database.
 
         Args:
             query (str): Transaction query to be executed.
+            params (tuple): Values of the %s placeholders of the query, if any.
         """
 
         try:
             cursor = self.get_cursor()
-            cursor.execute(query)
+            cursor.execute(query, params)
             self.connection.commit()
         except pymysql.err.OperationalError as error:
             self.connection.rollback()
@@ -97,11 +111,36 @@ class MySQLComponent(DatabaseComponent):
                          "table".format(query))
             raise custom_exceptions.MySQLExecutionError from error
 
-    def execute_query(self, query):
+    def execute_batch(self, statements):
+        """Executes parameterized statements and commits them at once.
+
+        Every query is run with executemany, which sends a multi-row INSERT
+        for INSERT queries whose VALUES are all placeholders.
+
+        Args:
+            statements (List[Tuple[str, List[tuple]]]): Queries with %s
+                placeholders and the list of values to execute each of them
+                with.
+        """
+
+        try:
+            cursor = self.get_cursor()
+            for query, params_list in statements:
+                if params_list:
+                    cursor.executemany(query, params_list)
+            self.connection.commit()
+        except pymysql.err.OperationalError as error:
+            self.connection.rollback()
+            logger.error("Failed to commit transaction {} to Cloud SQL "
+                         "table".format([query for query, _ in statements]))
+            raise custom_exceptions.MySQLExecutionError from error
+
+    def execute_query(self, query, params=None):
         """Executes query and returns the results.
 
         Args:
             query (str): Query to be executed.
+            params (tuple): Values of the %s placeholders of the query, if any.
 
         Returns:
             List: Results of the query.
@@ -109,7 +148,7 @@ class MySQLComponent(DatabaseComponent):
 
         cursor = self.get_cursor()
         try:
-            cursor.execute(query)
+            cursor.execute(query, params)
             return cursor.fetchall()
         except pymysql.err.OperationalError as error:
             logger.error(
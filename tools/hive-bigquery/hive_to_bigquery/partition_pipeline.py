@@ -0,0 +1,365 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module to migrate the partitions of a Hive table concurrently.
+
+Every partition goes through four stages, each of them run by its own pool
+of worker threads:
+
+    stage: creates and loads the Hive staging table of the partition.
+    list: lists the HDFS files of the staging tables of the partitions
+        waiting for it in one call and records them in the tracking table.
+    copy: copies the files to GCS with Hadoop distcp.
+    load: starts the BigQuery load jobs of the copied files.
+
+The stages are connected by bounded queues, so a stage that is ahead blocks
+instead of piling up work (and staging tables) in front of a slower one. The
+tracking table records the progress of every partition, which is used to
+resume an interrupted migration from the stage each partition had reached.
+"""
+
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger('Hive2BigQuery')
+
+STAGES = ('stage', 'list', 'copy', 'load')
+# Default number of worker threads of every stage.
+DEFAULT_CONCURRENCY = {'stage': 4, 'list': 4, 'copy': 4, 'load': 2}
+# Default maximum number of partitions waiting in front of every stage.
+DEFAULT_QUEUE_SIZE = 8
+# Maximum number of failed distcp attempts for the files of a partition.
+MAX_COPY_ATTEMPTS = 3
+# Maximum number of waiting partitions whose files are listed in one call.
+LIST_BATCH_SIZE = 16
+
+# Tells a worker thread that there is no more work for its stage.
+_DONE = object()
+
+
+class _WorkerComponents(object):
+    """Hive and MySQL components owned by a single worker thread.
+
+    pyhive and pymysql connections are not thread safe, so every worker
+    lazily acquires its own clones from the pools of the components and
+    gives them back when it finishes, to be reused by later runs.
+    """
+    def __init__(self, hive_component, mysql_component):
+        self._hive_component = hive_component
+        self._mysql_component = mysql_component
+        self._hive = None
+        self._mysql = None
+
+    @property
+    def hive(self):
+        if self._hive is None:
+            self._hive = self._hive_component.acquire()
+        return self._hive
+
+    @property
+    def mysql(self):
+        if self._mysql is None:
+            self._mysql = self._mysql_component.acquire()
+        return self._mysql
+
+    def release(self, failed=False):
+        """Gives back the clones, or closes them if an operation failed
+        since their connections may be unusable."""
+
+        for pool, component in ((self._hive_component, self._hive),
+                                (self._mysql_component, self._mysql)):
+            if component is None:
+                continue
+            if not failed:
+                pool.release(component)
+                continue
+            try:
+                component.connection.close()
+            except Exception:  # pylint: disable=broad-except
+                logger.debug("Failed to close connection of %s", component)
+
+
+class PartitionMigrationPipeline(object):
+    """Migrates the pending partitions recorded in the tracking table.
+
+    Attributes:
+        hive_component (:class:`HiveComponent`): Instance of HiveComponent
+            to connect to Hive, cloned by the worker threads.
+        mysql_component (:class:`MySQLComponent`): Instance of
+            MySQLComponent to connect to MySQL, cloned by the worker threads.
+        bq_component (:class:`BigQueryComponent`): Instance of
+            BigQueryComponent to do BigQuery operations.
+        gcs_component (:class:`GCSStorageComponent`): Instance of
+            GCSStorageComponent to do GCS operations.
+        hive_table_model (:class:`HiveTableModel`): Wrapper to Hive table
+            details.
+        bq_table_model (:class:`BigQueryTableModel`): Wrapper to BigQuery
+            table details.
+        gcs_bucket_name (str): GCS bucket name.
+        concurrency (dict): Number of worker threads of every stage.
+        queue_size (int): Maximum number of partitions waiting in front of
+            every stage.
+    """
+    def __init__(self,
+                 hive_component,
+                 mysql_component,
+                 bq_component,
+                 gcs_component,
+                 hive_table_model,
+                 bq_table_model,
+                 gcs_bucket_name,
+                 concurrency=None,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+
+        self.hive_component = hive_component
+        self.mysql_component = mysql_component
+        self.bq_component = bq_component
+        self.gcs_component = gcs_component
+        self.hive_table_model = hive_table_model
+        self.bq_table_model = bq_table_model
+        self.gcs_bucket_name = gcs_bucket_name
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.queue_size = queue_size
+
+        self._queues = {
+            stage: queue.Queue(maxsize=queue_size)
+            for stage in STAGES
+        }
+        self._functions = {
+            'stage': self.stage_partition,
+            'list': self.list_partitions,
+            'copy': self.copy_partition,
+            'load': self.load_partition
+        }
+        # Stages whose function processes a list of partitions at once.
+        self._batch_sizes = {'list': LIST_BATCH_SIZE}
+        self._next_stage = dict(zip(STAGES, STAGES[1:]))
+        self._failed = threading.Event()
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def get_pending_work(self):
+        """Queries the tracking table for the partitions to resume.
+
+        Returns:
+            dict: Lists of partitions (dict elements) to feed to the 'stage',
+            'copy' and 'load' stages.
+        """
+
+        tracking_table_name = self.hive_table_model.tracking_table_name
+        to_copy = OrderedDict()
+        results = self.mysql_component.execute_query(
+            "SELECT table_name,file_path FROM {} WHERE "
+            "gcs_copy_status='TODO'".format(tracking_table_name))
+        for table_name, file_path in results:
+            to_copy.setdefault(table_name, []).append(file_path)
+
+        to_load = OrderedDict()
+        results = self.mysql_component.execute_query(
+            "SELECT table_name,gcs_file_path FROM {} WHERE "
+            "gcs_copy_status='DONE' AND bq_job_status='TODO'".format(
+                tracking_table_name))
+        for table_name, gcs_file_path in results:
+            to_load.setdefault(table_name, []).append(gcs_file_path)
+
+        return {
+            'stage':
+            self.hive_component.get_pending_partitions(
+                self.mysql_component, self.hive_table_model),
+            'copy': [{
+                'table_name': table_name,
+                'file_paths': file_paths
+            } for table_name, file_paths in to_copy.items()],
+            'load': [{
+                'table_name': table_name,
+                'gcs_file_paths': gcs_file_paths
+            } for table_name, gcs_file_paths in to_load.items()]
+        }
+
+    def stage_partition(self, partition, components):
+        """Creates and loads the Hive staging table of the partition."""
+
+        table_name = partition['table_name']
+        # The staging table may exist if a previous run was interrupted
+        # before recording its files.
+        components.hive.execute_query(
+            "DROP TABLE IF EXISTS default.{}".format(table_name))
+        components.hive.create_and_load_stage_table(
+            self.hive_table_model, table_name,
+            self.hive_component.get_partition_insert_clause(
+                self.hive_table_model, partition))
+        return partition
+
+    def list_partitions(self, partitions, components):
+        """Lists the HDFS files of the staging tables of several partitions
+        in one call and records them in the tracking table."""
+
+        locations = [
+            components.hive.get_table_location("default",
+                                               partition['table_name'])
+            for partition in partitions
+        ]
+        hdfs_files = components.hive.list_hdfs_files_bulk(locations)
+        for partition, location in zip(partitions, locations):
+            logger.info("Updating file paths of %s in the tracking table..",
+                        partition['table_name'])
+            self.hive_component.record_staged_files(components.mysql,
+                                                    self.hive_table_model,
+                                                    partition,
+                                                    hdfs_files[location])
+            partition['file_paths'] = hdfs_files[location]
+        return partitions
+
+    def copy_partition(self, partition, components):
+        """Copies the files of the partition to GCS.
+
+        distcp copies the first of the files having the same name, the others
+        are copied by the next attempts. Attempts copying less than that are
+        retried up to MAX_COPY_ATTEMPTS times, after which the remaining
+        files are left as 'TODO' in the tracking table for the next run.
+        """
+
+        remaining = list(partition['file_paths'])
+        gcs_file_paths = []
+        failed_attempts = 0
+        while remaining and failed_attempts < MAX_COPY_ATTEMPTS:
+            files_to_copy = OrderedDict()
+            for path in remaining:
+                files_to_copy.setdefault(path.split('/')[-1], path)
+            copied = self.gcs_component.copy_files_to_gcs(
+                components.mysql, self.hive_table_model, self.gcs_bucket_name,
+                list(files_to_copy.values()))
+            gcs_file_paths.extend(copied)
+            copied_paths = set(files_to_copy[path.split('/')[-1]]
+                               for path in copied)
+            remaining = [path for path in remaining if path not in copied_paths]
+            if len(copied_paths) < len(files_to_copy):
+                failed_attempts += 1
+        if remaining:
+            logger.error(
+                "Failed copying %d files of %s to GCS, they will be retried "
+                "in the next run", len(remaining), partition['table_name'])
+        partition['gcs_file_paths'] = gcs_file_paths
+        return partition
+
+    def load_partition(self, partition, components):
+        """Starts the BigQuery load jobs of the copied files."""
+
+        self.bq_component.start_load_jobs(components.mysql,
+                                          self.hive_table_model,
+                                          self.bq_table_model,
+                                          partition['gcs_file_paths'])
+        return None
+
+    def _set_error(self, error):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._failed.set()
+
+    def _work(self, stage):
+        """Processes the partitions of a stage until told there are no more.
+
+        After a failure in any stage, the remaining partitions are drained
+        without being processed so that no thread blocks on a full queue.
+        """
+
+        components = _WorkerComponents(self.hive_component,
+                                       self.mysql_component)
+        input_queue = self._queues[stage]
+        next_stage = self._next_stage.get(stage)
+        batch_size = self._batch_sizes.get(stage)
+        failed = False
+        done = False
+        try:
+            while not done:
+                partitions = []
+                partition = input_queue.get()
+                # Takes the partitions already waiting to process them in a
+                # single call, for the stages which support it.
+                while partition is not _DONE:
+                    partitions.append(partition)
+                    if len(partitions) >= (batch_size or 1):
+                        break
+                    try:
+                        partition = input_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                done = partition is _DONE
+                if not partitions or self._failed.is_set():
+                    continue
+                try:
+                    if batch_size:
+                        results = self._functions[stage](partitions,
+                                                         components)
+                    else:
+                        results = [
+                            self._functions[stage](partitions[0], components)
+                        ]
+                except Exception as error:  # pylint: disable=broad-except
+                    logger.error(
+                        "Failed at %s stage for %s", stage,
+                        ', '.join(partition['table_name']
+                                  for partition in partitions))
+                    self._set_error(error)
+                    failed = True
+                    continue
+                for result in results:
+                    if next_stage and result is not None:
+                        # Blocks while the next stage is busy.
+                        self._queues[next_stage].put(result)
+        finally:
+            components.release(failed)
+
+    def run(self):
+        """Runs all the stages until every pending partition is migrated.
+
+        Raises:
+            Exception: The first error raised while migrating a partition.
+        """
+
+        pending_work = self.get_pending_work()
+        logger.info(
+            "Migrating partitions - %d to stage, %d to copy to GCS, %d to "
+            "load to BigQuery", len(pending_work['stage']),
+            len(pending_work['copy']), len(pending_work['load']))
+
+        workers = {}
+        for stage in STAGES:
+            workers[stage] = [
+                threading.Thread(target=self._work,
+                                 args=(stage, ),
+                                 name='hive2bq-{}-{}'.format(stage, i))
+                for i in range(self.concurrency[stage])
+            ]
+            for worker in workers[stage]:
+                worker.daemon = True
+                worker.start()
+
+        # Partitions closest to completion are fed first.
+        for stage in ('load', 'copy', 'stage'):
+            for partition in pending_work.get(stage, []):
+                self._queues[stage].put(partition)
+
+        # A stage is done once all of its producers, the previous stage's
+        # workers, are done.
+        for stage in STAGES:
+            for _ in workers[stage]:
+                self._queues[stage].put(_DONE)
+            for worker in workers[stage]:
+                worker.join()
+
+        if self._error is not None:
+            raise self._error
@@ -31,6 +31,7 @@ requirements = [
     'google-cloud-bigquery >= 1.9.0, < 2.0.0dev',
     'google-cloud-storage >= 1.14.0, < 2.0.0dev',
     'google-cloud-kms >= 1.0.0, < 2.0.0dev',
+    'requests >= 2.18.0',
     "setuptools >= 34.0.0",
 ]
 
@@ -51,5 +52,6 @@ setup(
     ],
     packages=find_packages(where=str(here)),
     python_requires='>=3.5, <4',
-    install_requires=requirements
+    install_requires=requirements,
+    extras_require={'pyarrow': ['pyarrow >= 2.0.0']}
 )
@@ -0,0 +1,145 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import pytest
+
+from hive_to_bigquery import custom_exceptions
+
+WAREHOUSE = 'hdfs://namenode:8020/user/hive/warehouse'
+
+LS_OUTPUT = """\
+drwxr-xr-x   - hive hive          0 2020-01-01 00:00 {0}/stage_a/sub
+-rw-r--r--   3 hive hive        100 2020-01-01 00:00 {0}/stage_a/000000_0
+-rw-r--r--   3 hive hive        200 2020-01-01 00:00 {0}/stage_a/sub/000000_0
+-rw-r--r--   3 hive hive          0 2020-01-01 00:00 {0}/stage_a/_SUCCESS
+-rw-r--r--   3 hive hive        300 2020-01-01 00:00 {0}/stage_ab/000000_0
+""".format(WAREHOUSE)
+
+
+@pytest.fixture
+def module_under_test():
+    from hive_to_bigquery import hdfs_lister
+
+    return hdfs_lister
+
+
+@pytest.fixture
+def mock_popen(module_under_test, monkeypatch):
+    popen = mock.Mock()
+    popen.return_value.communicate.return_value = (LS_OUTPUT.encode(), b'')
+    popen.return_value.returncode = 0
+    monkeypatch.setattr(module_under_test.subprocess, 'Popen', popen)
+    return popen
+
+
+def test_shell_list_files_bulk(module_under_test, mock_popen):
+    locations = [WAREHOUSE + '/stage_a', WAREHOUSE + '/stage_ab']
+
+    files = module_under_test.ShellHDFSLister().list_files_bulk(locations)
+
+    mock_popen.assert_called_once_with(['hdfs', 'dfs', '-ls', '-R'] +
+                                       locations,
+                                       stdout=mock.ANY,
+                                       stderr=mock.ANY)
+    assert files == {
+        locations[0]: [
+            WAREHOUSE + '/stage_a/000000_0',
+            WAREHOUSE + '/stage_a/sub/000000_0'
+        ],
+        locations[1]: [WAREHOUSE + '/stage_ab/000000_0'],
+    }
+
+
+def test_shell_command_failure(module_under_test, mock_popen):
+    mock_popen.return_value.returncode = 1
+
+    with pytest.raises(custom_exceptions.HDFSCommandError):
+        module_under_test.ShellHDFSLister().list_files(WAREHOUSE)
+
+
+def file_status(path_suffix, file_type='FILE', length=100):
+    return {'pathSuffix': path_suffix, 'type': file_type, 'length': length}
+
+
+def test_webhdfs_list_files(module_under_test):
+    statuses = {
+        '/user/hive/warehouse/stage_a': [
+            file_status('000000_0'),
+            file_status('sub', 'DIRECTORY', 0),
+            file_status('_SUCCESS', length=0),
+            file_status('_temporary', 'DIRECTORY', 0),
+            file_status('.hive-staging_hive_1', 'DIRECTORY', 0),
+            file_status('.000000_0.crc')
+        ],
+        '/user/hive/warehouse/stage_a/sub': [file_status('000000_0')],
+    }
+    lister = module_under_test.WebHDFSLister('http://namenode:9870/',
+                                             user='hive')
+    lister.session = mock.Mock()
+
+    def get(url, params, timeout):
+        path = url.split('/webhdfs/v1')[1]
+        response = mock.Mock()
+        response.json.return_value = {
+            'FileStatuses': {
+                'FileStatus': statuses[path]
+            }
+        }
+        return response
+
+    lister.session.get.side_effect = get
+
+    assert lister.list_files(WAREHOUSE + '/stage_a') == [
+        WAREHOUSE + '/stage_a/000000_0', WAREHOUSE + '/stage_a/sub/000000_0'
+    ]
+    lister.session.get.assert_any_call(
+        'http://namenode:9870/webhdfs/v1/user/hive/warehouse/stage_a',
+        params={
+            'op': 'LISTSTATUS',
+            'user.name': 'hive'
+        },
+        timeout=60)
+
+
+HIDDEN_LS_OUTPUT = """\
+-rw-r--r--   3 hive hive        100 2020-01-01 00:00 {0}/stage_a/000000_0
+-rw-r--r--   3 hive hive         10 2020-01-01 00:00 {0}/stage_a/_SUCCESS
+drwxr-xr-x   - hive hive          0 2020-01-01 00:00 {0}/stage_a/_temporary
+-rw-r--r--   3 hive hive        100 2020-01-01 00:00 {0}/stage_a/_temporary/0/part-0
+-rw-r--r--   3 hive hive        100 2020-01-01 00:00 {0}/stage_a/.hive-staging_hive_1/-ext-10000/000000_0
+-rw-r--r--   3 hive hive        100 2020-01-01 00:00 {0}/stage_a/sub/.000000_0.crc
+-rw-r--r--   3 hive hive        200 2020-01-01 00:00 {0}/stage_a/sub/000000_0
+""".format(WAREHOUSE)
+
+
+def test_shell_list_files_skips_hidden(module_under_test, mock_popen):
+    mock_popen.return_value.communicate.return_value = (
+        HIDDEN_LS_OUTPUT.encode(), b'')
+
+    files = module_under_test.ShellHDFSLister().list_files(WAREHOUSE +
+                                                           '/stage_a')
+
+    assert files == [
+        WAREHOUSE + '/stage_a/000000_0', WAREHOUSE + '/stage_a/sub/000000_0'
+    ]
+
+
+def test_lister_requires_list_files_bulk(module_under_test):
+    class IncompleteLister(module_under_test.HDFSLister):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteLister()
@@ -0,0 +1,83 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import pymysql
+import pytest
+
+from hive_to_bigquery import custom_exceptions
+
+
+@pytest.fixture
+def mock_connect(monkeypatch):
+    connect = mock.Mock()
+    monkeypatch.setattr(pymysql, "connect", connect)
+    return connect
+
+
+@pytest.fixture
+def module_under_test():
+    from hive_to_bigquery import mysql_component
+
+    return mysql_component
+
+
+@pytest.fixture
+def object_under_test(module_under_test, mock_connect):
+    return module_under_test.MySQLComponent(host='localhost',
+                                            port=3306,
+                                            user='root',
+                                            password='password',
+                                            database='tracking')
+
+
+def test_execute_batch_commits_once(object_under_test, mock_connect):
+    connection = mock_connect.return_value
+    cursor = connection.cursor.return_value
+    insert_query = "INSERT INTO tracking (table_name,file_path) VALUES (%s,%s)"
+    delete_query = "DELETE FROM tracking WHERE table_name=%s"
+
+    object_under_test.execute_batch([
+        (insert_query, [('stage', '/a'), ('stage', '/b')]),
+        ("UPDATE tracking SET bq_job_status=%s", []),
+        (delete_query, [('stage', )]),
+    ])
+
+    assert cursor.executemany.call_args_list == [
+        mock.call(insert_query, [('stage', '/a'), ('stage', '/b')]),
+        mock.call(delete_query, [('stage', )]),
+    ]
+    connection.commit.assert_called_once_with()
+
+
+def test_execute_batch_rolls_back(object_under_test, mock_connect):
+    connection = mock_connect.return_value
+    connection.cursor.return_value.executemany.side_effect = \
+        pymysql.err.OperationalError
+
+    with pytest.raises(custom_exceptions.MySQLExecutionError):
+        object_under_test.execute_batch([("DELETE FROM tracking", [()])])
+
+    connection.rollback.assert_called_once_with()
+    connection.commit.assert_not_called()
+
+
+def test_acquire_reuses_released_clone(object_under_test, mock_connect):
+    clone = object_under_test.acquire()
+    object_under_test.release(clone)
+
+    assert object_under_test.acquire() is clone
+    # One connection for the component and one for its clone.
+    assert mock_connect.call_count == 2
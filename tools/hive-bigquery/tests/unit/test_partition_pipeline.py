@@ -0,0 +1,154 @@
+# Copyright 2019 Google Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import pytest
+
+from hive_to_bigquery import custom_exceptions
+
+
+@pytest.fixture
+def module_under_test():
+    from hive_to_bigquery import partition_pipeline
+
+    return partition_pipeline
+
+
+@pytest.fixture
+def hive_component():
+    component = mock.Mock()
+    component.acquire.return_value = component
+    component.get_pending_partitions.return_value = []
+    component.get_table_location.side_effect = (
+        lambda database, table_name: 'hdfs:///staging/' + table_name)
+    component.list_hdfs_files_bulk.side_effect = (
+        lambda locations: {
+            location: [location + '/000000_0'] for location in locations
+        })
+    return component
+
+
+@pytest.fixture
+def mysql_component():
+    component = mock.Mock()
+    component.acquire.return_value = component
+    component.execute_query.return_value = []
+    return component
+
+
+@pytest.fixture
+def gcs_component():
+    component = mock.Mock()
+    component.copy_files_to_gcs.side_effect = (
+        lambda mysql, model, bucket, paths:
+        ['gs://bucket/' + '/'.join(path.split('/')[-2:]) for path in paths])
+    return component
+
+
+@pytest.fixture
+def bq_component():
+    return mock.Mock()
+
+
+@pytest.fixture
+def object_under_test(module_under_test, hive_component, mysql_component,
+                      bq_component, gcs_component):
+    return module_under_test.PartitionMigrationPipeline(
+        hive_component,
+        mysql_component,
+        bq_component,
+        gcs_component,
+        mock.Mock(tracking_table_name='tracking'),
+        mock.Mock(),
+        'bucket',
+        concurrency={'stage': 2, 'list': 2, 'copy': 2, 'load': 2},
+        queue_size=1)
+
+
+def loaded_files(bq_component):
+    return sorted(path for call in bq_component.start_load_jobs.call_args_list
+                  for path in call[0][3])
+
+
+def test_run_migrates_pending_partitions(object_under_test, hive_component,
+                                         bq_component):
+    hive_component.get_pending_partitions.return_value = [{
+        'table_name': 'stage_{}'.format(i),
+        'clause': 'WHERE part="{}"'.format(i)
+    } for i in range(5)]
+
+    object_under_test.run()
+
+    assert hive_component.create_and_load_stage_table.call_count == 5
+    assert hive_component.record_staged_files.call_count == 5
+    assert loaded_files(bq_component) == [
+        'gs://bucket/stage_{}/000000_0'.format(i) for i in range(5)
+    ]
+
+
+def test_run_resumes_copy_and_load(object_under_test, mysql_component,
+                                   gcs_component, bq_component):
+    mysql_component.execute_query.side_effect = [
+        # Files still to copy to GCS.
+        [('stage_0', 'hdfs:///staging/stage_0/000000_0'),
+         ('stage_0', 'hdfs:///staging/stage_0/000001_0')],
+        # Files copied to GCS but not loaded.
+        [('stage_1', 'gs://bucket/stage_1/000000_0')],
+    ]
+
+    object_under_test.run()
+
+    gcs_component.copy_files_to_gcs.assert_called_once_with(
+        mysql_component, mock.ANY, 'bucket', [
+            'hdfs:///staging/stage_0/000000_0',
+            'hdfs:///staging/stage_0/000001_0'
+        ])
+    assert loaded_files(bq_component) == [
+        'gs://bucket/stage_0/000000_0', 'gs://bucket/stage_0/000001_0',
+        'gs://bucket/stage_1/000000_0'
+    ]
+
+
+def test_run_raises_first_error(object_under_test, hive_component,
+                                bq_component):
+    hive_component.get_pending_partitions.return_value = [{
+        'table_name': 'stage_{}'.format(i),
+        'clause': ''
+    } for i in range(5)]
+    hive_component.create_and_load_stage_table.side_effect = \
+        custom_exceptions.HiveExecutionError
+
+    with pytest.raises(custom_exceptions.HiveExecutionError):
+        object_under_test.run()
+
+    bq_component.start_load_jobs.assert_not_called()
+
+
+def test_copy_partition_copies_files_with_same_name(object_under_test,
+                                                    gcs_component):
+    partition = {
+        'table_name': 'stage_0',
+        'file_paths': ['hdfs:///a/000000_0', 'hdfs:///b/000000_0']
+    }
+
+    object_under_test.copy_partition(partition, mock.Mock())
+
+    assert gcs_component.copy_files_to_gcs.call_args_list == [
+        mock.call(mock.ANY, mock.ANY, 'bucket', ['hdfs:///a/000000_0']),
+        mock.call(mock.ANY, mock.ANY, 'bucket', ['hdfs:///b/000000_0']),
+    ]
+    assert partition['gcs_file_paths'] == [
+        'gs://bucket/a/000000_0', 'gs://bucket/b/000000_0'
+    ]
@@ -28,12 +28,19 @@ def get_available_subscriptions(credential):
         return []
 
 
-def get_aks_data_for_subscription(credential, subscription_id):
-    """Fetches all AKS cluster data for a given subscription."""
+def get_aks_data_for_subscription(
+    credential, subscription_id, list_options=None, on_cluster=None
+):
+    """
+    Fetches all AKS cluster data for a given subscription.
+    Every cluster is passed to on_cluster once discovered, by default appending it to the
+    returned list.
+    """
     logging.info("Scanning AKS clusters in subscription: %s", subscription_id)
     try:
         aks_client = ContainerServiceClient(credential, subscription_id)
         clusters_data = []
+        on_cluster = on_cluster or clusters_data.append
 
         for cluster in aks_client.managed_clusters.list():
             logging.info(
@@ -72,7 +79,7 @@ def get_aks_data_for_subscription(credential, subscription_id):
             # Only attempt to get Kubernetes details if the cluster's provisioning state is 'Succeeded'.
             if cluster.provisioning_state == "Succeeded":
                 kubernetes_details = get_k8s_details_for_aks(
-                    aks_client, resource_group, cluster.name
+                    aks_client, resource_group, cluster.name, list_options, cluster.id
                 )
             else:
                 logging.warning(
@@ -88,7 +95,7 @@ def get_aks_data_for_subscription(credential, subscription_id):
                 "hosting_provider_details": cluster_details,
                 "kubernetes_details": kubernetes_details,
             }
-            clusters_data.append(final_cluster_data)
+            on_cluster(final_cluster_data)
 
         return clusters_data
     except HttpResponseError as e:
@@ -107,12 +114,24 @@ def get_aks_data_for_subscription(credential, subscription_id):
         return []
 
 
-def run_aks_discovery(credential, subscriptions_to_scan):
-    """Runs AKS discovery across multiple subscriptions in parallel."""
+def run_aks_discovery(
+    credential, subscriptions_to_scan, list_options=None, on_cluster=None
+):
+    """
+    Runs AKS discovery across multiple subscriptions in parallel.
+    With on_cluster, the clusters are passed to it as they are discovered instead of being
+    returned.
+    """
     all_aks_data = []
     with ThreadPoolExecutor(max_workers=10) as executor:
         future_to_subscription = {
-            executor.submit(get_aks_data_for_subscription, credential, sub_id): sub_id
+            executor.submit(
+                get_aks_data_for_subscription,
+                credential,
+                sub_id,
+                list_options,
+                on_cluster,
+            ): sub_id
             for sub_id in subscriptions_to_scan
         }
         for future in as_completed(future_to_subscription):
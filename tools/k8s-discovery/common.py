@@ -1,6 +1,9 @@
+import csv
 import json
 import logging
 import os
+import textwrap
+import threading
 import pandas as pd
 
 
@@ -52,6 +55,10 @@ def _flatten_workloads(cluster_id, k8s_details):
                         "memory"
                     )
 
+                # Set by incremental discoveries
+                if "change" in item:
+                    workload_info["change"] = item["change"]
+
                 workloads_list.append(workload_info)
     return workloads_list
 
@@ -67,6 +74,157 @@ def _flatten_and_add_cluster_id(cluster_id, k8s_details, resource_key):
     return resource_list
 
 
+# The kubernetes_details keys flattened as is into the resource file of the same name
+_PLAIN_RESOURCES = [
+    "pods",
+    "services",
+    "ingresses",
+    "persistent_volume_claims",
+    "persistent_volumes",
+    "namespaces",
+    "configmaps",
+    "secrets",
+    "hpas",
+    "jobs",
+    "cronjobs",
+    "network_policies",
+    "roles",
+    "role_bindings",
+    "resource_quotas",
+    "limit_ranges",
+    "pod_disruption_budgets",
+    "service_accounts",
+]
+
+# The CSV files of the flattened resources, in the order they are saved. The cluster file
+# is named after the provider, e.g. eks_clusters.csv.
+RESOURCE_FILES = ["clusters", "nodepools", "nodes", "workloads"] + _PLAIN_RESOURCES
+
+
+def _resource_filename(resource, provider):
+    if resource == "clusters":
+        provider_name_map = {"aws": "eks", "azure": "aks", "gke": "gke"}
+        return f"{provider_name_map.get(provider, provider)}_clusters"
+    return resource
+
+
+def flatten_cluster(cluster_data, provider):
+    """
+    Flattens the data of one cluster into the rows of the relational CSV files.
+    Returns a dict of the rows of every name of RESOURCE_FILES.
+    """
+    rows = {resource: [] for resource in RESOURCE_FILES}
+    provider_details = cluster_data.get("hosting_provider_details", {})
+    k8s_details = cluster_data.get("kubernetes_details", {})
+
+    # --- Cluster Info ---
+    cluster_name = provider_details.get("name")
+    region = provider_details.get("region") or provider_details.get("location")
+    cluster_id = f"{provider}-{region}-{cluster_name}"
+
+    # Dump all provider details into a single record.
+    # Complex types (dicts, lists) are converted to JSON strings.
+    cluster_info = {
+        "cluster_id": cluster_id,
+        "provider": provider,
+    }
+    for key, value in provider_details.items():
+        if isinstance(value, (dict, list)):
+            cluster_info[key] = json.dumps(value, default=str)
+        else:
+            cluster_info[key] = value
+    rows["clusters"].append(cluster_info)
+
+    # --- Nodepool Info (Provider-specific) ---
+    if provider == "aws":
+        for np in provider_details.get("nodegroups", []):
+            rows["nodepools"].append(
+                {
+                    "cluster_id": cluster_id,
+                    "nodegroup_name": np.get("nodegroupName"),
+                    "instance_types": ", ".join(np.get("instanceTypes", [])),
+                    "ami_type": np.get("amiType"),
+                    "disk_size_gb": np.get("diskSize"),
+                    "desired_size": np.get("scalingConfig", {}).get("desiredSize"),
+                    "min_size": np.get("scalingConfig", {}).get("minSize"),
+                    "max_size": np.get("scalingConfig", {}).get("maxSize"),
+                    "status": np.get("status"),
+                    "taints": json.dumps(np.get("taints", [])),
+                    "labels": json.dumps(np.get("labels", {})),
+                }
+            )
+    elif provider == "azure":
+        for ap in provider_details.get("agentPools", []):
+            rows["nodepools"].append(
+                {
+                    "cluster_id": cluster_id,
+                    "agentpool_name": ap.get("name"),
+                    "vm_size": ap.get("vmSize"),
+                    "node_count": ap.get("count"),
+                    "min_count": ap.get("minCount"),
+                    "max_count": ap.get("maxCount"),
+                    "os_type": ap.get("osType"),
+                    "os_disk_size_gb": ap.get("osDiskSizeGB"),
+                    "provisioning_state": ap.get("provisioningState"),
+                    "mode": ap.get("mode"),
+                    "taints": json.dumps(ap.get("nodeTaints", [])),
+                    "labels": json.dumps(ap.get("nodeLabels", {})),
+                }
+            )
+    elif provider == "gke":
+        for np in provider_details.get("nodePools", []):
+            rows["nodepools"].append(
+                {
+                    "cluster_id": cluster_id,
+                    "nodepool_name": np.get("name"),
+                    "machine_type": np.get("config", {}).get("machineType"),
+                    "disk_size_gb": np.get("config", {}).get("diskSizeGb"),
+                    "initial_node_count": np.get("initialNodeCount"),
+                    "status": np.get("status"),
+                    "version": np.get("version"),
+                    "autoscaling_enabled": np.get("autoscaling", {}).get(
+                        "enabled", False
+                    ),
+                    "min_node_count": np.get("autoscaling", {}).get("minNodeCount"),
+                    "max_node_count": np.get("autoscaling", {}).get("maxNodeCount"),
+                    "taints": json.dumps(np.get("config", {}).get("taints", [])),
+                    "labels": json.dumps(np.get("config", {}).get("labels", {})),
+                }
+            )
+
+    # --- Node Info ---
+    if k8s_details and "nodes" in k8s_details:
+        for node in k8s_details["nodes"]:
+            rows["nodes"].append(
+                {
+                    "cluster_id": cluster_id,
+                    "node_name": node.get("name"),
+                    "instance_type": node.get("instance_type"),
+                    "zone": node.get("zone"),
+                    "is_ready": node.get("is_ready"),
+                    "status_message": node.get("status_message"),
+                    "cpu_capacity": node.get("cpu_capacity"),
+                    "memory_capacity": node.get("memory_capacity"),
+                    "os_image": node.get("os_image"),
+                    "kernel_version": node.get("kernel_version"),
+                    "kubelet_version": node.get("kubelet_version"),
+                    "creation_timestamp": node.get("creation_timestamp"),
+                    **({"change": node["change"]} if "change" in node else {}),
+                }
+            )
+
+    # --- Workload Info ---
+    rows["workloads"].extend(_flatten_workloads(cluster_id, k8s_details))
+
+    # --- Other K8s Resources ---
+    for resource in _PLAIN_RESOURCES:
+        rows[resource].extend(
+            _flatten_and_add_cluster_id(cluster_id, k8s_details, resource)
+        )
+
+    return rows
+
+
 def save_to_csvs(all_cluster_data, output_dir, provider):
     """
     Processes the collected cluster data and saves it into multiple relational CSV files.
@@ -77,213 +235,114 @@ def save_to_csvs(all_cluster_data, output_dir, provider):
 
     os.makedirs(output_dir, exist_ok=True)
 
-    provider_clusters_list = []
-    nodepools_list = []
-    nodes_list = []
-    workloads_list = []
-    pods_list = []
-    services_list = []
-    ingresses_list = []
-    pvcs_list = []
-    pvs_list = []
-    namespaces_list = []
-    configmaps_list = []
-    secrets_list = []
-    hpas_list = []
-    jobs_list = []
-    cronjobs_list = []
-    network_policies_list = []
-    roles_list = []
-    role_bindings_list = []
-    resource_quotas_list = []
-    limit_ranges_list = []
-    pdbs_list = []
-    service_accounts_list = []
-
+    all_rows = {resource: [] for resource in RESOURCE_FILES}
     for cluster_data in all_cluster_data:
-        provider_details = cluster_data.get("hosting_provider_details", {})
-        k8s_details = cluster_data.get("kubernetes_details", {})
-
-        # --- Cluster Info ---
-        cluster_name = provider_details.get("name")
-        region = provider_details.get("region") or provider_details.get("location")
-        cluster_id = f"{provider}-{region}-{cluster_name}"
-
-        # Dump all provider details into a single record.
-        # Complex types (dicts, lists) are converted to JSON strings.
-        cluster_info = {
-            "cluster_id": cluster_id,
-            "provider": provider,
-        }
-        for key, value in provider_details.items():
-            if isinstance(value, (dict, list)):
-                cluster_info[key] = json.dumps(value, default=str)
-            else:
-                cluster_info[key] = value
-        provider_clusters_list.append(cluster_info)
-
-        # --- Nodepool Info (Provider-specific) ---
-        if provider == "aws":
-            for np in provider_details.get("nodegroups", []):
-                nodepools_list.append(
-                    {
-                        "cluster_id": cluster_id,
-                        "nodegroup_name": np.get("nodegroupName"),
-                        "instance_types": ", ".join(np.get("instanceTypes", [])),
-                        "ami_type": np.get("amiType"),
-                        "disk_size_gb": np.get("diskSize"),
-                        "desired_size": np.get("scalingConfig", {}).get("desiredSize"),
-                        "min_size": np.get("scalingConfig", {}).get("minSize"),
-                        "max_size": np.get("scalingConfig", {}).get("maxSize"),
-                        "status": np.get("status"),
-                        "taints": json.dumps(np.get("taints", [])),
-                        "labels": json.dumps(np.get("labels", {})),
-                    }
-                )
-        elif provider == "azure":
-            for ap in provider_details.get("agentPools", []):
-                nodepools_list.append(
-                    {
-                        "cluster_id": cluster_id,
-                        "agentpool_name": ap.get("name"),
-                        "vm_size": ap.get("vmSize"),
-                        "node_count": ap.get("count"),
-                        "min_count": ap.get("minCount"),
-                        "max_count": ap.get("maxCount"),
-                        "os_type": ap.get("osType"),
-                        "os_disk_size_gb": ap.get("osDiskSizeGB"),
-                        "provisioning_state": ap.get("provisioningState"),
-                        "mode": ap.get("mode"),
-                        "taints": json.dumps(ap.get("nodeTaints", [])),
-                        "labels": json.dumps(ap.get("nodeLabels", {})),
-                    }
-                )
-        elif provider == "gke":
-            for np in provider_details.get("nodePools", []):
-                nodepools_list.append(
-                    {
-                        "cluster_id": cluster_id,
-                        "nodepool_name": np.get("name"),
-                        "machine_type": np.get("config", {}).get("machineType"),
-                        "disk_size_gb": np.get("config", {}).get("diskSizeGb"),
-                        "initial_node_count": np.get("initialNodeCount"),
-                        "status": np.get("status"),
-                        "version": np.get("version"),
-                        "autoscaling_enabled": np.get("autoscaling", {}).get(
-                            "enabled", False
-                        ),
-                        "min_node_count": np.get("autoscaling", {}).get("minNodeCount"),
-                        "max_node_count": np.get("autoscaling", {}).get("maxNodeCount"),
-                        "taints": json.dumps(np.get("config", {}).get("taints", [])),
-                        "labels": json.dumps(np.get("config", {}).get("labels", {})),
-                    }
-                )
-
-        # --- Node Info ---
-        if k8s_details and "nodes" in k8s_details:
-            for node in k8s_details["nodes"]:
-                nodes_list.append(
-                    {
-                        "cluster_id": cluster_id,
-                        "node_name": node.get("name"),
-                        "instance_type": node.get("instance_type"),
-                        "zone": node.get("zone"),
-                        "is_ready": node.get("is_ready"),
-                        "status_message": node.get("status_message"),
-                        "cpu_capacity": node.get("cpu_capacity"),
-                        "memory_capacity": node.get("memory_capacity"),
-                        "os_image": node.get("os_image"),
-                        "kernel_version": node.get("kernel_version"),
-                        "kubelet_version": node.get("kubelet_version"),
-                        "creation_timestamp": node.get("creation_timestamp"),
-                    }
-                )
-
-        # --- Workload Info ---
-        workloads_list.extend(_flatten_workloads(cluster_id, k8s_details))
-
-        # --- Other K8s Resources ---
-        pods_list.extend(_flatten_and_add_cluster_id(cluster_id, k8s_details, "pods"))
-        services_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "services")
-        )
-        ingresses_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "ingresses")
-        )
-        pvcs_list.extend(
-            _flatten_and_add_cluster_id(
-                cluster_id, k8s_details, "persistent_volume_claims"
-            )
-        )
-        pvs_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "persistent_volumes")
-        )
-        namespaces_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "namespaces")
-        )
-        configmaps_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "configmaps")
-        )
-        secrets_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "secrets")
-        )
-        hpas_list.extend(_flatten_and_add_cluster_id(cluster_id, k8s_details, "hpas"))
-        jobs_list.extend(_flatten_and_add_cluster_id(cluster_id, k8s_details, "jobs"))
-        cronjobs_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "cronjobs")
-        )
-        network_policies_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "network_policies")
-        )
-        roles_list.extend(_flatten_and_add_cluster_id(cluster_id, k8s_details, "roles"))
-        role_bindings_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "role_bindings")
-        )
-        resource_quotas_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "resource_quotas")
-        )
-        limit_ranges_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "limit_ranges")
-        )
-        pdbs_list.extend(
-            _flatten_and_add_cluster_id(
-                cluster_id, k8s_details, "pod_disruption_budgets"
-            )
-        )
-        service_accounts_list.extend(
-            _flatten_and_add_cluster_id(cluster_id, k8s_details, "service_accounts")
-        )
+        for resource, rows in flatten_cluster(cluster_data, provider).items():
+            all_rows[resource].extend(rows)
 
     # --- Save to CSV ---
-    def to_csv(data, filename):
-        if data:
-            df = pd.DataFrame(data)
-            filepath = os.path.join(output_dir, filename)
+    for resource in RESOURCE_FILES:
+        if all_rows[resource]:
+            df = pd.DataFrame(all_rows[resource])
+            filepath = os.path.join(
+                output_dir, f"{_resource_filename(resource, provider)}.csv"
+            )
             df.to_csv(filepath, index=False)
             logging.info(f"Successfully saved data to {filepath}")
 
-    provider_name_map = {"aws": "eks", "azure": "aks", "gke": "gke"}
-    cluster_csv_filename = f"{provider_name_map.get(provider, provider)}_clusters.csv"
-
-    to_csv(provider_clusters_list, cluster_csv_filename)
-    to_csv(nodepools_list, "nodepools.csv")
-    to_csv(nodes_list, "nodes.csv")
-    to_csv(workloads_list, "workloads.csv")
-    to_csv(pods_list, "pods.csv")
-    to_csv(services_list, "services.csv")
-    to_csv(ingresses_list, "ingresses.csv")
-    to_csv(pvcs_list, "persistent_volume_claims.csv")
-    to_csv(pvs_list, "persistent_volumes.csv")
-    to_csv(namespaces_list, "namespaces.csv")
-    to_csv(configmaps_list, "configmaps.csv")
-    to_csv(secrets_list, "secrets.csv")
-    to_csv(hpas_list, "hpas.csv")
-    to_csv(jobs_list, "jobs.csv")
-    to_csv(cronjobs_list, "cronjobs.csv")
-    to_csv(network_policies_list, "network_policies.csv")
-    to_csv(roles_list, "roles.csv")
-    to_csv(role_bindings_list, "role_bindings.csv")
-    to_csv(resource_quotas_list, "resource_quotas.csv")
-    to_csv(limit_ranges_list, "limit_ranges.csv")
-    to_csv(pdbs_list, "pod_disruption_budgets.csv")
-    to_csv(service_accounts_list, "service_accounts.csv")
+
+def _ndjson_to_csv(ndjson_path, csv_path):
+    """
+    Converts a file of JSON rows to CSV, reading it twice to gather the columns of all of
+    the rows first, so that only one row is held in memory at a time.
+    """
+    columns = {}
+    with open(ndjson_path) as f:
+        for line in f:
+            columns.update(dict.fromkeys(json.loads(line)))
+
+    with open(ndjson_path) as f, open(csv_path, "w", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=list(columns), lineterminator="\n")
+        writer.writeheader()
+        for line in f:
+            writer.writerow(json.loads(line))
+
+
+class DiscoveryWriter:
+    """
+    Writes the data of every cluster as soon as its discovery completes, so that memory
+    does not grow with the size of the fleet.
+
+    The clusters are appended to the JSON file and their flattened rows to one NDJSON file
+    per resource, next to the CSV files. The CSV files are written from the NDJSON files on
+    close(), once the columns of all of the rows are known, and the NDJSON files are then
+    deleted. write_cluster() can be called from several threads.
+    """
+
+    def __init__(self, output_dir, provider, json_filename):
+        self.output_dir = output_dir
+        self.provider = provider
+        self.json_filename = json_filename
+        self.cluster_count = 0
+        self._lock = threading.Lock()
+        self._json_file = None
+        self._ndjson_files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _path(self, filename):
+        return os.path.join(self.output_dir, filename)
+
+    def write_cluster(self, cluster_data):
+        """Appends the data of one cluster to the output files."""
+        rows = flatten_cluster(cluster_data, self.provider)
+        cluster_json = json.dumps(cluster_data, indent=4, default=str)
+
+        with self._lock:
+            self.cluster_count += 1
+            if not self.output_dir:
+                return
+
+            if self._json_file is None:
+                os.makedirs(self.output_dir, exist_ok=True)
+                self._json_file = open(self._path(self.json_filename), "w")
+                self._json_file.write("[\n")
+            else:
+                self._json_file.write(",\n")
+            # Indented as an item of the list, as json.dump of the whole list would
+            self._json_file.write(textwrap.indent(cluster_json, " " * 4))
+
+            for resource in RESOURCE_FILES:
+                if not rows[resource]:
+                    continue
+                if resource not in self._ndjson_files:
+                    filename = f"{_resource_filename(resource, self.provider)}.ndjson"
+                    self._ndjson_files[resource] = open(self._path(filename), "w")
+                ndjson_file = self._ndjson_files[resource]
+                for row in rows[resource]:
+                    ndjson_file.write(json.dumps(row, default=str) + "\n")
+
+    def close(self):
+        """Completes the JSON file and writes the CSV files."""
+        if self._json_file is not None:
+            self._json_file.write("\n]")
+            self._json_file.close()
+            self._json_file = None
+            logging.info(f"Successfully saved data to {self._path(self.json_filename)}")
+
+        for resource, ndjson_file in self._ndjson_files.items():
+            ndjson_file.close()
+            filename = _resource_filename(resource, self.provider)
+            csv_path = self._path(f"{filename}.csv")
+            ndjson_path = self._path(f"{filename}.ndjson")
+            try:
+                _ndjson_to_csv(ndjson_path, csv_path)
+                os.remove(ndjson_path)
+                logging.info(f"Successfully saved data to {csv_path}")
+            except IOError as e:
+                logging.error(f"Failed to save data to {csv_path}: {e}")
+        self._ndjson_files = {}
@@ -65,11 +65,17 @@ def _get_fargate_profiles(eks_client, cluster_name):
     return fargate_profiles
 
 
-def get_eks_data_for_region(session, region):
+def get_eks_data_for_region(session, region, list_options=None, on_cluster=None):
+    """
+    Fetches all EKS cluster data for a given region.
+    Every cluster is passed to on_cluster once discovered, by default appending it to the
+    returned list.
+    """
     logging.info("Scanning EKS clusters in region: %s", region)
     try:
         eks_client = session.client("eks", region_name=region)
         clusters_data = []
+        on_cluster = on_cluster or clusters_data.append
 
         # Paginate through all clusters in the region
         paginator = eks_client.get_paginator("list_clusters")
@@ -100,7 +106,9 @@ def get_eks_data_for_region(session, region):
 
                 # Only attempt to get Kubernetes details if the cluster is in an ACTIVE state.
                 if cluster_details.get("status") == "ACTIVE":
-                    kubernetes_details = get_k8s_details_for_eks(cluster_details)
+                    kubernetes_details = get_k8s_details_for_eks(
+                        cluster_details, list_options
+                    )
                 else:
                     status = cluster_details.get("status", "UNKNOWN")
                     logging.warning(
@@ -117,7 +125,7 @@ def get_eks_data_for_region(session, region):
                     "hosting_provider_details": cluster_details,
                     "kubernetes_details": kubernetes_details,
                 }
-                clusters_data.append(final_cluster_data)
+                on_cluster(final_cluster_data)
         return clusters_data
     except ClientError as e:
         # Handles regions where EKS might not be enabled or accessible.
@@ -127,12 +135,18 @@ def get_eks_data_for_region(session, region):
         return []
 
 
-def run_eks_discovery(session, regions_to_scan):
-    """Runs EKS discovery across multiple regions in parallel."""
+def run_eks_discovery(session, regions_to_scan, list_options=None, on_cluster=None):
+    """
+    Runs EKS discovery across multiple regions in parallel.
+    With on_cluster, the clusters are passed to it as they are discovered instead of being
+    returned.
+    """
     all_eks_data = []
     with ThreadPoolExecutor(max_workers=10) as executor:
         future_to_region = {
-            executor.submit(get_eks_data_for_region, session, region): region
+            executor.submit(
+                get_eks_data_for_region, session, region, list_options, on_cluster
+            ): region
             for region in regions_to_scan
         }
         for future in as_completed(future_to_region):
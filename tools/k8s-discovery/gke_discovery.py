@@ -58,10 +58,17 @@ def get_available_projects(credentials, organization_id):
         return []
 
 
-def get_gke_data_for_project(credentials, project_id):
-    """Fetches all GKE cluster data for a given project."""
+def get_gke_data_for_project(
+    credentials, project_id, list_options=None, on_cluster=None
+):
+    """
+    Fetches all GKE cluster data for a given project.
+    Every cluster is passed to on_cluster once discovered, by default appending it to the
+    returned list.
+    """
     logging.info("Scanning GKE clusters in project: %s", project_id)
     clusters_data = []
+    on_cluster = on_cluster or clusters_data.append
     try:
         # The parent path is 'projects/{project_id}/locations/-' to list clusters in all locations.
         parent = f"projects/{project_id}/locations/-"
@@ -98,7 +105,7 @@ def get_gke_data_for_project(credentials, project_id):
             # Other states (PROVISIONING, STOPPING, ERROR) will not have a connectable API endpoint.
             if cluster.status == container_v1.Cluster.Status.RUNNING:
                 kubernetes_details = get_k8s_details_for_gke_cluster(
-                    cluster_details, credentials
+                    cluster_details, credentials, list_options
                 )
             else:
                 logging.warning(
@@ -114,7 +121,7 @@ def get_gke_data_for_project(credentials, project_id):
                 "hosting_provider_details": cluster_details,
                 "kubernetes_details": kubernetes_details,
             }
-            clusters_data.append(final_cluster_data)
+            on_cluster(final_cluster_data)
 
         return clusters_data
     except google_exceptions.PermissionDenied as e:
@@ -134,12 +141,20 @@ def get_gke_data_for_project(credentials, project_id):
         return []
 
 
-def run_gke_discovery(credentials, projects_to_scan):
-    """Runs GKE discovery across multiple projects in parallel."""
+def run_gke_discovery(
+    credentials, projects_to_scan, list_options=None, on_cluster=None
+):
+    """
+    Runs GKE discovery across multiple projects in parallel.
+    With on_cluster, the clusters are passed to it as they are discovered instead of being
+    returned.
+    """
     all_gke_data = []
     with ThreadPoolExecutor(max_workers=10) as executor:
         future_to_project = {
-            executor.submit(get_gke_data_for_project, credentials, proj_id): proj_id
+            executor.submit(
+                get_gke_data_for_project, credentials, proj_id, list_options, on_cluster
+            ): proj_id
             for proj_id in projects_to_scan
         }
         for future in as_completed(future_to_project):
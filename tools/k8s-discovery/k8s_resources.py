@@ -4,7 +4,10 @@ import os
 import tempfile
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from dataclasses import dataclass
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 import google.auth
@@ -15,6 +18,61 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Large clusters hold 100k+ pods, so every kind is listed in pages of this many objects
+DEFAULT_PAGE_SIZE = 500
+# The number of resource kinds of a cluster listed at the same time
+DEFAULT_MAX_CONCURRENT_LISTS = 6
+
+
+@dataclass
+class ListOptions:
+    """How the resources of a cluster are listed."""
+
+    page_size: int = DEFAULT_PAGE_SIZE
+    max_concurrent_lists: int = DEFAULT_MAX_CONCURRENT_LISTS
+    # A snapshot_store.SnapshotStore to only report the objects changed since the last run
+    snapshot_store: object = None
+
+
+# The _ListTracker of the resource kind being fetched by the current thread, if any
+_list_tracking = threading.local()
+
+
+class _ListTracker:
+    """Records the resourceVersions of the objects listed while fetching a resource kind."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets the lists recorded so far, when their objects are not reported."""
+        self.resource_version = None
+        self.object_versions = {}
+        self.failed = False
+
+    def record(self, items, resource_version):
+        if self.resource_version is None:
+            self.resource_version = resource_version
+        for item in items:
+            if isinstance(item, dict):
+                metadata = item.get("metadata", {})
+                key = (metadata.get("namespace"), metadata.get("name"))
+                self.object_versions[key] = metadata.get("resourceVersion")
+            else:
+                key = (item.metadata.namespace, item.metadata.name)
+                self.object_versions[key] = item.metadata.resource_version
+
+
+@contextmanager
+def _untracked_lists():
+    """Stops tracking the lists made by the current thread whose objects are not reported."""
+    tracker = getattr(_list_tracking, "tracker", None)
+    _list_tracking.tracker = None
+    try:
+        yield
+    finally:
+        _list_tracking.tracker = tracker
+
 
 def parse_k8s_quantity(quantity_str):
     """
@@ -55,6 +113,45 @@ def parse_k8s_quantity(quantity_str):
     return value
 
 
+def _list_all_items(list_func, page_size, *args, raw=False, **kwargs):
+    """
+    Yields the objects of a Kubernetes list call, requesting them one page at a time.
+    With raw=True, the objects are the parsed JSON dicts instead of client models,
+    which skips the costly deserialization of fields that are not kept.
+    """
+    tracker = getattr(_list_tracking, "tracker", None)
+    _continue = None
+    while True:
+        try:
+            if raw:
+                response = list_func(
+                    *args,
+                    limit=page_size,
+                    _continue=_continue,
+                    _preload_content=False,
+                    **kwargs,
+                )
+                page = json.loads(response.data)
+                items = page.get("items") or []
+                _continue = page.get("metadata", {}).get("continue")
+                resource_version = page.get("metadata", {}).get("resourceVersion")
+            else:
+                page = list_func(*args, limit=page_size, _continue=_continue, **kwargs)
+                items = page.items
+                _continue = page.metadata._continue
+                resource_version = page.metadata.resource_version
+        except ApiException:
+            # The snapshot of a partial list would report the missing objects as deleted
+            if tracker:
+                tracker.failed = True
+            raise
+        if tracker:
+            tracker.record(items, resource_version)
+        yield from items
+        if not _continue:
+            return
+
+
 @contextmanager
 def _get_api_clients_from_kubeconfig_content(kubeconfig_content):
     """Creates Kubernetes API clients from kubeconfig content."""
@@ -172,11 +269,10 @@ def _get_api_clients_for_eks(cluster_details):
             os.remove(ca_cert_path)
 
 
-def get_node_details(api_client):
+def get_node_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     nodes = []
     try:
-        response = api_client.list_node()
-        for node in response.items:
+        for node in _list_all_items(api_client.list_node, page_size):
             mem_bytes = parse_k8s_quantity(node.status.allocatable.get("memory", "0"))
             mem_gib = round(mem_bytes / (1024**3), 2) if mem_bytes > 0 else 0
             nodes.append(
@@ -205,21 +301,24 @@ def get_node_details(api_client):
     return nodes
 
 
-def get_pod_details(api_client):
+def get_pod_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     pods = []
     try:
-        response = api_client.list_pod_for_all_namespaces()
-        for pod in response.items:
-            containers = pod.spec.containers
-            container_images = [c.image for c in containers]
+        for pod in _list_all_items(
+            api_client.list_pod_for_all_namespaces, page_size, raw=True
+        ):
+            metadata = pod.get("metadata", {})
+            spec = pod.get("spec", {})
+            status = pod.get("status", {})
+            container_images = [c.get("image", "") for c in spec.get("containers", [])]
             pods.append(
                 {
-                    "namespace": pod.metadata.namespace,
-                    "name": pod.metadata.name,
-                    "status": pod.status.phase,
-                    "pod_ip": pod.status.pod_ip,
-                    "node_name": pod.spec.node_name,
-                    "service_account": pod.spec.service_account_name,
+                    "namespace": metadata.get("namespace"),
+                    "name": metadata.get("name"),
+                    "status": status.get("phase"),
+                    "pod_ip": status.get("podIP"),
+                    "node_name": spec.get("nodeName"),
+                    "service_account": spec.get("serviceAccountName"),
                     "container_images": ", ".join(container_images),
                 }
             )
@@ -228,11 +327,12 @@ def get_pod_details(api_client):
     return pods
 
 
-def get_deployment_details(api_client):
+def get_deployment_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     deployments = []
     try:
-        response = api_client.list_deployment_for_all_namespaces()
-        for deployment in response.items:
+        for deployment in _list_all_items(
+            api_client.list_deployment_for_all_namespaces, page_size
+        ):
             containers = deployment.spec.template.spec.containers
             container_images = [c.image for c in containers]
             mounts = []
@@ -267,11 +367,12 @@ def get_deployment_details(api_client):
     return deployments
 
 
-def get_service_details(api_client):
+def get_service_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     services = []
     try:
-        response = api_client.list_service_for_all_namespaces()
-        for service in response.items:
+        for service in _list_all_items(
+            api_client.list_service_for_all_namespaces, page_size
+        ):
             ports = (
                 [f"{p.name}:{p.port}/{p.protocol}" for p in service.spec.ports]
                 if service.spec.ports
@@ -297,11 +398,12 @@ def get_service_details(api_client):
     return services
 
 
-def get_statefulset_details(api_client):
+def get_statefulset_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     statefulsets = []
     try:
-        response = api_client.list_stateful_set_for_all_namespaces()
-        for ss in response.items:
+        for ss in _list_all_items(
+            api_client.list_stateful_set_for_all_namespaces, page_size
+        ):
             containers = ss.spec.template.spec.containers
             container_images = [c.image for c in containers]
             volume_templates = (
@@ -340,11 +442,12 @@ def get_statefulset_details(api_client):
     return statefulsets
 
 
-def get_daemonset_details(api_client):
+def get_daemonset_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     daemonsets = []
     try:
-        response = api_client.list_daemon_set_for_all_namespaces()
-        for ds in response.items:
+        for ds in _list_all_items(
+            api_client.list_daemon_set_for_all_namespaces, page_size
+        ):
             containers = ds.spec.template.spec.containers
             container_images = [c.image for c in containers]
             resources = []
@@ -382,11 +485,10 @@ def get_daemonset_details(api_client):
     return daemonsets
 
 
-def get_job_details(api_client):
+def get_job_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     jobs = []
     try:
-        response = api_client.list_job_for_all_namespaces()
-        for job in response.items:
+        for job in _list_all_items(api_client.list_job_for_all_namespaces, page_size):
             containers = job.spec.template.spec.containers
             container_images = [c.image for c in containers]
             jobs.append(
@@ -405,11 +507,12 @@ def get_job_details(api_client):
     return jobs
 
 
-def get_cronjob_details(api_client):
+def get_cronjob_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     cronjobs = []
     try:
-        response = api_client.list_cron_job_for_all_namespaces()
-        for cj in response.items:
+        for cj in _list_all_items(
+            api_client.list_cron_job_for_all_namespaces, page_size
+        ):
             containers = cj.spec.job_template.spec.template.spec.containers
             container_images = [c.image for c in containers]
             cronjobs.append(
@@ -430,11 +533,10 @@ def get_cronjob_details(api_client):
     return cronjobs
 
 
-def get_pv_details(api_client):
+def get_pv_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     pvs = []
     try:
-        response = api_client.list_persistent_volume()
-        for pv in response.items:
+        for pv in _list_all_items(api_client.list_persistent_volume, page_size):
             pvs.append(
                 {
                     "name": pv.metadata.name,
@@ -458,12 +560,11 @@ def get_pv_details(api_client):
     return pvs
 
 
-def get_namespace_details(api_client):
+def get_namespace_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all Namespace objects."""
     namespaces = []
     try:
-        response = api_client.list_namespace()
-        for ns in response.items:
+        for ns in _list_all_items(api_client.list_namespace, page_size):
             labels = json.dumps(ns.metadata.labels) if ns.metadata.labels else "{}"
             namespaces.append(
                 {
@@ -478,18 +579,21 @@ def get_namespace_details(api_client):
     return namespaces
 
 
-def get_secret_details(api_client):
+def get_secret_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches metadata for all Secret objects."""
     secrets = []
     try:
-        response = api_client.list_secret_for_all_namespaces()
-        for secret in response.items:
+        for secret in _list_all_items(
+            api_client.list_secret_for_all_namespaces, page_size, raw=True
+        ):
+            metadata = secret.get("metadata", {})
+            data = secret.get("data")
             secrets.append(
                 {
-                    "namespace": secret.metadata.namespace,
-                    "name": secret.metadata.name,
-                    "type": secret.type,
-                    "data_keys": ", ".join(secret.data.keys()) if secret.data else "",
+                    "namespace": metadata.get("namespace"),
+                    "name": metadata.get("name"),
+                    "type": secret.get("type"),
+                    "data_keys": ", ".join(data.keys()) if data else "",
                 }
             )
     except ApiException as e:
@@ -497,21 +601,24 @@ def get_secret_details(api_client):
     return secrets
 
 
-def get_configmap_details(api_client):
+def get_configmap_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches metadata for all ConfigMap objects."""
     configmaps = []
     try:
-        response = api_client.list_config_map_for_all_namespaces()
-        for cm in response.items:
+        for cm in _list_all_items(
+            api_client.list_config_map_for_all_namespaces, page_size, raw=True
+        ):
+            metadata = cm.get("metadata", {})
+            data = cm.get("data")
             data_count = 0
             data_size_bytes = 0
             data_summary = ""
-            if cm.data:
-                data_count = len(cm.data)
+            if data:
+                data_count = len(data)
                 data_size_bytes = sum(
-                    len(str(v).encode("utf-8")) for v in cm.data.values()
+                    len(str(v).encode("utf-8")) for v in data.values()
                 )
-                keys = list(cm.data.keys())
+                keys = list(data.keys())
                 summary_keys = keys[:3]
                 data_summary = ", ".join(summary_keys)
                 if len(keys) > 3:
@@ -519,12 +626,12 @@ def get_configmap_details(api_client):
 
             configmaps.append(
                 {
-                    "namespace": cm.metadata.namespace,
-                    "name": cm.metadata.name,
+                    "namespace": metadata.get("namespace"),
+                    "name": metadata.get("name"),
                     "data_count": data_count,
                     "data_size_bytes": data_size_bytes,
                     "data_summary": data_summary,
-                    "data_keys": ", ".join(cm.data.keys()) if cm.data else "",
+                    "data_keys": ", ".join(data.keys()) if data else "",
                 }
             )
     except ApiException as e:
@@ -532,12 +639,13 @@ def get_configmap_details(api_client):
     return configmaps
 
 
-def get_pvc_details(api_client):
+def get_pvc_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all PersistentVolumeClaim objects."""
     pvcs = []
     try:
-        response = api_client.list_persistent_volume_claim_for_all_namespaces()
-        for pvc in response.items:
+        for pvc in _list_all_items(
+            api_client.list_persistent_volume_claim_for_all_namespaces, page_size
+        ):
             pvcs.append(
                 {
                     "namespace": pvc.metadata.namespace,
@@ -563,12 +671,13 @@ def get_pvc_details(api_client):
     return pvcs
 
 
-def get_ingress_details(api_client):
+def get_ingress_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all Ingress objects."""
     ingresses = []
     try:
-        response = api_client.list_ingress_for_all_namespaces()
-        for ingress in response.items:
+        for ingress in _list_all_items(
+            api_client.list_ingress_for_all_namespaces, page_size
+        ):
             hosts = (
                 [rule.host for rule in ingress.spec.rules if rule.host]
                 if ingress.spec.rules
@@ -605,12 +714,13 @@ def get_ingress_details(api_client):
     return ingresses
 
 
-def get_networkpolicy_details(api_client):
+def get_networkpolicy_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all NetworkPolicy objects."""
     netpols = []
     try:
-        response = api_client.list_network_policy_for_all_namespaces()
-        for np in response.items:
+        for np in _list_all_items(
+            api_client.list_network_policy_for_all_namespaces, page_size
+        ):
             ingress_rules = (
                 json.dumps(
                     api_client.api_client.sanitize_for_serialization(np.spec.ingress)
@@ -646,12 +756,13 @@ def get_networkpolicy_details(api_client):
     return netpols
 
 
-def get_hpa_details(api_client):
+def get_hpa_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all HorizontalPodAutoscaler objects."""
     hpas = []
     try:
-        response = api_client.list_horizontal_pod_autoscaler_for_all_namespaces()
-        for hpa in response.items:
+        for hpa in _list_all_items(
+            api_client.list_horizontal_pod_autoscaler_for_all_namespaces, page_size
+        ):
             metrics = (
                 json.dumps(
                     api_client.api_client.sanitize_for_serialization(hpa.spec.metrics)
@@ -676,12 +787,11 @@ def get_hpa_details(api_client):
     return hpas
 
 
-def get_role_details(api_client):
+def get_role_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all Role objects."""
     roles = []
     try:
-        response = api_client.list_role_for_all_namespaces()
-        for role in response.items:
+        for role in _list_all_items(api_client.list_role_for_all_namespaces, page_size):
             rules_summary = (
                 [
                     f"[{','.join(rule.api_groups)}][{','.join(rule.resources)}][{','.join(rule.verbs)}]"
@@ -708,12 +818,13 @@ def get_role_details(api_client):
     return roles
 
 
-def get_rolebinding_details(api_client):
+def get_rolebinding_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all RoleBinding objects."""
     bindings = []
     try:
-        response = api_client.list_role_binding_for_all_namespaces()
-        for rb in response.items:
+        for rb in _list_all_items(
+            api_client.list_role_binding_for_all_namespaces, page_size
+        ):
             subjects = (
                 [f"{s.kind}:{s.name}" for s in rb.subjects] if rb.subjects else []
             )
@@ -730,12 +841,13 @@ def get_rolebinding_details(api_client):
     return bindings
 
 
-def get_resourcequota_details(api_client):
+def get_resourcequota_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all ResourceQuota objects."""
     quotas = []
     try:
-        response = api_client.list_resource_quota_for_all_namespaces()
-        for quota in response.items:
+        for quota in _list_all_items(
+            api_client.list_resource_quota_for_all_namespaces, page_size
+        ):
             quotas.append(
                 {
                     "namespace": quota.metadata.namespace,
@@ -753,12 +865,13 @@ def get_resourcequota_details(api_client):
     return quotas
 
 
-def get_limitrange_details(api_client):
+def get_limitrange_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """Fetches details for all LimitRange objects."""
     ranges = []
     try:
-        response = api_client.list_limit_range_for_all_namespaces()
-        for lr in response.items:
+        for lr in _list_all_items(
+            api_client.list_limit_range_for_all_namespaces, page_size
+        ):
             if not lr.spec.limits:
                 continue
             for item in lr.spec.limits:
@@ -794,7 +907,7 @@ def get_limitrange_details(api_client):
     return ranges
 
 
-def get_pdb_details(policy_v1_api, core_v1_api):
+def get_pdb_details(policy_v1_api, core_v1_api, page_size=DEFAULT_PAGE_SIZE):
     """
     Fetches details for all PodDisruptionBudget objects.
     It attempts a cluster-wide query first and falls back to per-namespace
@@ -804,7 +917,11 @@ def get_pdb_details(policy_v1_api, core_v1_api):
     items = []
     try:
         # First, try the more efficient cluster-wide call
-        items = policy_v1_api.list_pod_disruption_budget_for_all_namespaces().items
+        items = list(
+            _list_all_items(
+                policy_v1_api.list_pod_disruption_budget_for_all_namespaces, page_size
+            )
+        )
     except ApiException as e:
         if e.status not in [401, 403]:
             logging.error("Error fetching PDBs: %s", e)
@@ -817,20 +934,32 @@ def get_pdb_details(policy_v1_api, core_v1_api):
             "This may be slower and some resources may be missed if namespace access is restricted.",
             e.reason,
         )
+        # Only the per-namespace lists make up the reported PDBs
+        tracker = getattr(_list_tracking, "tracker", None)
+        if tracker:
+            tracker.reset()
         try:
-            namespaces = core_v1_api.list_namespace().items
+            with _untracked_lists():
+                namespaces = list(
+                    _list_all_items(core_v1_api.list_namespace, page_size)
+                )
         except ApiException as ns_list_e:
             logging.error(
                 "Could not list namespaces to fall back for PDBs: %s", ns_list_e
             )
+            if tracker:
+                tracker.failed = True
             return []
 
         for ns in namespaces:
             try:
-                namespace_pdbs = policy_v1_api.list_namespaced_pod_disruption_budget(
-                    ns.metadata.name
+                items.extend(
+                    _list_all_items(
+                        policy_v1_api.list_namespaced_pod_disruption_budget,
+                        page_size,
+                        ns.metadata.name,
+                    )
                 )
-                items.extend(namespace_pdbs.items)
             except ApiException as ns_e:
                 if ns_e.status in [401, 403]:
                     logging.warning(
@@ -862,14 +991,15 @@ def get_pdb_details(policy_v1_api, core_v1_api):
     return pdbs
 
 
-def get_serviceaccount_details(api_client):
+def get_serviceaccount_details(api_client, page_size=DEFAULT_PAGE_SIZE):
     """
     Fetches details for all ServiceAccount objects.
     """
     service_accounts = []
     try:
-        response = api_client.list_service_account_for_all_namespaces()
-        for sa in response.items:
+        for sa in _list_all_items(
+            api_client.list_service_account_for_all_namespaces, page_size
+        ):
             service_accounts.append(
                 {
                     "namespace": sa.metadata.namespace,
@@ -884,39 +1014,97 @@ def get_serviceaccount_details(api_client):
 
 
 def get_kubernetes_resources(
-    core_v1, apps_v1, batch_v1, networking_v1, autoscaling_v2, rbac_v1, policy_v1
+    core_v1,
+    apps_v1,
+    batch_v1,
+    networking_v1,
+    autoscaling_v2,
+    rbac_v1,
+    policy_v1,
+    list_options=None,
+    cluster_key=None,
 ):
-    """Fetches various resources from a Kubernetes cluster."""
-    logging.info("  - Fetching Kubernetes resource details...")
-    all_resources = {
-        "nodes": get_node_details(core_v1),
-        "pods": get_pod_details(core_v1),
-        "deployments": get_deployment_details(apps_v1),
-        "services": get_service_details(core_v1),
-        "statefulsets": get_statefulset_details(apps_v1),
-        "daemonsets": get_daemonset_details(apps_v1),
-        "jobs": get_job_details(batch_v1),
-        "cronjobs": get_cronjob_details(batch_v1),
-        "persistent_volumes": get_pv_details(core_v1),
-        "namespaces": get_namespace_details(core_v1),
-        "secrets": get_secret_details(core_v1),
-        "configmaps": get_configmap_details(core_v1),
-        "persistent_volume_claims": get_pvc_details(core_v1),
-        "ingresses": get_ingress_details(networking_v1),
-        "network_policies": get_networkpolicy_details(networking_v1),
-        "hpas": get_hpa_details(autoscaling_v2),
-        "roles": get_role_details(rbac_v1),
-        "role_bindings": get_rolebinding_details(rbac_v1),
-        "resource_quotas": get_resourcequota_details(core_v1),
-        "limit_ranges": get_limitrange_details(core_v1),
-        "pod_disruption_budgets": get_pdb_details(policy_v1, core_v1),
-        "service_accounts": get_serviceaccount_details(core_v1),
+    """
+    Fetches various resources from a Kubernetes cluster.
+    The resource kinds are listed concurrently, by at most list_options.max_concurrent_lists
+    requests at a time. With a list_options.snapshot_store, only the objects added, modified
+    or deleted since the last snapshot of the cluster identified by cluster_key are returned.
+    """
+    list_options = list_options or ListOptions()
+    page_size = list_options.page_size
+    fetches = {
+        "nodes": (get_node_details, core_v1),
+        "pods": (get_pod_details, core_v1),
+        "deployments": (get_deployment_details, apps_v1),
+        "services": (get_service_details, core_v1),
+        "statefulsets": (get_statefulset_details, apps_v1),
+        "daemonsets": (get_daemonset_details, apps_v1),
+        "jobs": (get_job_details, batch_v1),
+        "cronjobs": (get_cronjob_details, batch_v1),
+        "persistent_volumes": (get_pv_details, core_v1),
+        "namespaces": (get_namespace_details, core_v1),
+        "secrets": (get_secret_details, core_v1),
+        "configmaps": (get_configmap_details, core_v1),
+        "persistent_volume_claims": (get_pvc_details, core_v1),
+        "ingresses": (get_ingress_details, networking_v1),
+        "network_policies": (get_networkpolicy_details, networking_v1),
+        "hpas": (get_hpa_details, autoscaling_v2),
+        "roles": (get_role_details, rbac_v1),
+        "role_bindings": (get_rolebinding_details, rbac_v1),
+        "resource_quotas": (get_resourcequota_details, core_v1),
+        "limit_ranges": (get_limitrange_details, core_v1),
+        "pod_disruption_budgets": (get_pdb_details, policy_v1, core_v1),
+        "service_accounts": (get_serviceaccount_details, core_v1),
     }
+
+    logging.info("  - Fetching Kubernetes resource details...")
+    snapshot_store = list_options.snapshot_store if cluster_key else None
+    with ThreadPoolExecutor(max_workers=list_options.max_concurrent_lists) as executor:
+        futures = {
+            key: executor.submit(
+                _fetch_resource_kind, fetch, page_size, snapshot_store is not None
+            )
+            for key, fetch in fetches.items()
+        }
+        results = {key: future.result() for key, future in futures.items()}
+
+    if not snapshot_store:
+        return {key: rows for key, (rows, _) in results.items()}
+
+    all_resources = {}
+    for key, (rows, tracker) in results.items():
+        if tracker.failed:
+            logging.warning(
+                "  - Could not list all %s, keeping their last snapshot until the next run",
+                key,
+            )
+            all_resources[key] = []
+            continue
+        all_resources[key] = snapshot_store.diff(
+            cluster_key, key, rows, tracker.object_versions, tracker.resource_version
+        )
     return all_resources
 
 
-def get_k8s_details_for_eks(cluster_details):
+def _fetch_resource_kind(fetch, page_size, track_versions):
+    """
+    Runs one of the get_*_details functions, tracking the versions of the objects it lists
+    if track_versions is set. Returns its rows and the _ListTracker, if any.
+    """
+    if not track_versions:
+        return fetch[0](*fetch[1:], page_size=page_size), None
+
+    tracker = _ListTracker()
+    _list_tracking.tracker = tracker
+    try:
+        return fetch[0](*fetch[1:], page_size=page_size), tracker
+    finally:
+        _list_tracking.tracker = None
+
+
+def get_k8s_details_for_eks(cluster_details, list_options=None):
     """Get Kubernetes details for an EKS cluster."""
+    cluster_key = cluster_details.get("arn") or cluster_details["name"]
     logging.info(
         "  - Getting Kubernetes resource details for EKS cluster '%s'",
         cluster_details["name"],
@@ -939,6 +1127,8 @@ def get_k8s_details_for_eks(cluster_details):
                 autoscaling_v2,
                 rbac_v1,
                 policy_v1,
+                list_options,
+                cluster_key,
             )
     except Exception as e:
         logging.error(
@@ -949,8 +1139,11 @@ def get_k8s_details_for_eks(cluster_details):
         return {"error": f"Could not connect to Kubernetes API: {e}"}
 
 
-def get_k8s_details_for_aks(aks_client, resource_group, cluster_name):
-    """Get Kubernetes details for an AKS cluster."""
+def get_k8s_details_for_aks(
+    aks_client, resource_group, cluster_name, list_options=None, cluster_id=None
+):
+    """Get Kubernetes details for an AKS cluster, whose Azure resource ID is cluster_id."""
+    cluster_key = cluster_id or f"{resource_group}/{cluster_name}"
     logging.info(
         "  - Getting Kubernetes resource details for AKS cluster '%s'", cluster_name
     )
@@ -979,6 +1172,8 @@ def get_k8s_details_for_aks(aks_client, resource_group, cluster_name):
                 autoscaling_v2,
                 rbac_v1,
                 policy_v1,
+                list_options,
+                cluster_key,
             )
     except Exception as e:
         logging.error(
@@ -989,9 +1184,13 @@ def get_k8s_details_for_aks(aks_client, resource_group, cluster_name):
         return {"error": f"Could not connect to Kubernetes API: {e}"}
 
 
-def get_k8s_details_for_gke_cluster(cluster_details, credentials):
+def get_k8s_details_for_gke_cluster(cluster_details, credentials, list_options=None):
     """Get Kubernetes details for a specific GKE cluster."""
     cluster_name = cluster_details["name"]
+    cluster_key = (
+        f"projects/{cluster_details.get('projectId')}/locations/"
+        f"{cluster_details.get('location')}/clusters/{cluster_name}"
+    )
     logging.info(
         "  - Getting Kubernetes resource details for GKE cluster '%s'", cluster_name
     )
@@ -1013,6 +1212,8 @@ def get_k8s_details_for_gke_cluster(cluster_details, credentials):
                 autoscaling_v2,
                 rbac_v1,
                 policy_v1,
+                list_options,
+                cluster_key,
             )
     except Exception as e:
         logging.error(
@@ -3,9 +3,10 @@ import eks_discovery
 import aks_discovery
 import gke_discovery
 import common
+import k8s_resources
+import snapshot_store
 import boto3
 import logging
-import os
 import google.auth
 from azure.identity import DefaultAzureCredential
 
@@ -16,6 +17,11 @@ logging.basicConfig(
 )
 
 
+def _get_list_options(page_size, max_concurrent_lists, snapshot_db):
+    store = snapshot_store.SnapshotStore(snapshot_db) if snapshot_db else None
+    return k8s_resources.ListOptions(page_size, max_concurrent_lists, store)
+
+
 @app.command()
 def aws(
     regions: list[str] = typer.Option(
@@ -26,6 +32,20 @@ def aws(
     output_dir: str = typer.Option(
         "./discovery_output", help="The directory to save the output CSV files."
     ),
+    page_size: int = typer.Option(
+        k8s_resources.DEFAULT_PAGE_SIZE,
+        min=1,
+        help="The number of Kubernetes objects requested per page when listing a resource kind.",
+    ),
+    max_concurrent_lists: int = typer.Option(
+        k8s_resources.DEFAULT_MAX_CONCURRENT_LISTS,
+        min=1,
+        help="The number of resource kinds of a cluster listed at the same time.",
+    ),
+    snapshot_db: str = typer.Option(
+        None,
+        help="A local SQLite file of the last snapshot of every cluster. If set, only the Kubernetes objects added, modified or deleted since the last run with the same file are saved.",
+    ),
 ):
     """
     Discover EKS clusters in specific or all AWS regions with detailed information.
@@ -34,16 +54,21 @@ def aws(
     regions_to_scan = regions or eks_discovery.get_available_regions(session, "eks")
     logging.info("Starting EKS discovery for regions: %s", regions_to_scan)
 
-    all_eks_data = eks_discovery.run_eks_discovery(session, regions_to_scan)
+    list_options = _get_list_options(page_size, max_concurrent_lists, snapshot_db)
+    # Every cluster is written out as soon as it is discovered
+    with common.DiscoveryWriter(output_dir, "aws", "eks_data.json") as writer:
+        eks_discovery.run_eks_discovery(
+            session, regions_to_scan, list_options, writer.write_cluster
+        )
+    if list_options.snapshot_store:
+        # Only once the output is written, as the next run reports changes since then
+        list_options.snapshot_store.commit()
+        list_options.snapshot_store.close()
 
-    if all_eks_data:
+    if writer.cluster_count:
         logging.info(
-            f"Found a total of {len(all_eks_data)} EKS clusters across all scanned regions."
+            f"Found a total of {writer.cluster_count} EKS clusters across all scanned regions."
         )
-        if output_dir:
-            json_filepath = os.path.join(output_dir, "eks_data.json")
-            common.save_to_json(all_eks_data, json_filepath)
-            common.save_to_csvs(all_eks_data, output_dir, "aws")
     else:
         logging.info("No EKS data found across scanned regions.")
 
@@ -58,6 +83,20 @@ def azure(
     output_dir: str = typer.Option(
         "./discovery_output", help="The directory to save the output CSV files."
     ),
+    page_size: int = typer.Option(
+        k8s_resources.DEFAULT_PAGE_SIZE,
+        min=1,
+        help="The number of Kubernetes objects requested per page when listing a resource kind.",
+    ),
+    max_concurrent_lists: int = typer.Option(
+        k8s_resources.DEFAULT_MAX_CONCURRENT_LISTS,
+        min=1,
+        help="The number of resource kinds of a cluster listed at the same time.",
+    ),
+    snapshot_db: str = typer.Option(
+        None,
+        help="A local SQLite file of the last snapshot of every cluster. If set, only the Kubernetes objects added, modified or deleted since the last run with the same file are saved.",
+    ),
 ):
     """
     Discover AKS clusters in specific or all Azure subscriptions with detailed information.
@@ -82,16 +121,21 @@ def azure(
 
     logging.info("Starting AKS discovery for subscriptions: %s", subscriptions_to_scan)
 
-    all_aks_data = aks_discovery.run_aks_discovery(credential, subscriptions_to_scan)
+    list_options = _get_list_options(page_size, max_concurrent_lists, snapshot_db)
+    # Every cluster is written out as soon as it is discovered
+    with common.DiscoveryWriter(output_dir, "azure", "aks_data.json") as writer:
+        aks_discovery.run_aks_discovery(
+            credential, subscriptions_to_scan, list_options, writer.write_cluster
+        )
+    if list_options.snapshot_store:
+        # Only once the output is written, as the next run reports changes since then
+        list_options.snapshot_store.commit()
+        list_options.snapshot_store.close()
 
-    if all_aks_data:
+    if writer.cluster_count:
         logging.info(
-            f"Found a total of {len(all_aks_data)} AKS clusters across all scanned subscriptions."
+            f"Found a total of {writer.cluster_count} AKS clusters across all scanned subscriptions."
         )
-        if output_dir:
-            json_filepath = os.path.join(output_dir, "aks_data.json")
-            common.save_to_json(all_aks_data, json_filepath)
-            common.save_to_csvs(all_aks_data, output_dir, "azure")
     else:
         logging.info("No AKS data found across scanned subscriptions.")
 
@@ -111,6 +155,20 @@ def gke(
     output_dir: str = typer.Option(
         "./discovery_output", help="The directory to save the output CSV files."
     ),
+    page_size: int = typer.Option(
+        k8s_resources.DEFAULT_PAGE_SIZE,
+        min=1,
+        help="The number of Kubernetes objects requested per page when listing a resource kind.",
+    ),
+    max_concurrent_lists: int = typer.Option(
+        k8s_resources.DEFAULT_MAX_CONCURRENT_LISTS,
+        min=1,
+        help="The number of resource kinds of a cluster listed at the same time.",
+    ),
+    snapshot_db: str = typer.Option(
+        None,
+        help="A local SQLite file of the last snapshot of every cluster. If set, only the Kubernetes objects added, modified or deleted since the last run with the same file are saved.",
+    ),
 ):
     """
     Discover GKE clusters in specific or all accessible GCP projects.
@@ -142,16 +200,21 @@ def gke(
 
     logging.info("Starting GKE discovery for projects: %s", projects_to_scan)
 
-    all_gke_data = gke_discovery.run_gke_discovery(credentials, projects_to_scan)
+    list_options = _get_list_options(page_size, max_concurrent_lists, snapshot_db)
+    # Every cluster is written out as soon as it is discovered
+    with common.DiscoveryWriter(output_dir, "gke", "gke_data.json") as writer:
+        gke_discovery.run_gke_discovery(
+            credentials, projects_to_scan, list_options, writer.write_cluster
+        )
+    if list_options.snapshot_store:
+        # Only once the output is written, as the next run reports changes since then
+        list_options.snapshot_store.commit()
+        list_options.snapshot_store.close()
 
-    if all_gke_data:
+    if writer.cluster_count:
         logging.info(
-            f"Found a total of {len(all_gke_data)} GKE clusters across all scanned projects."
+            f"Found a total of {writer.cluster_count} GKE clusters across all scanned projects."
         )
-        if output_dir:
-            json_filepath = os.path.join(output_dir, "gke_data.json")
-            common.save_to_json(all_gke_data, json_filepath)
-            common.save_to_csvs(all_gke_data, output_dir, "gke")
     else:
         logging.info("No GKE data found across scanned projects.")
 
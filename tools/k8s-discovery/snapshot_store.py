@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+def _object_key(row):
+    return json.dumps([row.get("namespace"), row.get("name")])
+
+
+def _rows_hash(rows):
+    return hashlib.sha1(
+        json.dumps(rows, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class SnapshotStore:
+    """
+    A local SQLite file recording, for every cluster and resource kind, the resourceVersion
+    of the last list and of every object listed, so that a discovery run only reports the
+    objects added, modified or deleted since the previous one.
+    The store can be used by several threads. The new snapshots are only saved by
+    commit(), once the changes they report have been written out.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # The (cluster_key, kind, object versions, list resourceVersion, time) of the
+        # snapshots taken by diff and not yet committed
+        self._pending_snapshots = []
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    cluster_key TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    resource_version TEXT,
+                    taken_at TEXT NOT NULL,
+                    PRIMARY KEY (cluster_key, kind)
+                )
+                """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    cluster_key TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    resource_version TEXT NOT NULL,
+                    PRIMARY KEY (cluster_key, kind, object_key)
+                )
+                """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def commit(self):
+        """Saves the snapshots taken by diff since the last commit."""
+        with self._lock, self._connection:
+            for (
+                cluster_key,
+                kind,
+                versions,
+                list_resource_version,
+                taken_at,
+            ) in self._pending_snapshots:
+                self._connection.execute(
+                    "DELETE FROM objects WHERE cluster_key = ? AND kind = ?",
+                    (cluster_key, kind),
+                )
+                self._connection.executemany(
+                    "INSERT INTO objects VALUES (?, ?, ?, ?)",
+                    [
+                        (cluster_key, kind, key, version)
+                        for key, version in versions.items()
+                    ],
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                    (cluster_key, kind, list_resource_version, taken_at),
+                )
+            self._pending_snapshots = []
+
+    def diff(self, cluster_key, kind, rows, object_versions, list_resource_version):
+        """
+        Compares the rows of a complete list of a resource kind with the last snapshot of
+        the cluster. The snapshot is replaced with them on the next commit().
+
+        Args:
+            cluster_key: A key unique to the cluster, e.g. its ARN or resource ID
+            kind: The name of the resource kind, e.g. "pods"
+            rows: The rows of the objects, identified by their namespace and name. An object
+                can have several rows, e.g. one per limit of a LimitRange.
+            object_versions: The resourceVersion of every listed object, keyed by
+                (namespace, name). Objects missing from it are compared by their rows.
+            list_resource_version: The resourceVersion of the list
+
+        Returns:
+            The rows of the added and modified objects, along with a row for every deleted
+            object, each with a "change" field.
+        """
+        rows_by_object = {}
+        for row in rows:
+            rows_by_object.setdefault(_object_key(row), []).append(row)
+
+        versions = {}
+        for key, object_rows in rows_by_object.items():
+            namespace, name = json.loads(key)
+            versions[key] = object_versions.get((namespace, name)) or _rows_hash(
+                object_rows
+            )
+
+        with self._lock:
+            previous_versions = dict(
+                self._connection.execute(
+                    "SELECT object_key, resource_version FROM objects"
+                    " WHERE cluster_key = ? AND kind = ?",
+                    (cluster_key, kind),
+                )
+            )
+            self._pending_snapshots.append(
+                (
+                    cluster_key,
+                    kind,
+                    versions,
+                    list_resource_version,
+                    datetime.now(timezone.utc).isoformat(),
+                )
+            )
+
+        changes = []
+        for key, object_rows in rows_by_object.items():
+            if key not in previous_versions:
+                change = ADDED
+            elif previous_versions[key] != versions[key]:
+                change = MODIFIED
+            else:
+                continue
+            changes.extend(dict(row, change=change) for row in object_rows)
+
+        for key in previous_versions:
+            if key not in versions:
+                namespace, name = json.loads(key)
+                deleted_row = {"namespace": namespace} if namespace is not None else {}
+                deleted_row.update(name=name, change=DELETED)
+                changes.append(deleted_row)
+
+        logging.info(
+            "  - %s: %d of %d objects added or modified, %d deleted since the last snapshot",
+            kind,
+            len({_object_key(row) for row in changes if row["change"] != DELETED}),
+            len(rows_by_object),
+            len([row for row in changes if row["change"] == DELETED]),
+        )
+        return changes
@@ -19,7 +19,8 @@ JOB = [
     bigquery.SchemaField("prefix", "STRING", mode="REQUIRED"),
     bigquery.SchemaField("status", "STRING", mode="REQUIRED"),
     bigquery.SchemaField("job_name", "STRING", mode="NULLABLE"),
-    bigquery.SchemaField("last_updated", "TIMESTAMP", mode="REQUIRED")
+    bigquery.SchemaField("last_updated", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("transfer_job_name", "STRING", mode="NULLABLE")
 ]
 
 JOB_HISTORY = [
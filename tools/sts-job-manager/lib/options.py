@@ -93,7 +93,10 @@ class STSJobManagerOptions():
                  destination_bucket='migration-destination',
                  job_interval=1200,
                  metrics_interval=300,
+                 full_scan_interval=86400,
                  max_concurrent_jobs=20,
+                 adaptive_concurrency=False,
+                 max_error_rate=0.01,
                  overwrite_dest_objects=False,
                  sleep_timeout=60, no_retry_on_job_error=False,
                  allow_new_jobs_when_stalled=False,
@@ -105,7 +108,10 @@ class STSJobManagerOptions():
         self.destination_bucket = destination_bucket
         self.job_interval = job_interval
         self.metrics_interval = metrics_interval
+        self.full_scan_interval = full_scan_interval
         self.max_concurrent_jobs = max_concurrent_jobs
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_error_rate = max_error_rate
         self.overwrite_dest_objects = overwrite_dest_objects
         self.sleep_timeout = sleep_timeout
         self.no_retry_on_job_error = no_retry_on_job_error
@@ -146,11 +152,35 @@ class STSJobManagerOptions():
                                 metrics. This should be >= \
                                 `--sleep-timeout`. (default: %(default)s) \
                                 (unit: seconds)')
+        parser.add_argument('--full-scan-interval', type=int, metavar='N',
+                            default=self.full_scan_interval,
+                            help='Determines how often all of the transfer \
+                                operations of the project are listed, to find \
+                                the ones of jobs not created by this tool. \
+                                Otherwise only the operations of the jobs \
+                                created by this tool for unfinished prefixes \
+                                are listed. 0 disables the full scans after \
+                                the first one. (default: %(default)s) \
+                                (unit: seconds)')
         parser.add_argument('--max-concurrent-jobs',
                             type=_int_below_or_equal_to_fifty, metavar='N',
                             default=self.max_concurrent_jobs,
                             help='The max number of jobs allowed to run \
                                 concurrently (default: %(default)s)')
+        parser.add_argument('--adaptive-concurrency',
+                            default=self.adaptive_concurrency,
+                            help='Adapts the number of jobs running \
+                                concurrently to the throughput of the \
+                                transfer, up to `--max-concurrent-jobs`. \
+                                Jobs keep being added while the bytes copied \
+                                per second grow, and half as many run after \
+                                failures or throttling. (default: \
+                                %(default)s)', action='store_true')
+        parser.add_argument('--max-error-rate', type=float, metavar='RATE',
+                            default=self.max_error_rate,
+                            help='The ratio of objects failing to be copied \
+                                above which `--adaptive-concurrency` runs \
+                                fewer jobs. (default: %(default)s)')
         parser.add_argument('--no-retry-on-job-error',
                             default=self.no_retry_on_job_error,
                             help='Use this flag to disable the retrying of \
@@ -211,7 +241,10 @@ class STSJobManagerOptions():
         self.destination_bucket = args.destination_bucket
         self.job_interval = args.job_interval
         self.metrics_interval = args.metrics_interval
+        self.full_scan_interval = args.full_scan_interval
         self.max_concurrent_jobs = args.max_concurrent_jobs
+        self.adaptive_concurrency = args.adaptive_concurrency
+        self.max_error_rate = args.max_error_rate
         self.no_retry_on_job_error = args.no_retry_on_job_error
         self.allow_new_jobs_when_stalled = args.allow_new_jobs_when_stalled
         self.overwrite_dest_objects = args.overwrite_dest_objects
@@ -226,3 +259,5 @@ class STSJobManagerOptions():
         if self.metrics_interval < self.sleep_timeout:
             raise Exception(
                 'The metrics interval should be >= `--sleep-timeout`')
+        if not 0 <= self.max_error_rate <= 1:
+            raise Exception('The max error rate should be between 0 and 1')
@@ -47,6 +47,32 @@ def create_table(client: Services.bigquery, options: BigQueryOptions,
     logger.debug("...done.")
 
 
+def add_missing_columns(client: Services.bigquery, options: BigQueryOptions,
+                        table_name: str, schema: List[bigquery.SchemaField]):
+    """
+    Adds the columns of the schema missing from an existing table, such as
+    ones added by a newer version of this tool. They must be `NULLABLE`.
+    """
+    table_ref = get_table_ref(client, options, table_name)
+    table = client.get_table(table_ref)
+
+    existing_columns = set(field.name for field in table.schema)
+    missing_fields = [
+        field for field in schema if field.name not in existing_columns]
+
+    if not missing_fields:
+        return
+
+    logger.info(
+        f"Adding columns {[field.name for field in missing_fields]} to \
+            `{table_name}`...")
+
+    table.schema = list(table.schema) + missing_fields
+    client.update_table(table, ['schema'])
+
+    logger.info("...done.")
+
+
 def create_dataset(client: Services.bigquery, options: BigQueryOptions):
     """
     Creates a dataset.
@@ -29,7 +29,8 @@ from constants import schemas
 from constants.status import STATUS
 from lib.options import PrepareTableOptions
 from lib.services import Services
-from lib.table_util import create_dataset, create_table, get_table_ref
+from lib.table_util import (add_missing_columns, create_dataset, create_table,
+                            get_table_ref)
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -44,6 +45,10 @@ def create_job_table(client: Services.bigquery, options: PrepareTableOptions):
 
     create_table(client, options.bigquery_options, table_name, schemas.JOB)
 
+    # Tables created by older versions lack the newer columns
+    add_missing_columns(client, options.bigquery_options, table_name,
+                        schemas.JOB)
+
 
 def create_job_history_table(client: Services.bigquery,
                              options: PrepareTableOptions):
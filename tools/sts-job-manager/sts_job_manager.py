@@ -25,7 +25,7 @@ import logging
 import os
 import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set
 
 from google.cloud import bigquery, monitoring_v3
 
@@ -34,18 +34,50 @@ from constants.status import (KNOWN_STATUSES, STATUS,
                               sts_operation_status_to_table_status)
 from lib.options import STSJobManagerOptions
 from lib.services import Services
-from lib.table_util import get_table_identifier, get_table_ref
+from lib.table_util import (add_missing_columns, get_table_identifier,
+                            get_table_ref)
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get("LOGLEVEL", "INFO").upper())
 
+# The number of transfer job names per transfer operation list request
+JOB_NAMES_PER_OPERATION_REQUEST = 100
+
+# The `errorBreakdowns` codes of transfer operations caused by throttling
+THROTTLING_ERROR_CODES = frozenset([
+    'RESOURCE_EXHAUSTED',
+    'UNAVAILABLE',
+    'DEADLINE_EXCEEDED'
+])
+
+# The relative growth of the bytes copied per second for the adaptive
+# concurrency to keep ramping up
+THROUGHPUT_GROWTH_THRESHOLD = 0.05
+
+
+class DECISION():
+    START = 'start'
+    RAMP_UP = 'ramp_up'
+    HOLD = 'hold'
+    BACK_OFF = 'back_off'
+
+
+KNOWN_DECISIONS = frozenset([
+    DECISION.START,
+    DECISION.RAMP_UP,
+    DECISION.HOLD,
+    DECISION.BACK_OFF
+])
+
 
 class Job:
     def __init__(self, data):
         self.prefix: str = data.prefix
         self.status: str = data.status
         self.job_name: str = data.job_name
+        self.transfer_job_name: Optional[str] = getattr(
+            data, 'transfer_job_name', None)
         self.last_updated: datetime = data.last_updated
         self.operation_results: Optional[dict] = getattr(
             data, 'operation_results', None)
@@ -93,12 +125,15 @@ def get_jobs_by_prefix(services: Services, options: STSJobManagerOptions) \
     return prefixToStatus
 
 
-def set_prefixes_to_status(prefixes: List[str], status: str,
-                           services: Services, options: STSJobManagerOptions):
+def merge_job_updates(updates: Dict[str, Dict[str, str]],
+                      services: Services, options: STSJobManagerOptions):
     """
-    Sets a list of prefixes to a given status in the database.
+    Sets the status, transfer operation and/or transfer job names of several
+    prefixes in the database with a single MERGE statement.
+    The values are dicts with the `status`, `job_name` and/or
+    `transfer_job_name` to set, the missing ones are left unchanged.
     """
-    logger.info(f'Updating {len(prefixes)} prefixes to `{status}` status')
+    logger.info(f'Updating {len(updates)} prefixes...')
 
     table = get_table_identifier(
         services, options.bigquery_options,
@@ -107,48 +142,36 @@ def set_prefixes_to_status(prefixes: List[str], status: str,
     # API does not support table names for preparameterized queries
     # https://cloud.google.com/bigquery/docs/parameterized-queries
     query = f"""
-    UPDATE `{table}`
-    SET status = @status, last_updated = CURRENT_TIMESTAMP()
-    WHERE prefix IN UNNEST(@prefixes)
+    MERGE `{table}` t
+    USING UNNEST(@updates) u
+    ON t.prefix = u.prefix
+    WHEN MATCHED THEN UPDATE SET
+        status = IFNULL(u.status, t.status),
+        job_name = IFNULL(u.job_name, t.job_name),
+        transfer_job_name = IFNULL(u.transfer_job_name, t.transfer_job_name),
+        last_updated = CURRENT_TIMESTAMP()
     """
 
-    params = [
-        bigquery.ScalarQueryParameter("status", "STRING", status),
-        bigquery.ArrayQueryParameter("prefixes", "STRING", prefixes)
+    struct_updates = [
+        bigquery.StructQueryParameter(
+            None,
+            bigquery.ScalarQueryParameter("prefix", "STRING", prefix),
+            bigquery.ScalarQueryParameter(
+                "status", "STRING", values.get('status')),
+            bigquery.ScalarQueryParameter(
+                "job_name", "STRING", values.get('job_name')),
+            bigquery.ScalarQueryParameter(
+                "transfer_job_name", "STRING",
+                values.get('transfer_job_name')))
+        for prefix, values in updates.items()
     ]
 
-    run_query(query, params, services, options).result()
-
-
-def set_job_name(prefix: str, job_name: str, services: Services,
-                 options: STSJobManagerOptions):
-    """
-    Set's a prefix's transfer operation job name in the database.
-    """
-    logger.info(
-        f'Updating the prefix `{prefix}` with job name `{job_name}`...')
-
-    table = get_table_identifier(
-        services, options.bigquery_options,
-        options.bigquery_options.table_name['job'])
-
-    # API does not support table names for preparameterized queries
-    # https://cloud.google.com/bigquery/docs/parameterized-queries
-    query = f"""
-    UPDATE `{table}`
-    SET job_name = @job_name, last_updated = CURRENT_TIMESTAMP()
-    WHERE prefix = @prefix
-    """
-
     params = [
-        bigquery.ScalarQueryParameter("prefix", "STRING", prefix),
-        bigquery.ScalarQueryParameter("job_name", "STRING", job_name)
-    ]
+        bigquery.ArrayQueryParameter("updates", "STRUCT", struct_updates)]
 
     run_query(query, params, services, options).result()
 
-    logger.info(
-        f'...updated the prefix `{prefix}` with job name `{job_name}`.')
+    logger.info(f'...updated {len(updates)} prefixes.')
 
 
 def insert_history(rows: List[object], services: Services,
@@ -174,20 +197,51 @@ def insert_history(rows: List[object], services: Services,
         raise Exception('Error inserting one or more rows')
 
 
-def get_latest_operation_by_prefix(services: Services,
-                                   options: STSJobManagerOptions):
+class StateWriteBuffer:
     """
-    Gets the latest transfer operation cooresponding to a prefix.
-    Returns a key-value object where the key is a prefix and the value is a
-    [TransferOperation](https://cloud.google.com/storage-transfer/docs/reference/rest/v1/transferOperations#resource-transferoperation).
+    Coalesces the changes to the job table and the history rows gathered
+    while managing the state or running jobs, so that `flush` writes them with
+    one MERGE statement and one streaming insert, however many prefixes
+    changed.
     """
-    job_filter = json.dumps({"project_id": services.bigquery.project})
 
-    request = services.sts.transferOperations().list(
-        name='transferOperations', filter=job_filter, pageSize=256)
+    def __init__(self):
+        self.job_updates: Dict[str, Dict[str, str]] = {}
+        self.history_rows: List[object] = []
 
-    latest_operation_by_prefix: Dict[str, dict] = {}
-    operation_to_prefix: Dict[str, str] = {}
+    def update_job(self, prefix: str, **values: str):
+        """
+        Sets the `status`, `job_name` and/or `transfer_job_name` of a prefix.
+        The last value set for a column wins.
+        """
+        self.job_updates.setdefault(prefix, {}).update(values)
+
+    def append_history(self, job: Job, operation_results: object):
+        self.history_rows.append({
+            'prefix': job.prefix,
+            'status': job.status,
+            'job_name': job.job_name,
+            'operation_results': json.dumps(operation_results),
+            'timestamp': datetime.now()
+        })
+
+    def flush(self, services: Services, options: STSJobManagerOptions):
+        if self.history_rows:
+            insert_history(self.history_rows, services, options)
+            self.history_rows = []
+
+        if self.job_updates:
+            merge_job_updates(self.job_updates, services, options)
+            self.job_updates = {}
+
+
+def list_operations(job_filter: dict, services: Services) -> Iterator[dict]:
+    """
+    Lists the transfer operations matching a filter, page by page.
+    """
+    request = services.sts.transferOperations().list(
+        name='transferOperations', filter=json.dumps(job_filter),
+        pageSize=256)
 
     while request is not None:
         response = request.execute()
@@ -195,96 +249,250 @@ def get_latest_operation_by_prefix(services: Services,
         if not response:
             break
 
-        for operation in response['operations']:
-            transfer_spec = operation['metadata']['transferSpec']
+        yield from response['operations']
 
-            if 'objectConditions' not in transfer_spec:
-                continue
+        request = services.sts.transferOperations().list_next(
+            previous_request=request, previous_response=response)
 
-            object_conditions = transfer_spec['objectConditions']
 
-            if 'includePrefixes' not in object_conditions:
-                continue
+def get_operation_prefixes(operation: dict, options: STSJobManagerOptions) \
+        -> List[str]:
+    """
+    Returns the prefixes transferred by an operation, or an empty list if it
+    is not a transfer of prefixes between the source and destination buckets.
+    """
+    transfer_spec = operation['metadata']['transferSpec']
 
-            if 'gcsDataSource' not in operation['metadata']['transferSpec']:
-                continue
+    if 'objectConditions' not in transfer_spec:
+        return []
 
-            if 'gcsDataSink' not in operation['metadata']['transferSpec']:
-                continue
+    object_conditions = transfer_spec['objectConditions']
+
+    if 'includePrefixes' not in object_conditions:
+        return []
+
+    if 'gcsDataSource' not in transfer_spec:
+        return []
+
+    if 'gcsDataSink' not in transfer_spec:
+        return []
+
+    if options.source_bucket != transfer_spec['gcsDataSource']['bucketName']:
+        return []
+
+    if options.destination_bucket != \
+            transfer_spec['gcsDataSink']['bucketName']:
+        return []
+
+    return object_conditions['includePrefixes']
 
-            if options.source_bucket != operation['metadata']['transferSpec'][
-                    'gcsDataSource']['bucketName']:
-                continue
 
-            if options.destination_bucket != operation['metadata'][
-                    'transferSpec']['gcsDataSink']['bucketName']:
+def is_newer_operation(operation: dict, other: dict) -> bool:
+    """
+    Determines if an operation is newer than another one, by end time when
+    both have ended and by start time otherwise.
+    """
+    if 'endTime' not in operation['metadata'] or \
+            'endTime' not in other['metadata']:
+        return operation['metadata']['startTime'] > \
+            other['metadata']['startTime']
+
+    return operation['metadata']['endTime'] > other['metadata']['endTime']
+
+
+def get_latest_operation_by_prefix(services: Services,
+                                   options: STSJobManagerOptions):
+    """
+    Gets the latest transfer operation cooresponding to a prefix.
+    Returns a key-value object where the key is a prefix and the value is a
+    [TransferOperation](https://cloud.google.com/storage-transfer/docs/reference/rest/v1/transferOperations#resource-transferoperation).
+
+    This pages through every transfer operation of the project, see
+    `OperationState` for the incremental alternative.
+    """
+    latest_operation_by_prefix: Dict[str, dict] = {}
+    operation_to_prefix: Dict[str, str] = {}
+
+    for operation in list_operations(
+            {"project_id": services.bigquery.project}, services):
+        for prefix in get_operation_prefixes(operation, options):
+            if prefix in latest_operation_by_prefix and \
+                    not is_newer_operation(
+                        operation, latest_operation_by_prefix[prefix]):
                 continue
 
-            for prefix in object_conditions['includePrefixes']:
-                operation_to_set_for_prefix = None
-
-                if prefix not in latest_operation_by_prefix:
-                    # The prefix does not have an operation, let's use this one
-                    operation_to_set_for_prefix = operation
-                elif 'endTime' not in operation['metadata'] or \
-                        'endTime' not in latest_operation_by_prefix[prefix][
-                            'metadata']:
-
-                    # if end time is not available, use the start time
-                    if operation['metadata']['startTime'] > \
-                            latest_operation_by_prefix[prefix]['metadata'][
-                                'startTime']:
-                        latest_operation_by_prefix[prefix] = operation
-                elif operation['metadata']['endTime'] > \
-                        latest_operation_by_prefix[prefix]['metadata'][
-                            'endTime']:
-                    # This operation is newer than the assigned operation
-                    operation_to_set_for_prefix = operation
-
-                # Set the operation for the prefix
-                if operation_to_set_for_prefix:
-                    # unreference existing operation to prefix, if exists
-                    operation_to_prefix.pop(operation['name'], None)
-
-                    latest_operation_by_prefix[prefix] = operation
-                    operation_to_prefix[operation['name']] = prefix
+            # unreference existing operation to prefix, if exists
+            operation_to_prefix.pop(operation['name'], None)
 
-        request = services.sts.transferOperations().list_next(
-            previous_request=request, previous_response=response)
+            latest_operation_by_prefix[prefix] = operation
+            operation_to_prefix[operation['name']] = prefix
 
     # If the latest transferOperation is from a deleted job, we should not
     # consider the operation for state management
-    deleted_job_request = services.sts.transferJobs().list(
-        filter=json.dumps({
+    for operation_to_remove in get_deleted_job_operation_names(services):
+        prefix = operation_to_prefix.pop(operation_to_remove, None)
+
+        if prefix:
+            latest_operation_by_prefix.pop(prefix, None)
+
+    return latest_operation_by_prefix
+
+
+def get_deleted_job_operation_names(
+        services: Services,
+        job_names: Optional[List[str]] = None) -> Set[str]:
+    """
+    Gets the names of the latest transfer operations of the deleted transfer
+    jobs of the project, or of the deleted jobs among the given transfer jobs.
+    """
+    job_filters = []
+
+    if job_names is None:
+        job_filters.append({
             "project_id": services.bigquery.project,
             "jobStatuses": ["DELETED"]
-        }), pageSize=256)
+        })
+    else:
+        for i in range(0, len(job_names), JOB_NAMES_PER_OPERATION_REQUEST):
+            job_filters.append({
+                "project_id": services.bigquery.project,
+                "job_names": job_names[i:i + JOB_NAMES_PER_OPERATION_REQUEST],
+                "jobStatuses": ["DELETED"]
+            })
 
-    while deleted_job_request is not None:
-        deleted_job_response = deleted_job_request.execute()
+    operation_names: Set[str] = set()
 
-        if not deleted_job_response:
-            break
+    for job_filter in job_filters:
+        deleted_job_request = services.sts.transferJobs().list(
+            filter=json.dumps(job_filter), pageSize=256)
 
-        for transferJob in deleted_job_response['transferJobs']:
-            if 'latestOperationName' not in transferJob:
-                continue
+        while deleted_job_request is not None:
+            deleted_job_response = deleted_job_request.execute()
 
-            operation_to_remove = transferJob['latestOperationName']
+            if not deleted_job_response:
+                break
 
-            prefix = operation_to_prefix.pop(operation_to_remove, None)
+            for transferJob in deleted_job_response['transferJobs']:
+                if 'latestOperationName' in transferJob:
+                    operation_names.add(transferJob['latestOperationName'])
 
-            if prefix:
-                latest_operation_by_prefix.pop(prefix, None)
+            deleted_job_request = services.sts.transferJobs().list_next(
+                previous_request=deleted_job_request,
+                previous_response=deleted_job_response)
 
-        deleted_job_request = services.sts.transferJobs().list_next(
-            previous_request=deleted_job_request,
-            previous_response=deleted_job_response)
+    return operation_names
 
-    return latest_operation_by_prefix
+
+def get_latest_operation_by_job_name(job_names: List[str],
+                                     services: Services) -> Dict[str, dict]:
+    """
+    Gets the latest transfer operation of each of the given transfer jobs,
+    listing only their operations.
+    Returns a key-value object where the key is a transfer job name and the
+    value is a TransferOperation.
+    """
+    latest_operation_by_job_name: Dict[str, dict] = {}
+
+    for i in range(0, len(job_names), JOB_NAMES_PER_OPERATION_REQUEST):
+        job_filter = {
+            "project_id": services.bigquery.project,
+            "job_names": job_names[i:i + JOB_NAMES_PER_OPERATION_REQUEST]
+        }
+
+        for operation in list_operations(job_filter, services):
+            job_name = operation['metadata']['transferJobName']
+
+            if job_name not in latest_operation_by_job_name or \
+                    is_newer_operation(
+                        operation, latest_operation_by_job_name[job_name]):
+                latest_operation_by_job_name[job_name] = operation
+
+    return latest_operation_by_job_name
+
+
+class OperationState:
+    """
+    A local cache of the latest transfer operation of every prefix.
+
+    Listing every transfer operation of the project takes minutes with months
+    of history, so that full scan only runs on the first refresh and then
+    every `--full-scan-interval`, to find the operations of jobs created
+    outside of this tool. Other refreshes only list the operations of the
+    transfer jobs recorded in the job table for unfinished prefixes.
+    """
+
+    def __init__(self):
+        self.latest_operation_by_prefix: Dict[str, dict] = {}
+        self.last_full_scan: Optional[float] = None
+
+    def is_full_scan_due(self, options: STSJobManagerOptions) -> bool:
+        if self.last_full_scan is None:
+            return True
+
+        if not options.full_scan_interval:
+            return False
+
+        return time.time() - self.last_full_scan >= options.full_scan_interval
+
+    def refresh(self, jobs: Dict[str, Job], services: Services,
+                options: STSJobManagerOptions) -> Dict[str, dict]:
+        """
+        Updates the latest transfer operation of the prefixes of the jobs.
+        """
+        if self.is_full_scan_due(options):
+            logger.info('Listing all transfer operations of the project...')
+
+            self.latest_operation_by_prefix = get_latest_operation_by_prefix(
+                services, options)
+            self.last_full_scan = time.time()
+
+            return self.latest_operation_by_prefix
+
+        # Operations of finished prefixes do not change anymore. A transfer
+        # job can transfer several prefixes, e.g. one created outside of
+        # this tool and recorded by a full scan.
+        prefixes_by_job_name: Dict[str, List[str]] = {}
+        for prefix in jobs:
+            if jobs[prefix].transfer_job_name and \
+                    jobs[prefix].status != STATUS.DONE:
+                prefixes_by_job_name.setdefault(
+                    jobs[prefix].transfer_job_name, []).append(prefix)
+
+        logger.info(
+            f'Listing transfer operations of {len(prefixes_by_job_name)} jobs')
+
+        latest_operation_by_job_name = get_latest_operation_by_job_name(
+            list(prefixes_by_job_name), services)
+
+        # As with the full scan, operations of deleted jobs are not
+        # considered for state management
+        deleted_job_operation_names = get_deleted_job_operation_names(
+            services, list(prefixes_by_job_name))
+
+        for job_name, operation in latest_operation_by_job_name.items():
+            operation_prefixes = get_operation_prefixes(operation, options)
+
+            for prefix in prefixes_by_job_name[job_name]:
+                cached_operation = self.latest_operation_by_prefix.get(prefix)
+
+                if prefix not in operation_prefixes:
+                    continue
+
+                if cached_operation is not None and \
+                        cached_operation['name'] != operation['name'] and \
+                        not is_newer_operation(operation, cached_operation):
+                    continue
+
+                if operation['name'] in deleted_job_operation_names:
+                    self.latest_operation_by_prefix.pop(prefix, None)
+                else:
+                    self.latest_operation_by_prefix[prefix] = operation
+
+        return self.latest_operation_by_prefix
 
 
-def manage_state(services: Services, options: STSJobManagerOptions):
+def manage_state(services: Services, options: STSJobManagerOptions,
+                 operation_state: OperationState):
     """
     Gathers all prefix information from both STS and the database, then updates
     the corresponding rows where necessary.
@@ -295,26 +503,10 @@ def manage_state(services: Services, options: STSJobManagerOptions):
     jobs = get_jobs_by_prefix(services, options)
 
     # transfer operations from STS
-    latest_operation_by_prefix = get_latest_operation_by_prefix(
-        services, options)
-
-    history_rows: List[object] = []
-    job_status_to_update: Dict[str, List[str]] = {
-        STATUS.DONE: [],
-        STATUS.ERROR: [],
-        STATUS.PAUSED: [],
-        STATUS.RUNNING: [],
-        STATUS.WAITING: []
-    }
+    latest_operation_by_prefix = operation_state.refresh(
+        jobs, services, options)
 
-    def append_history(job: Job, operation_results: object):
-        history_rows.append({
-            'prefix': job.prefix,
-            'status': job.status,
-            'job_name': job.job_name,
-            'operation_results': json.dumps(operation_results),
-            'timestamp': datetime.now()
-        })
+    write_buffer = StateWriteBuffer()
 
     for prefix in jobs:
         if prefix in latest_operation_by_prefix:
@@ -324,6 +516,9 @@ def manage_state(services: Services, options: STSJobManagerOptions):
             actual_status = sts_operation_status_to_table_status(
                 operation_status)
             actual_job_name = latest_operation_by_prefix[prefix]['name']
+            actual_transfer_job_name = \
+                latest_operation_by_prefix[prefix]['metadata'].get(
+                    'transferJobName')
 
             if actual_status != expected_status:
                 # Capture the history for running jobs
@@ -333,36 +528,34 @@ def manage_state(services: Services, options: STSJobManagerOptions):
 
                 jobs[prefix].status = actual_status
 
-                job_status_to_update[actual_status].append(prefix)
+                write_buffer.update_job(prefix, status=actual_status)
 
-                append_history(
+                write_buffer.append_history(
                     jobs[prefix], latest_operation_by_prefix[prefix])
             elif actual_status == STATUS.RUNNING:
                 # Capture the history for running jobs
-                append_history(
+                write_buffer.append_history(
                     jobs[prefix], latest_operation_by_prefix[prefix])
 
             if actual_job_name != jobs[prefix].job_name:
-                set_job_name(prefix, actual_job_name, services, options)
+                jobs[prefix].job_name = actual_job_name
+                write_buffer.update_job(prefix, job_name=actual_job_name)
 
-                # sleep to avoid rate limiting
-                # https://cloud.google.com/bigquery/quotas#standard_tables
-                time.sleep(2)
+            # Record jobs found by a full scan, so that their operations are
+            # listed by the next incremental refreshes
+            if actual_transfer_job_name and \
+                    actual_transfer_job_name != jobs[prefix].transfer_job_name:
+                jobs[prefix].transfer_job_name = actual_transfer_job_name
+                write_buffer.update_job(
+                    prefix, transfer_job_name=actual_transfer_job_name)
 
             # Assign the latest `operation_results`
             jobs[prefix].operation_results = latest_operation_by_prefix[prefix]
 
-    if history_rows:
-        insert_history(history_rows, services, options)
-
-    for status in job_status_to_update:
-        if job_status_to_update[status]:
-            set_prefixes_to_status(
-                job_status_to_update[status], status, services, options)
-
-            # sleep to avoid rate limiting
-            # https://cloud.google.com/bigquery/quotas#standard_tables
-            time.sleep(2)
+    # A single DML statement per state check keeps clear of the DML
+    # concurrency limits, however many prefixes changed
+    # https://cloud.google.com/bigquery/quotas#data-manipulation-language-statements
+    write_buffer.flush(services, options)
 
     logger.info('...state is up to date.')
 
@@ -373,6 +566,7 @@ def run_jobs(count: int, services: Services, options: STSJobManagerOptions):
     """
     Pulls pending prefixes from the database and either create a new transfer
     operation or resume an existing one.
+    The names of the created transfer jobs are recorded in the database.
 
     The `manage_state` function will handle the updates in the job statuses;
     this keeps DML usage to a minimum
@@ -402,67 +596,83 @@ def run_jobs(count: int, services: Services, options: STSJobManagerOptions):
     ]
 
     results = run_query(query, params, services, options)
+    write_buffer = StateWriteBuffer()
 
-    for row in results:
-        job = Job(row)
+    try:
+        for row in results:
+            run_job(Job(row), write_buffer, services, options)
+    finally:
+        # Record the new jobs even if creating another one failed, so that
+        # their operations are tracked by the next `manage_state`
+        write_buffer.flush(services, options)
 
-        if job.status == STATUS.PAUSED:
-            operation_request = services.sts.transferOperations().resume(
-                name=job.job_name, body={})
-            operation_request.execute()
+    return True
 
-            logger.info(f'Resumed `{job.prefix}` (job name: {job.job_name}).')
-        else:
-            utc_now = datetime.utcnow()
-
-            if job.status == STATUS.ERROR:
-                logger.error(
-                    f'Retrying errored prefix `{job.prefix}`. \
-                        Previous failed job: {job.job_name}')
-
-            transfer_job_body = {
-                'description': f'Created via STS Job Manager - {job.prefix}',
-                'project_id': services.bigquery.project,
-                'transfer_spec': {
-                    'object_conditions': {
-                        'include_prefixes': [
-                            job.prefix
-                        ]
-                    },
-                    'transfer_options': {
-                        'overwrite_objects_already_existing_in_sink':
-                        options.overwrite_dest_objects
-                    },
-                    'gcs_data_source': {
-                        'bucket_name': options.source_bucket
-                    },
-                    'gcs_data_sink': {
-                        'bucket_name': options.destination_bucket
-                    }
+
+def run_job(job: Job, write_buffer: StateWriteBuffer, services: Services,
+            options: STSJobManagerOptions):
+    """
+    Resumes the paused transfer operation of a prefix or creates a new
+    transfer job for it, whose name is added to the `write_buffer`.
+    """
+    if job.status == STATUS.PAUSED:
+        operation_request = services.sts.transferOperations().resume(
+            name=job.job_name, body={})
+        operation_request.execute()
+
+        logger.info(f'Resumed `{job.prefix}` (job name: {job.job_name}).')
+    else:
+        utc_now = datetime.utcnow()
+
+        if job.status == STATUS.ERROR:
+            logger.error(
+                f'Retrying errored prefix `{job.prefix}`. \
+                    Previous failed job: {job.job_name}')
+
+        transfer_job_body = {
+            'description': f'Created via STS Job Manager - {job.prefix}',
+            'project_id': services.bigquery.project,
+            'transfer_spec': {
+                'object_conditions': {
+                    'include_prefixes': [
+                        job.prefix
+                    ]
                 },
-                'schedule': {
-                    "schedule_start_date": {
-                        "year": utc_now.year,
-                        "month": utc_now.month,
-                        "day": utc_now.day
-                    },
-                    "schedule_end_date": {
-                        "year": utc_now.year,
-                        "month": utc_now.month,
-                        "day": utc_now.day
-                    }
+                'transfer_options': {
+                    'overwrite_objects_already_existing_in_sink':
+                    options.overwrite_dest_objects
                 },
-                'status': 'ENABLED'
-            }
-
-            request = services.sts.transferJobs().create(
-                body=transfer_job_body)
-            response = request.execute()
+                'gcs_data_source': {
+                    'bucket_name': options.source_bucket
+                },
+                'gcs_data_sink': {
+                    'bucket_name': options.destination_bucket
+                }
+            },
+            'schedule': {
+                "schedule_start_date": {
+                    "year": utc_now.year,
+                    "month": utc_now.month,
+                    "day": utc_now.day
+                },
+                "schedule_end_date": {
+                    "year": utc_now.year,
+                    "month": utc_now.month,
+                    "day": utc_now.day
+                }
+            },
+            'status': 'ENABLED'
+        }
+
+        request = services.sts.transferJobs().create(
+            body=transfer_job_body)
+        response = request.execute()
 
-            logger.info(
-                f'Created new transfer job for `{job.prefix}`: ({response}).')
+        logger.info(
+            f'Created new transfer job for `{job.prefix}`: ({response}).')
 
-    return True
+        write_buffer.update_job(
+            job.prefix, transfer_job_name=response['name'])
 
 
 def determine_stalled_jobs(jobs: Dict[str, Job], last_jobs: Dict[str, Job]) \
@@ -502,8 +712,126 @@ def determine_stalled_jobs(jobs: Dict[str, Job], last_jobs: Dict[str, Job]) \
     return stalled_jobs
 
 
+def get_operation_sample(operation: dict) -> Dict[str, int]:
+    """
+    Gets the cumulative counters of a transfer operation used by the
+    `ConcurrencyController`.
+    """
+    metadata = operation.get('metadata', {})
+    counters = metadata.get('counters') or {}
+    throttling_errors = 0
+
+    for error in metadata.get('errorBreakdowns') or []:
+        if error.get('errorCode') in THROTTLING_ERROR_CODES:
+            throttling_errors += int(error.get('errorCount', 0))
+
+    # int64 counters are strings in the JSON API
+    return {
+        'bytes': int(counters.get('bytesCopiedToSink', 0)),
+        'objects': int(counters.get('objectsCopiedToSink', 0)),
+        'failed_objects': int(counters.get('objectsFromSourceFailed', 0)),
+        'throttling_errors': throttling_errors,
+        'failed': int(metadata.get('status') == 'FAILED')
+    }
+
+
+class ConcurrencyController:
+    """
+    Adapts the number of concurrently running jobs to the throughput of the
+    transfer, with an additive increase, multiplicative decrease (AIMD) of a
+    target concurrency.
+
+    The counters of the transfer operations are sampled on every job interval.
+    The target doubles while the bytes copied per second grow, as the fixed
+    ramp up does, then grows by one job at a time once the throughput has
+    plateaued. It is halved when operations fail, get throttled or fail to
+    copy more than `--max-error-rate` of their objects. Running jobs are never
+    paused: no new jobs run until enough of them have finished.
+    """
+
+    def __init__(self):
+        self.target = 0
+        self.slow_start = True
+        self.decision: Optional[str] = None
+        self.bytes_per_second = 0.0
+        self.objects_per_second = 0.0
+        self.error_rate = 0.0
+        self.last_samples: Dict[str, Dict[str, int]] = {}
+        self.last_sample_time: Optional[float] = None
+
+    def update(self, jobs: Dict[str, Job], current_running_jobs: int,
+               options: STSJobManagerOptions) -> int:
+        """
+        Samples the operations of the jobs, then returns the new target
+        concurrency.
+        """
+        now = time.time()
+
+        # keyed by operation name, as a prefix gets new operations on retries
+        samples = {
+            job.operation_results['name']:
+            get_operation_sample(job.operation_results)
+            for job in jobs.values() if job.operation_results
+        }
+
+        if self.last_sample_time is None:
+            self.decision = DECISION.START
+            self.target = max(1, current_running_jobs)
+        else:
+            deltas: Dict[str, int] = {}
+
+            for name, sample in samples.items():
+                last_sample = self.last_samples.get(name, {})
+
+                for key, value in sample.items():
+                    deltas[key] = deltas.get(key, 0) + \
+                        max(0, value - last_sample.get(key, 0))
+
+            elapsed = max(now - self.last_sample_time, 1.0)
+            last_bytes_per_second = self.bytes_per_second
+            attempted_objects = deltas.get('objects', 0) + \
+                deltas.get('failed_objects', 0)
+
+            self.bytes_per_second = deltas.get('bytes', 0) / elapsed
+            self.objects_per_second = deltas.get('objects', 0) / elapsed
+            self.error_rate = deltas.get('failed_objects', 0) / \
+                attempted_objects if attempted_objects else 0.0
+
+            if deltas.get('failed') or deltas.get('throttling_errors') or \
+                    self.error_rate > options.max_error_rate:
+                self.decision = DECISION.BACK_OFF
+                self.target = max(1, self.target // 2)
+                self.slow_start = False
+            elif current_running_jobs < self.target:
+                # The target has not been reached, so says nothing of the
+                # throughput of more jobs
+                self.decision = DECISION.HOLD
+            elif self.bytes_per_second > \
+                    last_bytes_per_second * (1 + THROUGHPUT_GROWTH_THRESHOLD):
+                self.decision = DECISION.RAMP_UP
+                self.target = self.target * 2 if self.slow_start \
+                    else self.target + 1
+            else:
+                self.decision = DECISION.HOLD
+                self.slow_start = False
+
+        self.target = min(self.target, options.max_concurrent_jobs)
+        self.last_samples = samples
+        self.last_sample_time = now
+
+        logger.info(f'Adaptive concurrency: {self.decision} \
+            (target = {self.target}, \
+            bytes/s = {self.bytes_per_second:.0f}, \
+            objects/s = {self.objects_per_second:.1f}, \
+            error rate = {self.error_rate:.4f})')
+
+        return self.target
+
+
 def manage_jobs(jobs: Dict[str, Job], last_jobs: Dict[str, Job],
-                services: Services, options: STSJobManagerOptions):
+                services: Services, options: STSJobManagerOptions,
+                concurrency_controller: Optional[
+                    ConcurrencyController] = None):
     """
     Determines the number of new operations to spin-up, then spins them up.
     """
@@ -525,23 +853,32 @@ def manage_jobs(jobs: Dict[str, Job], last_jobs: Dict[str, Job],
             stalled_count = len(determine_stalled_jobs(jobs, last_jobs))
             current_running_jobs = max(0, current_running_jobs - stalled_count)
 
+        max_concurrent_jobs = options.max_concurrent_jobs
+
+        if concurrency_controller:
+            max_concurrent_jobs = concurrency_controller.update(
+                jobs, current_running_jobs, options)
+
         max_number_jobs_available_to_run = \
-            options.max_concurrent_jobs - current_running_jobs
+            max_concurrent_jobs - current_running_jobs
         double_current_job_count = current_running_jobs * 2
 
         if not pending_job_count:
             logger.info('No jobs available to run')
             return 0
-        elif current_running_jobs > options.max_concurrent_jobs:
+        elif current_running_jobs > max_concurrent_jobs:
             logger.info(f'Will not create any new jobs - too many are running \
                 (current = {current_running_jobs}, \
-                max = {options.max_concurrent_jobs})')
+                max = {max_concurrent_jobs})')
             return 0
         elif current_running_jobs == 0 and \
                 max_number_jobs_available_to_run > 0:
             logger.info(
                 'Will prepare initial job, as no other jobs are running')
             return 1
+        elif concurrency_controller:
+            logger.info('Filling up to the target concurrency')
+            return max_number_jobs_available_to_run
         else:
             logger.info('Ramping up job count')
             return min(max_number_jobs_available_to_run,
@@ -564,7 +901,9 @@ def manage_jobs(jobs: Dict[str, Job], last_jobs: Dict[str, Job],
 
 def publish_heartbeat(jobs: Dict[str, Job], last_jobs: Dict[str, Job],
                       services: Services, options: STSJobManagerOptions,
-                      monitoring_types=monitoring_v3.types):
+                      monitoring_types=monitoring_v3.types,
+                      concurrency_controller: Optional[
+                          ConcurrencyController] = None):
     """
     Publishes status heartbeats
     """
@@ -626,6 +965,31 @@ def publish_heartbeat(jobs: Dict[str, Job], last_jobs: Dict[str, Job],
         stalled_metric, stalled_count, services, monitoring_project_name,
         monitoring_types)
 
+    # Publish the last decision of the adaptive concurrency
+    if concurrency_controller and concurrency_controller.decision:
+        metrics = {
+            'target_concurrency': concurrency_controller.target,
+            'bytes_per_second': int(concurrency_controller.bytes_per_second),
+            'objects_per_second':
+            int(concurrency_controller.objects_per_second)
+        }
+
+        for metric in metrics:
+            name = f'custom.googleapis.com/sts_job_manager/metrics/{metric}'
+
+            publish_timeseries_heartbeat(
+                name, metrics[metric], services, monitoring_project_name,
+                monitoring_types)
+
+        for decision in KNOWN_DECISIONS:
+            name = 'custom.googleapis.com/sts_job_manager/' \
+                f'concurrency_decision/{decision}'
+            value = int(decision == concurrency_controller.decision)
+
+            publish_timeseries_heartbeat(
+                name, value, services, monitoring_project_name,
+                monitoring_types)
+
     logger.info('...done publishing heartbeats.')
 
 
@@ -639,6 +1003,9 @@ def interval(services: Services, options: STSJobManagerOptions):
     last_manage_jobs = 0.0
     last_jobs: Dict[str, Job] = {}
     jobs: Dict[str, Job] = {}
+    operation_state = OperationState()
+    concurrency_controller = ConcurrencyController() \
+        if options.adaptive_concurrency else None
 
     while True:
         logger.info(f'Running main interval #{interval_count}...')
@@ -649,20 +1016,23 @@ def interval(services: Services, options: STSJobManagerOptions):
 
         if job_timeout or metrics_timeout:
             last_jobs = jobs
-            jobs = manage_state(services, options)
+            jobs = manage_state(services, options, operation_state)
             last_state_check = time.time()
 
         if job_timeout:
-            manage_jobs(jobs, last_jobs, services, options)
+            manage_jobs(jobs, last_jobs, services, options,
+                        concurrency_controller)
 
             # Regather metrics
-            jobs = manage_state(services, options)
+            jobs = manage_state(services, options, operation_state)
 
             last_manage_jobs = time.time()
 
         if options.publish_heartbeat:
             try:
-                publish_heartbeat(jobs, last_jobs, services, options)
+                publish_heartbeat(
+                    jobs, last_jobs, services, options,
+                    concurrency_controller=concurrency_controller)
             except Exception as e:
                 logger.error('Failed to publish heartbeat:')
                 logger.exception(e)
@@ -684,6 +1054,11 @@ def main(options: STSJobManagerOptions):
 
     services = Services()
 
+    # Job tables created by older versions lack the newer columns
+    add_missing_columns(services.bigquery, options.bigquery_options,
+                        options.bigquery_options.table_name['job'],
+                        schemas.JOB)
+
     interval(services, options)
 
 